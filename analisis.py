@@ -0,0 +1,217 @@
+# analisis.py
+# Análisis de ventas con pandas/NumPy: margen bruto por producto y categoría,
+# clasificación ABC (Pareto sobre el importe), velocidad de venta y días de stock.
+# Las columnas se leen de SQLite por lotes (fetchmany) a arreglos tipados
+# (int32/float32, la categoría como category) y todo el cálculo es vectorizado:
+# ningún bucle por fila en Python. Lo usa la ventana "Análisis"; sin ventana:
+#
+#   python analisis.py --desde 2025-01-01 --hasta 2025-06-30 --salida analisis.xlsx
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import database
+import segundo_plano
+
+LOTE = 100_000
+# Clase A hasta el 80 % del importe acumulado, B hasta el 95 %, el resto C
+CORTE_A = 0.80
+CORTE_B = 0.95
+CLASES = ("A", "B", "C")
+
+_DESDE = "0000-01-01"
+_HASTA = "9999-12-30"
+
+# Días desde 1970-01-01 (julianday del 1970-01-01 = 2440587.5)
+DIA = "CAST(julianday(substr({f}, 1, 10)) - 2440587.5 AS INTEGER)"
+
+# Columnas (producto_id, dia, unidades, importe, costo). "diarias" lee el resumen
+# ventas_diarias (O(días × productos) filas); "lineas" recorre venta_items.
+FUENTES = {
+    "diarias": f"""SELECT producto_id, {DIA.format(f="fecha")}, unidades, importe, costo
+                   FROM ventas_diarias WHERE fecha BETWEEN ? AND ?""",
+    "lineas": f"""SELECT i.producto_id, {DIA.format(f="v.fecha")}, i.cantidad,
+                         i.cantidad * i.precio_unitario, i.cantidad * COALESCE(i.costo_unitario, 0)
+                  FROM venta_items i JOIN ventas v ON v.id = i.venta_id
+                  WHERE v.fecha >= ? AND v.fecha < date(?, '+1 day')""",
+}
+TIPOS_VENTAS = {"producto_id": np.int32, "dia": np.int32, "unidades": np.int32,
+                "importe": np.float32, "costo": np.float32}
+
+SQL_CATALOGO = "SELECT id, nombre, categoria, costo, COALESCE(precio_venta, precio), COALESCE(stock, 0) FROM productos"
+TIPOS_CATALOGO = {"id": np.int32, "nombre": object, "categoria": "category", "costo": np.float32,
+                  "precio": np.float32, "stock": np.int32}
+
+
+# -----------------------------
+# Carga por lotes
+# -----------------------------
+def leer_columnas(con, sql, parametros, tipos, lote):
+    """
+    DataFrame con las columnas de tipos; cada lote se convierte apenas llega a un
+    arreglo estructurado (una sola pasada en C por lote, sin transponer tuplas).
+    """
+    registro = np.dtype([(c, object if t == "category" else t) for c, t in tipos.items()])
+    partes = []
+    cur = con.execute(sql, parametros)
+    while True:
+        filas = cur.fetchmany(lote)
+        if not filas:
+            break
+        partes.append(np.array(filas, dtype=registro))
+    todo = np.concatenate(partes) if partes else np.empty(0, dtype=registro)
+    del partes
+    datos = {}
+    for c, tipo in tipos.items():
+        if tipo == "category":
+            datos[c] = pd.Categorical(np.where(pd.isna(todo[c]), "Sin categoría", todo[c]))
+        else:
+            datos[c] = np.ascontiguousarray(todo[c])
+    return pd.DataFrame(datos)
+
+
+# Las cargas van por database.lectura_larga: una conexión aparte de solo lectura,
+# así el recorrido por lotes no le quita un lector del pool a la caja.
+def cargar_ventas(desde=None, hasta=None, fuente="diarias", lote=LOTE):
+    """Ventas del rango ('YYYY-MM-DD' inclusive): producto_id, dia (días desde 1970), unidades, importe, costo."""
+    if fuente not in FUENTES:
+        raise ValueError(f"Fuente desconocida: {fuente} (usa {', '.join(FUENTES)})")
+    with database.lectura_larga() as con:
+        return leer_columnas(con, FUENTES[fuente], (desde or _DESDE, hasta or _HASTA), TIPOS_VENTAS, lote)
+
+
+def cargar_catalogo(lote=LOTE):
+    with database.lectura_larga() as con:
+        return leer_columnas(con, SQL_CATALOGO, (), TIPOS_CATALOGO, lote)
+
+
+# -----------------------------
+# Cálculo
+# -----------------------------
+def _dias(desde, hasta, ventas):
+    """Días del período: el rango pedido o, si está abierto, el de las ventas."""
+    if len(ventas):
+        primero, ultimo = int(ventas["dia"].min()), int(ventas["dia"].max())
+    else:
+        primero = ultimo = 0
+    if desde:
+        primero = date.fromisoformat(desde).toordinal() - date(1970, 1, 1).toordinal()
+    if hasta:
+        ultimo = date.fromisoformat(hasta).toordinal() - date(1970, 1, 1).toordinal()
+    return max(ultimo - primero + 1, 1)
+
+
+def por_producto(ventas, catalogo, dias):
+    """
+    Una fila por producto del catálogo, ordenadas por importe: unidades, importe, costo,
+    margen, margen_pct, participacion, acumulado, clase (A/B/C), velocidad (unidades por
+    día), sell_through (vendido / (vendido + stock)) y dias_stock (NaN si no se vende).
+    Las ventas de productos que ya no están en el catálogo no entran.
+    """
+    ids = catalogo["id"].to_numpy()
+    orden = np.argsort(ids, kind="stable")
+    n = len(ids)
+    vendidos = ventas["producto_id"].to_numpy()
+    if n:
+        pos = np.minimum(np.searchsorted(ids[orden], vendidos), n - 1)
+        conocido = ids[orden][pos] == vendidos
+        fila = orden[pos[conocido]]
+    else:
+        conocido = np.zeros(len(vendidos), dtype=bool)
+        fila = np.array([], dtype=np.intp)
+
+    def suma(columna):
+        # bincount acumula en float64 aunque la columna venga en float32
+        return np.bincount(fila, weights=ventas[columna].to_numpy()[conocido], minlength=n)
+
+    unidades, importe, costo = suma("unidades"), suma("importe"), suma("costo")
+    stock = catalogo["stock"].to_numpy().astype(np.float64)
+    margen = importe - costo
+    velocidad = unidades / dias
+    total = importe.sum()
+
+    r = pd.DataFrame({
+        "id": ids, "nombre": catalogo["nombre"].to_numpy(), "categoria": catalogo["categoria"],
+        "stock": catalogo["stock"].to_numpy(),
+        "unidades": unidades.astype(np.int64), "importe": importe, "costo": costo, "margen": margen,
+        "margen_pct": np.divide(margen, importe, out=np.full(n, np.nan), where=importe > 0),
+        "velocidad": velocidad,
+        "sell_through": np.divide(unidades, unidades + np.maximum(stock, 0), out=np.full(n, np.nan),
+                                  where=(unidades + np.maximum(stock, 0)) > 0),
+        "dias_stock": np.divide(stock, velocidad, out=np.full(n, np.nan), where=velocidad > 0),
+    })
+    r = r.iloc[np.argsort(-importe, kind="stable")].reset_index(drop=True)
+    participacion = r["importe"].to_numpy() / total if total else np.zeros(n)
+    acumulado = np.cumsum(participacion)
+    previo = acumulado - participacion       # lo que acumulaban los anteriores
+    clase = np.select([(previo < CORTE_A) & (participacion > 0), (previo < CORTE_B) & (participacion > 0)],
+                      ["A", "B"], "C")
+    r["participacion"] = participacion
+    r["acumulado"] = acumulado
+    r["clase"] = pd.Categorical(clase, categories=CLASES)
+    return r
+
+
+def por_categoria(productos):
+    """Totales por categoría con margen y cuántos productos A/B/C tiene, ordenados por importe."""
+    r = productos.groupby("categoria", observed=True).agg(
+        productos=("id", "size"), unidades=("unidades", "sum"), importe=("importe", "sum"),
+        costo=("costo", "sum"), margen=("margen", "sum"), stock=("stock", "sum"), velocidad=("velocidad", "sum"))
+    r["margen_pct"] = (r["margen"] / r["importe"].where(r["importe"] > 0)).astype(np.float64)
+    r["dias_stock"] = r["stock"] / r["velocidad"].where(r["velocidad"] > 0)
+    clases = pd.crosstab(productos["categoria"], productos["clase"], dropna=False)
+    r = r.join(clases.reindex(columns=list(CLASES), fill_value=0).rename(columns=lambda c: f"clase_{c}"))
+    return r.sort_values("importe", ascending=False).reset_index()
+
+
+def analizar(desde=None, hasta=None, fuente="diarias", lote=LOTE):
+    """(por_producto, por_categoria) del rango 'YYYY-MM-DD' inclusive; None = todo el historial."""
+    ventas = cargar_ventas(desde, hasta, fuente, lote)
+    catalogo = cargar_catalogo(lote)
+    productos = por_producto(ventas, catalogo, _dias(desde, hasta, ventas))
+    return productos, por_categoria(productos)
+
+
+def analizar_en_segundo_plano(**kwargs):
+    """
+    Corre analizar() en un hilo. Devuelve estado = {"resultado", "error", "terminado"}
+    (la UI lo lee con root.after, como reportes.exportar_en_segundo_plano).
+    """
+    return segundo_plano.en_segundo_plano(analizar, **kwargs)
+
+
+def guardar(ruta, productos, categorias):
+    """Excel (.xlsx, una hoja por tabla) o CSV (ruta y ruta_categorias.csv). Devuelve los archivos escritos."""
+    if ruta.lower().endswith(".xlsx"):
+        with pd.ExcelWriter(ruta) as libro:
+            productos.to_excel(libro, sheet_name="Por producto", index=False)
+            categorias.to_excel(libro, sheet_name="Por categoría", index=False)
+        return [ruta]
+    base = ruta[:-4] if ruta.lower().endswith(".csv") else ruta
+    productos.to_csv(base + ".csv", index=False)
+    categorias.to_csv(base + "_categorias.csv", index=False)
+    return [base + ".csv", base + "_categorias.csv"]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Márgenes, clasificación ABC y velocidad de venta")
+    ap.add_argument("--desde", help="YYYY-MM-DD (por defecto todo el historial)")
+    ap.add_argument("--hasta", help="YYYY-MM-DD")
+    ap.add_argument("--fuente", choices=list(FUENTES), default="diarias")
+    ap.add_argument("--salida", help="archivo .xlsx o .csv (si no, se imprime el resumen por categoría)")
+    ap.add_argument("--db", help="ruta de la BD (por defecto TIENDA_DB o tienda.db)")
+    args = ap.parse_args(argv)
+    if args.db:
+        database.configurar(args.db)
+    productos, categorias = analizar(args.desde, args.hasta, args.fuente)
+    if args.salida:
+        print("\n".join(guardar(args.salida, productos, categorias)))
+    else:
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(categorias.round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Benchmarks de TIENDA-1.5. Se ejecutan desde la raíz: python -m benchmarks.<nombre>"""
+import os
+import tempfile
+
+# Los benchmarks nunca abren la tienda.db real (cada benchmark migra la base que abre).
+os.environ.setdefault("TIENDA_DB", os.path.join(tempfile.mkdtemp(prefix="tienda_bench_"), "tienda.db"))
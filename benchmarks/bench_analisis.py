@@ -0,0 +1,109 @@
+"""
+Análisis de ventas (analisis.py) sobre un historial grande: tiempo y memoria.
+
+Cada modo corre en un proceso nuevo para que el pico de memoria sea solo el suyo:
+
+- diarias: analisis.analizar leyendo el resumen ventas_diarias.
+- lineas: analisis.analizar recorriendo todas las líneas de venta_items.
+- python: la referencia con bucles: cada línea suma en diccionarios y el ABC se
+  arma recorriendo la lista ordenada (lo que haría un script sin pandas).
+
+Se informa el tiempo de carga y de cálculo, lo que ocupa el DataFrame de ventas
+tipado (int32/float32) frente al mismo con int64/float64, y el RSS máximo.
+
+    python -m benchmarks.bench_analisis --lineas 10000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import database
+from benchmarks import datos
+from benchmarks.bench_reporte import _rss_mb
+
+MODOS = ["diarias", "lineas", "python"]
+
+
+def _python(desde, hasta):
+    import analisis
+    t = time.perf_counter()
+    unidades, importe, costo = {}, {}, {}
+    with database.lectura() as con:
+        for pid, _dia, cant, imp, cst in con.execute(analisis.FUENTES["lineas"], (desde, hasta)):
+            unidades[pid] = unidades.get(pid, 0) + cant
+            importe[pid] = importe.get(pid, 0.0) + imp
+            costo[pid] = costo.get(pid, 0.0) + cst
+        catalogo = con.execute(analisis.SQL_CATALOGO).fetchall()
+    carga = time.perf_counter() - t
+    total = sum(importe.values())
+    filas, acumulado = [], 0.0
+    for pid, nombre, categoria, _c, _p, stock in sorted(catalogo, key=lambda f: -importe.get(f[0], 0.0)):
+        imp = importe.get(pid, 0.0)
+        clase = "A" if acumulado < analisis.CORTE_A * total and imp else "B" if acumulado < analisis.CORTE_B * total and imp else "C"
+        acumulado += imp
+        filas.append((pid, nombre, categoria, unidades.get(pid, 0), imp, imp - costo.get(pid, 0.0), clase))
+    return carga, len(filas)
+
+
+def correr_hijo(db, modo):
+    """Corre en el proceso hijo: imprime una línea JSON con el resultado."""
+    database.configurar(db)
+    import analisis
+    import numpy  # noqa: F401  (las bibliotecas antes de la medida base)
+    import pandas  # noqa: F401
+    base = _rss_mb()
+    desde, hasta = "0000-01-01", "9999-12-30"
+    t = time.perf_counter()
+    extra = {}
+    if modo == "python":
+        carga, productos = _python(desde, hasta)
+    else:
+        ventas = analisis.cargar_ventas(fuente=modo)
+        catalogo = analisis.cargar_catalogo()
+        carga = time.perf_counter() - t
+        prod = analisis.por_producto(ventas, catalogo, analisis._dias(None, None, ventas))
+        analisis.por_categoria(prod)
+        productos = len(prod)
+        extra = {"filas_ventas": len(ventas),
+                 "mb_frame": round(ventas.memory_usage(deep=True).sum() / 2**20, 1),
+                 "mb_frame_64": round(len(ventas) * 8 * len(ventas.columns) / 2**20, 1)}
+    total = time.perf_counter() - t
+    print(json.dumps({"modo": modo, "carga_s": round(carga, 2), "calculo_s": round(total - carga, 3),
+                      "total_s": round(total, 2), "productos": productos, **extra,
+                      "rss_base_mb": base, "rss_max_mb": _rss_mb()}))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lineas", type=int, default=10_000_000)
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--modos", nargs="+", default=MODOS, choices=MODOS)
+    ap.add_argument("--hijo", nargs=2, metavar=("DB", "MODO"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.hijo:
+        correr_hijo(*args.hijo)
+        return None
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "tienda.db")
+        print(json.dumps({"datos": datos.poblar(db, args.productos, args.lineas)}))
+        database.get_pool().cerrar()
+        for modo in args.modos:
+            salida = subprocess.run([sys.executable, "-m", "benchmarks.bench_analisis", "--hijo", db, modo],
+                                    capture_output=True, text=True)
+            if salida.returncode:
+                r = {"modo": modo, "error": salida.stderr.strip().splitlines()[-1]}
+            else:
+                r = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(json.dumps(r))
+            resultados.append(r)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
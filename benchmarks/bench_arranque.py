@@ -0,0 +1,113 @@
+"""
+Arranque de la app: importar los módulos y dejar la BD en el esquema actual.
+
+Cada medida corre en un proceso nuevo (mediana de --repeticiones):
+- importar: import interfaz_unificada_tienda (sin tocar la BD).
+- migrar_al_dia: migraciones.migrar() sobre una base ya en la última versión.
+- migrar_vieja: migraciones.migrar() sobre una copia de la tienda.db del repo (esquema viejo).
+Además cuenta las consultas del pool en un guardado de producto en una base al día
+y lista los módulos que más tardan según `python -X importtime` (test_arranque.py
+falla si el import de la interfaz pasa de PRESUPUESTO_IMPORT_MS o trae MODULOS_DIFERIDOS).
+
+    python -m benchmarks.bench_arranque --repeticiones 7
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import de la interfaz (todo lo que corre antes de la primera ventana), en ms
+PRESUPUESTO_IMPORT_MS = 250
+# Solo se cargan al abrir la ventana que los usa
+MODULOS_DIFERIDOS = ("pandas", "numpy", "openpyxl", "pyarrow", "importar", "reportes", "analisis", "compras", "productos")
+
+HIJO = {
+    "importar": "import interfaz_unificada_tienda",
+    "migrar": "import migraciones; migraciones.migrar()",
+}
+
+
+def medir_hijo(codigo, db):
+    prog = ("import time; t = time.perf_counter(); " + codigo +
+            "; print((time.perf_counter() - t) * 1000)")
+    salida = subprocess.run([sys.executable, "-c", prog], cwd=RAIZ, capture_output=True, text=True,
+                            env={**os.environ, "TIENDA_DB": db}, check=True)
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def tiempos_de_import(modulo, db):
+    """{módulo: ms acumulados} según -X importtime al importar modulo en un proceso nuevo."""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"], cwd=RAIZ,
+                            capture_output=True, text=True, env={**os.environ, "TIENDA_DB": db}, check=True)
+    tiempos = {}
+    for linea in salida.stderr.splitlines():
+        partes = linea[len("import time:"):].split("|")
+        if not linea.startswith("import time:") or not partes[1].strip().isdigit():
+            continue    # encabezado u otra salida
+        tiempos[partes[2].strip()] = int(partes[1]) / 1000
+    return tiempos
+
+
+def consultas_por_guardado(db):
+    import database
+    import migraciones
+    import productos
+    database.configurar(db)
+    migraciones.migrar()
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos")
+    antes = database.estadisticas()["consultas"]
+    productos.agregar_o_actualizar_producto("Pan", 500, 1100, "Granos")
+    consultas = database.estadisticas()["consultas"] - antes
+    database.get_pool().cerrar()
+    return consultas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeticiones", type=int, default=7)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        al_dia = os.path.join(tmp, "al_dia.db")
+        medir_hijo(HIJO["migrar"], al_dia)
+        casos = [("importar", HIJO["importar"], lambda: al_dia),
+                 ("migrar_al_dia", HIJO["migrar"], lambda: al_dia)]
+        vieja = os.path.join(RAIZ, "tienda.db")
+
+        def copia_vieja():
+            ruta = os.path.join(tmp, "vieja.db")
+            for sufijo in ("", "-wal", "-shm"):
+                if os.path.exists(ruta + sufijo):
+                    os.remove(ruta + sufijo)
+            shutil.copy(vieja, ruta)
+            return ruta
+
+        if os.path.exists(vieja):
+            casos.append(("migrar_vieja", HIJO["migrar"], copia_vieja))
+        for nombre, codigo, db in casos:
+            tiempos = [medir_hijo(codigo, db()) for _ in range(args.repeticiones)]
+            r = {"caso": nombre, "ms_mediana": round(statistics.median(tiempos), 1),
+                 "ms_min": round(min(tiempos), 1)}
+            print(json.dumps(r))
+            resultados.append(r)
+        tiempos = tiempos_de_import(HIJO["importar"].split()[-1], al_dia)
+        r = {"caso": "importtime", "ms_interfaz": round(tiempos["interfaz_unificada_tienda"], 1),
+             "presupuesto_ms": PRESUPUESTO_IMPORT_MS,
+             "mas_lentos": {m: round(ms, 1) for m, ms in sorted(tiempos.items(), key=lambda x: -x[1])[1:9]},
+             "diferidos_cargados": [m for m in MODULOS_DIFERIDOS if m in tiempos]}
+        print(json.dumps(r, ensure_ascii=False))
+        resultados.append(r)
+        r = {"caso": "guardar_producto", "consultas": consultas_por_guardado(os.path.join(tmp, "guardar.db"))}
+        print(json.dumps(r))
+        resultados.append(r)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
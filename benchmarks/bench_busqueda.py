@@ -0,0 +1,91 @@
+"""
+Latencia por tecla: LIKE '%texto%' vs FTS5 sobre un catálogo sintético.
+
+Simula a alguien escribiendo palabra por palabra ("c", "ca", "caf", ...) en el
+buscador y mide cada consulta como la haría la UI en cada <KeyRelease>.
+
+    python -m benchmarks.bench_busqueda --productos 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import database
+import migraciones
+import productos
+import busqueda
+
+MARCAS = ["Alpina", "Colanta", "Diana", "Roa", "Sello Rojo", "Águila", "Postobón", "Zenú",
+          "Ramo", "Noel", "Fab", "Colgate", "Familia", "Juan Valdez", "Nestlé", "Quala"]
+BASES = ["Café", "Leche", "Arroz", "Fríjol", "Lenteja", "Azúcar", "Sal", "Aceite", "Jabón",
+         "Detergente", "Cerveza", "Gaseosa", "Salchichón", "Jamón", "Queso", "Yogur", "Pan",
+         "Galletas", "Chocolate", "Atún", "Papel higiénico", "Crema dental", "Huevos", "Panela"]
+PRESENTACIONES = ["250g", "500g", "1kg", "1L", "2L", "350ml", "x6", "x12", "bolsa", "lata", "caja"]
+CATEGORIAS = ["Verduras y Frutas", "Lácteos y Huevos", "Carnes y Embutidos", "Aseo",
+              "Gaseosa", "Licores", "Granos", "Otros"]
+
+ESCRITURAS = ["cafe sello", "leche alpina", "jabon fab", "atun", "queso colanta 500"]
+
+
+def preparar(ruta, n, semilla=7):
+    rnd = random.Random(semilla)
+    database.configurar(ruta)
+    migraciones.migrar()
+    filas = [(f"{rnd.choice(BASES)} {rnd.choice(MARCAS)} {rnd.choice(PRESENTACIONES)} #{i}",
+              rnd.choice(CATEGORIAS), 100, 150, 150, 10) for i in range(n)]
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            filas)
+
+
+def _like(texto):
+    like = f"%{texto}%"
+    with database.lectura() as con:
+        return con.execute(
+            """SELECT id, nombre, categoria, costo, COALESCE(precio_venta, precio), stock
+               FROM productos WHERE nombre LIKE ? OR categoria LIKE ? ORDER BY nombre ASC""",
+            (like, like)).fetchall()
+
+
+def _fts(texto):
+    return productos.buscar_productos(texto)
+
+
+def teclas(frase):
+    return [frase[:i] for i in range(1, len(frase) + 1) if frase[i - 1] != " "]
+
+
+def medir(funcion):
+    tiempos = []
+    for frase in ESCRITURAS:
+        for parcial in teclas(frase):
+            t = time.perf_counter()
+            funcion(parcial)
+            tiempos.append((time.perf_counter() - t) * 1000)
+    tiempos.sort()
+    return {"p50_ms": round(statistics.median(tiempos), 2),
+            "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 2),
+            "max_ms": round(tiempos[-1], 2),
+            "teclas": len(tiempos)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--productos", type=int, default=100_000)
+    args = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(os.path.join(tmp, "tienda.db"), args.productos)
+        _fts("calentar"); _like("calentar")
+        r = {"productos": args.productos, "like": medir(_like), "fts": medir(_fts)}
+        database.get_pool().cerrar()
+    print(json.dumps(r))
+    return r
+
+
+if __name__ == "__main__":
+    main()
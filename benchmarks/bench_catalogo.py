@@ -0,0 +1,83 @@
+"""
+Cambios de categoría por segundo en la grilla: SQLite en cada clic vs catalogo.py.
+
+"sin_cache" repite la consulta que hacía obtener_productos_por_categoria antes
+del catálogo en memoria; "con_cache" usa la función actual. Con --venta-cada N
+se registra una venta cada N clics (el catálogo la recibe por write-through).
+
+    python -m benchmarks.bench_catalogo --productos 5000 --clics 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import catalogo
+import database
+import migraciones
+import interfaz_unificada_tienda as app
+from ventas import registrar_venta_carrito
+
+CATEGORIAS = app.TiendaApp.CATEGORIAS
+
+SQL_ANTERIOR = """SELECT id, nombre, COALESCE(precio_venta,precio) AS precio_venta, stock
+                  FROM productos WHERE categoria=? ORDER BY nombre ASC"""
+
+
+def preparar(ruta, n):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:05d}", CATEGORIAS[i % len(CATEGORIAS)], 100, 150, 150, 10_000) for i in range(n)])
+
+
+def sin_cache(categoria):
+    with database.lectura() as con:
+        return con.execute(SQL_ANTERIOR, (categoria,)).fetchall()
+
+
+def con_cache(categoria):
+    return app.obtener_productos_por_categoria(categoria)
+
+
+def medir(modo, clics, venta_cada):
+    consultas = database.estadisticas()["consultas"]
+    stats = catalogo.estadisticas()
+    ventas = 0
+    t = time.perf_counter()
+    for i in range(clics):
+        modo(CATEGORIAS[i % len(CATEGORIAS)])
+        if venta_cada and i % venta_cada == venta_cada - 1:
+            registrar_venta_carrito([(1 + i % 50, "x", 1, 150)])
+            ventas += 1
+    s = time.perf_counter() - t
+    fin = catalogo.estadisticas()
+    return {"clics_por_s": round(clics / s), "ventas": ventas,
+            "consultas_por_clic": round((database.estadisticas()["consultas"] - consultas) / clics, 3),
+            "aciertos": fin["aciertos"] - stats["aciertos"], "fallos": fin["fallos"] - stats["fallos"]}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--clics", type=int, default=20_000)
+    ap.add_argument("--venta-cada", type=int, default=50)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(os.path.join(tmp, "tienda.db"), args.productos)
+        for venta_cada in (0, args.venta_cada):
+            for modo in (sin_cache, con_cache):
+                r = {"modo": modo.__name__, "productos": args.productos, "clics": args.clics,
+                     **medir(modo, args.clics, venta_cada)}
+                print(json.dumps(r))
+                resultados.append(r)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Cobro directo contra la cola con diario (cola_ventas.py).
+
+- directo: registrar_venta_carrito en el hilo de la UI, una transacción por venta.
+- cola: ColaVentas.encolar (diario con fsync) en el hilo de la UI; el escritor
+  aplica por lotes. "ui" es lo que espera la caja por venta; ventas_por_s cuenta
+  hasta que la última quedó en la BD.
+- cola_sin_fsync: lo mismo sin fsync del diario (lo que cuesta la durabilidad).
+
+--ocupado-ms N simula otra escritura larga (importación, ajuste masivo): un hilo
+toma el escritor N ms de cada 100 ms. --synchronous FULL hace fsync en cada COMMIT
+de SQLite (lo más parecido a una tarjeta SD lenta).
+
+    python -m benchmarks.bench_cola_ventas --ventas 2000 --ocupado-ms 30
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import cola_ventas
+import database
+from benchmarks import datos
+from ventas import registrar_venta_carrito
+
+
+def _percentiles(tiempos):
+    ms = sorted(t * 1000 for t in tiempos)
+    return {"ui_p50_ms": round(ms[len(ms) // 2], 3), "ui_p95_ms": round(ms[max(int(len(ms) * 0.95) - 1, 0)], 3),
+            "ui_max_ms": round(ms[-1], 3)}
+
+
+def ocupar(ms, parar):
+    """Toma el escritor ms milisegundos de cada 100 hasta que parar esté puesto."""
+    while not parar.wait(max(100 - ms, 1) / 1000):
+        with database.escritura():
+            time.sleep(ms / 1000)
+
+
+def correr(modo, carritos, tmp):
+    tiempos = []
+    t0 = time.perf_counter()
+    if modo == "directo":
+        for items in carritos:
+            t = time.perf_counter()
+            registrar_venta_carrito(items)
+            tiempos.append(time.perf_counter() - t)
+        total, extra = time.perf_counter() - t0, {}
+    else:
+        ruta = os.path.join(tmp, f"{modo}.diario")
+        cola = cola_ventas.ColaVentas(ruta, fsync=modo == "cola").iniciar()
+        for items in carritos:
+            t = time.perf_counter()
+            cola.encolar(items)
+            tiempos.append(time.perf_counter() - t)
+        cola.esperar()
+        total = time.perf_counter() - t0
+        extra = {"lotes": cola.lotes, "aplicadas": cola.aplicadas}
+        cola.cerrar()
+    return {"modo": modo, "ventas": len(carritos), **_percentiles(tiempos),
+            "ventas_por_s": round(len(carritos) / total, 1), **extra}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--ventas", type=int, default=2000)
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--ocupado-ms", type=int, default=0)
+    ap.add_argument("--synchronous", choices=("NORMAL", "FULL"), default="NORMAL")
+    ap.add_argument("--semilla", type=int, default=datos.SEMILLA)
+    args = ap.parse_args(argv)
+    database.PERFIL_ALMACENAMIENTO["synchronous"] = args.synchronous
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        productos = datos.catalogo(args.productos, args.semilla)
+        ids, acumulados = datos.popularidad(args.productos, args.semilla)
+        for modo in ("directo", "cola", "cola_sin_fsync"):
+            datos.poblar(os.path.join(tmp, f"{modo}.db"), args.productos, semilla=args.semilla)
+            rnd = random.Random(args.semilla)
+            carritos = [datos.carrito(rnd, productos, ids, acumulados) for _ in range(args.ventas)]
+            parar = threading.Event()
+            hilo = threading.Thread(target=ocupar, args=(args.ocupado_ms, parar), daemon=True)
+            if args.ocupado_ms:
+                hilo.start()
+            r = {**correr(modo, carritos, tmp), "ocupado_ms": args.ocupado_ms, "synchronous": args.synchronous}
+            parar.set()
+            if args.ocupado_ms:
+                hilo.join()
+            print(json.dumps(r))
+            resultados.append(r)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Sugerencias de compra (compras.py): corrida nocturna incremental contra rearmar todo.
+
+Sobre un historial de --lineas líneas en 365 días, el pronóstico se arma hasta
+--noches días antes del final y después se corre una vez por noche, como el cron:
+
+- incremental: compras.actualizar(día): solo los productos que vendieron ese día.
+- completo: compras.actualizar(día, completo=True): todos los productos desde los
+  últimos compras.VENTANA días (lo que costaría cada noche sin el estado guardado).
+
+Además se mide compras.sugerencias() (punto de pedido y cantidades de todo el catálogo).
+
+    python -m benchmarks.bench_compras --productos 5000 --lineas 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+import database
+from benchmarks import datos
+
+
+def _medir(fn, argumentos):
+    tiempos, productos = [], []
+    for args in argumentos:
+        t = time.perf_counter()
+        r = fn(*args)
+        tiempos.append(time.perf_counter() - t)
+        productos.append(r["productos"] if isinstance(r, dict) else len(r[0]))
+    ms = sorted(x * 1000 for x in tiempos)
+    return {"corridas": len(ms), "productos_p50": sorted(productos)[len(productos) // 2],
+            "p50_ms": round(ms[len(ms) // 2], 1), "max_ms": round(ms[-1], 1)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--lineas", type=int, default=1_000_000)
+    ap.add_argument("--noches", type=int, default=14)
+    args = ap.parse_args(argv)
+    import compras
+    noches = [(datos.FIN - timedelta(days=n)).strftime("%Y-%m-%d") for n in range(args.noches - 1, -1, -1)]
+    inicio = (datos.FIN - timedelta(days=args.noches)).strftime("%Y-%m-%d")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(json.dumps({"datos": datos.poblar(os.path.join(tmp, "tienda.db"), args.productos, args.lineas)}))
+        resultados = []
+        compras.actualizar(inicio, completo=True)
+        resultados.append({"modo": "incremental", **_medir(compras.actualizar, [(n,) for n in noches])})
+        compras.actualizar(inicio, completo=True)
+        resultados.append({"modo": "completo", **_medir(lambda n: compras.actualizar(n, completo=True),
+                                                        [(n,) for n in noches])})
+        resultados.append({"modo": "sugerencias", **_medir(compras.sugerencias, [()] * 5)})
+        for r in resultados:
+            print(json.dumps(r))
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Lector de código de barras: del Enter del lector a la fila del carrito.
+
+Repite en tiempo real un flujo de --escaneos lecturas a --por-segundo lecturas/s
+(cada código tecleado a --ms-tecla ms por carácter, como un lector "keyboard
+wedge") sobre una tienda sintética de --productos productos con código. Cada
+tecla pasa por escaner.LectorRafagas y el código por TiendaApp.escanear sobre
+una caja sin Tk (Treeview que cuenta operaciones). Mide la latencia desde el
+momento programado del Enter hasta que la fila del carrito quedó aplicada, y
+la compara con buscar el mismo producto por nombre (busqueda.buscar_ids).
+
+    python -m benchmarks.bench_escaner --productos 50000 --escaneos 400
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+import busqueda
+import carrito
+import catalogo
+import database
+import escaner
+import interfaz_unificada_tienda as app
+from benchmarks import datos
+from benchmarks.stubs import Etiqueta, TreeContado
+
+
+def caja_de_mentira():
+    caja = SimpleNamespace(carrito=carrito.Carrito(), tv=TreeContado(), lbl_total=Etiqueta(),
+                           lbl_escaner=Etiqueta(), root=SimpleNamespace(bell=lambda: None))
+    for metodo in ("agregar_producto", "escanear", "_on_cambio_carrito", "_fila_carrito"):
+        setattr(caja, metodo, getattr(app.TiendaApp, metodo).__get__(caja))
+    caja.carrito.suscribir(caja._on_cambio_carrito)
+    return caja
+
+
+def _percentiles(ms):
+    ms = sorted(ms)
+    return {"p50_ms": round(ms[len(ms) // 2], 3), "p95_ms": round(ms[max(int(len(ms) * 0.95) - 1, 0)], 3),
+            "max_ms": round(ms[-1], 3)}
+
+
+def flujo(productos, n, desconocidos, semilla):
+    """Códigos a escanear: productos populares (Zipf) y de vez en cuando uno que no existe."""
+    rnd = random.Random(semilla)
+    ids, acumulados = datos.popularidad(productos, semilla)
+    return [f"999{rnd.randrange(10**9):09d}0" if rnd.random() < desconocidos
+            else datos.ean13(rnd.choices(ids, cum_weights=acumulados)[0]) for _ in range(n)]
+
+
+def repetir(codigos, por_segundo, ms_tecla):
+    """Teclea cada código en tiempo real; devuelve latencias (ms) y operaciones del Treeview por lectura."""
+    caja, lector = caja_de_mentira(), escaner.LectorRafagas()
+    latencias, ops = [], []
+    inicio = time.perf_counter() + 0.05
+    for k, codigo in enumerate(codigos):
+        t0 = inicio + k / por_segundo
+        for i, caracter in enumerate(codigo + "\r"):
+            programado = t0 + i * ms_tecla / 1000
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            antes = caja.tv.ops
+            leido = lector.tecla(caracter, programado * 1000)
+            if leido:
+                caja.escanear(leido)
+                latencias.append((time.perf_counter() - programado) * 1000)
+                ops.append(caja.tv.ops - antes)
+    return latencias, ops, caja
+
+
+def por_nombre(codigos):
+    """Lo mismo sin lector: buscar cada producto por su nombre completo y agregarlo."""
+    caja = caja_de_mentira()
+    tiempos = []
+    for codigo in codigos:
+        p = catalogo.por_codigo(codigo)
+        if p is None:
+            continue
+        t = time.perf_counter()
+        ids = busqueda.buscar_ids(p.nombre)
+        elegido = catalogo.get_catalogo().get(ids[0])
+        caja.agregar_producto(elegido.nombre, elegido.precio, 1, elegido.id)
+        tiempos.append((time.perf_counter() - t) * 1000)
+    return tiempos
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--productos", type=int, default=50_000)
+    ap.add_argument("--escaneos", type=int, default=400)
+    ap.add_argument("--por-segundo", type=float, default=20)
+    ap.add_argument("--ms-tecla", type=float, default=1.0)
+    ap.add_argument("--desconocidos", type=float, default=0.02, help="fracción de códigos que no existen")
+    ap.add_argument("--semilla", type=int, default=datos.SEMILLA)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        datos.poblar(os.path.join(tmp, "tienda.db"), args.productos, semilla=args.semilla)
+        t = time.perf_counter()
+        catalogo.get_catalogo().precargar()
+        carga_ms = round((time.perf_counter() - t) * 1000, 1)
+        codigos = flujo(args.productos, args.escaneos, args.desconocidos, args.semilla)
+
+        latencias, ops, caja = repetir(codigos, args.por_segundo, args.ms_tecla)
+        r = {"caso": "escaner", "productos": args.productos, "lecturas": len(latencias),
+             "por_segundo": args.por_segundo, **_percentiles(latencias),
+             "ops_treeview_max": max(ops), "lineas_carrito": len(caja.carrito.lineas),
+             "carga_catalogo_ms": carga_ms}
+        print(json.dumps(r))
+        resultados.append(r)
+        tiempos = por_nombre(codigos)
+        r = {"caso": "buscar_por_nombre", "lecturas": len(tiempos), **_percentiles(tiempos)}
+        print(json.dumps(r))
+        resultados.append(r)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
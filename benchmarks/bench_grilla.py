@@ -0,0 +1,136 @@
+"""
+Tiempo de pintado y cantidad de widgets: tarjetas completas vs GrillaVirtual.
+
+"antes" reproduce el _pintar_productos original (Frame, cuerpo, 3 Label, fila y 3 Button por
+producto dentro de un frame con scroll); "virtual" usa GrillaVirtual con tarjetas
+recicladas. También mide un recorrido completo con scroll en la grilla virtual.
+
+    python -m benchmarks.bench_grilla --tamanos 10 1000 10000
+
+Necesita un display (en Linux sin X: xvfb-run python -m benchmarks.bench_grilla).
+Sin display solo reporta las cuentas del modelo (tarjetas que se materializarían).
+"""
+import argparse
+import json
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from grilla_virtual import GrillaVirtual, ModeloGrilla
+
+ALTO_VISTA = 560
+ALTO_FILA = 150
+
+
+def _productos(n):
+    return [(i, f"Producto {i}", 1000 + i, i % 50) for i in range(n)]
+
+
+def _contar_widgets(w):
+    return 1 + sum(_contar_widgets(h) for h in w.winfo_children())
+
+
+def _pintar_antes(parent, productos):
+    canvas = tk.Canvas(parent, highlightthickness=0)
+    inner = ttk.Frame(canvas)
+    canvas.create_window((0, 0), window=inner, anchor="nw")
+    canvas.pack(fill="both", expand=True)
+    for i, (pid, nombre, precio, stock) in enumerate(productos):
+        tarjeta = ttk.Frame(inner)
+        r, c = divmod(i, 2); tarjeta.grid(row=r, column=c, padx=8, pady=8, sticky="nsew")
+        body = ttk.Frame(tarjeta); body.pack(fill="both", expand=True, padx=10, pady=10)
+        ttk.Label(body, text=nombre).pack(anchor="w")
+        ttk.Label(body, text=f"Precio: {precio}").pack(anchor="w")
+        ttk.Label(body, text=f"Stock: {stock}").pack(anchor="w")
+        fila = ttk.Frame(body); fila.pack(fill="x")
+        for texto in ("Agregar", "+1", "+5"):
+            ttk.Button(fila, text=texto).pack(side="left")
+    return canvas
+
+
+class _Tarjeta(ttk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent)
+        body = ttk.Frame(self); body.pack(fill="both", expand=True, padx=10, pady=10)
+        self.lbls = [ttk.Label(body) for _ in range(3)]
+        for lbl in self.lbls:
+            lbl.pack(anchor="w")
+        fila = ttk.Frame(body); fila.pack(fill="x")
+        for texto in ("Agregar", "+1", "+5"):
+            ttk.Button(fila, text=texto).pack(side="left")
+
+    def asignar(self, item):
+        _pid, nombre, precio, stock = item
+        self.lbls[0].config(text=nombre)
+        self.lbls[1].config(text=f"Precio: {precio}")
+        self.lbls[2].config(text=f"Stock: {stock}")
+
+
+def _medir_tk(root, n):
+    productos = _productos(n)
+    r = {"productos": n}
+
+    marco = ttk.Frame(root, width=700, height=ALTO_VISTA); marco.pack(fill="both", expand=True)
+    t = time.perf_counter()
+    _pintar_antes(marco, productos)
+    root.update()
+    r["antes_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    r["antes_widgets"] = _contar_widgets(marco)
+    marco.destroy(); root.update()
+
+    grilla = GrillaVirtual(root, _Tarjeta, columnas=2, alto_fila=ALTO_FILA)
+    grilla.pack(fill="both", expand=True)
+    root.update()
+    t = time.perf_counter()
+    grilla.set_items(productos)
+    root.update()
+    r["virtual_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    r["virtual_widgets"] = _contar_widgets(grilla)
+
+    t = time.perf_counter()
+    pasos = 0
+    while grilla.canvas.yview()[1] < 1.0 and pasos < 2000:
+        grilla.canvas.yview_scroll(1, "pages")
+        root.update()
+        pasos += 1
+    r["virtual_scroll_ms_por_pagina"] = round((time.perf_counter() - t) * 1000 / max(pasos, 1), 2)
+    r["virtual_tarjetas"] = grilla.tarjetas_creadas()
+    grilla.destroy(); root.update()
+    return r
+
+
+def _medir_modelo(n):
+    m = ModeloGrilla(columnas=2, alto_fila=ALTO_FILA)
+    m.set_items(_productos(n))
+    t = time.perf_counter()
+    for y in range(0, max(m.alto_total() - ALTO_VISTA, 0) + 1, ALTO_VISTA):
+        m.actualizar(y, ALTO_VISTA)
+    return {"productos": n,
+            "antes_widgets": 1 + 9 * n,             # frame interior + 9 por tarjeta
+            "virtual_tarjetas": m.n_ranuras,
+            "virtual_widgets": m.n_ranuras * 9,
+            "modelo_recorrido_ms": round((time.perf_counter() - t) * 1000, 2)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--tamanos", type=int, nargs="+", default=[10, 1000, 10000])
+    args = ap.parse_args(argv)
+    try:
+        root = tk.Tk()
+        root.geometry(f"720x{ALTO_VISTA}")
+    except tk.TclError:
+        root = None
+    resultados = []
+    for n in args.tamanos:
+        r = _medir_tk(root, n) if root else _medir_modelo(n)
+        r["tk"] = root is not None
+        print(json.dumps(r))
+        resultados.append(r)
+    if root:
+        root.destroy()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
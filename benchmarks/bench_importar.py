@@ -0,0 +1,80 @@
+"""
+Importar una lista de precios: agregar_o_actualizar_producto por fila vs importar.py.
+
+La lista tiene --filas productos; la mitad ya existe en la BD (se actualizan) y
+la otra mitad es nueva. Cada modo corre sobre una BD recién preparada.
+
+    python -m benchmarks.bench_importar --filas 20000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+import database
+import migraciones
+import importar
+import productos
+
+CATEGORIAS = ["Granos", "Aseo", "Lácteos y Huevos", "Gaseosa", "Licores", "Otros"]
+
+
+def escribir_lista(ruta, filas, semilla=5):
+    rnd = random.Random(semilla)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["nombre", "categoria", "costo", "precio", "stock"])
+        for i in range(filas):
+            costo = rnd.randint(5, 500) * 100
+            w.writerow([f"Producto {i:06d}", CATEGORIAS[i % len(CATEGORIAS)], costo,
+                        int(costo * 1.3), rnd.choice(["", rnd.randint(0, 200)])])
+
+
+def preparar(ruta, existentes):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:06d}", "Otros", 100, 150, 150, 5) for i in range(0, existentes * 2, 2)])
+
+
+def por_fila(lista):
+    with open(lista, newline="", encoding="utf-8") as f:
+        for fila in csv.DictReader(f):
+            productos.agregar_o_actualizar_producto(fila["nombre"], fila["costo"], fila["precio"],
+                                                    fila["categoria"], stock=fila["stock"])
+
+
+def masivo(lista):
+    importar.importar(lista)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--filas", type=int, default=20_000)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        lista = os.path.join(tmp, "lista.csv")
+        escribir_lista(lista, args.filas)
+        for modo in (por_fila, masivo):
+            preparar(os.path.join(tmp, f"{modo.__name__}.db"), args.filas // 2)
+            t = time.perf_counter()
+            modo(lista)
+            s = time.perf_counter() - t
+            with database.lectura() as con:
+                total = con.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+            r = {"modo": modo.__name__, "filas": args.filas, "segundos": round(s, 2),
+                 "filas_por_s": round(args.filas / s), "productos_final": total}
+            print(json.dumps(r))
+            resultados.append(r)
+            database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Inventario abierto durante un minuto: sondeo cada 2 s vs avisos de cambios.py.
+
+"sondeo" reproduce el _loop_auto anterior (SELECT completo + borrar y volver a
+insertar todo el árbol cada 2 s en cada ventana); "avisos" usa VigilanteCambios
+y ArbolInventario. Se mide en reposo y con una venta cada 10 s, con un reloj
+virtual (sin Tk): consultas a la BD, operaciones sobre el Treeview y tiempo.
+
+    python -m benchmarks.bench_inventario --productos 2000 --ventanas 3
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import cambios
+import database
+import migraciones
+import interfaz_unificada_tienda as app
+from ventas import registrar_venta_carrito
+from benchmarks.stubs import RelojFalso, TreeContado
+
+CATEGORIAS = app.TiendaApp.CATEGORIAS
+
+
+def preparar(ruta, n):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:05d}", CATEGORIAS[i % len(CATEGORIAS)], 100, 150, 150, 10_000) for i in range(n)])
+
+
+def _vender(reloj, cada_ms, hasta):
+    def vender():
+        antes = database.estadisticas()["consultas"]
+        registrar_venta_carrito([(1 + (reloj.ahora // cada_ms) % 50, "x", 1, 150)])
+        reloj.consultas_venta += database.estadisticas()["consultas"] - antes
+        if reloj.ahora + cada_ms <= hasta:
+            reloj.after(cada_ms, vender)
+    reloj.after(cada_ms, vender)
+
+
+def sondeo(ventanas, venta_cada_ms, minuto=60_000):
+    reloj = RelojFalso()
+    arboles = [TreeContado() for _ in range(ventanas)]
+
+    def pintar(tree):
+        filas = app.obtener_inventario("Todas")
+        tree.delete(*tree.get_children())
+        tree._hijos = 0
+        padres = set()
+        for categoria, _nombre, _stock in filas:
+            if categoria not in padres:
+                padres.add(categoria)
+                tree.insert("", "end")
+            tree.insert("", "end")
+
+    def loop(tree):
+        pintar(tree)
+        reloj.after(2000, lambda: loop(tree))
+
+    for tree in arboles:
+        pintar(tree)
+        reloj.after(2000, lambda t=tree: loop(t))
+    if venta_cada_ms:
+        _vender(reloj, venta_cada_ms, minuto)
+    return reloj, arboles
+
+
+def avisos(ventanas, venta_cada_ms, minuto=60_000):
+    reloj = RelojFalso()
+    vigilante = cambios.VigilanteCambios(reloj)
+    arboles = []
+    for _ in range(ventanas):
+        arbol = app.ArbolInventario(TreeContado())
+        arbol.cargar(app.obtener_inventario_ids("Todas"))
+        arbol.tree.ops = 0
+        vigilante.suscribir(lambda ids, a=arbol: a.aplicar(app.obtener_inventario_ids("Todas", ids=ids), ids)
+                            if ids is not None else a.cargar(app.obtener_inventario_ids("Todas")))
+        arboles.append(arbol)
+    if venta_cada_ms:
+        _vender(reloj, venta_cada_ms, minuto)
+    return reloj, [a.tree for a in arboles]
+
+
+def medir(escenario, ventanas, venta_cada_ms):
+    reloj, arboles = escenario(ventanas, venta_cada_ms)
+    for tree in arboles:
+        tree.ops = 0
+    consultas = database.estadisticas()["consultas"]
+    t = time.perf_counter()
+    reloj.correr_hasta(60_000)
+    # las consultas de las propias ventas no cuentan: son iguales en ambos modos
+    return {"consultas_min": database.estadisticas()["consultas"] - consultas - reloj.consultas_venta,
+            "ops_widgets_min": sum(t.ops for t in arboles),
+            "cpu_ms": round((time.perf_counter() - t) * 1000, 1)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--productos", type=int, default=2000)
+    ap.add_argument("--ventanas", type=int, default=3)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(os.path.join(tmp, "tienda.db"), args.productos)
+        for nombre, venta_cada_ms in (("reposo", 0), ("venta_cada_10s", 10_000)):
+            for escenario in (sondeo, avisos):
+                r = {"caso": nombre, "modo": escenario.__name__, "productos": args.productos,
+                     "ventanas": args.ventanas, **medir(escenario, args.ventanas, venta_cada_ms)}
+                print(json.dumps(r))
+                resultados.append(r)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
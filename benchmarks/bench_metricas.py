@@ -0,0 +1,92 @@
+"""
+Costo de la instrumentación (metricas.py): apagada, encendida y sin el pool.
+
+- bloque: `with metricas.medir(...)` vacío, en ns por llamada.
+- consulta: SELECT por id a través del pool; "directo" es una conexión sqlite3
+  sin envolturas (el piso: lo que no se puede ganar quitando el contador).
+- cobro: registrar_venta_carrito de 3 líneas.
+
+    python -m benchmarks.bench_metricas --consultas 50000 --cobros 2000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import database
+import metricas
+import migraciones
+from ventas import registrar_venta_carrito
+
+
+def preparar(ruta, n=1000):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:04d}", "Otros", 100, 150, 150, 1_000_000) for i in range(n)])
+
+
+def bloque(n):
+    t = time.perf_counter()
+    for _ in range(n):
+        with metricas.medir("bench.bloque"):
+            pass
+    return (time.perf_counter() - t) / n * 1e9
+
+
+def consulta(n, con=None):
+    sql = "SELECT nombre, stock FROM productos WHERE id = ?"
+    t = time.perf_counter()
+    if con is not None:
+        for i in range(n):
+            con.execute(sql, (1 + i % 1000,)).fetchone()
+    else:
+        for i in range(n):
+            with database.lectura() as c:
+                c.execute(sql, (1 + i % 1000,)).fetchone()
+    return n / (time.perf_counter() - t)
+
+
+def cobro(n):
+    t = time.perf_counter()
+    for i in range(n):
+        registrar_venta_carrito([(1 + i % 1000, "x", 1, 150), (1 + (i * 7) % 1000, "y", 2, 150),
+                                 (1 + (i * 13) % 1000, "z", 1, 150)])
+    return n / (time.perf_counter() - t)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--consultas", type=int, default=50_000)
+    ap.add_argument("--cobros", type=int, default=2000)
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "tienda.db")
+        preparar(ruta)
+        directo = sqlite3.connect(ruta)
+        r = {"modo": "directo", "consultas_por_s": round(consulta(args.consultas, directo))}
+        directo.close()
+        print(json.dumps(r))
+        resultados.append(r)
+        for encendida in (False, True):
+            metricas.activar(encendida)
+            metricas.reiniciar()
+            r = {"modo": "encendida" if encendida else "apagada",
+                 "bloque_ns": round(bloque(200_000)),
+                 "consultas_por_s": round(consulta(args.consultas)),
+                 "cobros_por_s": round(cobro(args.cobros)),
+                 "medidas": len(metricas.resumen())}
+            print(json.dumps(r))
+            resultados.append(r)
+        metricas.activar(False)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Stock a una fecha sobre un libro grande de movimientos: fotos + cola contra sumar todo.
+
+Carga --movimientos movimientos sintéticos (ventas de 1 a 3 unidades, entradas de
+mercadería y algún conteo) repartidos en --dias días sobre --productos productos,
+con una foto cada movimientos.FOTO_CADA, como la toma la app. Después consulta
+el stock de todos los productos y de uno solo a fechas al azar:
+
+- suma: SUM(delta) de todos los movimientos hasta la fecha.
+- foto: movimientos.stock_al (última foto anterior + movimientos posteriores).
+
+Antes de medir se comprueba que las dos den lo mismo.
+
+    python -m benchmarks.bench_movimientos --movimientos 5000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+import database
+import migraciones
+import movimientos
+from benchmarks import datos
+
+# filas por transacción de carga (una foto por lote)
+LOTE = movimientos.FOTO_CADA
+
+SQL_SUMA = """SELECT producto_id, SUM(delta) FROM movimientos_stock WHERE fecha <= ?
+              GROUP BY producto_id HAVING SUM(delta) != 0"""
+SQL_SUMA_UNO = "SELECT COALESCE(SUM(delta), 0) FROM movimientos_stock WHERE producto_id = ? AND fecha <= ?"
+
+
+def _generar(n, productos, dias, semilla):
+    """Lotes de filas (producto_id, delta, motivo, fecha) en orden de fecha."""
+    rnd = random.Random(semilla)
+    inicio = datos.FIN - timedelta(days=dias - 1)
+    paso = dias * 86400 / n
+    ids, acumulados = datos.popularidad(productos, semilla)
+    lote, cache = [], {}
+    for i in range(n):
+        segundo = int(i * paso)
+        minuto = segundo - segundo % 60
+        if minuto not in cache:
+            cache = {minuto: (inicio + timedelta(seconds=minuto)).strftime("%Y-%m-%d %H:%M")}
+        fecha = f"{cache[minuto]}:{segundo % 60:02d}"
+        r = rnd.random()
+        if r < 0.93:
+            pid = rnd.choices(ids, cum_weights=acumulados)[0]
+            lote.append((pid, -rnd.randint(1, 3), "venta", fecha))
+        elif r < 0.99:
+            lote.append((rnd.randint(1, productos), rnd.randint(20, 100), "entrada", fecha))
+        else:
+            lote.append((rnd.randint(1, productos), -rnd.randint(0, 5), "conteo", fecha))
+        if len(lote) == LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def preparar(ruta, args):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    database.configurar(ruta)
+    migraciones.migrar()
+    t = time.perf_counter()
+    cargados = ultima = 0
+    for lote in _generar(args.movimientos, args.productos, args.dias, datos.SEMILLA):
+        with database.escritura() as con:
+            con.executemany("INSERT INTO movimientos_stock (producto_id, delta, motivo, fecha) VALUES (?,?,?,?)",
+                            lote)
+        cargados += len(lote)
+        # la app toma la foto en el checkpoint periódico; acá, cada FOTO_CADA movimientos
+        if cargados - ultima >= movimientos.FOTO_CADA:
+            movimientos.tomar_foto(lote[-1][3])
+            ultima = cargados
+    database.checkpoint()
+    with database.lectura() as con:
+        fotos, filas = con.execute("SELECT COUNT(*), (SELECT COUNT(*) FROM stock_fotos_items) FROM stock_fotos"
+                                   ).fetchone()
+    return {"movimientos": cargados, "fotos": fotos, "filas_fotos": filas,
+            "carga_s": round(time.perf_counter() - t, 1), "mb": round(os.path.getsize(ruta) / 2**20, 1)}
+
+
+def _medir(fn, argumentos):
+    tiempos = []
+    for args in argumentos:
+        t = time.perf_counter()
+        fn(*args)
+        tiempos.append(time.perf_counter() - t)
+    ms = sorted(x * 1000 for x in tiempos)
+    return {"consultas": len(ms), "p50_ms": round(ms[len(ms) // 2], 3), "max_ms": round(ms[-1], 3)}
+
+
+def suma(fecha):
+    with database.lectura() as con:
+        return dict(con.execute(SQL_SUMA, (fecha,)).fetchall())
+
+
+def suma_uno(pid, fecha):
+    with database.lectura() as con:
+        return con.execute(SQL_SUMA_UNO, (pid, fecha)).fetchone()[0]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--movimientos", type=int, default=5_000_000)
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--consultas", type=int, default=20, help="fechas al azar por caso")
+    args = ap.parse_args(argv)
+    rnd = random.Random(datos.SEMILLA)
+    with tempfile.TemporaryDirectory() as tmp:
+        r = preparar(os.path.join(tmp, "movimientos.db"), args)
+        print(json.dumps({"datos": r}))
+        fechas = [(datos.FIN - timedelta(days=rnd.randrange(args.dias), minutes=rnd.randrange(1440))
+                   ).strftime("%Y-%m-%d %H:%M:%S") for _ in range(args.consultas)]
+        uno = [(rnd.randint(1, args.productos), f) for f in fechas]
+        for f in fechas[:3]:
+            assert suma(f) == movimientos.stock_al(f), f
+        for pid, f in uno[:3]:
+            assert suma_uno(pid, f) == movimientos.stock_al(f, ids=[pid]).get(pid, 0), (pid, f)
+        resultados = [
+            {"caso": "todos_a_una_fecha", "modo": "suma", **_medir(suma, [(f,) for f in fechas])},
+            {"caso": "todos_a_una_fecha", "modo": "foto", **_medir(movimientos.stock_al, [(f,) for f in fechas])},
+            {"caso": "todos_hoy", "modo": "suma", **_medir(suma, [("9999-12-31",)] * 5)},
+            {"caso": "todos_hoy", "modo": "foto", **_medir(movimientos.stock_al, [()] * 5)},
+            {"caso": "uno_a_una_fecha", "modo": "suma", **_medir(suma_uno, uno)},
+            {"caso": "uno_a_una_fecha", "modo": "foto",
+             **_medir(lambda pid, f: movimientos.stock_al(f, ids=[pid]), uno)},
+        ]
+        for r in resultados:
+            print(json.dumps(r))
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
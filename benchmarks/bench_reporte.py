@@ -0,0 +1,132 @@
+"""
+Exportación de reportes sobre un historial sintético: tiempo y RSS máximo.
+
+Cada exportación corre en un proceso nuevo para que el pico de memoria sea solo
+el suyo. "fetchall_csv" es la referencia ingenua (todas las filas a una lista
+antes de escribir); los demás usan reportes.exportar por lotes. Parte del RSS es
+la BD mapeada (mmap_size del perfil, hasta 64 MB) y su caché de páginas: está
+acotada por el perfil y no crece con el historial.
+
+    python -m benchmarks.bench_reporte --lineas 1000000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database
+import migraciones
+
+LINEAS_POR_TICKET = 4
+MODOS = ["csv", "xlsx", "parquet", "fetchall_csv"]
+
+
+def preparar(ruta, lineas, semilla=11):
+    rnd = random.Random(semilla)
+    database.configurar(ruta)
+    migraciones.migrar()
+    cats = ["Granos", "Aseo", "Lácteos y Huevos", "Gaseosa", "Licores", "Otros"]
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:04d}", cats[i % len(cats)], 100, 150, 150, 0) for i in range(2000)])
+        inicio = datetime(2024, 1, 1)
+        tickets = lineas // LINEAS_POR_TICKET
+        paso = 365 * 24 * 3600 / tickets          # un año de ventas
+        con.executemany(
+            "INSERT INTO ventas (id, fecha, total) VALUES (?, ?, 0)",
+            ((t + 1, (inicio + timedelta(seconds=t * paso)).strftime("%Y-%m-%d %H:%M:%S")) for t in range(tickets)))
+        con.executemany(
+            "INSERT INTO venta_items (venta_id, producto_id, cantidad, precio_unitario) VALUES (?,?,?,?)",
+            ((1 + n // LINEAS_POR_TICKET, rnd.randint(1, 2000), rnd.randint(1, 5), rnd.choice([1000, 2500, 3500.5]))
+             for n in range(tickets * LINEAS_POR_TICKET)))
+        con.execute("""UPDATE ventas SET total = (SELECT SUM(cantidad * precio_unitario)
+                                                  FROM venta_items WHERE venta_id = ventas.id)""")
+    database.get_pool().cerrar()
+
+
+def _status_mb(*campos):
+    """Campos de /proc/self/status en MB (None fuera de Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            valores = dict(linea.split(":", 1) for linea in f)
+        return tuple(round(int(valores[c].split()[0]) / 1024, 1) for c in campos)
+    except (OSError, KeyError):
+        return (None,) * len(campos)
+
+
+def _rss_mb():
+    # VmHWM es el pico de este proceso; ru_maxrss se hereda del padre a través de exec
+    pico, = _status_mb("VmHWM")
+    return pico if pico is not None else round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _rss_actual_mb():
+    """(anónima, de archivos): las páginas de la BD leídas por mmap cuentan como RSS de archivo."""
+    return _status_mb("RssAnon", "RssFile")
+
+
+def exportar_hijo(db, modo, destino):
+    """Corre en el proceso hijo: imprime una línea JSON con el resultado."""
+    database.configurar(db)
+    import reportes
+    # la biblioteca de cada formato se importa antes de la medida base
+    if modo == "xlsx":
+        import openpyxl  # noqa: F401
+    elif modo == "parquet":
+        import pyarrow.parquet  # noqa: F401
+    base = _rss_mb()
+    t = time.perf_counter()
+    if modo == "fetchall_csv":
+        import csv
+        with database.lectura() as con:
+            filas = con.execute(reportes.HOJA_DETALLE[2], ("0000-01-01", "9999-12-30")).fetchall()
+        with open(destino + ".csv", "w", newline="") as f:
+            csv.writer(f).writerows(filas)
+        archivos = [destino + ".csv"]
+    else:
+        archivos = reportes.exportar(f"{destino}.{modo}")
+    anon, archivo = _rss_actual_mb()
+    print(json.dumps({"modo": modo, "segundos": round(time.perf_counter() - t, 2),
+                      "rss_base_mb": base, "rss_max_mb": _rss_mb(),
+                      "rss_anon_mb": anon, "rss_archivo_mb": archivo,
+                      "mb_escritos": round(sum(os.path.getsize(a) for a in archivos) / 2**20, 1)}))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--lineas", type=int, default=1_000_000)
+    ap.add_argument("--modos", nargs="+", default=MODOS, choices=MODOS)
+    ap.add_argument("--hijo", nargs=3, metavar=("DB", "MODO", "DESTINO"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.hijo:
+        exportar_hijo(*args.hijo)
+        return None
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "tienda.db")
+        t = time.perf_counter()
+        preparar(db, args.lineas)
+        print(json.dumps({"lineas": args.lineas, "preparar_s": round(time.perf_counter() - t, 1)}))
+        for modo in args.modos:
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_reporte", "--hijo", db, modo, os.path.join(tmp, f"r_{modo}")],
+                capture_output=True, text=True)
+            if salida.returncode:
+                r = {"modo": modo, "error": salida.stderr.strip().splitlines()[-1]}
+            else:
+                r = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(json.dumps(r))
+            resultados.append(r)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cobro con poco stock y varias cajas a la vez: reserva estricta contra el descuento anterior.
+
+- reserva: registrar_venta_carrito (ventas.reservar_stock): un UPDATE condicional
+  para todo el carrito; si una línea no alcanza no se vende nada y se informa cuál.
+- antes: el UPDATE de antes, stock = MAX(stock - cantidad, 0): la venta siempre
+  entra y el stock se queda en cero aunque se hayan vendido más unidades.
+
+Cada caja es un proceso que cobra --ventas carritos sobre los --calientes productos
+más vendidos, con --stock unidades cada uno (la demanda supera al stock). Se
+informan ventas/s, latencia, ventas rechazadas y la sobreventa: unidades vendidas
+por encima del stock que había.
+
+    python -m benchmarks.bench_reservas --cajas 1 4 8 --ventas 500
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import datos
+
+SQL_ANTES = """
+    WITH d(id, cant) AS (
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+    )
+    UPDATE productos SET stock = MAX(COALESCE(stock,0) - d.cant, 0)
+    FROM d WHERE productos.id = d.id
+    RETURNING productos.id, productos.costo
+"""
+
+
+def vender_antes(items):
+    """El cobro anterior: nunca rechaza por stock."""
+    import database
+    from ventas import SQL_CABECERA, SQL_ITEM
+    por_id = {}
+    for pid, _nombre, cant, _precio in items:
+        por_id[pid] = por_id.get(pid, 0) + cant
+    with database.escritura() as con:
+        venta_id = con.execute(SQL_CABECERA, (time.strftime("%Y-%m-%d %H:%M:%S"),
+                                              sum(c * p for _i, _n, c, p in items), None)).lastrowid
+        costo = dict(con.execute(SQL_ANTES, (json.dumps(list(por_id.items())),)).fetchall())
+        con.executemany(SQL_ITEM, [(venta_id, pid, cant, precio, costo[pid]) for pid, _n, cant, precio in items])
+
+
+def carritos(n, calientes, semilla):
+    rnd = random.Random(semilla)
+    return [[(pid, "x", rnd.randint(1, 3), 1000) for pid in rnd.sample(range(1, calientes + 1), rnd.randint(1, 3))]
+            for _ in range(n)]
+
+
+def caja(modo, ruta, numero, ventas, calientes, inicio):
+    """Un proceso de caja. Devuelve (latencias en s, rechazadas, errores, hora de la última venta)."""
+    import sqlite3
+    import database
+    from ventas import StockInsuficiente, registrar_venta_carrito
+    database.configurar(ruta)
+    vender = registrar_venta_carrito if modo == "reserva" else vender_antes
+    lista = carritos(ventas, calientes, datos.SEMILLA + numero)
+    while time.time() < inicio:       # todas las cajas arrancan juntas
+        time.sleep(0.001)
+    latencias, rechazadas, errores = [], 0, 0
+    for items in lista:
+        t = time.perf_counter()
+        try:
+            vender(items)
+        except StockInsuficiente:
+            rechazadas += 1
+        except sqlite3.Error:
+            errores += 1
+        latencias.append(time.perf_counter() - t)
+    return latencias, rechazadas, errores, time.time()
+
+
+def correr(modo, cajas, args, tmp):
+    import database
+    ruta = os.path.join(tmp, f"{modo}_{cajas}.db")
+    datos.poblar(ruta, args.productos, permite_negativo=False)
+    with database.escritura() as con:
+        con.execute("UPDATE productos SET stock = ? WHERE id <= ?", (args.stock, args.calientes))
+    database.get_pool().cerrar()
+    inicio = time.time() + 1.0      # tiempo para que arranquen todos los procesos
+    with multiprocessing.Pool(cajas) as pool:
+        resultados = pool.starmap(caja, [(modo, ruta, n, args.ventas, args.calientes, inicio)
+                                         for n in range(cajas)])
+    database.configurar(ruta)
+    with database.lectura() as con:
+        vendidas = dict(con.execute(
+            "SELECT producto_id, SUM(cantidad) FROM venta_items GROUP BY producto_id").fetchall())
+        negativos = con.execute("SELECT COUNT(*) FROM productos WHERE stock < 0").fetchone()[0]
+    database.get_pool().cerrar()
+    total = max(r[3] for r in resultados) - inicio
+    ms = sorted(t * 1000 for r in resultados for t in r[0])
+    rechazadas = sum(r[1] for r in resultados)
+    errores = sum(r[2] for r in resultados)
+    hechas = len(ms) - rechazadas - errores
+    return {"modo": modo, "cajas": cajas, "ventas": hechas, "rechazadas": rechazadas, "errores": errores,
+            "cobros_por_s": round(len(ms) / total, 1),
+            "p50_ms": round(ms[len(ms) // 2], 2), "p99_ms": round(ms[max(int(len(ms) * 0.99) - 1, 0)], 2),
+            "max_ms": round(ms[-1], 2),
+            "stock_inicial": args.stock * args.calientes, "unidades_vendidas": sum(vendidas.values()),
+            "sobreventa": sum(max(v - args.stock, 0) for v in vendidas.values()),
+            "stock_negativo": negativos}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--cajas", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--ventas", type=int, default=500, help="cobros por caja")
+    ap.add_argument("--productos", type=int, default=2000)
+    ap.add_argument("--calientes", type=int, default=20, help="productos que se venden")
+    ap.add_argument("--stock", type=int, default=150, help="unidades de cada producto caliente")
+    ap.add_argument("--modos", nargs="+", choices=("reserva", "antes"), default=["reserva", "antes"])
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for modo in args.modos:
+            for cajas in args.cajas:
+                r = correr(modo, cajas, args, tmp)
+                print(json.dumps(r))
+                resultados.append(r)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
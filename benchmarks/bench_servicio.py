@@ -0,0 +1,136 @@
+"""
+Prueba de carga: N cajas cobrando a la vez sobre la misma tienda.db.
+
+- directo: cada caja es un proceso que abre la BD y cobra con registrar_venta_carrito
+  (lo que hace hoy la app con varias cajas sobre una carpeta compartida).
+- servicio: servicio.py en su propio proceso; cada caja es un proceso con un
+  ClienteTienda (HTTP local) y el servicio agrupa las escrituras en lotes.
+
+Cada caja cobra --ventas carritos de la tienda sintética y, cada --ajuste-cada
+ventas, hace un ajuste de stock. Se informan ventas/s del conjunto, latencia
+p50/p99/máx por cobro y los cobros que fallaron (p. ej. "database is locked").
+
+    python -m benchmarks.bench_servicio --cajas 1 2 4 8 --ventas 300
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks import datos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _carritos(n, productos, semilla):
+    import random
+    rnd = random.Random(semilla)
+    catalogo = datos.catalogo(productos, datos.SEMILLA)
+    ids, acumulados = datos.popularidad(productos, datos.SEMILLA)
+    return [datos.carrito(rnd, catalogo, ids, acumulados) for _ in range(n)], catalogo
+
+
+def caja(modo, destino, numero, ventas, productos, ajuste_cada, inicio):
+    """Un proceso de caja. Devuelve (latencias en s, errores, hora de la última venta)."""
+    carritos, catalogo = _carritos(ventas, productos, datos.SEMILLA + numero)
+    if modo == "directo":
+        import database
+        import inventario
+        from ventas import registrar_venta_carrito
+        database.configurar(destino)
+        vender, ajustar = registrar_venta_carrito, inventario.ajustar_stock
+    else:
+        import cliente
+        c = cliente.ClienteTienda(destino)
+        vender, ajustar = c.vender, c.ajustar_stock
+    while time.time() < inicio:       # todas las cajas arrancan juntas
+        time.sleep(0.001)
+    latencias, errores = [], 0
+    for i, items in enumerate(carritos):
+        t = time.perf_counter()
+        try:
+            vender(items)
+            if ajuste_cada and i % ajuste_cada == 0:
+                ajustar(catalogo[items[0][0] - 1][0], delta=1)
+        except (sqlite3.Error, ValueError, OSError):
+            errores += 1
+        latencias.append(time.perf_counter() - t)
+    return latencias, errores, time.time()
+
+
+def correr(modo, destino, cajas, args):
+    inicio = time.time() + 1.0      # tiempo para que arranquen todos los procesos
+    with multiprocessing.Pool(cajas) as pool:
+        resultados = pool.starmap(caja, [(modo, destino, n, args.ventas, args.productos, args.ajuste_cada, inicio)
+                                         for n in range(cajas)])
+    total = max(fin for _lat, _e, fin in resultados) - inicio
+    ms = sorted(t * 1000 for lat, _e, _fin in resultados for t in lat)
+    errores = sum(e for _lat, e, _fin in resultados)
+    latencias = ms
+    return {"modo": modo, "cajas": cajas, "ventas": len(latencias) - errores, "errores": errores,
+            "ventas_por_s": round((len(latencias) - errores) / total, 1),
+            "p50_ms": round(ms[len(ms) // 2], 2), "p99_ms": round(ms[max(int(len(ms) * 0.99) - 1, 0)], 2),
+            "max_ms": round(ms[-1], 2)}
+
+
+def levantar_servicio(ruta):
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen([sys.executable, "servicio.py", "--puerto", str(puerto), "--db", ruta],
+                               cwd=RAIZ, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(url + "/salud", timeout=1).read()
+            return proceso, url
+        except OSError:
+            time.sleep(0.05)
+    proceso.kill()
+    raise RuntimeError("el servicio no arrancó")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--cajas", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--ventas", type=int, default=300, help="cobros por caja")
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--ajuste-cada", type=int, default=10, help="un ajuste de stock cada N ventas (0 = ninguno)")
+    ap.add_argument("--modos", nargs="+", choices=("directo", "servicio"), default=["directo", "servicio"])
+    args = ap.parse_args(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for modo in args.modos:
+            for cajas in args.cajas:
+                ruta = os.path.join(tmp, f"{modo}_{cajas}.db")
+                datos.poblar(ruta, args.productos)
+                import database
+                database.get_pool().cerrar()
+                proceso = None
+                destino = ruta
+                if modo == "servicio":
+                    proceso, destino = levantar_servicio(ruta)
+                try:
+                    r = correr(modo, destino, cajas, args)
+                finally:
+                    if proceso:
+                        proceso.terminate()
+                        proceso.wait()
+                print(json.dumps(r))
+                resultados.append(r)
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Ventas confirmadas por segundo según el tamaño de la canasta.
+
+Compara tres caminos:
+- original: conexión nueva por venta y un INSERT + UPDATE por nombre por línea
+- por_linea: lo mismo pero sobre el pool (una transacción por venta)
+- carrito: ventas.registrar_venta_carrito (executemany + un UPDATE por id)
+
+    python -m benchmarks.bench_venta --canastas 1 10 40 100
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import database
+import migraciones
+from ventas import registrar_venta_carrito
+
+
+def preparar(ruta, n_productos):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:05d}", f"Cat {i % 8}", 100, 150, 150, 10 ** 9) for i in range(n_productos)],
+        )
+    with database.lectura() as con:
+        return con.execute("SELECT id, nombre, precio_venta FROM productos").fetchall()
+
+
+def _lineas(cur, carrito, fecha):
+    for _, nombre, cantidad, precio in carrito:
+        cur.execute("INSERT INTO ventas_planas (producto, cantidad, total, fecha) VALUES (?,?,?,?)",
+                    (nombre, cantidad, precio * cantidad, fecha))
+        try:
+            cur.execute("UPDATE productos SET stock = MAX(COALESCE(stock,0) - ?, 0) WHERE nombre=?",
+                        (cantidad, nombre))
+        except sqlite3.OperationalError:
+            pass
+
+
+def venta_original(carrito, fecha):
+    # finalizar_venta antes del pool
+    con = sqlite3.connect(database.db_path)
+    _lineas(con.cursor(), carrito, fecha)
+    con.commit()
+    con.close()
+
+
+def venta_por_linea(carrito, fecha):
+    with database.escritura() as con:
+        _lineas(con.cursor(), carrito, fecha)
+
+
+def medir(funcion, catalogo, canasta, segundos, rnd):
+    n = 0
+    fin = time.perf_counter() + segundos
+    inicio = time.perf_counter()
+    while time.perf_counter() < fin:
+        carrito = [(pid, nombre, rnd.randint(1, 3), precio)
+                   for pid, nombre, precio in rnd.sample(catalogo, canasta)]
+        funcion(carrito, time.strftime("%Y-%m-%d %H:%M:%S"))
+        n += 1
+    return n / (time.perf_counter() - inicio)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--canastas", type=int, nargs="+", default=[1, 5, 10, 40, 100])
+    ap.add_argument("--segundos", type=float, default=2)
+    ap.add_argument("--productos", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogo = preparar(os.path.join(tmp, "tienda.db"), args.productos)
+        rnd = random.Random(1)
+        for canasta in args.canastas:
+            original = medir(venta_original, catalogo, canasta, args.segundos, rnd)
+            por_linea = medir(venta_por_linea, catalogo, canasta, args.segundos, rnd)
+            carrito = medir(registrar_venta_carrito, catalogo, canasta, args.segundos, rnd)
+            r = {"canasta": canasta,
+                 "ventas_por_s_original": round(original, 1),
+                 "ventas_por_s_por_linea": round(por_linea, 1),
+                 "ventas_por_s_carrito": round(carrito, 1),
+                 "mejora_vs_original": round(carrito / original, 2)}
+            print(json.dumps(r))
+            resultados.append(r)
+        database.get_pool().cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
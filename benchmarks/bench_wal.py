@@ -0,0 +1,121 @@
+"""
+Lecturas/escrituras concurrentes: journal por defecto vs WAL + PERFIL_ALMACENAMIENTO.
+
+Simula una caja cobrando (INSERT en ventas + UPDATE de stock) mientras otras
+ventanas/cajas refrescan el inventario completo, como hace _loop_auto.
+
+    python -m benchmarks.bench_wal --segundos 5 --lectores 3
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import database
+import migraciones
+
+
+SQL_INVENTARIO = """SELECT categoria, nombre, COALESCE(stock,0)
+                    FROM productos ORDER BY categoria, nombre"""
+SQL_VENTA = "INSERT INTO ventas_planas (producto, cantidad, total, fecha) VALUES (?,?,?,?)"
+SQL_STOCK = "UPDATE productos SET stock = MAX(COALESCE(stock,0) - ?, 0) WHERE nombre=?"
+
+
+def preparar(ruta, n_productos, wal):
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT OR IGNORE INTO productos (nombre, categoria, costo, precio, precio_venta, stock)"
+            " VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:05d}", f"Cat {i % 8}", 100, 150, 150, 1000) for i in range(n_productos)],
+        )
+    if not wal:
+        database.checkpoint("TRUNCATE")
+        database.get_pool().cerrar()
+        con = sqlite3.connect(ruta)
+        con.execute("PRAGMA journal_mode=DELETE")
+        con.close()
+    database.get_pool().cerrar()
+
+
+def _trabajador(ruta, rol, modo, segundos, n_productos, salida):
+    ops = errores = 0
+    rnd = random.Random(os.getpid())
+    if modo == "wal":
+        database.configurar(ruta)
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        nombre = f"Producto {rnd.randrange(n_productos):05d}"
+        fecha = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            if modo == "wal":
+                if rol == "escritor":
+                    with database.escritura() as con:
+                        con.execute(SQL_VENTA, (nombre, 1, 150, fecha))
+                        con.execute(SQL_STOCK, (1, nombre))
+                else:
+                    with database.lectura() as con:
+                        con.execute(SQL_INVENTARIO).fetchall()
+            else:
+                # lo que hacía la app antes: conexión nueva por operación
+                con = sqlite3.connect(ruta)
+                try:
+                    if rol == "escritor":
+                        con.execute(SQL_VENTA, (nombre, 1, 150, fecha))
+                        con.execute(SQL_STOCK, (1, nombre))
+                        con.commit()
+                    else:
+                        con.execute(SQL_INVENTARIO).fetchall()
+                finally:
+                    con.close()
+            ops += 1
+        except sqlite3.OperationalError:
+            errores += 1
+    salida.put((rol, ops, errores))
+
+
+def medir(modo, segundos, lectores, n_productos):
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "tienda.db")
+        preparar(ruta, n_productos, wal=(modo == "wal"))
+        salida = mp.Queue()
+        roles = ["escritor"] + ["lector"] * lectores
+        procs = [mp.Process(target=_trabajador, args=(ruta, r, modo, segundos, n_productos, salida))
+                 for r in roles]
+        for p in procs:
+            p.start()
+        res = [salida.get() for _ in procs]
+        for p in procs:
+            p.join()
+    escrituras = sum(o for r, o, _ in res if r == "escritor")
+    lecturas = sum(o for r, o, _ in res if r == "lector")
+    return {
+        "modo": modo,
+        "segundos": segundos,
+        "lectores": lectores,
+        "productos": n_productos,
+        "ventas_por_s": round(escrituras / segundos, 1),
+        "refrescos_por_s": round(lecturas / segundos, 1),
+        "errores_lock": sum(e for _, _, e in res),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--segundos", type=float, default=5)
+    ap.add_argument("--lectores", type=int, default=3)
+    ap.add_argument("--productos", type=int, default=2000)
+    args = ap.parse_args(argv)
+    resultados = [medir(m, args.segundos, args.lectores, args.productos) for m in ("delete", "wal")]
+    for r in resultados:
+        print(json.dumps(r, ensure_ascii=False))
+    return resultados
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Datos sintéticos de una tienda, reproducibles por semilla.
+
+- catalogo(n): productos con nombre "Base Marca Presentación" de su categoría
+  (las de TiendaApp.CATEGORIAS), costo, precio con margen y stock; el producto
+  con id i lleva el código de barras ean13(i).
+- historial(...): tickets de 1 a 8 líneas repartidos en `dias` días, más
+  densos al mediodía y al final de la tarde; pocos productos se llevan la
+  mayoría de las ventas (popularidad tipo Zipf).
+- poblar(ruta, productos, lineas): BD migrada con todo eso adentro.
+  Misma semilla y tamaños -> mismo contenido, byte a byte en las tablas.
+
+    python -m benchmarks.datos /tmp/tienda.db --productos 50000 --lineas 1000000
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import database
+import migraciones
+import movimientos
+
+SEMILLA = 2024
+FIN = datetime(2024, 12, 31)        # último día del historial (fijo: no depende de hoy)
+LOTE_TICKETS = 20_000
+
+# categoría -> (bases, presentaciones, rango de costo en pesos)
+VOCABULARIO = {
+    "Verduras y Frutas": (["Tomate", "Cebolla", "Papa", "Zanahoria", "Banano", "Manzana", "Limón",
+                           "Aguacate", "Plátano", "Mango", "Naranja", "Pepino"],
+                          ["libra", "kilo", "unidad", "malla 1kg", "bandeja"], (300, 6000)),
+    "Lácteos y Huevos": (["Leche", "Queso", "Yogur", "Kumis", "Mantequilla", "Huevos", "Crema de leche",
+                          "Arequipe", "Leche en polvo"],
+                         ["200ml", "1L", "1.1L", "250g", "500g", "x12", "x30", "bolsa", "vaso"], (800, 25000)),
+    "Carnes y Embutidos": (["Salchicha", "Jamón", "Salchichón", "Chorizo", "Mortadela", "Pollo",
+                            "Carne molida", "Tocineta"],
+                           ["250g", "500g", "1kg", "x5", "x10", "paquete"], (2500, 30000)),
+    "Aseo": (["Jabón", "Detergente", "Papel higiénico", "Crema dental", "Shampoo", "Desinfectante",
+              "Lavaloza", "Suavizante", "Esponja"],
+             ["x3", "x4", "x12", "500ml", "1L", "2L", "500g", "1kg", "barra"], (1200, 35000)),
+    "Gaseosa": (["Gaseosa", "Agua", "Jugo", "Té", "Bebida energizante", "Malta"],
+                ["250ml", "400ml", "600ml", "1.5L", "2L", "3L", "lata", "x6"], (900, 9000)),
+    "Licores": (["Cerveza", "Aguardiente", "Ron", "Vino", "Whisky", "Vodka"],
+                ["lata", "botella", "media", "x6", "750ml", "375ml"], (2000, 90000)),
+    "Granos": (["Arroz", "Fríjol", "Lenteja", "Garbanzo", "Azúcar", "Sal", "Panela", "Café", "Avena",
+                "Harina", "Pasta", "Aceite"],
+               ["250g", "500g", "1kg", "2.5kg", "5kg", "libra", "1L", "bolsa"], (900, 28000)),
+    "Otros": (["Galletas", "Chocolate", "Atún", "Pilas", "Fósforos", "Velas", "Chicles", "Papas fritas",
+               "Maní", "Bombillo"],
+              ["x1", "x2", "x4", "x12", "lata", "paquete", "bolsa"], (300, 15000)),
+}
+CATEGORIAS = list(VOCABULARIO)
+MARCAS = ["Alpina", "Colanta", "Diana", "Roa", "Sello Rojo", "Águila", "Postobón", "Zenú", "Ramo",
+          "Noel", "Fab", "Colgate", "Familia", "Juan Valdez", "Nestlé", "Quala", "Doria", "Van Camp's",
+          "Corona", "Mama-Ía", "La Fina", "Del Campo", "Don Pepe", "Casa Luker"]
+# peso relativo de cada hora del día (7:00 a 21:00)
+HORAS = {7: 3, 8: 5, 9: 5, 10: 6, 11: 8, 12: 10, 13: 9, 14: 6, 15: 5, 16: 6, 17: 9, 18: 10, 19: 8,
+         20: 5, 21: 2}
+LINEAS_POR_TICKET = {1: 20, 2: 20, 3: 17, 4: 14, 5: 11, 6: 8, 7: 6, 8: 4}   # media ~3.5
+
+
+# -----------------------------
+# Catálogo
+# -----------------------------
+def catalogo(n, semilla=SEMILLA):
+    """Lista de (nombre, categoria, costo, precio, stock); los nombres no se repiten."""
+    rnd = random.Random(semilla)
+    filas, vistos = [], set()
+    for i in range(n):
+        categoria = CATEGORIAS[i % len(CATEGORIAS)] if i < len(CATEGORIAS) else rnd.choice(CATEGORIAS)
+        bases, presentaciones, (minimo, maximo) = VOCABULARIO[categoria]
+        nombre = f"{rnd.choice(bases)} {rnd.choice(MARCAS)} {rnd.choice(presentaciones)}"
+        if nombre in vistos:
+            nombre = f"{nombre} ref {i}"    # el catálogo grande tiene variantes con referencia
+        vistos.add(nombre)
+        costo = round(rnd.uniform(minimo, maximo) / 50) * 50
+        precio = round(costo * rnd.uniform(1.12, 1.45) / 50) * 50
+        filas.append((nombre, categoria, costo, precio, rnd.randint(0, 200)))
+    return filas
+
+
+def ean13(n):
+    """EAN-13 de Colombia (770) con dígito de control para el producto n."""
+    base = f"770{n:09d}"
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(base))
+    return base + str((10 - suma % 10) % 10)
+
+
+def popularidad(n, semilla=SEMILLA, s=1.0):
+    """Pesos acumulados Zipf(s) sobre los ids 1..n en un orden aleatorio: (ids, acumulados)."""
+    rnd = random.Random(semilla + 1)
+    ids = list(range(1, n + 1))
+    rnd.shuffle(ids)
+    return ids, list(itertools.accumulate(1 / (r ** s) for r in range(1, n + 1)))
+
+
+def carrito(rnd, productos, ids, acumulados, lineas=None):
+    """Un carrito [(producto_id, nombre, cantidad, precio)] como lo arma la caja."""
+    lineas = lineas or rnd.choices(list(LINEAS_POR_TICKET), weights=list(LINEAS_POR_TICKET.values()))[0]
+    elegidos = dict.fromkeys(rnd.choices(ids, cum_weights=acumulados, k=lineas))
+    return [(pid, productos[pid - 1][0], rnd.choice((1, 1, 1, 2, 2, 3)), productos[pid - 1][3])
+            for pid in elegidos]
+
+
+# -----------------------------
+# Historial de ventas
+# -----------------------------
+def historial(productos, lineas, dias=365, semilla=SEMILLA):
+    """
+    Genera lotes (tickets, items) hasta sumar `lineas` líneas, en orden de fecha:
+    tickets = [(id, fecha, total)], items = [(venta_id, producto_id, cantidad, precio, costo)].
+    """
+    rnd = random.Random(semilla + 2)
+    ids, acumulados = popularidad(len(productos), semilla)
+    media = sum(k * w for k, w in LINEAS_POR_TICKET.items()) / sum(LINEAS_POR_TICKET.values())
+    por_dia = max(lineas / media / dias, 1)
+    horas, pesos = list(HORAS), list(HORAS.values())
+    inicio = FIN - timedelta(days=dias - 1)
+    venta_id = hechas = 0
+    tickets, items = [], []
+    dia = 0
+    while hechas < lineas:
+        fecha_dia = inicio + timedelta(days=dia % dias)
+        n = max(int(rnd.gauss(por_dia, por_dia * 0.15)), 1)
+        momentos = sorted(timedelta(hours=h, seconds=rnd.randrange(3600))
+                          for h in rnd.choices(horas, weights=pesos, k=n))
+        for momento in momentos:
+            if hechas >= lineas:
+                break
+            venta_id += 1
+            linea = carrito(rnd, productos, ids, acumulados, min(
+                rnd.choices(list(LINEAS_POR_TICKET), weights=list(LINEAS_POR_TICKET.values()))[0],
+                lineas - hechas))
+            total = 0
+            for pid, _nombre, cantidad, precio in linea:
+                items.append((venta_id, pid, cantidad, precio, productos[pid - 1][2]))
+                total += cantidad * precio
+            hechas += len(linea)
+            tickets.append((venta_id, (fecha_dia + momento).strftime("%Y-%m-%d %H:%M:%S"), total))
+            if len(tickets) >= LOTE_TICKETS:
+                yield tickets, items
+                tickets, items = [], []
+        dia += 1
+    if tickets:
+        yield tickets, items
+
+
+# -----------------------------
+# Base completa
+# -----------------------------
+def poblar(ruta, productos, lineas=0, dias=365, semilla=SEMILLA, permite_negativo=True):
+    """
+    Crea (o reemplaza) la BD en ruta, la migra y la llena. Deja el pool configurado
+    sobre ella. Devuelve un resumen con los tamaños y el tiempo que tomó.
+    permite_negativo: los productos se venden aunque se acabe el stock (así los
+    benchmarks de cobro no se quedan sin qué vender); False para medir reservas.
+    """
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    t = time.perf_counter()
+    database.configurar(ruta)
+    migraciones.migrar()
+    filas = catalogo(productos, semilla)
+    tickets = 0
+    with database.escritura() as con:
+        cur = con.cursor()
+        migraciones.pausar_indice_busqueda(cur)
+        movimientos.fijar_motivo(cur, "inicial")
+        cur.executemany(
+            """INSERT INTO productos (id, nombre, categoria, costo, precio, precio_venta, stock, codigo_barras,
+               permite_negativo) VALUES (?,?,?,?,?,?,?,?,?)""",
+            ((i, nombre, cat, costo, precio, precio, stock, ean13(i), int(permite_negativo))
+             for i, (nombre, cat, costo, precio, stock) in enumerate(filas, start=1)))
+        cur.execute("DELETE FROM productos_cambios")     # la carga inicial no es un cambio
+        migraciones.reanudar_indice_busqueda(cur)
+        movimientos.fijar_motivo(cur, "externo")
+        if lineas:
+            migraciones.pausar_resumenes(cur)
+            for lote_tickets, lote_items in historial(filas, lineas, dias, semilla):
+                cur.executemany("INSERT INTO ventas (id, fecha, total) VALUES (?,?,?)", lote_tickets)
+                cur.executemany("""INSERT INTO venta_items (venta_id, producto_id, cantidad, precio_unitario,
+                                   costo_unitario) VALUES (?,?,?,?,?)""", lote_items)
+                tickets += len(lote_tickets)
+            migraciones.reanudar_resumenes(cur)
+    database.checkpoint()
+    return {"productos": productos, "lineas": lineas, "tickets": tickets, "dias": dias, "semilla": semilla,
+            "segundos": round(time.perf_counter() - t, 1),
+            "mb": round(os.path.getsize(ruta) / 2**20, 1)}
+
+
+def lista_de_precios(ruta, filas, productos_en_bd, semilla=SEMILLA):
+    """
+    CSV para importar.py: la mitad de las filas son productos que ya están en la BD
+    (con precio nuevo y a veces stock), la otra mitad productos nuevos.
+    """
+    rnd = random.Random(semilla + 3)
+    existentes = catalogo(productos_en_bd, semilla)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["nombre", "categoria", "costo", "precio", "stock"])
+        for i in range(filas):
+            if i % 2 == 0 and existentes:
+                nombre, categoria, costo, precio, _ = existentes[rnd.randrange(len(existentes))]
+                precio = round(precio * rnd.uniform(1.0, 1.1) / 50) * 50
+            else:
+                categoria = rnd.choice(CATEGORIAS)
+                nombre = f"{rnd.choice(VOCABULARIO[categoria][0])} {rnd.choice(MARCAS)} nuevo {i}"
+                costo = rnd.randint(10, 400) * 50
+                precio = round(costo * 1.3 / 50) * 50
+            w.writerow([nombre, categoria, costo, precio, rnd.choice(["", rnd.randint(0, 100)])])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("ruta")
+    ap.add_argument("--productos", type=int, default=5000)
+    ap.add_argument("--lineas", type=int, default=100_000)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--semilla", type=int, default=SEMILLA)
+    args = ap.parse_args(argv)
+    r = poblar(args.ruta, args.productos, args.lineas, args.dias, args.semilla)
+    database.get_pool().cerrar()
+    print(json.dumps(r))
+    return r
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Reemplazos de Tk para correr los benchmarks sin pantalla."""
+
+
+class RelojFalso:
+    """root.after/after_cancel con tiempo virtual."""
+
+    def __init__(self):
+        self.ahora = 0
+        self.consultas_venta = 0
+        self._tareas = {}
+        self._n = 0
+
+    def after(self, ms, fn):
+        self._n += 1
+        self._tareas[self._n] = (self.ahora + ms, fn)
+        return self._n
+
+    def after_cancel(self, ident):
+        self._tareas.pop(ident, None)
+
+    def correr_hasta(self, fin):
+        while True:
+            pendientes = sorted((t, i) for i, (t, _) in self._tareas.items() if t <= fin)
+            if not pendientes:
+                self.ahora = fin
+                return
+            t, i = pendientes[0]
+            self.ahora = t
+            self._tareas.pop(i)[1]()
+
+
+class TreeContado:
+    """Treeview de mentira: solo cuenta operaciones."""
+
+    def __init__(self):
+        self.ops = 0
+        self._hijos = 0
+
+    def insert(self, *args, **kwargs):
+        self.ops += 1
+        self._hijos += 1
+        return f"n{self._hijos}"
+
+    def item(self, *args, **kwargs):
+        self.ops += 1
+
+    def delete(self, *iids):
+        self.ops += max(len(iids), 1)
+
+    def get_children(self, *args):
+        return [None] * self._hijos
+
+
+class Etiqueta:
+    """Label de mentira: guarda el último texto."""
+
+    def __init__(self):
+        self.texto = ""
+
+    def config(self, text=""):
+        self.texto = text
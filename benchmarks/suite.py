@@ -0,0 +1,270 @@
+"""
+Suite de rendimiento: los flujos de la caja sobre una tienda sintética (benchmarks/datos.py).
+
+Escenarios (en este orden; los que escriben van al final):
+- busqueda: el buscador tecla por tecla (busqueda.buscar_ids).
+- categoria: cambiar de categoría en la grilla (catálogo en memoria) y la carga del catálogo.
+- inventario: abrir el inventario completo y el refresco incremental tras una venta
+  (ArbolInventario sobre un Treeview de mentira, sin Tk).
+- exportar: reporte CSV de los últimos --dias-reporte días (reportes.exportar).
+- cobro: carritos de 1 a 8 líneas (registrar_venta_carrito).
+- importar: lista de precios con --filas-import filas, mitad existentes (importar.importar).
+
+Todo sale de --semilla: dos corridas con los mismos parámetros hacen exactamente las
+mismas operaciones. El resultado es un JSON (--salida) con el entorno y una entrada
+por escenario; --comparar ANTES.json muestra la relación con una corrida anterior.
+
+    python -m benchmarks.suite --escala mediana --salida despues.json --comparar antes.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+import busqueda
+import catalogo
+import database
+import interfaz_unificada_tienda as app
+import migraciones
+from benchmarks import datos
+from benchmarks.stubs import TreeContado
+from ventas import registrar_venta_carrito
+
+# (productos, líneas de venta)
+ESCALAS = {
+    "chica": (1_000, 50_000),
+    "mediana": (50_000, 1_000_000),
+    "grande": (500_000, 10_000_000),
+}
+# métrica principal de cada escenario para --comparar (más es mejor)
+PRINCIPAL = "ops_por_s"
+UMBRAL_REGRESION = 0.10
+
+
+def _latencias(tiempos):
+    tiempos = sorted(tiempos)
+    return {"ops": len(tiempos),
+            "ops_por_s": round(len(tiempos) / sum(tiempos), 1),
+            "p50_ms": round(statistics.median(tiempos) * 1000, 3),
+            "p95_ms": round(tiempos[max(int(len(tiempos) * 0.95) - 1, 0)] * 1000, 3),
+            "max_ms": round(tiempos[-1] * 1000, 3)}
+
+
+def _medir(fn, argumentos):
+    tiempos = []
+    for args in argumentos:
+        t = time.perf_counter()
+        fn(*args)
+        tiempos.append(time.perf_counter() - t)
+    return _latencias(tiempos)
+
+
+# -----------------------------
+# Escenarios: reciben el contexto y un Random propio, devuelven métricas
+# -----------------------------
+def busqueda_teclas(ctx, rnd):
+    frases = []
+    for _ in range(ctx.ops // 10 or 1):
+        nombre, *_ = ctx.productos[rnd.randrange(len(ctx.productos))]
+        frases.append(" ".join(nombre.split()[:2]).lower())
+    teclas = [(f[:i],) for f in frases for i in range(1, len(f) + 1) if f[i - 1] != " "]
+    return _medir(busqueda.buscar_ids, teclas[:ctx.ops])
+
+
+def categoria(ctx, rnd):
+    t = time.perf_counter()
+    catalogo.Catalogo().categorias()        # un catálogo nuevo: carga completa desde SQLite
+    carga_ms = round((time.perf_counter() - t) * 1000, 1)
+    app.obtener_productos_por_categoria(datos.CATEGORIAS[0])
+    clics = [(rnd.choice(datos.CATEGORIAS),) for _ in range(ctx.ops)]
+    return {**_medir(app.obtener_productos_por_categoria, clics), "carga_catalogo_ms": carga_ms}
+
+
+def inventario(ctx, rnd):
+    def abrir():
+        app.ArbolInventario(TreeContado()).cargar(app.obtener_inventario_ids())
+
+    r = _medir(abrir, [()] * max(ctx.ops // 100, 3))
+    arbol = app.ArbolInventario(TreeContado())
+    arbol.cargar(app.obtener_inventario_ids())
+    ids, acumulados = datos.popularidad(len(ctx.productos), ctx.semilla)
+    tiempos = []
+    for _ in range(max(ctx.ops // 10, 10)):
+        _venta, stock = registrar_venta_carrito(datos.carrito(rnd, ctx.productos, ids, acumulados))
+        t = time.perf_counter()
+        arbol.aplicar(app.obtener_inventario_ids(ids=set(stock)), set(stock))
+        tiempos.append(time.perf_counter() - t)
+    incremental = _latencias(tiempos)
+    return {**r, "filas": len(ctx.productos),
+            "incremental_p50_ms": incremental["p50_ms"], "incremental_p95_ms": incremental["p95_ms"]}
+
+
+def exportar(ctx, rnd):
+    import reportes
+    hasta = datos.FIN.date()
+    desde = hasta.fromordinal(hasta.toordinal() - ctx.dias_reporte + 1)
+    destino = os.path.join(ctx.tmp, "reporte.csv")
+    t = time.perf_counter()
+    archivos = reportes.exportar(destino, desde=desde.isoformat(), hasta=hasta.isoformat())
+    s = time.perf_counter() - t
+    with database.lectura() as con:
+        lineas = con.execute(reportes.SQL_CONTAR_LINEAS, (desde.isoformat(), hasta.isoformat())).fetchone()[0]
+    return {"ops": 1, "segundos": round(s, 3), "lineas": lineas,
+            "ops_por_s": round(lineas / s, 1),     # líneas de detalle por segundo
+            "mb_escritos": round(sum(os.path.getsize(a) for a in archivos) / 2**20, 1)}
+
+
+def cobro(ctx, rnd):
+    ids, acumulados = datos.popularidad(len(ctx.productos), ctx.semilla)
+    carritos = [(datos.carrito(rnd, ctx.productos, ids, acumulados),) for _ in range(ctx.ops // 4 or 1)]
+    consultas = database.estadisticas()["consultas"]
+    r = _medir(registrar_venta_carrito, carritos)
+    r["consultas_por_cobro"] = round((database.estadisticas()["consultas"] - consultas) / len(carritos), 2)
+    return r
+
+
+def importar_lista(ctx, rnd):
+    import importar
+    ruta = os.path.join(ctx.tmp, "lista.csv")
+    datos.lista_de_precios(ruta, ctx.filas_import, len(ctx.productos), ctx.semilla)
+    r = importar.importar(ruta)
+    return {"ops": 1, "segundos": r["segundos"], "filas": r["filas"], "importadas": r["importadas"],
+            "ops_por_s": r["filas_por_s"]}      # filas por segundo
+
+
+ESCENARIOS = {
+    "busqueda": busqueda_teclas,
+    "categoria": categoria,
+    "inventario": inventario,
+    "exportar": exportar,
+    "cobro": cobro,
+    "importar": importar_lista,
+}
+
+
+# -----------------------------
+# Corrida
+# -----------------------------
+class Contexto:
+    def __init__(self, args, tmp):
+        self.tmp = tmp
+        self.semilla = args.semilla
+        self.ops = args.ops
+        self.dias_reporte = args.dias_reporte
+        self.filas_import = args.filas_import
+        self.productos = datos.catalogo(args.productos, args.semilla)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def preparar_base(ruta, args):
+    """
+    Deja en ruta la tienda sintética de estos parámetros. Con --datos DIR la base
+    generada se guarda ahí y las corridas siguientes trabajan sobre una copia.
+    """
+    if not args.datos:
+        return datos.poblar(ruta, args.productos, args.lineas, semilla=args.semilla)
+    os.makedirs(args.datos, exist_ok=True)
+    original = os.path.join(args.datos, f"tienda_{args.productos}_{args.lineas}_{args.semilla}.db")
+    meta = original + ".json"
+    if not os.path.exists(meta):
+        r = datos.poblar(original, args.productos, args.lineas, semilla=args.semilla)
+        database.get_pool().cerrar()
+        with open(meta, "w") as f:
+            json.dump(r, f)
+    shutil.copy(original, ruta)
+    database.configurar(ruta)
+    migraciones.migrar()        # guardada con una versión anterior del esquema
+    with database.escritura() as con:
+        con.execute("UPDATE productos SET permite_negativo = 1")    # como datos.poblar
+    with open(meta) as f:
+        return json.load(f)
+
+
+def comparar(antes, despues, umbral=UMBRAL_REGRESION):
+    """Filas {escenario, antes, despues, relacion, regresion} por escenario presente en ambas corridas."""
+    previos = {r["escenario"]: r for r in antes["escenarios"]}
+    filas = []
+    for r in despues["escenarios"]:
+        a = previos.get(r["escenario"])
+        if not a or not a.get(PRINCIPAL) or PRINCIPAL not in r:
+            continue
+        relacion = r[PRINCIPAL] / a[PRINCIPAL]
+        filas.append({"escenario": r["escenario"], "antes": a[PRINCIPAL], "despues": r[PRINCIPAL],
+                      "relacion": round(relacion, 2), "regresion": relacion < 1 - umbral})
+    return filas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--escala", choices=ESCALAS, default="chica")
+    ap.add_argument("--productos", type=int, help="reemplaza el de la escala")
+    ap.add_argument("--lineas", type=int, help="reemplaza el de la escala")
+    ap.add_argument("--semilla", type=int, default=datos.SEMILLA)
+    ap.add_argument("--ops", type=int, default=2000, help="operaciones por escenario (aprox.)")
+    ap.add_argument("--dias-reporte", type=int, default=30)
+    ap.add_argument("--filas-import", type=int, default=20_000)
+    ap.add_argument("--escenarios", nargs="+", choices=ESCENARIOS, default=list(ESCENARIOS))
+    ap.add_argument("--datos", help="carpeta donde guardar y reutilizar las bases generadas")
+    ap.add_argument("--salida", help="archivo JSON con el resultado")
+    ap.add_argument("--comparar", metavar="ANTES.json", help="resultado de una corrida anterior")
+    ap.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                    help="caída relativa que cuenta como regresión (sale con código 1)")
+    args = ap.parse_args(argv)
+    productos, lineas = ESCALAS[args.escala]
+    args.productos = args.productos or productos
+    args.lineas = lineas if args.lineas is None else args.lineas
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = preparar_base(os.path.join(tmp, "tienda.db"), args)
+        print(json.dumps({"datos": base}))
+        ctx = Contexto(args, tmp)
+        resultado = {
+            "entorno": {"fecha": datetime.now().isoformat(timespec="seconds"), "commit": _commit(),
+                        "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                        "plataforma": platform.platform(), "cpus": os.cpu_count()},
+            "parametros": {"escala": args.escala, "productos": args.productos, "lineas": args.lineas,
+                           "semilla": args.semilla, "ops": args.ops, "dias_reporte": args.dias_reporte,
+                           "filas_import": args.filas_import},
+            "datos": base,
+            "escenarios": [],
+        }
+        for nombre in [e for e in ESCENARIOS if e in args.escenarios]:
+            rnd = random.Random(args.semilla ^ zlib.crc32(nombre.encode()))
+            r = {"escenario": nombre, **ESCENARIOS[nombre](ctx, rnd)}
+            print(json.dumps(r))
+            resultado["escenarios"].append(r)
+        database.get_pool().cerrar()
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar) as f:
+            antes = json.load(f)
+        filas = comparar(antes, resultado, args.umbral)
+        for fila in filas:
+            print(json.dumps(fila))
+        if any(f["regresion"] for f in filas):
+            sys.exit(1)
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
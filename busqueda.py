@@ -0,0 +1,162 @@
+# busqueda.py
+# Búsqueda de productos con FTS5 (tabla productos_fts, ver migraciones.py).
+# Una sola API para el buscador de la venta, el administrador y el inventario.
+import json
+import re
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+_PALABRA = re.compile(r"\w+")
+
+# Máximo de resultados por tecla: ninguna pantalla muestra más y el costo crece con los aciertos
+LIMITE_RESULTADOS = 500
+# Con menos letras casi todo coincide y ordenar por bm25 cuesta más que la búsqueda misma
+MIN_LETRAS_RANKING = 3
+
+
+def consulta_fts(texto, columna=None):
+    """
+    Convierte lo que escribe el usuario en una consulta FTS5:
+    cada palabra es un prefijo ("caf" -> "caf"*) y todas deben aparecer.
+    """
+    palabras = _PALABRA.findall(texto or "")
+    if not palabras:
+        return ""
+    terminos = " ".join(f'"{p}"*' for p in palabras)
+    return f"{columna} : ({terminos})" if columna else terminos
+
+
+def buscar_ids(texto, categoria=None, columna=None, limite=LIMITE_RESULTADOS):
+    """
+    Ids de productos que coinciden con texto, del más al menos relevante (bm25).
+    - categoria: restringe a una categoría exacta.
+    - columna: "nombre" o "categoria" para buscar solo en esa columna.
+    - limite: máximo de ids (-1 = todos).
+    Sin texto devuelve [] (cada pantalla decide qué mostrar sin filtro).
+    """
+    consulta = consulta_fts(texto, columna)
+    if not consulta:
+        return []
+    orden = "ORDER BY rank" if len("".join(_PALABRA.findall(texto))) >= MIN_LETRAS_RANKING else ""
+    try:
+        with database.lectura() as con:
+            if categoria:
+                filas = con.execute(
+                    f"""SELECT f.rowid FROM productos_fts f JOIN productos p ON p.id = f.rowid
+                        WHERE productos_fts MATCH ? AND p.categoria = ?
+                        {orden} LIMIT ?""",
+                    (consulta, categoria, limite),
+                ).fetchall()
+            else:
+                filas = con.execute(
+                    f"SELECT rowid FROM productos_fts WHERE productos_fts MATCH ? {orden} LIMIT ?",
+                    (consulta, limite),
+                ).fetchall()
+    except sqlite3.OperationalError:
+        # SQLite sin FTS5: mismo contrato con LIKE (sin ranking)
+        return _buscar_ids_like(texto, categoria, columna, limite)
+    return [f[0] for f in filas]
+
+
+def _buscar_ids_like(texto, categoria, columna, limite):
+    like = f"%{texto.strip()}%"
+    donde = {"nombre": "nombre LIKE ?", "categoria": "categoria LIKE ?"}.get(
+        columna, "(nombre LIKE ? OR categoria LIKE ?)")
+    params = [like] * donde.count("?")
+    if categoria:
+        donde += " AND categoria = ?"
+        params.append(categoria)
+    with database.lectura() as con:
+        return [f[0] for f in con.execute(
+            f"SELECT id FROM productos WHERE {donde} ORDER BY nombre LIMIT ?", (*params, limite)
+        )]
+
+
+def filas_por_ids(cur, columnas, ids):
+    """
+    SELECT id, <columnas> de los productos en ids, en el mismo orden que ids
+    (el orden de relevancia que devolvió buscar_ids).
+    """
+    if not ids:
+        return []
+    filas = cur.execute(
+        f"SELECT id, {columnas} FROM productos WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(ids),),
+    ).fetchall()
+    por_id = {f[0]: f for f in filas}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+# -----------------------------
+# Búsqueda mientras se escribe
+# -----------------------------
+class ControladorBusqueda:
+    """
+    Conecta un cuadro de búsqueda con una consulta lenta sin congelar la UI.
+    - debounce: cada tecla reinicia la espera; solo se busca cuando el usuario para.
+    - la consulta corre en un hilo aparte; las que quedaron viejas ni se ejecutan.
+    - el resultado vuelve al hilo de Tk con root.after y se descarta si, mientras
+      tanto, llegó otra tecla (número de generación).
+
+    root: widget Tk (o algo con after/after_cancel).
+    buscar(*args) -> resultado: corre fuera del hilo de Tk.
+    mostrar(resultado): corre en el hilo de Tk.
+    """
+
+    def __init__(self, root, buscar, mostrar, espera_ms=200, ejecutor=None):
+        self.root = root
+        self.buscar = buscar
+        self.mostrar = mostrar
+        self.espera_ms = espera_ms
+        self._ejecutor = ejecutor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="busqueda")
+        self._generacion = 0
+        self._pendiente = None
+        self.ejecutadas = 0
+        self.descartadas = 0
+
+    def solicitar(self, *args):
+        """Llamar en cada tecla: programa la búsqueda tras espera_ms sin teclas nuevas."""
+        self.cancelar()
+        gen = self._generacion
+        self._pendiente = self.root.after(self.espera_ms, lambda: self._lanzar(gen, args))
+
+    def ahora(self, *args):
+        """Busca ya (Enter, cambio de categoría), descartando lo que estuviera en curso."""
+        self.cancelar()
+        self._lanzar(self._generacion, args)
+
+    def cancelar(self):
+        """Invalida la búsqueda pendiente y cualquier resultado en camino."""
+        self._generacion += 1
+        if self._pendiente is not None:
+            self.root.after_cancel(self._pendiente)
+            self._pendiente = None
+
+    # --- internos ---
+    def _lanzar(self, gen, args):
+        self._pendiente = None
+        if gen == self._generacion:
+            self._ejecutor.submit(self._trabajar, gen, args)
+
+    def _trabajar(self, gen, args):
+        # hilo de trabajo
+        if gen != self._generacion:
+            self.descartadas += 1
+            return
+        self.ejecutadas += 1
+        try:
+            resultado = self.buscar(*args)
+        except Exception:
+            traceback.print_exc()
+            return
+        self.root.after(0, lambda: self._entregar(gen, resultado))
+
+    def _entregar(self, gen, resultado):
+        # hilo de Tk
+        if gen != self._generacion:
+            self.descartadas += 1
+            return
+        self.mostrar(resultado)
@@ -0,0 +1,98 @@
+# cambios.py
+# Avisos de cambios en productos sin volver a leer toda la tabla.
+# Los triggers de migraciones.py anotan el id de cada fila insertada,
+# modificada o borrada en productos_cambios; las vistas piden "qué cambió desde seq".
+import database
+
+# Filas del log que se conservan al purgar (una vista más atrasada recarga todo)
+CONSERVAR = 10_000
+
+SQL_ULTIMO_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM productos_cambios"
+
+
+def ultimo_seq():
+    with database.lectura() as con:
+        return con.execute(SQL_ULTIMO_SEQ).fetchone()[0]
+
+
+def cambios_desde(seq):
+    """
+    Devuelve (seq_nuevo, ids) con los productos que cambiaron después de seq.
+    ids es None si el log ya se purgó más allá de seq: hay que recargar todo.
+    """
+    with database.lectura() as con:
+        filas = con.execute(
+            "SELECT seq, producto_id FROM productos_cambios WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+    if not filas:
+        return seq, set()
+    # AUTOINCREMENT no deja huecos (un ROLLBACK también devuelve el contador)
+    if filas[0][0] != seq + 1:
+        return filas[-1][0], None
+    return filas[-1][0], {pid for _, pid in filas}
+
+
+def purgar(conservar=CONSERVAR):
+    with database.escritura() as con:
+        con.execute(
+            "DELETE FROM productos_cambios WHERE seq <= (SELECT MAX(seq) FROM productos_cambios) - ?",
+            (conservar,),
+        )
+
+
+class VigilanteCambios:
+    """
+    Un solo vigilante por app, compartido por todas las ventanas abiertas.
+    - Escrituras de este proceso: database.get_pool().generacion cambia, sin consultar la BD.
+    - Otra caja sobre el mismo archivo: se consulta el log cada externo_ms.
+    suscribir(callback) -> callback(ids) con el set de ids cambiados (o None = recargar todo).
+    """
+
+    def __init__(self, root, intervalo_ms=1000, externo_ms=10_000):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.externo_ms = externo_ms
+        self.consultas = 0
+        self.notificaciones = 0
+        self._oyentes = []
+        self._seq = 0
+        self._gen = None
+        self._esperado = 0
+        self._after = None
+
+    def suscribir(self, callback):
+        self._oyentes.append(callback)
+        if self._after is None:
+            self._seq = ultimo_seq()
+            self.consultas += 1
+            self._gen = database.get_pool().generacion
+            self._esperado = 0
+            self._after = self.root.after(self.intervalo_ms, self._tick)
+
+    def desuscribir(self, callback):
+        if callback in self._oyentes:
+            self._oyentes.remove(callback)
+        if not self._oyentes and self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def revisar(self):
+        """Consulta el log ya (p. ej. justo después de una escritura desde la UI)."""
+        self._gen = database.get_pool().generacion
+        self._esperado = 0
+        seq, ids = cambios_desde(self._seq)
+        self.consultas += 1
+        if seq == self._seq:
+            return
+        self._seq = seq
+        self.notificaciones += 1
+        for callback in list(self._oyentes):
+            callback(ids)
+
+    def _tick(self):
+        self._after = None
+        self._esperado += self.intervalo_ms
+        if database.get_pool().generacion != self._gen or self._esperado >= self.externo_ms:
+            self.revisar()
+        if self._oyentes:
+            self._after = self.root.after(self.intervalo_ms, self._tick)
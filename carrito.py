@@ -0,0 +1,116 @@
+# carrito.py
+# Modelo del carrito de la venta. Emite un evento por cada línea que cambia para
+# que la vista actualice solo esa fila, y lleva el total en centavos (enteros).
+from bisect import bisect_left
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+AGREGADO = "agregado"
+CANTIDAD = "cantidad"
+QUITADO = "quitado"
+VACIADO = "vaciado"
+
+# tipo: uno de los de arriba; linea: dict de la línea (None si se quitó);
+# indice: posición de la línea en orden alfabético (para insertarla en su lugar)
+Cambio = namedtuple("Cambio", "tipo nombre linea indice")
+
+
+def a_centavos(valor):
+    """Precio (float, str, Decimal o None) -> centavos enteros, redondeando medio hacia arriba."""
+    return int((Decimal(str(valor or 0)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def a_pesos(centavos):
+    return centavos / 100
+
+
+class Carrito:
+    """
+    Líneas por nombre de producto: {"id": int, "precio_c": int, "cantidad": int}.
+    suscribir(callback) recibe un Cambio por cada modificación.
+    """
+
+    def __init__(self):
+        self.lineas = {}
+        self.total_c = 0
+        self._nombres = []      # nombres en orden, para ubicar las filas nuevas
+        self._oyentes = []
+
+    def suscribir(self, callback):
+        self._oyentes.append(callback)
+
+    def _emitir(self, tipo, nombre, linea=None, indice=None):
+        cambio = Cambio(tipo, nombre, linea, indice)
+        for callback in self._oyentes:
+            callback(cambio)
+
+    # --- consultas ---
+    def __len__(self):
+        return len(self.lineas)
+
+    def __contains__(self, nombre):
+        return nombre in self.lineas
+
+    def get(self, nombre):
+        return self.lineas.get(nombre)
+
+    def nombres(self):
+        return list(self._nombres)
+
+    def subtotal_c(self, nombre):
+        linea = self.lineas[nombre]
+        return linea["precio_c"] * linea["cantidad"]
+
+    def total(self):
+        return a_pesos(self.total_c)
+
+    def recalcular_total_c(self):
+        """Total desde cero (para verificar el incremental)."""
+        return sum(l["precio_c"] * l["cantidad"] for l in self.lineas.values())
+
+    def items_venta(self):
+        """Líneas en el formato de ventas.registrar_venta_carrito."""
+        return [(l["id"], nombre, l["cantidad"], a_pesos(l["precio_c"])) for nombre, l in self.lineas.items()]
+
+    # --- cambios ---
+    def agregar(self, nombre, precio, cantidad=1, producto_id=None):
+        linea = self.lineas.get(nombre)
+        if linea:
+            self.cambiar_cantidad(nombre, int(cantidad))
+            return
+        linea = {"id": producto_id, "precio_c": a_centavos(precio), "cantidad": int(cantidad)}
+        if linea["cantidad"] <= 0:
+            return
+        self.lineas[nombre] = linea
+        self.total_c += linea["precio_c"] * linea["cantidad"]
+        indice = bisect_left(self._nombres, nombre)
+        self._nombres.insert(indice, nombre)
+        self._emitir(AGREGADO, nombre, linea, indice)
+
+    def cambiar_cantidad(self, nombre, delta):
+        """Suma delta a la cantidad; si queda en 0 o menos, quita la línea."""
+        linea = self.lineas.get(nombre)
+        if linea is None or not delta:
+            return
+        if linea["cantidad"] + delta <= 0:
+            self.quitar(nombre)
+            return
+        linea["cantidad"] += delta
+        self.total_c += linea["precio_c"] * delta
+        self._emitir(CANTIDAD, nombre, linea)
+
+    def quitar(self, nombre):
+        linea = self.lineas.pop(nombre, None)
+        if linea is None:
+            return
+        self.total_c -= linea["precio_c"] * linea["cantidad"]
+        self._nombres.pop(bisect_left(self._nombres, nombre))
+        self._emitir(QUITADO, nombre)
+
+    def vaciar(self):
+        if not self.lineas:
+            return
+        self.lineas = {}
+        self._nombres = []
+        self.total_c = 0
+        self._emitir(VACIADO, None)
@@ -0,0 +1,284 @@
+# catalogo.py
+# Catálogo de productos en memoria: la grilla por categoría, el inventario, la
+# lista de categorías y los precios salen de aquí sin volver a SQLite.
+# Se carga una vez; las escrituras de la app lo parchan al terminar
+# (actualizar_stock / refrescar / quitar) y lo que escriba otra caja sobre el
+# mismo archivo llega por el log productos_cambios (ver cambios.py).
+import json
+import threading
+import time
+from bisect import bisect_left, insort
+
+import cambios
+import database
+
+# Cada cuánto se mira el log por escrituras de otro proceso
+EXTERNO_S = 10
+
+# Sale del índice idx_productos_categoria_nombre, ya ordenado como las listas por categoría
+SQL_CARGAR = """SELECT id, categoria, nombre, COALESCE(precio_venta, precio), stock, codigo_barras
+                FROM productos ORDER BY categoria, nombre"""
+SQL_POR_IDS = """SELECT id, categoria, nombre, COALESCE(precio_venta, precio), stock, codigo_barras
+                 FROM productos WHERE id IN (SELECT value FROM json_each(?))"""
+
+
+class Producto:
+    __slots__ = ("id", "categoria", "nombre", "precio", "stock", "codigo")
+
+    def __init__(self, id, categoria, nombre, precio, stock, codigo=None):
+        self.id = id
+        self.categoria = categoria
+        self.nombre = nombre
+        self.precio = precio
+        self.stock = stock
+        self.codigo = codigo
+
+    def __repr__(self):
+        return f"Producto({self.id}, {self.nombre!r}, {self.categoria!r}, {self.precio}, {self.stock})"
+
+
+class Catalogo:
+    """
+    Productos indexados por id, por nombre, por código de barras y por categoría (cada categoría
+    ordenada por nombre, igual que el ORDER BY de las consultas que reemplaza).
+    - aciertos: lecturas servidas de memoria.
+    - fallos: lecturas que tuvieron que ir a la BD (carga o sincronización con el log).
+    Una escritura de este proceso que no pasó por los ganchos cambia
+    database.get_pool().generacion y la siguiente lectura se sincroniza.
+    """
+
+    def __init__(self, externo_s=EXTERNO_S):
+        self.externo_s = externo_s
+        self.aciertos = 0
+        self.fallos = 0
+        self.recargas = 0
+        self._lock = threading.RLock()
+        self._pool = None
+        self._gen = None
+        self._seq = 0
+        self._visto = 0.0
+        self._por_id = {}
+        self._por_nombre = {}
+        self._por_codigo = {}
+        self._por_categoria = {}        # categoria -> [(nombre, id)] ordenada
+
+    # --- carga y sincronización (con _lock tomado) ---
+    def _vigente(self):
+        pool = database.get_pool()
+        if pool is not self._pool:
+            self._cargar(pool)
+        elif pool.generacion != self._gen or time.monotonic() - self._visto >= self.externo_s:
+            self._sincronizar(pool)
+        else:
+            self.aciertos += 1
+
+    def _cargar(self, pool):
+        gen = pool.generacion
+        with pool.lectura() as con:
+            con.execute("BEGIN")
+            try:
+                seq = con.execute(cambios.SQL_ULTIMO_SEQ).fetchone()[0]
+                filas = con.execute(SQL_CARGAR).fetchall()
+            finally:
+                con.execute("COMMIT")
+        self._por_id, self._por_nombre, self._por_codigo, self._por_categoria = {}, {}, {}, {}
+        for fila in filas:
+            p = Producto(*fila)
+            self._por_id[p.id] = p
+            self._por_nombre[p.nombre] = p
+            if p.codigo:
+                self._por_codigo[p.codigo] = p
+            # ya vienen ordenadas: append basta
+            self._por_categoria.setdefault(p.categoria, []).append((p.nombre, p.id))
+        self._pool, self._gen, self._seq = pool, gen, seq
+        self._visto = time.monotonic()
+        self.fallos += 1
+        self.recargas += 1
+
+    def _sincronizar(self, pool):
+        gen = pool.generacion
+        seq, ids = cambios.cambios_desde(self._seq)
+        if ids is None:
+            self._cargar(pool)
+            return
+        self.fallos += 1
+        self._gen, self._seq, self._visto = gen, seq, time.monotonic()
+        if ids:
+            self._releer(ids)
+
+    def _releer(self, ids):
+        with database.lectura() as con:
+            filas = con.execute(SQL_POR_IDS, (json.dumps(sorted(ids)),)).fetchall()
+        for pid in ids:
+            self._sacar(pid)
+        for fila in filas:
+            self._poner(Producto(*fila))
+
+    def _poner(self, p):
+        self._por_id[p.id] = p
+        self._por_nombre[p.nombre] = p
+        if p.codigo:
+            self._por_codigo[p.codigo] = p
+        insort(self._por_categoria.setdefault(p.categoria, []), (p.nombre, p.id))
+
+    def _sacar(self, pid):
+        p = self._por_id.pop(pid, None)
+        if p is None:
+            return
+        if self._por_nombre.get(p.nombre) is p:
+            del self._por_nombre[p.nombre]
+        if p.codigo and self._por_codigo.get(p.codigo) is p:
+            del self._por_codigo[p.codigo]
+        lista = self._por_categoria[p.categoria]
+        del lista[bisect_left(lista, (p.nombre, p.id))]
+        if not lista:
+            del self._por_categoria[p.categoria]
+
+    def _al_escribir(self):
+        """
+        Tras un gancho: si el único COMMIT desde la última sincronización fue el
+        que se acaba de parchar, el catálogo sigue al día sin consultar el log.
+        """
+        pool = self._pool
+        if pool is not None and pool.generacion == self._gen + 1:
+            self._gen = pool.generacion
+
+    def _cargado(self):
+        # dentro de una transacción exterior el cambio todavía puede deshacerse:
+        # no se parcha y el COMMIT (si llega) se ve por generacion
+        return self._pool is database.get_pool() and not self._pool.en_transaccion()
+
+    # --- lecturas ---
+    def get(self, producto_id):
+        with self._lock:
+            self._vigente()
+            return self._por_id.get(producto_id)
+
+    def por_nombre(self, nombre):
+        with self._lock:
+            self._vigente()
+            return self._por_nombre.get(nombre)
+
+    def por_codigo(self, codigo):
+        """Producto con ese código de barras (None si no hay)."""
+        with self._lock:
+            self._vigente()
+            return self._por_codigo.get(codigo)
+
+    def precio(self, producto_id):
+        p = self.get(producto_id)
+        return None if p is None else p.precio
+
+    def categorias(self):
+        with self._lock:
+            self._vigente()
+            return sorted(self._por_categoria)
+
+    def de_categoria(self, categoria):
+        """Productos de una categoría ordenados por nombre."""
+        with self._lock:
+            self._vigente()
+            return [self._por_id[pid] for _, pid in self._por_categoria.get(categoria, ())]
+
+    def todos(self):
+        """Todos los productos ordenados por (categoria, nombre)."""
+        with self._lock:
+            self._vigente()
+            return [self._por_id[pid] for cat in sorted(self._por_categoria)
+                    for _, pid in self._por_categoria[cat]]
+
+    def por_ids(self, ids):
+        """Los productos de ids en ese orden (los que ya no existen se omiten)."""
+        with self._lock:
+            self._vigente()
+            return [self._por_id[i] for i in ids if i in self._por_id]
+
+    def precargar(self):
+        with self._lock:
+            self._vigente()
+
+    def sincronizar(self):
+        """Consulta el log ya, sin esperar a externo_s (p. ej. tras un aviso de cambios.VigilanteCambios)."""
+        with self._lock:
+            pool = database.get_pool()
+            if pool is not self._pool:
+                self._cargar(pool)
+            else:
+                self._sincronizar(pool)
+
+    # --- ganchos de escritura (llamar después del COMMIT) ---
+    def actualizar_stock(self, stock):
+        """stock: {producto_id: stock_nuevo}, p. ej. el RETURNING de una venta."""
+        with self._lock:
+            if not self._cargado():
+                return
+            for pid, valor in stock.items():
+                p = self._por_id.get(pid)
+                if p is not None:
+                    p.stock = valor
+            self._al_escribir()
+
+    def refrescar(self, ids):
+        """Vuelve a leer esos productos (alta, edición, cambio de nombre o categoría)."""
+        with self._lock:
+            if not self._cargado():
+                return
+            self._releer(set(ids))
+            self._al_escribir()
+
+    def quitar(self, producto_id):
+        with self._lock:
+            if not self._cargado():
+                return
+            self._sacar(producto_id)
+            self._al_escribir()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "recargas": self.recargas,
+                "productos": len(self._por_id),
+            }
+
+
+# -----------------------------
+# Catálogo de proceso
+# -----------------------------
+_catalogo = Catalogo()
+
+
+def get_catalogo():
+    return _catalogo
+
+
+def precargar_en_segundo_plano():
+    """Carga el catálogo en un hilo: el primer clic en una categoría ya no espera a SQLite."""
+    hilo = threading.Thread(target=_catalogo.precargar, name="precarga-catalogo", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def por_codigo(codigo):
+    return _catalogo.por_codigo(codigo)
+
+
+def actualizar_stock(stock):
+    _catalogo.actualizar_stock(stock)
+
+
+def refrescar(ids):
+    _catalogo.refrescar(ids)
+
+
+def sincronizar():
+    _catalogo.sincronizar()
+
+
+def quitar(producto_id):
+    _catalogo.quitar(producto_id)
+
+
+def estadisticas():
+    return _catalogo.estadisticas()
@@ -0,0 +1,99 @@
+# cliente.py
+# Modo cliente de la caja: con TIENDA_SERVICIO=http://host:puerto la grilla, la
+# búsqueda, el cobro y los ajustes de stock pasan por servicio.py en vez de abrir
+# SQLite para escribir. Una conexión HTTP persistente por hilo.
+import http.client
+import json
+import os
+import threading
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from ventas import StockInsuficiente
+
+
+class ErrorServicio(OSError):
+    """El servicio no respondió o respondió con un error que no es de la venta."""
+
+
+class ClienteTienda:
+    def __init__(self, url, timeout=10):
+        partes = urlsplit(url)
+        self.url = url
+        self.host = partes.hostname or "127.0.0.1"
+        self.puerto = partes.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conexion(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = http.client.HTTPConnection(self.host, self.puerto, timeout=self.timeout)
+        return con
+
+    def _pedir(self, metodo, ruta, cuerpo=None, reintentar=True):
+        datos = None if cuerpo is None else json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        cabeceras = {"Content-Type": "application/json"} if datos is not None else {}
+        try:
+            con = self._conexion()
+            con.request(metodo, ruta, body=datos, headers=cabeceras)
+            r = con.getresponse()
+            respuesta = json.loads(r.read() or b"null")
+        except (http.client.HTTPException, ConnectionError) as e:
+            self._local.con = None
+            if reintentar:      # el servicio cerró la conexión persistente: una vez más con otra
+                return self._pedir(metodo, ruta, cuerpo, reintentar=False)
+            raise ErrorServicio(f"Sin respuesta del servicio en {self.url}: {e}") from e
+        except OSError as e:
+            self._local.con = None
+            raise ErrorServicio(f"Sin respuesta del servicio en {self.url}: {e}") from e
+        if r.status == 400:
+            raise ValueError(respuesta["error"])
+        if r.status == 404:
+            return None
+        if r.status == 409:
+            raise StockInsuficiente({int(pid): tuple(par) for pid, par in respuesta["faltantes"].items()})
+        if r.status != 200:
+            raise ErrorServicio(respuesta.get("error") if isinstance(respuesta, dict) else r.reason)
+        return respuesta
+
+    # --- lecturas ---
+    def salud(self):
+        return self._pedir("GET", "/salud")
+
+    def categorias(self):
+        return self._pedir("GET", "/categorias")
+
+    def productos(self, categoria, filtro=""):
+        """Como interfaz_unificada_tienda.obtener_productos_por_categoria: [(id, nombre, precio, stock)]."""
+        filas = self._pedir("GET", "/productos?" + urlencode({"categoria": categoria or "", "q": filtro}))
+        return [tuple(f) for f in filas]
+
+    def por_codigo(self, codigo):
+        return self._pedir("GET", "/codigo?" + urlencode({"c": codigo}))
+
+    def estadisticas(self):
+        return self._pedir("GET", "/estadisticas")
+
+    # --- escrituras ---
+    def vender(self, items, fecha=None, uid=None):
+        """
+        Registra el carrito [(producto_id, nombre, cantidad, precio)]. Devuelve
+        (venta_id, {producto_id: stock}). El uid hace seguro el reintento: si la venta
+        ya había llegado, el servicio no la repite. Sin stock: StockInsuficiente.
+        """
+        r = self._pedir("POST", "/ventas", {"items": [list(i) for i in items], "fecha": fecha,
+                                            "uid": uid or uuid.uuid4().hex})
+        return r["venta_id"], {int(k): v for k, v in r["stock"].items()}
+
+    def ajustar_stock(self, nombre, delta=None, fijar=None):
+        # un delta repetido no es idempotente: sin reintento automático
+        r = self._pedir("POST", "/stock", {"nombre": nombre, "delta": delta, "fijar": fijar},
+                        reintentar=delta is None)
+        return {int(k): v for k, v in r["stock"].items()}
+
+
+def desde_entorno():
+    """ClienteTienda si TIENDA_SERVICIO apunta a un servicio; None = la caja abre la BD sola."""
+    url = os.environ.get("TIENDA_SERVICIO", "").strip()
+    return ClienteTienda(url) if url else None
@@ -0,0 +1,295 @@
+# cola_ventas.py
+# Cobro sin esperar a la BD: cada venta se anota en un diario (una línea JSON por
+# ticket, con fsync) y un hilo escritor la pasa a tienda.db por lotes, en una sola
+# transacción por lote. Lo que quedó en el diario sin aplicar (corte de luz, cierre
+# a la fuerza) se aplica al abrir la app con recuperar().
+# Exactamente una vez: cada ticket lleva un uid y ventas.uid es UNIQUE; un ticket
+# cuyo uid ya está en ventas se salta (se aplicó pero el diario no llegó a vaciarse).
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import catalogo
+import database
+import metricas
+from ventas import registrar_en, venta_por_uid, verificar_stock
+
+# Tickets por transacción como máximo
+LOTE = 200
+# Espera antes de reintentar un lote que falló por la BD (bloqueada, disco lleno)
+REINTENTO_S = 1.0
+# El diario se vacía cuando no queda nada pendiente y pasa de este tamaño (bytes) o
+# hubo un rechazo; lo ya aplicado que quede ahí se salta por uid si hay que recuperar
+VACIAR_DESDE = 256 * 1024
+
+_FIN = object()
+
+
+def ruta_por_defecto():
+    return database.get_pool().ruta + "-ventas.diario"
+
+
+class ColaVentas:
+    """
+    encolar(items) anota el ticket en el diario y vuelve; el hilo escritor lo aplica.
+    al_aplicar([(uid, venta_id, stock)]) y al_rechazar(entrada, error) corren en el
+    hilo escritor (la UI los pasa a Tk con root.after).
+    Los tickets que la BD rechaza (producto borrado) van a <diario>.rechazadas.
+    Un ticket sin stock suficiente ni siquiera entra: encolar() lanza StockInsuficiente
+    contando lo que ya reservaron los tickets pendientes.
+    """
+
+    def __init__(self, ruta=None, fsync=True, al_aplicar=None, al_rechazar=None, vaciar_desde=VACIAR_DESDE):
+        self.ruta = ruta or ruta_por_defecto()
+        self.fsync = fsync
+        self.vaciar_desde = vaciar_desde
+        self.al_aplicar = al_aplicar
+        self.al_rechazar = al_rechazar
+        self.aplicadas = 0
+        self.duplicadas = 0
+        self.rechazadas = 0
+        self.lotes = 0
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()      # diario y contador de pendientes
+        self._pendientes = 0
+        self._con_rechazos = False
+        self._archivo = None
+        # unidades de los tickets encolados que aún no llegaron a la BD
+        self._lock_reservas = threading.Lock()
+        self._reservas = {}             # uid -> {producto_id: cantidad}
+        self._reservado = Counter()
+        self._hilo = None
+
+    # --- diario ---
+    def _abrir(self):
+        # llamar con _lock tomado
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        return self._archivo
+
+    def _anotar(self, archivo, entrada):
+        archivo.write(json.dumps(entrada, ensure_ascii=False, separators=(",", ":")) + "\n")
+        archivo.flush()
+        if self.fsync:
+            os.fsync(archivo.fileno())
+
+    def leer_diario(self):
+        """Entradas del diario en orden. Una última línea cortada (corte a mitad de escritura) se ignora."""
+        if not os.path.exists(self.ruta):
+            return []
+        entradas = []
+        with open(self.ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    entradas.append(json.loads(linea))
+                except ValueError:
+                    if linea.endswith("\n"):
+                        raise       # una línea completa ilegible no es un corte: no se descarta
+        return entradas
+
+    def _vaciar_diario(self):
+        # llamar con _lock tomado y sin pendientes
+        self._abrir().truncate(0)
+        self._con_rechazos = False
+        if self.fsync:
+            os.fsync(self._archivo.fileno())
+
+    # --- API ---
+    @metricas.medido("cola.encolar")
+    def encolar(self, items, fecha=None):
+        """
+        Anota el ticket [(producto_id, nombre, cantidad, precio)] y lo deja para el escritor.
+        Cuando vuelve, la venta ya sobrevive a un corte. Devuelve el uid.
+        Si alguna línea no tiene stock (contando los tickets pendientes) lanza
+        StockInsuficiente y no anota nada.
+        """
+        entrada = {"uid": uuid.uuid4().hex,
+                   "fecha": fecha or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                   "items": [list(item) for item in items]}
+        cantidades = Counter()
+        for producto_id, _nombre, cantidad, _precio in items:
+            cantidades[int(producto_id)] += int(cantidad)
+        with self._lock_reservas:
+            if cantidades:
+                with database.lectura() as con:
+                    verificar_stock(con, cantidades, self._reservado)
+            self._reservas[entrada["uid"]] = cantidades
+            self._reservado.update(cantidades)
+        try:
+            with self._lock:
+                self._anotar(self._abrir(), entrada)
+                self._pendientes += 1
+        except BaseException:
+            with self._lock_reservas:
+                self._liberar([entrada])
+            raise
+        self._cola.put(entrada)
+        return entrada["uid"]
+
+    def recuperar(self):
+        """
+        Aplica lo que quedó en el diario de una sesión anterior y lo vacía.
+        Llamar al abrir la app, antes de iniciar(). Devuelve cuántos tickets se aplicaron.
+        Si otra caja tiene la BD bloqueada, los tickets quedan pendientes para el escritor
+        (que reintenta) y la app abre igual.
+        """
+        with self._lock:
+            entradas = self.leer_diario()
+            antes = self.aplicadas
+            if entradas:
+                try:
+                    self._aplicar(entradas)
+                except sqlite3.OperationalError:
+                    traceback.print_exc()
+                    self._diferir(entradas)
+                    return 0
+            self._vaciar_diario()
+        return self.aplicadas - antes
+
+    def _diferir(self, entradas):
+        # llamar con _lock tomado. El diario se reescribe con las entradas leídas (sin
+        # una última línea cortada, que dejaría ilegible lo que se anote después)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for entrada in entradas:
+                self._anotar(f, entrada)
+        os.replace(temporal, self.ruta)
+        self._abrir()
+        self._pendientes += len(entradas)
+        for entrada in entradas:
+            self._cola.put(entrada)
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._trabajar, name="cola-ventas", daemon=True)
+            self._hilo.start()
+        return self
+
+    def esperar(self):
+        """Bloquea hasta que todo lo encolado quedó en la BD (o rechazado)."""
+        self._cola.join()
+
+    def cerrar(self, timeout=10):
+        """Aplica lo pendiente y detiene el escritor. Lo que no alcance queda en el diario."""
+        if self._hilo is not None:
+            self._cola.put(_FIN)
+            self._hilo.join(timeout)
+            self._hilo = None
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+    def pendientes(self):
+        with self._lock:
+            return self._pendientes
+
+    # --- hilo escritor ---
+    def _trabajar(self):
+        while True:
+            primera = self._cola.get()
+            if primera is _FIN:
+                self._cola.task_done()
+                return
+            lote = [primera]
+            fin = False
+            while len(lote) < LOTE:
+                try:
+                    entrada = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if entrada is _FIN:
+                    self._cola.task_done()
+                    fin = True
+                    break
+                lote.append(entrada)
+            while True:
+                try:
+                    if self._aplicar(lote):
+                        self._con_rechazos = True     # que no se vuelvan a rechazar al recuperar
+                    break
+                except Exception:
+                    # BD bloqueada, disco lleno o un error inesperado: el hilo no muere, el
+                    # lote sigue en el diario y se reintenta entero (lo ya aplicado se salta por uid)
+                    traceback.print_exc()
+                    time.sleep(REINTENTO_S)
+            with self._lock:
+                self._pendientes -= len(lote)
+                # _archivo es None si cerrar() no esperó a este lote: el diario queda como está
+                if (not self._pendientes and self._archivo is not None
+                        and (self._con_rechazos or self._archivo.tell() >= self.vaciar_desde)):
+                    self._vaciar_diario()
+            for _ in lote:
+                self._cola.task_done()
+            if fin:
+                return
+
+    def _liberar(self, lote):
+        # llamar con _lock_reservas tomado
+        for entrada in lote:
+            self._reservado.subtract(self._reservas.pop(entrada["uid"], {}))
+        self._reservado += Counter()        # fuera los ceros
+
+    def _aplicar(self, lote):
+        """
+        Un lote en una transacción; cada ticket en su SAVEPOINT para rechazarlo solo.
+        Devuelve cuántos se rechazaron.
+        """
+        hechos, rechazos, stock = [], [], {}
+        tomado = False
+        try:
+            with metricas.medir("cola.lote"), database.escritura() as con:
+                for entrada in lote:
+                    if venta_por_uid(con, entrada["uid"]) is not None:
+                        self.duplicadas += 1
+                        continue
+                    con.execute("SAVEPOINT ticket")
+                    try:
+                        venta_id, nuevo = registrar_en(con, entrada["items"], entrada["fecha"], entrada["uid"])
+                    except sqlite3.OperationalError:
+                        raise       # BD bloqueada o disco lleno: se reintenta el lote
+                    except Exception as e:     # producto borrado, sin stock o mal formado
+                        con.execute("ROLLBACK TO ticket")
+                        con.execute("RELEASE ticket")
+                        rechazos.append((entrada, e))
+                        continue
+                    con.execute("RELEASE ticket")
+                    stock.update(nuevo)
+                    hechos.append((entrada["uid"], venta_id, nuevo))
+                # el COMMIT y la liberación de las reservas, sin un encolar() que lea en medio
+                self._lock_reservas.acquire()
+                tomado = True
+            self._liberar(lote)
+        finally:
+            if tomado:
+                self._lock_reservas.release()
+        self.lotes += 1
+        self.aplicadas += len(hechos)
+        # ya está en la BD: si algo de lo que sigue falla se anota y no se reintenta el lote
+        _sin_fallar(catalogo.actualizar_stock, stock)
+        for entrada, error in rechazos:
+            self.rechazadas += 1
+            _sin_fallar(self._anotar_rechazo, entrada, error)
+            if self.al_rechazar:
+                _sin_fallar(self.al_rechazar, entrada, error)
+        if hechos and self.al_aplicar:
+            _sin_fallar(self.al_aplicar, hechos)
+        return len(rechazos)
+
+    def _anotar_rechazo(self, entrada, error):
+        with open(self.ruta + ".rechazadas", "a", encoding="utf-8") as f:
+            self._anotar(f, {**entrada, "error": str(error)})
+
+
+def _sin_fallar(fn, *args):
+    try:
+        fn(*args)
+    except Exception:
+        traceback.print_exc()
@@ -0,0 +1,310 @@
+# compras.py
+# Sugerencias de compra: demanda diaria por producto pronosticada con suavizado
+# exponencial y un factor por día de la semana, sobre el resumen ventas_diarias, y
+# con ella el punto de pedido y la cantidad a pedir según el plazo de entrega y la
+# cobertura de cada categoría.
+# El estado del pronóstico queda en pronostico_demanda (migración v10): cada corrida
+# solo procesa los días nuevos de los productos que vendieron desde la anterior; a
+# los demás se les aplica al leer el decaimiento de los días sin venta. Cada noche:
+#
+#   python compras.py --actualizar
+#   python compras.py --salida compras.xlsx
+import argparse
+import json
+import time
+from datetime import date, datetime
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import analisis
+import database
+import segundo_plano
+
+# Días de historia con que arranca un producto nuevo (o uno que no vendió en ese lapso)
+VENTANA = 56
+# Suavizado: nivel, factores por día de la semana y varianza del error
+ALFA = 0.1
+GAMMA = 0.05
+BETA = 0.1
+# Unidades "a priori" por día de la semana al estimar los factores: con pocas
+# ventas los factores quedan cerca de 1 en vez de seguir al ruido
+PREVIO = 2.0
+FACTOR_MIN = 0.05
+# Valores por defecto de compras_parametros
+PLAZO = 7
+COBERTURA = 14
+SERVICIO = 0.95
+
+LOTE = analisis.LOTE
+FACTORES = [f"f{i}" for i in range(7)]        # f0 = lunes
+TIPOS_ESTADO = {"producto_id": np.int32, "dia": np.int32, "nivel": np.float64, "varianza": np.float64,
+                **{f: np.float64 for f in FACTORES}}
+TIPOS_DIARIAS = {"producto_id": np.int32, "dia": np.int32, "unidades": np.int32}
+
+SQL_DIARIAS = f"""SELECT producto_id, {analisis.DIA.format(f="fecha")}, MAX(unidades, 0)
+                  FROM ventas_diarias WHERE fecha BETWEEN ? AND ?"""
+SQL_DIARIAS_IDS = SQL_DIARIAS + " AND producto_id IN (SELECT value FROM json_each(?))"
+SQL_ESTADO = f"SELECT producto_id, dia, nivel, varianza, {', '.join(FACTORES)} FROM pronostico_demanda"
+SQL_ESTADO_IDS = SQL_ESTADO + " WHERE producto_id IN (SELECT value FROM json_each(?))"
+SQL_GUARDAR = (f"INSERT OR REPLACE INTO pronostico_demanda (producto_id, dia, nivel, varianza, {', '.join(FACTORES)}) "
+               f"VALUES ({', '.join('?' * 11)})")
+
+_EPOCA = date(1970, 1, 1).toordinal()
+
+
+def _a_dia(fecha):
+    """'YYYY-MM-DD' -> días desde 1970-01-01."""
+    return date.fromisoformat(fecha[:10]).toordinal() - _EPOCA
+
+
+def _a_fecha(dia):
+    return date.fromordinal(int(dia) + _EPOCA).isoformat()
+
+
+def _semana(dias):
+    """Día de la semana (0 = lunes) de días desde 1970 (el 1970-01-01 fue jueves)."""
+    return (dias + 3) % 7
+
+
+# -----------------------------
+# Pronóstico
+# -----------------------------
+def _matriz(ids, ventas, inicio, dias):
+    """Unidades [producto, día] de inicio a inicio + dias - 1; ids ordenados."""
+    m = np.zeros((len(ids), dias))
+    pid = ventas["producto_id"].to_numpy()
+    col = ventas["dia"].to_numpy() - inicio
+    fila = np.minimum(np.searchsorted(ids, pid), max(len(ids) - 1, 0))
+    ok = (col >= 0) & (col < dias) & (ids[fila] == pid) if len(ids) else np.zeros(len(pid), dtype=bool)
+    m[fila[ok], col[ok]] = ventas["unidades"].to_numpy()[ok]
+    return m
+
+
+def _iniciar(ids, ventas, fin):
+    """Estado al día fin desde los últimos VENTANA días: nivel = media, factores por día de la semana."""
+    inicio = fin - VENTANA + 1
+    m = _matriz(ids, ventas, inicio, VENTANA)
+    semana = _semana(inicio + np.arange(VENTANA))
+    nivel = m.mean(axis=1)
+    por_dia = np.stack([m[:, semana == w].sum(axis=1) for w in range(7)], axis=1)
+    f = (por_dia + PREVIO) / (por_dia.sum(axis=1, keepdims=True) / 7 + PREVIO)
+    f = np.maximum(f * 7 / f.sum(axis=1, keepdims=True), FACTOR_MIN)
+    residuo = m - nivel[:, None] * f[:, semana]
+    return {"producto_id": ids, "dia": np.full(len(ids), fin), "nivel": nivel,
+            "varianza": (residuo ** 2).mean(axis=1), "f": f}
+
+
+def _avanzar(estado, ventas, fin):
+    """
+    Procesa los días de (estado["dia"], fin] de cada producto, todos los productos a la
+    vez: un paso vectorizado por día. Los días sin fila en ventas son ceros.
+    """
+    ids, dia = estado["producto_id"], estado["dia"]
+    nivel, varianza, f = estado["nivel"].copy(), estado["varianza"].copy(), estado["f"].copy()
+    inicio = int(dia.min()) + 1 if len(ids) else fin + 1
+    m = _matriz(ids, ventas, inicio, fin - inicio + 1)
+    for j, d in enumerate(range(inicio, fin + 1)):
+        activo = dia < d
+        w = _semana(d)
+        x = m[:, j]
+        previsto = nivel * f[:, w]
+        e = x - previsto
+        varianza = np.where(activo, BETA * e * e + (1 - BETA) * varianza, varianza)
+        nuevo = ALFA * x / f[:, w] + (1 - ALFA) * nivel
+        razon = np.minimum(np.divide(x, nuevo, out=np.ones_like(x), where=nuevo > 0), 7.0)
+        fw = np.maximum(GAMMA * razon + (1 - GAMMA) * f[:, w], FACTOR_MIN)
+        nivel = np.where(activo, nuevo, nivel)
+        f[activo, w] = fw[activo]
+        f[activo] *= 7 / f[activo].sum(axis=1, keepdims=True)
+    return {"producto_id": ids, "dia": np.full(len(ids), fin), "nivel": nivel, "varianza": varianza, "f": f}
+
+
+def _estado(df):
+    return {"producto_id": df["producto_id"].to_numpy(), "dia": df["dia"].to_numpy().astype(np.int64),
+            "nivel": df["nivel"].to_numpy(), "varianza": df["varianza"].to_numpy(), "f": df[FACTORES].to_numpy()}
+
+
+def _filas(estado):
+    return [(int(p), int(d), float(n), float(v), *map(float, f)) for p, d, n, v, f in
+            zip(estado["producto_id"], estado["dia"], estado["nivel"], estado["varianza"], estado["f"])]
+
+
+def actualizar(hasta=None, completo=False):
+    """
+    Lleva el pronóstico hasta el día hasta ('YYYY-MM-DD'; por defecto ayer: solo días
+    cerrados). Solo se tocan los productos con ventas desde la corrida anterior; si no
+    hubo ninguna, o la última es de hace más de VENTANA días, o completo=True, se arma
+    de nuevo con los últimos VENTANA días. Devuelve {"hasta", "productos", "reiniciados", "segundos"}.
+    """
+    t = time.perf_counter()
+    fin = _a_dia(hasta) if hasta else date.today().toordinal() - _EPOCA - 1
+    inicio = fin - VENTANA + 1
+    # las lecturas por lotes de ventas_diarias no ocupan un lector del pool de la caja
+    with database.lectura_larga() as con:
+        previo = con.execute("SELECT hasta FROM pronostico_estado WHERE id = 1").fetchone()[0]
+        if previo is not None and previo >= fin and not completo:
+            return {"hasta": _a_fecha(previo), "productos": 0, "reiniciados": 0, "segundos": 0.0}
+        todo = completo or previo is None or previo < inicio
+        desde = inicio if todo else previo + 1
+        nuevas = analisis.leer_columnas(con, SQL_DIARIAS + " AND unidades > 0",
+                                        (_a_fecha(desde), _a_fecha(fin)), TIPOS_DIARIAS, LOTE)
+        ids = np.unique(nuevas["producto_id"].to_numpy())
+        if todo:
+            viejos, nuevos, historia = [], ids, nuevas
+        else:
+            estado = analisis.leer_columnas(con, SQL_ESTADO_IDS, (json.dumps(ids.tolist()),), TIPOS_ESTADO, LOTE)
+            # con más de VENTANA días sin vender el estado ya no sirve: se arma de nuevo
+            estado = estado[estado["dia"] >= inicio - 1]
+            viejos = estado.sort_values("producto_id")
+            nuevos = np.setdiff1d(ids, viejos["producto_id"].to_numpy())
+            historia = analisis.leer_columnas(con, SQL_DIARIAS_IDS, (_a_fecha(inicio), _a_fecha(fin),
+                                              json.dumps(nuevos.tolist())), TIPOS_DIARIAS, LOTE)
+    filas = _filas(_iniciar(nuevos, historia, fin))
+    if len(viejos):
+        filas += _filas(_avanzar(_estado(viejos), nuevas, fin))
+    segundos = time.perf_counter() - t
+    with database.escritura() as con:
+        if todo:
+            con.execute("DELETE FROM pronostico_demanda")
+        con.executemany(SQL_GUARDAR, filas)
+        con.execute("UPDATE pronostico_estado SET hasta = ?, actualizado = ?, productos = ?, segundos = ? WHERE id = 1",
+                    (fin, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), len(filas), segundos))
+    return {"hasta": _a_fecha(fin), "productos": len(filas), "reiniciados": len(nuevos),
+            "segundos": round(time.perf_counter() - t, 3)}
+
+
+# -----------------------------
+# Parámetros por categoría
+# -----------------------------
+def parametros():
+    """{categoria: (plazo_dias, cobertura_dias, nivel_servicio)} de las categorías con valores propios."""
+    with database.lectura() as con:
+        return {c: (p, d, s) for c, p, d, s in con.execute(
+            "SELECT categoria, plazo_dias, cobertura_dias, nivel_servicio FROM compras_parametros")}
+
+
+def fijar_parametros(categoria, plazo=PLAZO, cobertura=COBERTURA, servicio=SERVICIO):
+    """Plazo de entrega y cobertura en días y nivel de servicio (0.5 a 0.999) de una categoría."""
+    plazo, cobertura, servicio = int(plazo), int(cobertura), float(servicio)
+    if plazo < 0 or cobertura < 0:
+        raise ValueError("El plazo y la cobertura no pueden ser negativos.")
+    if not 0.5 <= servicio < 1:
+        raise ValueError("El nivel de servicio va de 0.5 a 0.999.")
+    with database.escritura() as con:
+        con.execute("INSERT OR REPLACE INTO compras_parametros (categoria, plazo_dias, cobertura_dias, nivel_servicio) "
+                    "VALUES (?, ?, ?, ?)", (categoria, plazo, cobertura, servicio))
+
+
+# -----------------------------
+# Sugerencias
+# -----------------------------
+def _conteo_semana(desde, dias):
+    """[producto, día de la semana]: cuántas veces cae cada día en los dias días desde desde."""
+    offset = (np.arange(7) - _semana(desde)) % 7
+    return dias[:, None] // 7 + (offset[None, :] < (dias % 7)[:, None])
+
+
+def sugerencias():
+    """
+    (por_producto, por_categoria). Por producto, con el pronóstico al último día procesado:
+    demanda_diaria, demanda_plazo (lo que se vende mientras llega el pedido), stock_seguridad
+    (z × desvío diario × √plazo), punto_pedido, objetivo (plazo + cobertura) y sugerido:
+    lo que falta para el objetivo si el stock no supera el punto de pedido. Primero lo que
+    hay que pedir, de menos a más días de stock.
+    """
+    catalogo = analisis.cargar_catalogo()
+    with database.lectura_larga() as con:
+        fin = con.execute("SELECT hasta FROM pronostico_estado WHERE id = 1").fetchone()[0]
+        estado = analisis.leer_columnas(con, SQL_ESTADO, (), TIPOS_ESTADO, LOTE)
+    propios = parametros()
+    if fin is None:
+        fin = date.today().toordinal() - _EPOCA - 1
+    e = estado.set_index("producto_id").reindex(catalogo["id"].to_numpy())
+    # los que no vendieron desde su último día: solo decae el nivel (x = 0 cada día)
+    edad = (fin - e["dia"].fillna(fin).to_numpy()).clip(0)
+    nivel = e["nivel"].fillna(0).to_numpy() * (1 - ALFA) ** edad
+    desvio = np.sqrt(e["varianza"].fillna(0).to_numpy())
+    f = e[FACTORES].fillna(1).to_numpy()
+
+    categorias = catalogo["categoria"].astype(str)
+    valores = {c: propios.get(c, (PLAZO, COBERTURA, SERVICIO)) for c in categorias.unique()}
+    plazo = categorias.map({c: v[0] for c, v in valores.items()}).to_numpy().astype(np.int64)
+    cobertura = categorias.map({c: v[1] for c, v in valores.items()}).to_numpy().astype(np.int64)
+    z = categorias.map({c: NormalDist().inv_cdf(v[2]) for c, v in valores.items()}).to_numpy().astype(np.float64)
+
+    stock = catalogo["stock"].to_numpy().astype(np.float64)
+    disponible = np.maximum(stock, 0)
+    demanda_plazo = nivel * (f * _conteo_semana(fin + 1, plazo)).sum(axis=1)
+    seguridad = z * desvio * np.sqrt(plazo)
+    punto = demanda_plazo + seguridad
+    objetivo = (nivel * (f * _conteo_semana(fin + 1, plazo + cobertura)).sum(axis=1)
+                + z * desvio * np.sqrt(plazo + cobertura))
+    pedir = (nivel > 0) & (disponible <= punto)
+    sugerido = np.where(pedir, np.ceil(np.maximum(objetivo - disponible, 0)), 0).astype(np.int64)
+
+    r = pd.DataFrame({
+        "id": catalogo["id"].to_numpy(), "nombre": catalogo["nombre"].to_numpy(), "categoria": catalogo["categoria"],
+        "stock": catalogo["stock"].to_numpy(), "demanda_diaria": nivel, "demanda_plazo": demanda_plazo,
+        "stock_seguridad": seguridad, "punto_pedido": punto, "objetivo": objetivo, "sugerido": sugerido,
+        "costo": catalogo["costo"].to_numpy().astype(np.float64),
+        "dias_stock": np.divide(disponible, nivel, out=np.full(len(nivel), np.nan), where=nivel > 0),
+        "plazo_dias": plazo, "cobertura_dias": cobertura,
+    })
+    r["importe_pedido"] = r["sugerido"] * r["costo"]
+    # lexsort: la última clave manda (primero lo que hay que pedir, después los días de stock)
+    r = r.iloc[np.lexsort((np.nan_to_num(r["dias_stock"].to_numpy(), nan=np.inf), sugerido == 0))]
+    r = r.reset_index(drop=True)
+    return r, por_categoria(r, valores)
+
+
+def por_categoria(productos, valores):
+    """Por categoría: productos a pedir, unidades e importe del pedido y sus parámetros."""
+    r = productos.assign(a_pedir=productos["sugerido"] > 0).groupby("categoria", observed=True).agg(
+        productos=("id", "size"), a_pedir=("a_pedir", "sum"), sugerido=("sugerido", "sum"),
+        importe_pedido=("importe_pedido", "sum"), demanda_diaria=("demanda_diaria", "sum"), stock=("stock", "sum"))
+    r = r.reset_index()
+    r["plazo_dias"] = [valores[str(c)][0] for c in r["categoria"]]
+    r["cobertura_dias"] = [valores[str(c)][1] for c in r["categoria"]]
+    r["nivel_servicio"] = [valores[str(c)][2] for c in r["categoria"]]
+    return r.sort_values("importe_pedido", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def sugerencias_en_segundo_plano(actualizar_antes=True):
+    """
+    actualizar() (si hace falta) y sugerencias() en un hilo; estado = {"resultado",
+    "corrida", "error", "terminado"}, como analisis.analizar_en_segundo_plano.
+    """
+    estado = {"corrida": None}
+
+    def compras():
+        if actualizar_antes:
+            estado["corrida"] = actualizar()
+        return sugerencias()
+
+    return segundo_plano.en_segundo_plano(compras, estado)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pronóstico de demanda y sugerencias de compra")
+    ap.add_argument("--actualizar", action="store_true", help="procesar las ventas nuevas (para correr cada noche)")
+    ap.add_argument("--completo", action="store_true", help="rearmar el pronóstico de todos los productos")
+    ap.add_argument("--hasta", help="último día a procesar, YYYY-MM-DD (por defecto ayer)")
+    ap.add_argument("--salida", help="archivo .xlsx o .csv con las sugerencias")
+    ap.add_argument("--db", help="ruta de la BD (por defecto TIENDA_DB o tienda.db)")
+    args = ap.parse_args(argv)
+    if args.db:
+        database.configurar(args.db)
+    if args.actualizar or args.completo:
+        print(json.dumps(actualizar(args.hasta, completo=args.completo)))
+    if args.salida:
+        print("\n".join(analisis.guardar(args.salida, *sugerencias())))
+    elif not (args.actualizar or args.completo):
+        productos, categorias = sugerencias()
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(categorias.round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
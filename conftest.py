@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import pytest
+
+# Nunca tocar la tienda.db real desde las pruebas: se fija antes de importar
+# los módulos de la app (database.db_path se lee al importarse).
+os.environ.setdefault("TIENDA_DB", os.path.join(tempfile.mkdtemp(prefix="tienda_test_"), "tienda.db"))
+
+
+@pytest.fixture
+def bd(tmp_path):
+    """Pool apuntando a una BD nueva con el esquema de la app."""
+    import database
+    import migraciones
+
+    pool = database.configurar(str(tmp_path / "tienda.db"))
+    migraciones.migrar()
+    yield pool
+    pool.cerrar()
+
+
+@pytest.fixture
+def crear_producto(bd):
+    """crear_producto(nombre, stock, precio=, categoria=, codigo=) -> id; el costo es la mitad del precio."""
+    import productos
+
+    def crear(nombre, stock=0, *, precio=1000, categoria="Otros", codigo=None):
+        productos.agregar_o_actualizar_producto(nombre, precio / 2, precio, categoria, stock=stock,
+                                                codigo_barras=codigo)
+        return productos.buscar_productos(nombre)[0][0]
+
+    return crear
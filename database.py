@@ -1,51 +1,367 @@
 import sqlite3
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
 
-# Ruta absoluta a tienda.db
-db_path = os.path.join(os.path.dirname(__file__), 'tienda.db')
+import metricas
 
-def crear_base_de_datos():
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Crear tabla productos
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            precio REAL NOT NULL
+# Ruta absoluta a tienda.db (se puede cambiar con la variable TIENDA_DB)
+db_path = os.environ.get("TIENDA_DB") or os.path.join(os.path.dirname(__file__), 'tienda.db')
+
+
+# -----------------------------
+# Perfil de almacenamiento
+# -----------------------------
+# PRAGMA por conexión; se aplican una sola vez al abrirla.
+# journal_mode=WAL es persistente en el archivo y se fija en activar_wal().
+PERFIL_ALMACENAMIENTO = {
+    "busy_timeout": 5000,              # ms esperando un lock antes de "database is locked"
+    "synchronous": "NORMAL",           # seguro en WAL; evita un fsync por cada COMMIT
+    "cache_size": -16000,              # ~16 MB de páginas en memoria (negativo = KiB)
+    "mmap_size": 64 * 1024 * 1024,     # lecturas por mmap en vez de read()
+    "temp_store": "MEMORY",
+    "wal_autocheckpoint": 1000,        # páginas; el checkpoint periódico hace el resto
+}
+
+# Cada cuánto la UI pide un checkpoint pasivo del WAL
+CHECKPOINT_MS = 5 * 60 * 1000
+
+
+def aplicar_perfil(con, perfil=None):
+    for pragma, valor in (perfil or PERFIL_ALMACENAMIENTO).items():
+        con.execute(f"PRAGMA {pragma}={valor}")
+
+
+# -----------------------------
+# Conexiones con contador de consultas
+# -----------------------------
+# Con metricas.activo cada sentencia se mide como "sql.<verbo>" (execute/executemany;
+# las filas que se leen después con fetch* quedan en la medida de quien las pidió).
+class _CursorContado(sqlite3.Cursor):
+    def execute(self, sql, *args, **kwargs):
+        self.connection._pool._contar()
+        if not metricas.activo:
+            return super().execute(sql, *args, **kwargs)
+        with metricas.medir(metricas.nombre_sql(sql)):
+            return super().execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        self.connection._pool._contar()
+        if not metricas.activo:
+            return super().executemany(sql, *args, **kwargs)
+        with metricas.medir(metricas.nombre_sql(sql)):
+            return super().executemany(sql, *args, **kwargs)
+
+
+class _ConexionContada(sqlite3.Connection):
+    _pool = None
+
+    def cursor(self, factory=_CursorContado):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args, **kwargs):
+        self._pool._contar()
+        if not metricas.activo:
+            return super().execute(sql, *args, **kwargs)
+        with metricas.medir(metricas.nombre_sql(sql)):
+            return super().execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        self._pool._contar()
+        if not metricas.activo:
+            return super().executemany(sql, *args, **kwargs)
+        with metricas.medir(metricas.nombre_sql(sql)):
+            return super().executemany(sql, *args, **kwargs)
+
+
+# -----------------------------
+# Pool: un escritor + N lectores de larga vida
+# -----------------------------
+class PoolConexiones:
+    """
+    Conexiones persistentes a la BD compartidas por toda la app.
+    - Un solo escritor, protegido por un lock (SQLite admite un escritor a la vez).
+    - N lectores en una cola; cada uno se presta el tiempo de una consulta.
+    Los PRAGMA se aplican una vez al abrir cada conexión y las sentencias
+    preparadas quedan en la caché de cada conexión (cached_statements).
+    """
+
+    CACHE_SENTENCIAS = 256
+    # Si los N lectores están prestados se espera esto y después se abre uno de más,
+    # que se cierra al devolverlo: una lectura lenta nunca deja esperando a la caja.
+    ESPERA_LECTOR = 0.05
+
+    def __init__(self, ruta=None, lectores=2):
+        self.ruta = ruta or db_path
+        self.n_lectores = max(1, int(lectores))
+        self._lock_escritor = threading.RLock()
+        self._lock_stats = threading.Lock()
+        self._escritor = None
+        self._lectores = queue.LifoQueue()
+        self._todas = []
+        self._creados = 0
+        self.conexiones_abiertas = 0
+        self.consultas = 0
+        self.desbordes = 0              # lectores de más abiertos porque los N estaban prestados
+        self.lecturas_largas = 0
+        self.generacion = 0             # sube con cada COMMIT de este proceso (ver cambios.py)
+        self._rastreo = None
+
+    # --- internos ---
+    def _contar(self):
+        with self._lock_stats:
+            self.consultas += 1
+
+    def _abrir(self):
+        con = sqlite3.connect(
+            self.ruta,
+            timeout=5.0,
+            isolation_level=None,          # transacciones explícitas (BEGIN ... COMMIT)
+            check_same_thread=False,       # se comparten entre hilos, siempre bajo lock/cola
+            cached_statements=self.CACHE_SENTENCIAS,
+            factory=_ConexionContada,
         )
-    ''')
-
-    # Crear tabla ventas con columnas completas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS ventas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            producto TEXT NOT NULL,
-            cantidad INTEGER NOT NULL,
-            total REAL NOT NULL,
-            fecha TEXT NOT NULL
+        con._pool = self
+        con.execute("PRAGMA foreign_keys=ON")
+        aplicar_perfil(con)
+        if self._rastreo:
+            con.set_trace_callback(self._rastreo)
+        with self._lock_stats:
+            self.conexiones_abiertas += 1
+            self._todas.append(con)
+        return con
+
+    def _conexion_escritora(self):
+        # llamar con _lock_escritor tomado
+        if self._escritor is None:
+            self._escritor = self._abrir()
+        return self._escritor
+
+    # --- API ---
+    @contextmanager
+    def escritura(self):
+        """
+        Presta la conexión escritora dentro de una transacción BEGIN IMMEDIATE.
+        Hace COMMIT al salir o ROLLBACK si hubo excepción.
+        Es reentrante: un bloque anidado participa de la transacción exterior.
+        """
+        with metricas.medir("bd.espera_escritor"):     # otro hilo con la transacción abierta
+            self._lock_escritor.acquire()
+        try:
+            con = self._conexion_escritora()
+            if con.in_transaction:
+                yield con
+                return
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.rollback()
+                raise
+            else:
+                with metricas.medir("sql.commit"):
+                    con.commit()
+                self.generacion += 1
+        finally:
+            self._lock_escritor.release()
+
+    def _descartar(self, con):
+        with self._lock_stats:
+            if con in self._todas:
+                self._todas.remove(con)
+                self.conexiones_abiertas -= 1
+        con.close()
+
+    @contextmanager
+    def lectura(self):
+        """
+        Presta una conexión lectora (autocommit) y la devuelve a la cola. Si las N están
+        prestadas y ninguna vuelve en ESPERA_LECTOR, abre una temporal.
+        """
+        temporal = False
+        try:
+            con = self._lectores.get_nowait()
+        except queue.Empty:
+            with self._lock_stats:
+                if self._creados < self.n_lectores:
+                    self._creados += 1
+                    crear = True
+                else:
+                    crear = False
+            if crear:
+                con = self._abrir()
+            else:
+                try:
+                    con = self._lectores.get(timeout=self.ESPERA_LECTOR)
+                except queue.Empty:
+                    con = self._abrir()
+                    temporal = True
+                    with self._lock_stats:
+                        self.desbordes += 1
+        try:
+            yield con
+        finally:
+            if temporal:
+                self._descartar(con)
+            else:
+                self._lectores.put(con)
+
+    @contextmanager
+    def lectura_larga(self):
+        """
+        Conexión propia de solo lectura (mode=ro, query_only) para recorridos largos
+        (reportes, análisis, compras), dentro de una transacción de lectura: todo lo
+        leído es del mismo momento. No ocupa un lector del pool, así la caja no espera;
+        se abre y se cierra en cada uso.
+        """
+        ruta = os.path.abspath(self.ruta).replace("\\", "/")
+        con = sqlite3.connect(
+            f"file:{quote(ruta if ruta.startswith('/') else '/' + ruta)}?mode=ro",
+            uri=True,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,       # la usa un solo hilo de trabajo
+            factory=_ConexionContada,
         )
-    ''')
-
-    # Insertar productos si está vacía
-    cursor.execute("SELECT COUNT(*) FROM productos")
-    if cursor.fetchone()[0] == 0:
-        productos = [
-            ('Pan', 1000),
-            ('Leche', 3500),
-            ('Huevos', 12000),
-            ('Café', 8000)
-        ]
-        cursor.executemany("INSERT INTO productos (nombre, precio) VALUES (?, ?)", productos)
-        print("✅ Productos iniciales insertados.")
-
-    conn.commit()
-    conn.close()
+        con._pool = self
+        try:
+            aplicar_perfil(con)
+            con.execute("PRAGMA query_only=ON")
+            if self._rastreo:
+                con.set_trace_callback(self._rastreo)
+            with self._lock_stats:
+                self.lecturas_largas += 1
+            con.execute("BEGIN")
+            yield con
+        finally:
+            con.close()
 
-if __name__ == "__main__":
-    crear_base_de_datos()
+    def en_transaccion(self):
+        """True si la conexión escritora tiene una transacción abierta (de cualquier hilo)."""
+        con = self._escritor
+        return con is not None and con.in_transaction
 
+    def activar_wal(self):
+        """Pasa el archivo a journal_mode=WAL (persistente). Devuelve el modo final."""
+        with self._lock_escritor:
+            return self._conexion_escritora().execute("PRAGMA journal_mode=WAL").fetchone()[0]
 
+    def checkpoint(self, modo="PASSIVE"):
+        """
+        Copia el WAL a la BD principal. PASSIVE no bloquea lectores ni al escritor;
+        TRUNCATE además deja el -wal en cero (útil al cerrar la app).
+        Devuelve (ocupado, paginas_wal, paginas_copiadas).
+        """
+        with self._lock_escritor:
+            return self._conexion_escritora().execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
 
+    def rastrear(self, callback):
+        """Llama callback(sql) por cada sentencia en todas las conexiones (None lo quita)."""
+        with self._lock_stats:
+            self._rastreo = callback
+            for con in self._todas:
+                con.set_trace_callback(callback)
 
+    def estadisticas(self):
+        with self._lock_stats:
+            return {
+                "ruta": self.ruta,
+                "conexiones_abiertas": self.conexiones_abiertas,
+                "consultas": self.consultas,
+                "generacion": self.generacion,
+                "lectores": self.n_lectores,
+                "desbordes": self.desbordes,
+                "lecturas_largas": self.lecturas_largas,
+            }
+
+    def cerrar(self):
+        with self._lock_escritor, self._lock_stats:
+            for con in self._todas:
+                try:
+                    con.close()
+                except sqlite3.Error:
+                    pass
+            self._todas = []
+            self._escritor = None
+            self._lectores = queue.LifoQueue()
+            self._creados = 0
+
+
+# -----------------------------
+# Pool de proceso
+# -----------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(db_path)
+    return _pool
+
+
+def configurar(ruta, lectores=2):
+    """Apunta el pool de proceso a otra BD (pruebas, benchmarks, otra caja)."""
+    global _pool, db_path
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+        db_path = ruta
+        _pool = PoolConexiones(ruta, lectores=lectores)
+    return _pool
+
+
+def lectura():
+    return get_pool().lectura()
+
+
+def escritura():
+    return get_pool().escritura()
+
+
+def lectura_larga():
+    return get_pool().lectura_larga()
+
+
+def estadisticas():
+    return get_pool().estadisticas()
+
+
+def activar_wal():
+    return get_pool().activar_wal()
+
+
+def checkpoint(modo="PASSIVE"):
+    return get_pool().checkpoint(modo)
+
+
+def crear_base_de_datos():
+    # Las tablas productos, ventas y venta_items las define migraciones.py
+    from migraciones import migrar
+    migrar()
+
+    with escritura() as conn:
+        cursor = conn.cursor()
+
+        # Insertar productos si está vacía
+        cursor.execute("SELECT COUNT(*) FROM productos")
+        if cursor.fetchone()[0] == 0:
+            productos = [
+                ('Pan', 1000, 'Granos'),
+                ('Leche', 3500, 'Lácteos y Huevos'),
+                ('Huevos', 12000, 'Lácteos y Huevos'),
+                ('Café', 8000, 'Otros')
+            ]
+            cursor.executemany(
+                "INSERT INTO productos (nombre, precio, precio_venta, categoria) VALUES (?, ?, ?, ?)",
+                [(n, p, p, c) for n, p, c in productos]
+            )
+            print("✅ Productos iniciales insertados.")
+
+if __name__ == "__main__":
+    crear_base_de_datos()
@@ -0,0 +1,40 @@
+# escaner.py
+# Lectores de código de barras tipo "keyboard wedge": el lector se presenta como
+# un teclado, teclea el código en unos pocos ms y termina con Enter. LectorRafagas
+# separa esas ráfagas de lo que escribe una persona por el tiempo entre teclas.
+
+# ms máximos entre dos teclas de una misma ráfaga (un lector típico: 2-15 ms;
+# una persona rápida: más de 60 ms)
+MAX_INTERVALO_MS = 40
+# ráfagas más cortas no son un código (p. ej. dos teclas seguidas por accidente)
+MIN_LARGO = 4
+FIN = ("\r", "\n")
+
+
+class LectorRafagas:
+    """
+    tecla(caracter, t_ms) por cada tecla (t_ms: event.time de Tk, en ms).
+    Devuelve el código cuando un Enter cierra una ráfaga; si no, None.
+    """
+
+    def __init__(self, max_intervalo_ms=MAX_INTERVALO_MS, min_largo=MIN_LARGO):
+        self.max_intervalo_ms = max_intervalo_ms
+        self.min_largo = min_largo
+        self._buffer = []
+        self._ultima = None
+
+    def tecla(self, caracter, t_ms):
+        if self._ultima is not None and t_ms - self._ultima > self.max_intervalo_ms:
+            self._buffer.clear()
+        self._ultima = t_ms
+        if caracter in FIN:
+            codigo = "".join(self._buffer)
+            self._buffer.clear()
+            self._ultima = None
+            return codigo if len(codigo) >= self.min_largo else None
+        if len(caracter) == 1 and caracter.isprintable():
+            self._buffer.append(caracter)
+        return None
+
+    def en_rafaga(self):
+        return bool(self._buffer)
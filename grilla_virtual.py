@@ -0,0 +1,172 @@
+# grilla_virtual.py
+# Grilla de tarjetas virtualizada: solo existen los widgets de las filas visibles
+# (más unas pocas de margen) y se reciclan al hacer scroll.
+import tkinter as tk
+from tkinter import ttk
+
+
+def rango_visible(y0, alto_vista, alto_fila, n_filas, overscan=1):
+    """Filas [desde, hasta) que deben estar materializadas para la vista actual."""
+    if n_filas <= 0 or alto_fila <= 0:
+        return 0, 0
+    desde = max(0, int(y0 // alto_fila) - overscan)
+    hasta = min(n_filas, int((y0 + max(alto_vista, 0)) // alto_fila) + 1 + overscan)
+    return desde, max(desde, hasta)
+
+
+# -----------------------------
+# Modelo (sin Tk): qué item va en qué ranura
+# -----------------------------
+class ModeloGrilla:
+    """
+    Reparte los items visibles en un conjunto de "ranuras" reciclables.
+    Cada ranura es una tarjeta ya creada; solo se crea una nueva cuando no hay libres.
+    """
+
+    def __init__(self, columnas=2, alto_fila=150, overscan=1):
+        self.columnas = columnas
+        self.alto_fila = alto_fila
+        self.overscan = overscan
+        self.items = []
+        self.asignadas = {}     # índice de item -> ranura
+        self.n_ranuras = 0
+        self._libres = []
+        self._por_ocultar = set()
+
+    def n_filas(self):
+        return -(-len(self.items) // self.columnas)
+
+    def alto_total(self):
+        return self.n_filas() * self.alto_fila
+
+    def posicion(self, indice):
+        """(fila, columna) del item."""
+        return divmod(indice, self.columnas)
+
+    def set_items(self, items):
+        self.items = list(items)
+        libres = list(self.asignadas.values())
+        self.asignadas = {}
+        self._libres.extend(libres)
+        self._por_ocultar.update(libres)
+
+    def actualizar(self, y0, alto_vista):
+        """
+        Devuelve (nuevas, ocultas):
+        - nuevas: [(ranura, indice)] tarjetas a las que hay que asignar un item y ubicar.
+        - ocultas: [ranura] tarjetas que quedaron sin item.
+        """
+        desde, hasta = rango_visible(y0, alto_vista, self.alto_fila, self.n_filas(), self.overscan)
+        necesarios = range(desde * self.columnas, min(hasta * self.columnas, len(self.items)))
+
+        ocultas = self._por_ocultar
+        self._por_ocultar = set()
+        for indice in [i for i in self.asignadas if i not in necesarios]:
+            ranura = self.asignadas.pop(indice)
+            self._libres.append(ranura)
+            ocultas.add(ranura)
+
+        nuevas = []
+        for indice in necesarios:
+            if indice in self.asignadas:
+                continue
+            if self._libres:
+                ranura = self._libres.pop()
+            else:
+                ranura = self.n_ranuras
+                self.n_ranuras += 1
+            self.asignadas[indice] = ranura
+            ocultas.discard(ranura)
+            nuevas.append((ranura, indice))
+        return nuevas, sorted(ocultas)
+
+
+# -----------------------------
+# Widget
+# -----------------------------
+class GrillaVirtual(ttk.Frame):
+    """
+    Reemplazo de ScrollableFrame para listas largas de tarjetas.
+    crear_tarjeta(parent) debe devolver un widget con .asignar(item).
+    """
+
+    PAD = 8
+
+    def __init__(self, parent, crear_tarjeta, columnas=2, alto_fila=150, overscan=1, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.crear_tarjeta = crear_tarjeta
+        self.modelo = ModeloGrilla(columnas, alto_fila, overscan)
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="right", fill="y")
+
+        self._tarjetas = []     # ranura -> (tarjeta, id de ventana en el canvas)
+        self._ancho = 0
+        self._programado = None
+        self._msg = self.canvas.create_text(16, 16, anchor="nw", text="", fill="#6b7280")
+
+        self.canvas.bind("<Configure>", lambda e: self._programar())
+        self.bind_all("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1*(e.delta//120), "units"))
+
+    # --- API ---
+    def set_items(self, items, al_inicio=True):
+        """Reemplaza el contenido; con al_inicio=False conserva la posición del scroll."""
+        self.modelo.set_items(items)
+        self.canvas.itemconfigure(self._msg, text="")
+        self._ajustar_region()
+        if al_inicio:
+            self.canvas.yview_moveto(0)
+        self._refrescar()
+
+    def mensaje(self, texto):
+        """Vacía la grilla y muestra un texto (p. ej. "Sin resultados…")."""
+        self.set_items([])
+        self.canvas.itemconfigure(self._msg, text=texto)
+
+    def tarjetas_creadas(self):
+        return len(self._tarjetas)
+
+    # --- internos ---
+    def _on_scroll(self, *args):
+        self.vsb.set(*args)
+        self._programar()
+
+    def _programar(self):
+        if self._programado is None:
+            self._programado = self.after_idle(self._refrescar)
+
+    def _ajustar_region(self):
+        ancho = max(self.canvas.winfo_width(), 1)
+        self.canvas.configure(scrollregion=(0, 0, ancho, self.modelo.alto_total()))
+
+    def _colocar(self, ranura, indice):
+        _, ventana = self._tarjetas[ranura]
+        fila, col = self.modelo.posicion(indice)
+        ancho_col = max(self._ancho // self.modelo.columnas, 1)
+        self.canvas.coords(ventana, col * ancho_col + self.PAD, fila * self.modelo.alto_fila + self.PAD)
+        self.canvas.itemconfigure(ventana, state="normal",
+                                  width=max(ancho_col - 2 * self.PAD, 1),
+                                  height=self.modelo.alto_fila - 2 * self.PAD)
+
+    def _refrescar(self):
+        self._programado = None
+        ancho = max(self.canvas.winfo_width(), 1)
+        if ancho != self._ancho:
+            # cambió el ancho: reubicar también las que ya estaban visibles
+            self._ancho = ancho
+            self._ajustar_region()
+            for indice, ranura in self.modelo.asignadas.items():
+                self._colocar(ranura, indice)
+
+        nuevas, ocultas = self.modelo.actualizar(self.canvas.canvasy(0), self.canvas.winfo_height())
+        for ranura in ocultas:
+            self.canvas.itemconfigure(self._tarjetas[ranura][1], state="hidden")
+        for ranura, indice in nuevas:
+            if ranura == len(self._tarjetas):
+                tarjeta = self.crear_tarjeta(self.canvas)
+                ventana = self.canvas.create_window(0, 0, window=tarjeta, anchor="nw")
+                self._tarjetas.append((tarjeta, ventana))
+            self._tarjetas[ranura][0].asignar(self.modelo.items[indice])
+            self._colocar(ranura, indice)
@@ -0,0 +1,243 @@
+# importar.py
+# Carga masiva de productos (lista de precios del proveedor) desde CSV o Excel.
+# El archivo se lee por lotes, cada lote se valida de una vez con pandas y las
+# filas válidas se escriben con un solo INSERT ... ON CONFLICT(nombre) DO UPDATE
+# (executemany) dentro de una transacción. Las filas con errores se informan y se saltan.
+import os
+import threading
+import time
+import unicodedata
+
+import pandas as pd
+
+import database
+import migraciones
+import movimientos
+import segundo_plano
+
+LOTE = 5000
+FORMATOS = ("csv", "xlsx")
+OBLIGATORIAS = ("nombre", "categoria", "costo", "precio")
+# encabezados que se aceptan además de los nombres de columna de productos
+ALIAS = {"producto": "nombre", "precio_venta": "precio", "precio venta": "precio", "cantidad": "stock",
+         "codigo": "codigo_barras", "codigo de barras": "codigo_barras", "ean": "codigo_barras"}
+# errores que se guardan como máximo (el conteo sigue)
+MAX_ERRORES = 1000
+
+# Un stock o código de barras vacío en el archivo no toca el existente (un producto
+# nuevo queda en 0 / sin código). Las filas iguales a lo que ya hay no se reescriben
+# (ni anotan en productos_cambios). Un código que ya es de otro producto aborta todo.
+SQL_UPSERT = """
+    INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock, codigo_barras)
+    VALUES (?1, ?2, ?3, ?4, ?4, COALESCE(?5, 0), ?6)
+    ON CONFLICT(nombre) DO UPDATE SET
+        categoria = excluded.categoria,
+        costo = excluded.costo,
+        precio = excluded.precio,
+        precio_venta = excluded.precio_venta,
+        stock = COALESCE(?5, productos.stock),
+        codigo_barras = COALESCE(?6, productos.codigo_barras)
+    WHERE (productos.categoria, productos.costo, productos.precio, productos.precio_venta)
+              IS NOT (excluded.categoria, excluded.costo, excluded.precio, excluded.precio_venta)
+          OR productos.stock IS NOT COALESCE(?5, productos.stock)
+          OR productos.codigo_barras IS NOT COALESCE(?6, productos.codigo_barras)
+"""
+# Base vieja con nombres repetidos (sin índice único, ver migraciones.nombre_unico):
+# lo mismo en dos pasos, primero el alta de los nombres nuevos y después la actualización
+# (así, como en el upsert, gana la última fila del archivo); un nombre repetido en la
+# base actualiza todas sus filas
+SQL_ACTUALIZAR = """
+    UPDATE productos SET categoria = ?2, costo = ?3, precio = ?4, precio_venta = ?4,
+        stock = COALESCE(?5, stock), codigo_barras = COALESCE(?6, codigo_barras)
+    WHERE nombre = ?1
+      AND ((categoria, costo, precio, precio_venta) IS NOT (?2, ?3, ?4, ?4)
+           OR stock IS NOT COALESCE(?5, stock)
+           OR codigo_barras IS NOT COALESCE(?6, codigo_barras))
+"""
+SQL_INSERTAR = """
+    INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock, codigo_barras)
+    SELECT ?1, ?2, ?3, ?4, ?4, COALESCE(?5, 0), ?6
+    WHERE NOT EXISTS (SELECT 1 FROM productos WHERE nombre = ?1)
+"""
+
+
+class ImportacionCancelada(Exception):
+    pass
+
+
+# -----------------------------
+# Lectura por lotes
+# -----------------------------
+def _columna(encabezado):
+    texto = unicodedata.normalize("NFKD", str(encabezado or "")).encode("ascii", "ignore").decode()
+    texto = texto.strip().lower()
+    return ALIAS.get(texto, texto)
+
+
+def _lotes_csv(ruta, lote):
+    # sep=None: detecta coma o punto y coma (Excel en español guarda con ;)
+    lector = pd.read_csv(ruta, dtype=str, keep_default_na=False, sep=None, engine="python",
+                         encoding="utf-8-sig", chunksize=lote)
+    for df in lector:
+        yield df
+
+
+def _lotes_xlsx(ruta, lote):
+    from openpyxl import load_workbook
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = wb.worksheets[0].iter_rows(values_only=True)
+        columnas = next(filas, None)
+        if columnas is None:
+            return
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == lote:
+                yield pd.DataFrame(bloque, columns=columnas, dtype=object)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas, dtype=object)
+    finally:
+        wb.close()
+
+
+LECTORES = {"csv": _lotes_csv, "xlsx": _lotes_xlsx}
+
+
+# -----------------------------
+# Validación (vectorizada por lote)
+# -----------------------------
+def _texto(serie):
+    return serie.astype("string").fillna("").str.strip()
+
+
+def _numero(serie):
+    """'$ 1.500', '2500,5', 1800 -> float (punto de miles, coma decimal); lo que no sea número queda NaN."""
+    texto = _texto(serie).str.replace(r"[$\s]", "", regex=True)
+    miles = texto.str.fullmatch(r"-?\d{1,3}(\.\d{3})+(,\d+)?")
+    texto = texto.mask(miles, texto.str.replace(".", "", regex=False))
+    texto = texto.str.replace(r"^(-?\d+),(\d+)$", r"\1.\2", regex=True)
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def validar_lote(df, primera_fila):
+    """
+    Devuelve (filas, errores):
+    - filas: tuplas (nombre, categoria, costo, precio, stock|None, codigo|None) listas para SQL_UPSERT.
+    - errores: (fila_del_archivo, mensaje); primera_fila es la fila del archivo del primer registro.
+    """
+    df = df.rename(columns=_columna)
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    nombre = _texto(df["nombre"])
+    categoria = _texto(df["categoria"])
+    costo = _numero(df["costo"])
+    precio = _numero(df["precio"])
+    if "stock" in df:
+        sin_stock = _texto(df["stock"]).eq("")
+        stock = _numero(df["stock"])
+    else:
+        sin_stock = pd.Series(True, index=df.index)
+        stock = pd.Series(float("nan"), index=df.index)
+    codigo = _texto(df["codigo_barras"]) if "codigo_barras" in df else pd.Series("", index=df.index)
+
+    problemas = [
+        (nombre.eq(""), "falta el nombre"),
+        (categoria.eq(""), "falta la categoría"),
+        (costo.isna() | (costo < 0), "costo inválido"),
+        (precio.isna() | (precio < 0), "precio inválido"),
+        (~sin_stock & (stock.isna() | (stock < 0) | (stock % 1 != 0)), "stock inválido"),
+        (codigo.ne("") & codigo.duplicated(keep=False), "código de barras repetido en el archivo"),
+    ]
+    mensajes = pd.Series("", index=df.index, dtype=object)
+    for mascara, texto in problemas:
+        mensajes = mensajes.mask(mascara, mensajes.where(mensajes.eq(""), mensajes + "; ") + texto)
+    malas = mensajes.ne("")
+    errores = [(primera_fila + i, mensajes[i]) for i in malas[malas].index]
+
+    buenas = ~malas
+    stock = stock.where(~sin_stock)[buenas]
+    filas = list(zip(nombre[buenas].tolist(), categoria[buenas].tolist(),
+                     costo[buenas].tolist(), precio[buenas].tolist(),
+                     [None if pd.isna(x) else int(x) for x in stock.tolist()],
+                     [c or None for c in codigo[buenas].tolist()]))
+    return filas, errores
+
+
+# -----------------------------
+# Importación
+# -----------------------------
+def importar(ruta, formato=None, lote=LOTE, progreso=None, cancelar=None):
+    """
+    Importa una lista de productos. Columnas: nombre, categoria, costo, precio y
+    (opcionales) stock y codigo_barras; tildes, mayúsculas y algunos alias en los encabezados dan igual.
+    Un nombre que ya existe se actualiza; si el stock viene vacío se conserva el actual.
+    Todo va en una transacción: si se cancela o falla no queda nada a medias.
+    progreso(filas_leidas). Devuelve {"filas", "importadas", "errores", "segundos", "filas_por_s"};
+    errores: [(fila_del_archivo, mensaje)] (los primeros MAX_ERRORES) y n_errores con el total.
+    """
+    formato = (formato or os.path.splitext(ruta)[1].lstrip(".") or "csv").lower()
+    if formato not in LECTORES:
+        raise ValueError(f"Formato no soportado: {formato} (usa {', '.join(FORMATOS)})")
+
+    t = time.perf_counter()
+    leidas = importadas = n_errores = 0
+    errores = []
+    with database.escritura() as con:
+        cur = con.cursor()
+        migraciones.pausar_indice_busqueda(cur)
+        movimientos.fijar_motivo(cur, "importacion")
+        sentencias = [SQL_UPSERT] if migraciones.nombre_unico(cur) else [SQL_INSERTAR, SQL_ACTUALIZAR]
+        for df in LECTORES[formato](ruta, lote):
+            if cancelar is not None and cancelar.is_set():
+                raise ImportacionCancelada()
+            faltan = [c for c in OBLIGATORIAS if c not in {_columna(x) for x in df.columns}]
+            if faltan:
+                raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltan)}")
+            # fila 1 = encabezado
+            filas, errs = validar_lote(df, leidas + 2)
+            for sql in sentencias:
+                cur.executemany(sql, filas)
+            leidas += len(df)
+            importadas += len(filas)
+            n_errores += len(errs)
+            errores.extend(errs[:MAX_ERRORES - len(errores)])
+            if progreso:
+                progreso(leidas)
+        migraciones.reanudar_indice_busqueda(cur)
+        movimientos.fijar_motivo(cur, "externo")
+    # el catálogo en memoria se pone al día por el log de cambios (ver catalogo.py)
+    segundos = time.perf_counter() - t
+    return {"filas": leidas, "importadas": importadas, "errores": errores, "n_errores": n_errores,
+            "segundos": round(segundos, 3), "filas_por_s": round(leidas / segundos) if segundos else 0}
+
+
+def importar_en_segundo_plano(ruta, **kwargs):
+    """
+    Corre importar() en un hilo. Devuelve (estado, cancelar):
+    estado = {"leidas", "resultado", "error", "terminado"} (la UI lo lee con root.after).
+    """
+    estado = {"leidas": 0}
+    cancelar = threading.Event()
+
+    def progreso(leidas):
+        estado["leidas"] = leidas
+
+    segundo_plano.en_segundo_plano(importar, estado, ruta=ruta, progreso=progreso, cancelar=cancelar, **kwargs)
+    return estado, cancelar
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Importa una lista de productos desde CSV o Excel")
+    ap.add_argument("archivo")
+    ap.add_argument("--formato", choices=FORMATOS)
+    args = ap.parse_args()
+    migraciones.migrar()
+    r = importar(args.archivo, formato=args.formato)
+    print(f"✅ {r['importadas']} de {r['filas']} filas importadas en {r['segundos']} s ({r['filas_por_s']} filas/s).")
+    for fila, mensaje in r["errores"]:
+        print(f"  fila {fila}: {mensaje}")
+    if r["n_errores"] > len(r["errores"]):
+        print(f"  … y {r['n_errores'] - len(r['errores'])} errores más")
@@ -1,74 +1,154 @@
 # interfaz_unificada_tienda.py
-from productos import (
-    interfaz_registro_producto,
-    interfaz_admin_productos,
-    db_path,  # misma BD que productos.py
-)
+# Los módulos que solo usa una ventana secundaria (productos, reportes,
+# importar -> pandas) se importan al abrirla, no al arrancar la caja.
+import database  # pool compartido, misma BD que productos.py
+import busqueda
+import catalogo
+import migraciones
+import metricas
+import movimientos
+import carrito
+import cliente
+import cola_ventas
+from ventas import StockInsuficiente
+import escaner
+import cambios
+from grilla_virtual import GrillaVirtual
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import sqlite3
-from datetime import datetime
+from bisect import bisect_left
+from datetime import datetime, timedelta
 
 
 # -----------------------------
-# Helpers de BD
+# Helpers de BD (en inventario.py, compartidos con servicio.py)
 # -----------------------------
-def ensure_stock_column():
-    """Garantiza que exista la columna stock en la tabla productos."""
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cols = [c[1] for c in cur.execute("PRAGMA table_info(productos)")]
-    if "stock" not in cols:
-        try:
-            cur.execute("ALTER TABLE productos ADD COLUMN stock INTEGER DEFAULT 0")
-            con.commit()
-        except sqlite3.OperationalError:
-            pass
-    con.close()
+from inventario import (ajustar_stock, ajustar_stock_en, obtener_categorias,  # noqa: E402,F401
+                        obtener_inventario, obtener_inventario_ids, obtener_productos_por_categoria)
 
 
-def obtener_productos_por_categoria(categoria, filtro=""):
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    try:
-        if filtro:
-            cur.execute(
-                """SELECT nombre, COALESCE(precio_venta,precio) AS precio_venta, stock
-                   FROM productos
-                   WHERE categoria=? AND nombre LIKE ?
-                   ORDER BY nombre ASC""",
-                (categoria, f"%{filtro}%"),
-            )
-        else:
-            cur.execute(
-                """SELECT nombre, COALESCE(precio_venta,precio) AS precio_venta, stock
-                   FROM productos
-                   WHERE categoria=?
-                   ORDER BY nombre ASC""",
-                (categoria,),
-            )
-        productos = cur.fetchall()
-    except sqlite3.OperationalError:
-        if filtro:
-            cur.execute(
-                """SELECT nombre, COALESCE(precio_venta,precio) AS precio_venta
-                   FROM productos
-                   WHERE categoria=? AND nombre LIKE ?
-                   ORDER BY nombre ASC""",
-                (categoria, f"%{filtro}%"),
-            )
-        else:
-            cur.execute(
-                """SELECT nombre, COALESCE(precio_venta,precio) AS precio_venta
-                   FROM productos
-                   WHERE categoria=?
-                   ORDER BY nombre ASC""",
-                (categoria,),
-            )
-        productos = [(n, p, None) for (n, p) in cur.fetchall()]
-    finally:
-        con.close()
-    return productos
+def detalle_faltantes(error, nombres):
+    """Texto de StockInsuficiente con nombres: {producto_id: nombre}."""
+    return "\n".join(f"• {nombres.get(pid, f'producto {pid}')}: pide {pedido}, hay {disponible}"
+                     for pid, (pedido, disponible) in sorted(error.faltantes.items()))
+
+
+# -----------------------------
+# Árbol del inventario (categoría > producto) actualizado por diferencias
+# -----------------------------
+class ArbolInventario:
+    """
+    Mantiene un ttk.Treeview con las filas (id, categoria, nombre, stock) tocando
+    solo los nodos que cambian. ops cuenta las operaciones sobre el widget.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.ops = 0
+        self._filas = {}        # id -> (categoria, nombre, stock)
+        self._cats = []         # categorías en orden
+        self._orden = {}        # categoria -> [(nombre, id)] en orden
+
+    @staticmethod
+    def iid_producto(pid):
+        return f"p{pid}"
+
+    @staticmethod
+    def iid_categoria(categoria):
+        return f"c:{categoria}"
+
+    def cargar(self, filas):
+        """Deja exactamente estas filas (cambio de filtro, recarga completa)."""
+        filas = list(filas)
+        self.aplicar(filas, set(self._filas) | {f[0] for f in filas})
+
+    def aplicar(self, filas, ids):
+        """Revisa solo los ids dados: los que vienen en filas se agregan/actualizan, el resto se quita."""
+        nuevas = {f[0]: tuple(f[1:]) for f in filas}
+        for pid in ids:
+            antes, ahora = self._filas.get(pid), nuevas.get(pid)
+            if antes == ahora:
+                continue
+            if antes is not None and (ahora is None or antes[:2] != ahora[:2]):
+                self._quitar(pid, antes)     # desapareció o cambió de categoría/nombre
+                antes = None
+            if ahora is None:
+                continue
+            if antes is None:
+                self._insertar(pid, ahora)
+            else:
+                self.tree.item(self.iid_producto(pid), values=(ahora[2],))
+                self.ops += 1
+                self._filas[pid] = ahora
+
+    def _insertar(self, pid, fila):
+        categoria, nombre, stock = fila
+        if categoria not in self._orden:
+            i = bisect_left(self._cats, categoria)
+            self._cats.insert(i, categoria)
+            self._orden[categoria] = []
+            self.tree.insert("", i, iid=self.iid_categoria(categoria), text=categoria, values=("",), open=True)
+            self.ops += 1
+        hijos = self._orden[categoria]
+        i = bisect_left(hijos, (nombre, pid))
+        hijos.insert(i, (nombre, pid))
+        self.tree.insert(self.iid_categoria(categoria), i, iid=self.iid_producto(pid),
+                         text=nombre, values=(stock,))
+        self.ops += 1
+        self._filas[pid] = fila
+
+    def _quitar(self, pid, fila):
+        categoria, nombre, _stock = fila
+        self.tree.delete(self.iid_producto(pid))
+        self.ops += 1
+        del self._filas[pid]
+        hijos = self._orden[categoria]
+        hijos.pop(bisect_left(hijos, (nombre, pid)))
+        if not hijos:
+            self.tree.delete(self.iid_categoria(categoria))
+            self.ops += 1
+            del self._orden[categoria]
+            self._cats.pop(bisect_left(self._cats, categoria))
+
+
+# Columnas de las tablas de las ventanas "Análisis" y "Sugerencias de compra":
+# (columna del DataFrame, encabezado, ancho, formato)
+COLUMNAS_ANALISIS = {
+    "productos": [("nombre", "Producto", 220, str), ("categoria", "Categoría", 130, str), ("clase", "ABC", 40, str),
+                  ("unidades", "Unidades", 70, "{:,.0f}"), ("importe", "Ventas", 100, "$"), ("margen", "Margen", 100, "$"),
+                  ("margen_pct", "Margen %", 70, "{:.1%}"), ("velocidad", "Unid./día", 70, "{:.2f}"),
+                  ("stock", "Stock", 60, "{:,.0f}"), ("dias_stock", "Días de stock", 90, "{:,.0f}")],
+    "categorias": [("categoria", "Categoría", 180, str), ("productos", "Productos", 70, "{:,.0f}"),
+                   ("unidades", "Unidades", 80, "{:,.0f}"), ("importe", "Ventas", 110, "$"), ("margen", "Margen", 110, "$"),
+                   ("margen_pct", "Margen %", 70, "{:.1%}"), ("clase_A", "A", 50, "{:,.0f}"),
+                   ("clase_B", "B", 50, "{:,.0f}"), ("clase_C", "C", 50, "{:,.0f}"),
+                   ("dias_stock", "Días de stock", 90, "{:,.0f}")],
+}
+COLUMNAS_COMPRAS = {
+    "productos": [("nombre", "Producto", 220, str), ("categoria", "Categoría", 130, str),
+                  ("stock", "Stock", 60, "{:,.0f}"), ("demanda_diaria", "Unid./día", 70, "{:.2f}"),
+                  ("dias_stock", "Días de stock", 90, "{:,.0f}"), ("punto_pedido", "Punto de pedido", 100, "{:,.1f}"),
+                  ("stock_seguridad", "Seguridad", 70, "{:,.1f}"), ("sugerido", "Pedir", 60, "{:,.0f}"),
+                  ("importe_pedido", "Costo del pedido", 110, "$")],
+    "categorias": [("categoria", "Categoría", 180, str), ("productos", "Productos", 70, "{:,.0f}"),
+                   ("a_pedir", "A pedir", 70, "{:,.0f}"), ("sugerido", "Unidades", 80, "{:,.0f}"),
+                   ("importe_pedido", "Costo del pedido", 120, "$"), ("plazo_dias", "Plazo (días)", 80, "{:,.0f}"),
+                   ("cobertura_dias", "Cobertura (días)", 100, "{:,.0f}"), ("nivel_servicio", "Servicio", 70, "{:.1%}")],
+}
+# Filas que se pintan por tabla (el orden se aplica antes, sobre todas)
+MAX_FILAS_TABLA = 500
+
+
+def _fmt_tabla(v, formato):
+    if formato is str:
+        return "" if v is None else str(v)
+    if v != v:       # NaN: sin ventas / sin stock
+        return "—"
+    if formato == "$":
+        return fmt_moneda(v)
+    # 1,234.5 -> 1.234,5
+    return formato.format(v).replace(",", "_").replace(".", ",").replace("_", ".")
 
 
 def fmt_moneda(v):
@@ -79,20 +159,95 @@ def fmt_moneda(v):
 
 
 # -----------------------------
-# Scrollable (para tarjetas)
+# Tabla ordenable sobre un DataFrame (Análisis, Sugerencias de compra)
+# -----------------------------
+class TablaDatos:
+    """
+    Treeview con columnas [(columna, encabezado, ancho, formato)]. Un clic en el encabezado
+    ordena el DataFrame entero con pandas y se pintan las primeras MAX_FILAS_TABLA filas.
+    """
+    # arrancan de menor a mayor; las demás de mayor a menor
+    ASCENDENTES = ("nombre", "categoria", "clase", "dias_stock")
+
+    def __init__(self, parent, columnas):
+        self.columnas = columnas
+        self.df = None              # en el orden mostrado
+        self._orden = (None, False)
+        self.tree = ttk.Treeview(parent, columns=[c for c, *_ in columnas], show="headings", selectmode="browse")
+        for col, encabezado, ancho, formato in columnas:
+            self.tree.heading(col, text=encabezado, command=lambda c=col: self.ordenar(c))
+            self.tree.column(col, width=ancho, anchor="w" if formato is str else "e")
+        barra = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=barra.set)
+        barra.pack(side="right", fill="y"); self.tree.pack(fill="both", expand=True)
+
+    def mostrar(self, df):
+        self.df = df
+        self._orden = (None, False)
+        self._pintar()
+
+    def ordenar(self, col):
+        if self.df is None:
+            return
+        previa, ascendente = self._orden
+        ascendente = not ascendente if previa == col else col in self.ASCENDENTES
+        self._orden = (col, ascendente)
+        # vectorizado sobre todas las filas; solo se pintan las primeras
+        self.df = self.df.sort_values(col, ascending=ascendente, kind="stable", na_position="last")
+        self._pintar()
+
+    def seleccionada(self):
+        """Fila (Series) seleccionada, o None."""
+        sel = self.tree.selection()
+        return self.df.iloc[int(sel[0])] if sel and self.df is not None else None
+
+    def _pintar(self):
+        self.tree.delete(*self.tree.get_children())
+        nombres = [c for c, *_ in self.columnas]
+        for i, fila in enumerate(self.df[nombres].head(MAX_FILAS_TABLA).itertuples(index=False)):
+            self.tree.insert("", "end", iid=str(i),
+                             values=[_fmt_tabla(v, f) for v, (_c, _e, _a, f) in zip(fila, self.columnas)])
+
+
+# -----------------------------
+# Tarjeta de producto (reciclable por GrillaVirtual)
 # -----------------------------
-class ScrollableFrame(ttk.Frame):
-    def __init__(self, parent, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        canvas = tk.Canvas(self, highlightthickness=0)
-        vsb = ttk.Scrollbar(self, orient="vertical", command=canvas.yview)
-        self.inner = ttk.Frame(canvas)
-        self.inner.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self.inner, anchor="nw")
-        canvas.configure(yscrollcommand=vsb.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        vsb.pack(side="right", fill="y")
-        self.bind_all("<MouseWheel>", lambda e: canvas.yview_scroll(-1*(e.delta//120), "units"))
+class TarjetaProducto(ttk.Frame):
+    """Widgets de una tarjeta; asignar() cambia el producto que muestra sin recrearla."""
+
+    def __init__(self, parent, agregar):
+        super().__init__(parent, style="Card.TFrame")
+        self._agregar = agregar
+        self.producto = None
+
+        body = ttk.Frame(self, style="Surface.TFrame")
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.lbl_nombre = ttk.Label(body, style="Strong.TLabel")
+        self.lbl_nombre.pack(anchor="w")
+        self.lbl_precio = ttk.Label(body, style="Card.TLabel")
+        self.lbl_precio.pack(anchor="w", pady=(2, 0))
+        self.lbl_stock = ttk.Label(body, style="Muted.TLabel")
+        self.lbl_stock.pack(anchor="w")
+
+        fila = ttk.Frame(body); fila.pack(fill="x", pady=6)
+        ttk.Button(fila, text="Agregar", style="Primary.TButton",
+                   command=lambda: self._click(1)).pack(side="left")
+        ttk.Button(fila, text="+1", width=4, command=lambda: self._click(1)).pack(side="left", padx=6)
+        ttk.Button(fila, text="+5", width=4, command=lambda: self._click(5)).pack(side="left")
+
+    def asignar(self, producto):
+        pid, nombre, precio, stock = producto
+        self.producto = producto
+        self.lbl_nombre.config(text=f"🧺  {nombre}")
+        self.lbl_precio.config(text=f"Precio: {fmt_moneda(precio or 0)}")
+        self.lbl_stock.config(text=f"Stock: {stock}" if stock is not None else "")
+
+    def _click(self, cantidad):
+        if self.producto is None:
+            return
+        pid, nombre, precio, _stock = self.producto
+        self._agregar(nombre, precio or 0, cantidad=cantidad, producto_id=pid)
 
 
 # -----------------------------
@@ -116,13 +271,31 @@ class TiendaApp:
         self.root.geometry("1150x650")
         self.root.minsize(1000, 600)
 
-        ensure_stock_column()  # importante para inventario/ventas
+        # modo cliente (TIENDA_SERVICIO): servicio.py es dueño de la BD y de las escrituras;
+        # esta caja solo la lee (catálogo en memoria, inventario, reportes)
+        self.servicio = cliente.desde_entorno()
+        self.cola_ventas = None
+        if self.servicio is None:
+            migraciones.migrar()  # una vez por arranque: la BD queda en el esquema actual
+            # cobro sin esperar al disco: diario con fsync + escritor en segundo plano;
+            # lo que quedó en el diario de la sesión anterior se aplica ahora (con la BD
+            # bloqueada por otra caja queda para el escritor, que reintenta)
+            self.cola_ventas = cola_ventas.ColaVentas(
+                al_aplicar=lambda hechos: self.root.after(0, self._on_ventas_aplicadas, hechos),
+                al_rechazar=lambda entrada, error: self.root.after(0, self._on_venta_rechazada, entrada, error))
+            self.cola_ventas.recuperar()
+            self.cola_ventas.iniciar()
+        self._productos = self.servicio.productos if self.servicio else obtener_productos_por_categoria
+        self.root.protocol("WM_DELETE_WINDOW", self._al_cerrar)
 
         self._configurar_tema()
 
-        self.carrito = {}       # nombre -> {"precio": float, "cantidad": int}
+        self.carrito = carrito.Carrito()    # emite un Cambio por línea; total en centavos
+        self.vigilante = cambios.VigilanteCambios(self.root)   # avisos para las vistas abiertas
         self.categoria_actual = None
         self.filtro_actual = tk.StringVar()
+        self.lector = escaner.LectorRafagas()
+        self.modo_escaner = tk.BooleanVar(value=True)
 
         self._crear_topbar()
         self._crear_sidebar()
@@ -133,9 +306,33 @@ class TiendaApp:
         self.root.bind("<Control-f>", lambda e: self.entry_buscar.focus_set())
         self.root.bind("<Delete>", lambda e: self.eliminar_seleccion())
         self.root.bind("<Control-n>", lambda e: self.vaciar_carrito())
+        self.root.bind("<Control-D>", lambda e: self.ventana_diagnostico())     # Ctrl+Shift+D, sin botón
+        # lector de código de barras: todas las teclas de la ventana principal pasan por el lector
+        self.root.bind_all("<Key>", self._on_tecla_escaner, add="+")
 
         self.mostrar_categorias()
 
+        # WAL: checkpoint pasivo periódico para que el -wal no crezca sin límite (en modo
+        # cliente lo hace el servicio)
+        if self.servicio is None:
+            self.root.after(database.CHECKPOINT_MS, self._checkpoint_wal)
+        # después del primer pintado: el catálogo se carga en un hilo aparte
+        self.root.after_idle(catalogo.precargar_en_segundo_plano)
+
+    def _al_cerrar(self):
+        if self.cola_ventas is not None:
+            self.cola_ventas.cerrar()     # aplica lo encolado; si no alcanza, queda en el diario
+        self.root.destroy()
+
+    def _checkpoint_wal(self):
+        try:
+            database.checkpoint()
+            cambios.purgar()
+            movimientos.foto_si_hace_falta()
+        except sqlite3.Error:
+            pass  # otra caja escribiendo; se reintenta en el próximo ciclo
+        self.root.after(database.CHECKPOINT_MS, self._checkpoint_wal)
+
     # --------- UI Base ----------
     def _configurar_tema(self):
         style = ttk.Style()
@@ -165,6 +362,8 @@ class TiendaApp:
         top = ttk.Frame(self.root, style="Surface.TFrame"); top.pack(side="top", fill="x")
         ttk.Label(top, text="🛒 Sistema de Ventas", style="H1.TLabel").pack(side="left", padx=16, pady=10)
         self.lbl_reloj = ttk.Label(top, text="", style="Muted.TLabel"); self.lbl_reloj.pack(side="right", padx=16)
+        ttk.Checkbutton(top, text="Modo escáner", variable=self.modo_escaner).pack(side="right", padx=8)
+        self.lbl_escaner = ttk.Label(top, text="", style="Muted.TLabel"); self.lbl_escaner.pack(side="right", padx=8)
         self._tick()
 
     def _tick(self):
@@ -185,6 +384,10 @@ class TiendaApp:
                    command=self.ventana_inventario).pack(fill="x", padx=10, pady=4)
         ttk.Button(side, text="📈 Exportar reportes", style="Sidebar.TButton",
                    command=self.exportar_reportes).pack(fill="x", padx=10, pady=4)
+        ttk.Button(side, text="🧮 Análisis", style="Sidebar.TButton",
+                   command=self.ventana_analisis).pack(fill="x", padx=10, pady=4)
+        ttk.Button(side, text="📥 Importar lista de precios", style="Sidebar.TButton",
+                   command=self.importar_lista).pack(fill="x", padx=10, pady=4)
         ttk.Separator(side).pack(fill="x", padx=10, pady=10)
         ttk.Button(side, text="🗑 Vaciar carrito", style="Sidebar.TButton",
                    command=self.vaciar_carrito).pack(fill="x", padx=10, pady=4)
@@ -198,15 +401,21 @@ class TiendaApp:
 
         self.entry_buscar = ttk.Entry(barra, textvariable=self.filtro_actual, width=30)
         self.entry_buscar.pack(side="right", padx=10, pady=10)
-        self.entry_buscar.bind("<KeyRelease>", lambda e: self._refrescar_productos())
+        # búsqueda con debounce en un hilo aparte; solo se pinta el resultado de la última tecla
+        self._busqueda_prod = busqueda.ControladorBusqueda(
+            self.root, self._productos, self._pintar_productos)
+        self.entry_buscar.bind("<KeyRelease>", self._on_tecla_buscar)
 
         cats = ttk.Frame(cont); cats.pack(fill="x", padx=10, pady=(8, 0))
         for cat in self.CATEGORIAS:
             ttk.Button(cats, text=cat, command=lambda c=cat: self.mostrar_productos(c))\
                 .pack(side="left", padx=6, pady=6)
 
-        self.scroll_prod = ScrollableFrame(cont)
-        self.scroll_prod.pack(fill="both", expand=True, padx=10, pady=10)
+        # solo se crean las tarjetas visibles; al hacer scroll se reutilizan
+        self.grilla_prod = GrillaVirtual(
+            cont, lambda parent: TarjetaProducto(parent, self.agregar_producto),
+            columnas=2, alto_fila=150)
+        self.grilla_prod.pack(fill="both", expand=True, padx=10, pady=10)
 
     def _crear_carrito(self):
         wrap = ttk.Frame(self.root, width=440)
@@ -230,6 +439,7 @@ class TiendaApp:
         self.tv.column("subtotal", width=100, anchor="e", stretch=False)
 
         self.tv.pack(fill="both", expand=True, padx=10, pady=(4, 0))
+        self.carrito.suscribir(self._on_cambio_carrito)
 
         xsb = ttk.Scrollbar(wrap, orient="horizontal", command=self.tv.xview)
         self.tv.configure(xscrollcommand=xsb.set)
@@ -259,112 +469,107 @@ class TiendaApp:
     # --------- Acciones ----------
     def mostrar_categorias(self):
         self.categoria_actual = None
-        for w in self.scroll_prod.inner.winfo_children():
-            w.destroy()
-        card = ttk.Frame(self.scroll_prod.inner, style="Card.TFrame"); card.pack(padx=10, pady=10, fill="x")
-        ttk.Label(card, text="Elige una categoría o usa la búsqueda para ver productos.",
-                  style="Card.TLabel").pack(padx=12, pady=12)
+        self._busqueda_prod.cancelar()
+        self.grilla_prod.mensaje("Elige una categoría o usa la búsqueda para ver productos.")
 
     def mostrar_productos(self, categoria):
         self.categoria_actual = categoria
         self.filtro_actual.set("")
         self._refrescar_productos()
 
+    def _on_tecla_buscar(self, event=None):
+        if self.categoria_actual:
+            self._busqueda_prod.solicitar(self.categoria_actual, self.filtro_actual.get().strip())
+
+    @metricas.medido("ui.refrescar_productos")
     def _refrescar_productos(self):
-        for w in self.scroll_prod.inner.winfo_children():
-            w.destroy()
+        self._busqueda_prod.cancelar()
         if not self.categoria_actual:
+            self._pintar_productos([])
             return
-
-        productos = obtener_productos_por_categoria(
+        self._pintar_productos(self._productos(
             self.categoria_actual, self.filtro_actual.get().strip()
-        )
+        ))
+
+    @metricas.medido("ui.pintar_productos")
+    def _pintar_productos(self, productos):
+        if not self.categoria_actual:
+            self.grilla_prod.set_items([])
+            return
         if not productos:
-            ttk.Label(self.scroll_prod.inner, text="Sin resultados…", style="Muted.TLabel")\
-                .pack(padx=12, pady=16, anchor="w")
+            self.grilla_prod.mensaje("Sin resultados…")
             return
-
-        cols = 2
-        for i, (nombre, precio, stock) in enumerate(productos):
-            tarjeta = ttk.Frame(self.scroll_prod.inner, style="Card.TFrame")
-            r, c = divmod(i, cols); tarjeta.grid(row=r, column=c, padx=8, pady=8, sticky="nsew")
-
-            body = ttk.Frame(tarjeta, style="Surface.TFrame")
-            body.pack(fill="both", expand=True, padx=10, pady=10)
-
-            ttk.Label(body, text=f"🧺  {nombre}", style="Strong.TLabel").pack(anchor="w")
-            ttk.Label(body, text=f"Precio: {fmt_moneda(precio or 0)}", style="Card.TLabel")\
-                .pack(anchor="w", pady=(2, 0))
-            if stock is not None:
-                ttk.Label(body, text=f"Stock: {stock}", style="Muted.TLabel").pack(anchor="w")
-
-            fila = ttk.Frame(body); fila.pack(fill="x", pady=6)
-            ttk.Button(fila, text="Agregar", style="Primary.TButton",
-                       command=lambda n=nombre, p=precio or 0: self.agregar_producto(n, p)).pack(side="left")
-            ttk.Button(fila, text="+1", width=4,
-                       command=lambda n=nombre, p=precio or 0: self.agregar_producto(n, p)).pack(side="left", padx=6)
-            ttk.Button(fila, text="+5", width=4,
-                       command=lambda n=nombre, p=precio or 0: self.agregar_producto(n, p, cantidad=5)).pack(side="left")
-
-        for c in range(cols):
-            self.scroll_prod.inner.grid_columnconfigure(c, weight=1)
-
-    def agregar_producto(self, nombre, precio, cantidad=1):
-        item = self.carrito.get(nombre)
-        if item:
-            item["cantidad"] += cantidad
-        else:
-            self.carrito[nombre] = {"precio": float(precio or 0), "cantidad": int(cantidad)}
-        self._refrescar_carrito()
-
-    def _refrescar_carrito(self):
-        for i in self.tv.get_children():
-            self.tv.delete(i)
-        total = 0
-        for nombre, data in sorted(self.carrito.items()):
-            cant = data["cantidad"]
-            precio = data["precio"]
-            subtotal = cant * precio
-            total += subtotal
-            self.tv.insert("", "end", iid=nombre,
-                           values=(nombre, cant, fmt_moneda(precio), fmt_moneda(subtotal)))
-        self.lbl_total.config(text=f"Total: {fmt_moneda(total)}")
+        self.grilla_prod.set_items(productos)
+
+    def agregar_producto(self, nombre, precio, cantidad=1, producto_id=None):
+        self.carrito.agregar(nombre, precio, cantidad, producto_id)
+
+    # --------- Lector de código de barras ----------
+    def _on_tecla_escaner(self, event):
+        widget = event.widget      # puede ser un nombre (str) en ventanas internas de Tk
+        if not self.modo_escaner.get() or isinstance(widget, str) or widget.winfo_toplevel() is not self.root:
+            return None
+        codigo = self.lector.tecla(event.char, event.time)
+        if not codigo:
+            return None
+        # si el foco estaba en un campo de texto, la ráfaga también se escribió ahí
+        if isinstance(widget, (tk.Entry, ttk.Entry)) and widget.get().endswith(codigo):
+            fin = len(widget.get())
+            widget.delete(fin - len(codigo), fin)
+        self.escanear(codigo)
+        return "break"
+
+    @metricas.medido("ui.escanear")
+    def escanear(self, codigo):
+        """Agrega una unidad del producto con ese código; solo cambia la fila del carrito."""
+        p = catalogo.por_codigo(codigo)
+        if p is None:
+            self.root.bell()
+            self.lbl_escaner.config(text=f"Código {codigo} no encontrado")
+            return None
+        self.agregar_producto(p.nombre, p.precio, 1, p.id)
+        self.lbl_escaner.config(text=f"✓ {p.nombre}")
+        return p
+
+    @metricas.medido("ui.refrescar_carrito")
+    def _on_cambio_carrito(self, cambio):
+        """Aplica al Treeview solo la fila que cambió."""
+        if cambio.tipo == carrito.AGREGADO:
+            self.tv.insert("", cambio.indice, iid=cambio.nombre, values=self._fila_carrito(cambio.nombre))
+        elif cambio.tipo == carrito.CANTIDAD:
+            self.tv.item(cambio.nombre, values=self._fila_carrito(cambio.nombre))
+        elif cambio.tipo == carrito.QUITADO:
+            self.tv.delete(cambio.nombre)
+        elif cambio.tipo == carrito.VACIADO:
+            self.tv.delete(*self.tv.get_children())
+        self.lbl_total.config(text=f"Total: {fmt_moneda(self.carrito.total())}")
+
+    def _fila_carrito(self, nombre):
+        linea = self.carrito.get(nombre)
+        return (nombre, linea["cantidad"], fmt_moneda(carrito.a_pesos(linea["precio_c"])),
+                fmt_moneda(carrito.a_pesos(self.carrito.subtotal_c(nombre))))
 
     def eliminar_seleccion(self):
-        sel = self.tv.selection()
-        if not sel:
-            return
-        for iid in sel:
-            self.carrito.pop(iid, None)
-        self._refrescar_carrito()
+        for iid in self.tv.selection():
+            self.carrito.quitar(iid)
 
     def incrementar_seleccion(self):
-        sel = self.tv.selection()
-        if not sel:
-            return
-        for iid in sel:
-            self.carrito[iid]["cantidad"] += 1
-        self._refrescar_carrito()
+        for iid in self.tv.selection():
+            self.carrito.cambiar_cantidad(iid, 1)
 
     def decrementar_seleccion(self):
-        sel = self.tv.selection()
-        if not sel:
-            return
-        for iid in sel:
-            self.carrito[iid]["cantidad"] -= 1
-            if self.carrito[iid]["cantidad"] <= 0:
-                self.carrito.pop(iid)
-        self._refrescar_carrito()
+        for iid in self.tv.selection():
+            self.carrito.cambiar_cantidad(iid, -1)
 
     def vaciar_carrito(self):
         if not self.carrito:
             return
         if messagebox.askyesno("Vaciar carrito", "¿Seguro que quieres vaciar el carrito?"):
-            self.carrito.clear()
-            self._refrescar_carrito()
+            self.carrito.vaciar()
 
     # --------- Ventanas de productos ----------
     def ingresar_productos(self):
+        from productos import interfaz_registro_producto
         try:
             win = tk.Toplevel(self.root); win.title("Ingresar productos"); win.geometry("520x460")
             cont = tk.Frame(win, padx=12, pady=12); cont.pack(fill="both", expand=True)
@@ -377,6 +582,7 @@ class TiendaApp:
             messagebox.showerror("Error", f"No se pudo abrir la ventana.\n{str(e)}")
 
     def editar_productos(self):
+        from productos import interfaz_admin_productos
         try:
             win = tk.Toplevel(self.root); win.title("Buscar/Editar productos"); win.geometry("900x540")
             cont = tk.Frame(win, padx=12, pady=12); cont.pack(fill="both", expand=True)
@@ -391,8 +597,6 @@ class TiendaApp:
 
     # --------- Inventario ----------
     def ventana_inventario(self):
-        ensure_stock_column()
-
         win = tk.Toplevel(self.root)
         win.title("Inventario")
         win.geometry("920x560")
@@ -400,12 +604,7 @@ class TiendaApp:
         top = ttk.Frame(win); top.pack(fill="x", padx=10, pady=8)
 
         # categorías dinámicas desde la BD
-        con = sqlite3.connect(db_path)
-        cur = con.cursor()
-        cats_db = [r[0] for r in cur.execute(
-            "SELECT DISTINCT categoria FROM productos ORDER BY categoria"
-        ).fetchall()]
-        con.close()
+        cats_db = obtener_categorias()
         categorias = ["Todas"] + (cats_db or self.CATEGORIAS)
 
         tk.Label(top, text="Categoría:").pack(side="left")
@@ -421,6 +620,7 @@ class TiendaApp:
         auto_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(top, text="Auto-refresco", variable=auto_var).pack(side="left", padx=10)
         ttk.Button(top, text="Refrescar", command=lambda: _refrescar()).pack(side="left", padx=6)
+        ttk.Button(top, text="🛒 Sugerencias de compra", command=self.ventana_sugerencias).pack(side="right")
 
         mid = ttk.Frame(win); mid.pack(fill="both", expand=True, padx=10, pady=6)
 
@@ -467,7 +667,8 @@ class TiendaApp:
                 messagebox.showwarning("Cantidad inválida", "Ingresa un número entero ≥ 0.")
                 return None
 
-        def _ajustar(delta=None, fijar=None):
+        def _ajustar(delta=None, fijar=False):
+            # delta: +1/-1 por la cantidad; fijar=True: la cantidad es el stock nuevo
             nombre = _sel_producto()
             if not nombre:
                 messagebox.showinfo("Inventario", "Selecciona un producto primero.")
@@ -475,121 +676,465 @@ class TiendaApp:
             q = _parse_qty()
             if q is None:
                 return
-            con = sqlite3.connect(db_path)
-            cur = con.cursor()
+            delta = None if delta is None else delta * q
+            fijar = q if fijar else None
             try:
-                if delta is not None:
-                    # entrada/salida
-                    cur.execute(
-                        "UPDATE productos SET stock = MAX(COALESCE(stock,0) + ?, 0) WHERE nombre=?",
-                        (delta * q, nombre),
-                    )
-                elif fijar is not None:
-                    cur.execute(
-                        "UPDATE productos SET stock = ? WHERE nombre=?",
-                        (fijar, nombre),
-                    )
-                con.commit()
-            finally:
-                con.close()
-            _refrescar()
+                if self.servicio is not None:
+                    catalogo.actualizar_stock(self.servicio.ajustar_stock(nombre, delta=delta, fijar=fijar))
+                else:
+                    ajustar_stock(nombre, delta=delta, fijar=fijar)
+            except StockInsuficiente as e:
+                messagebox.showwarning("Inventario", "No hay tanto stock para sacar.\n"
+                                       + detalle_faltantes(e, dict.fromkeys(e.faltantes, nombre)), parent=win)
+                return
+            except (ValueError, OSError, sqlite3.Error) as e:
+                messagebox.showerror("Inventario", f"No se pudo ajustar el stock.\n{e}", parent=win)
+                return
+            self.vigilante.revisar()    # solo se repinta la fila ajustada
 
         ttk.Button(actions, text="Entrar (+)", command=lambda: _ajustar(delta=+1)).pack(side="left", padx=4)
         ttk.Button(actions, text="Salir (–)",  command=lambda: _ajustar(delta=-1)).pack(side="left", padx=4)
-        ttk.Button(actions, text="Fijar (=)",  command=lambda: _ajustar(fijar=_parse_qty() or 0)).pack(side="left", padx=8)
+        ttk.Button(actions, text="Fijar (=)",  command=lambda: _ajustar(fijar=True)).pack(side="left", padx=8)
+
+        estado = ttk.Label(actions, text="", style="Muted.TLabel")
+        estado.pack(side="right")
 
         # --- refresco de la grilla ---
+        arbol = ArbolInventario(tree)
+
+        @metricas.medido("ui.inventario_refrescar")
         def _refrescar():
-            tree.delete(*tree.get_children())
-            cat = cat_var.get()
-            buscar = buscar_var.get().strip()
-            con = sqlite3.connect(db_path)
-            cur = con.cursor()
-            if cat == "Todas":
-                if buscar:
-                    cur.execute(
-                        """SELECT categoria, nombre, COALESCE(stock,0)
-                           FROM productos
-                           WHERE nombre LIKE ?
-                           ORDER BY categoria, nombre""",
-                        (f"%{buscar}%",),
-                    )
-                else:
-                    cur.execute(
-                        """SELECT categoria, nombre, COALESCE(stock,0)
-                           FROM productos
-                           ORDER BY categoria, nombre"""
-                    )
-            else:
-                if buscar:
-                    cur.execute(
-                        """SELECT categoria, nombre, COALESCE(stock,0)
-                           FROM productos
-                           WHERE categoria=? AND nombre LIKE ?
-                           ORDER BY nombre""",
-                        (cat, f"%{buscar}%",),
-                    )
-                else:
-                    cur.execute(
-                        """SELECT categoria, nombre, COALESCE(stock,0)
-                           FROM productos
-                           WHERE categoria=?
-                           ORDER BY nombre""",
-                        (cat,),
-                    )
-            rows = cur.fetchall()
-            con.close()
-
-            # agrupar por categoría
-            padres = {}
-            for categoria, nombre, stock in rows:
-                if categoria not in padres:
-                    padres[categoria] = tree.insert("", "end", text=categoria, values=("",), open=True)
-                tree.insert(padres[categoria], "end", text=nombre, values=(stock,))
+            ctl_busqueda.cancelar()
+            _pintar(obtener_inventario_ids(cat_var.get(), buscar_var.get().strip()))
 
+        def _pintar(rows):
+            if not win.winfo_exists():
+                return
+            with metricas.medir("ui.inventario_pintar"):
+                arbol.cargar(rows)
+
+        def _on_cambios(ids):
+            # aviso de cambios.VigilanteCambios: re-consultar solo esos productos
+            if not auto_var.get():
+                return
+            if ids is None:
+                _refrescar()
+                return
+            with metricas.medir("ui.inventario_cambios"):
+                arbol.aplicar(obtener_inventario_ids(cat_var.get(), buscar_var.get().strip(), ids), ids)
+
+        ctl_busqueda = busqueda.ControladorBusqueda(self.root, obtener_inventario_ids, _pintar)
         cb.bind("<<ComboboxSelected>>", lambda e: _refrescar())
-        ent_buscar.bind("<KeyRelease>", lambda e: _refrescar())
+        ent_buscar.bind("<KeyRelease>",
+                        lambda e: ctl_busqueda.solicitar(cat_var.get(), buscar_var.get().strip()))
+        # al reactivar el auto-refresco se recarga lo que cambió mientras estuvo apagado
+        auto_var.trace_add("write", lambda *a: auto_var.get() and _refrescar())
 
         _refrescar()
+        self.vigilante.suscribir(_on_cambios)
 
-        # auto refresco periódico
-        def _loop_auto():
+        # instrumentación: consultas a la BD y operaciones sobre el árbol en el último minuto
+        cache = catalogo.estadisticas()
+        medida = {"consultas": database.estadisticas()["consultas"], "ops": arbol.ops,
+                  "aciertos": cache["aciertos"], "fallos": cache["fallos"]}
+
+        def _medir():
             if not win.winfo_exists():
                 return
-            if auto_var.get():
-                _refrescar()
-            win.after(2000, _loop_auto)
+            consultas = database.estadisticas()["consultas"]
+            cache = catalogo.estadisticas()
+            estado.config(text=f"Último minuto: {consultas - medida['consultas']} consultas · "
+                               f"{arbol.ops - medida['ops']} ops de widgets · catálogo "
+                               f"{cache['aciertos'] - medida['aciertos']} aciertos / "
+                               f"{cache['fallos'] - medida['fallos']} fallos")
+            medida.update(consultas=consultas, ops=arbol.ops, aciertos=cache["aciertos"], fallos=cache["fallos"])
+            win.after(60_000, _medir)
+
+        win.after(60_000, _medir)
+        win.bind("<Destroy>", lambda e: e.widget is win and self.vigilante.desuscribir(_on_cambios))
+
+    # --------- Diagnóstico (oculto: Ctrl+Shift+D) ----------
+    def ventana_diagnostico(self):
+        win = tk.Toplevel(self.root)
+        win.title("Diagnóstico")
+        win.geometry("760x420")
 
-        win.after(2000, _loop_auto)
+        top = ttk.Frame(win); top.pack(fill="x", padx=10, pady=8)
+        medir_var = tk.BooleanVar(value=metricas.activo)
+        ttk.Checkbutton(top, text="Medir", variable=medir_var,
+                        command=lambda: metricas.activar(medir_var.get())).pack(side="left")
+        ttk.Button(top, text="Reiniciar", command=lambda: (metricas.reiniciar(), _pintar())).pack(side="left", padx=6)
+        ttk.Button(top, text="Guardar…", command=lambda: _guardar()).pack(side="left")
+        lbl = ttk.Label(top, text="", style="Muted.TLabel"); lbl.pack(side="right")
+
+        columnas = ("cuenta", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "suma_ms")
+        tree = ttk.Treeview(win, columns=columnas, show="tree headings")
+        tree.heading("#0", text="Medida")
+        tree.column("#0", width=220, anchor="w")
+        for c in columnas:
+            tree.heading(c, text=c)
+            tree.column(c, width=70, anchor="e")
+        tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        def _pintar():
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for nombre, r in metricas.resumen().items():
+                tree.insert("", "end", text=nombre, values=[r[c] for c in columnas])
+            bd, cache = database.estadisticas(), catalogo.estadisticas()
+            lbl.config(text=f"{bd['consultas']} consultas · {bd['conexiones_abiertas']} conexiones · "
+                            f"catálogo {cache['aciertos']} aciertos / {cache['fallos']} fallos")
+
+        def _tick():
+            if win.winfo_exists():
+                _pintar()
+                win.after(1000, _tick)
+
+        def _guardar():
+            ruta = filedialog.asksaveasfilename(
+                parent=win, title="Guardar métricas",
+                initialfile=f"metricas_{datetime.now():%Y%m%d_%H%M}.json", defaultextension=".json",
+                filetypes=[("JSON", "*.json"), ("Prometheus (texto)", "*.prom")])
+            if ruta:
+                metricas.volcar(ruta)
+
+        _tick()
 
     # --------- Venta ----------
+    @metricas.medido("ui.finalizar_venta")
     def finalizar_venta(self):
         if not self.carrito:
             messagebox.showwarning("Aviso", "No hay productos en la venta.")
             return
 
-        con = sqlite3.connect(db_path)
-        cur = con.cursor()
-        fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        items = self.carrito.items_venta()
+        if self.servicio is not None:
+            self._vender_en_servicio(items)
+            return
+        try:
+            self.cola_ventas.encolar(items)     # ya en el diario; el escritor la pasa a la BD
+        except StockInsuficiente as e:
+            self._avisar_sin_stock(e, items)
+            return
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo registrar la venta.\n{e}")
+            return
 
-        for nombre, data in self.carrito.items():
-            cantidad = data["cantidad"]
-            total = data["precio"] * cantidad
-            cur.execute("INSERT INTO ventas (producto, cantidad, total, fecha) VALUES (?,?,?,?)",
-                        (nombre, cantidad, total, fecha_actual))
-            try:
-                cur.execute("UPDATE productos SET stock = MAX(COALESCE(stock,0) - ?, 0) WHERE nombre=?",
-                            (cantidad, nombre))
-            except sqlite3.OperationalError:
-                # por si no existe stock (muy raro si ensure_stock_column corrió)
-                pass
-
-        con.commit(); con.close()
-        self.carrito.clear(); self._refrescar_carrito()
+        # stock esperado en las tarjetas visibles; el real llega con _on_ventas_aplicadas
+        vendidos = {}
+        for pid, _nombre, cantidad, _precio in items:
+            vendidos[pid] = vendidos.get(pid, 0) + cantidad
+        self._actualizar_stock_visible(
+            {pid: (s or 0) - vendidos[pid] for pid, _n, _p, s in self.grilla_prod.modelo.items
+             if pid in vendidos})
+
+        self.carrito.vaciar()
+        messagebox.showinfo("Venta registrada", "La venta ha sido finalizada exitosamente.")
+
+    def _vender_en_servicio(self, items):
+        try:
+            _venta_id, stock = self.servicio.vender(items)
+        except StockInsuficiente as e:
+            self._avisar_sin_stock(e, items)
+            return
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", f"No se pudo registrar la venta.\n{e}")
+            return
+        catalogo.actualizar_stock(stock)
+        self._actualizar_stock_visible(stock)
+        self.carrito.vaciar()
         messagebox.showinfo("Venta registrada", "La venta ha sido finalizada exitosamente.")
 
+    def _avisar_sin_stock(self, error, items):
+        # el carrito queda como está para corregir las cantidades
+        messagebox.showwarning("Sin stock", "No alcanza el stock para esta venta:\n"
+                               + detalle_faltantes(error, {pid: n for pid, n, _c, _p in items}))
+
+    def _actualizar_stock_visible(self, stock):
+        """Repinta las tarjetas visibles con {producto_id: stock} (sin re-consultar)."""
+        if stock:
+            self.grilla_prod.set_items(
+                [(pid, n, p, stock.get(pid, s)) for pid, n, p, s in self.grilla_prod.modelo.items],
+                al_inicio=False)
+
+    def _on_ventas_aplicadas(self, hechos):
+        # hilo de Tk: el escritor de cola_ventas confirmó estos tickets
+        stock = {}
+        for _uid, _venta_id, nuevo in hechos:
+            stock.update(nuevo)
+        self._actualizar_stock_visible(stock)
+
+    def _on_venta_rechazada(self, entrada, error):
+        messagebox.showerror(
+            "Venta no registrada",
+            f"La venta de las {entrada['fecha']} no se pudo guardar:\n{error}\n\n"
+            f"Quedó anotada en {self.cola_ventas.ruta}.rechazadas")
+
     def exportar_reportes(self):
-        messagebox.showinfo("Exportar reportes", "Función aún en desarrollo.")
+        import reportes
+        ruta = filedialog.asksaveasfilename(
+            parent=self.root, title="Exportar reportes",
+            initialfile=f"historial_ventas_{datetime.now():%Y%m%d}.xlsx",
+            defaultextension=".xlsx",
+            filetypes=[("Excel", "*.xlsx"), ("CSV (un archivo por hoja)", "*.csv"),
+                       ("Parquet (un archivo por hoja)", "*.parquet")],
+        )
+        if not ruta:
+            return
+
+        # la exportación corre en un hilo; esta ventana solo muestra el avance
+        win = tk.Toplevel(self.root)
+        win.title("Exportando…")
+        win.resizable(False, False)
+        lbl = ttk.Label(win, text="Preparando…")
+        lbl.pack(padx=16, pady=(14, 6), anchor="w")
+        barra = ttk.Progressbar(win, length=360, mode="determinate", maximum=100)
+        barra.pack(padx=16, pady=6)
+        estado, cancelar = reportes.exportar_en_segundo_plano(ruta)
+        ttk.Button(win, text="Cancelar", command=cancelar.set).pack(pady=(6, 14))
+        win.protocol("WM_DELETE_WINDOW", cancelar.set)
+
+        def _seguir():
+            if not estado["terminado"]:
+                if estado["total"]:
+                    barra["value"] = 100 * estado["hechas"] / estado["total"]
+                    lbl.config(text=f"{estado['hechas']:,} de {estado['total']:,} líneas".replace(",", "."))
+                win.after(150, _seguir)
+                return
+            win.destroy()
+            error = estado["error"]
+            if isinstance(error, reportes.ExportacionCancelada):
+                return
+            if error is not None:
+                messagebox.showerror("Exportar reportes", f"No se pudo exportar.\n{error}")
+                return
+            messagebox.showinfo("Exportar reportes",
+                                "Reporte exportado:\n" + "\n".join(estado["resultado"]))
+
+        _seguir()
+
+    # --------- Análisis ----------
+    def ventana_analisis(self):
+        import analisis
+        win = tk.Toplevel(self.root)
+        win.title("Análisis")
+        win.geometry("1080x600")
+
+        top = ttk.Frame(win); top.pack(fill="x", padx=10, pady=8)
+        periodos = {"Últimos 30 días": 30, "Últimos 90 días": 90, "Último año": 365, "Todo el historial": None}
+        periodo_var = tk.StringVar(value="Últimos 90 días")
+        tk.Label(top, text="Período:").pack(side="left")
+        ttk.Combobox(top, textvariable=periodo_var, values=list(periodos), width=20, state="readonly")\
+            .pack(side="left", padx=6)
+        btn_calcular = ttk.Button(top, text="Calcular", command=lambda: _calcular())
+        btn_calcular.pack(side="left", padx=6)
+        ttk.Button(top, text="Exportar…", command=lambda: _exportar()).pack(side="left")
+        lbl = ttk.Label(top, text="", style="Muted.TLabel"); lbl.pack(side="right")
+
+        pestanas = ttk.Notebook(win); pestanas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        tablas = {}
+        for clave, titulo in (("productos", "Por producto"), ("categorias", "Por categoría")):
+            marco = ttk.Frame(pestanas); pestanas.add(marco, text=titulo)
+            tablas[clave] = TablaDatos(marco, COLUMNAS_ANALISIS[clave])
+
+        def _calcular():
+            dias = periodos[periodo_var.get()]
+            hoy = datetime.now().date()
+            desde = None if dias is None else (hoy - timedelta(days=dias - 1)).isoformat()
+            estado = analisis.analizar_en_segundo_plano(desde=desde, hasta=None if dias is None else hoy.isoformat())
+            btn_calcular.state(["disabled"])
+            lbl.config(text="Calculando…")
+            t0 = datetime.now()
+
+            def _seguir():
+                if not win.winfo_exists():
+                    return
+                if not estado["terminado"]:
+                    win.after(100, _seguir)
+                    return
+                btn_calcular.state(["!disabled"])
+                if estado["error"] is not None:
+                    lbl.config(text="")
+                    messagebox.showerror("Análisis", f"No se pudo calcular.\n{estado['error']}", parent=win)
+                    return
+                for tabla, df in zip(tablas.values(), estado["resultado"]):
+                    tabla.mostrar(df)
+                n = len(tablas["productos"].df)
+                lbl.config(text=f"{n:,} productos".replace(",", ".")
+                                + (f" (se muestran {MAX_FILAS_TABLA})" if n > MAX_FILAS_TABLA else "")
+                                + f" · {(datetime.now() - t0).total_seconds():.1f} s")
+
+            _seguir()
+
+        def _exportar():
+            if tablas["productos"].df is None:
+                messagebox.showinfo("Análisis", "Calcula el análisis primero.", parent=win)
+                return
+            ruta = filedialog.asksaveasfilename(
+                parent=win, title="Exportar análisis", initialfile=f"analisis_{datetime.now():%Y%m%d}.xlsx",
+                defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv")])
+            if not ruta:
+                return
+            try:
+                archivos = analisis.guardar(ruta, tablas["productos"].df, tablas["categorias"].df)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Análisis", f"No se pudo exportar.\n{e}", parent=win)
+                return
+            messagebox.showinfo("Análisis", "Análisis exportado:\n" + "\n".join(archivos), parent=win)
+
+        _calcular()
+
+    # --------- Sugerencias de compra ----------
+    def ventana_sugerencias(self):
+        import compras
+        win = tk.Toplevel(self.root)
+        win.title("Sugerencias de compra")
+        win.geometry("1080x600")
+
+        top = ttk.Frame(win); top.pack(fill="x", padx=10, pady=8)
+        btn_calcular = ttk.Button(top, text="Recalcular", command=lambda: _calcular())
+        btn_calcular.pack(side="left")
+        ttk.Button(top, text="Parámetros de la categoría…", command=lambda: _parametros()).pack(side="left", padx=6)
+        ttk.Button(top, text="Exportar…", command=lambda: _exportar()).pack(side="left")
+        lbl = ttk.Label(top, text="", style="Muted.TLabel"); lbl.pack(side="right")
+
+        pestanas = ttk.Notebook(win); pestanas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        tablas = {}
+        for clave, titulo in (("productos", "Por producto"), ("categorias", "Por categoría")):
+            marco = ttk.Frame(pestanas); pestanas.add(marco, text=titulo)
+            tablas[clave] = TablaDatos(marco, COLUMNAS_COMPRAS[clave])
+        tablas["categorias"].tree.bind("<Double-1>", lambda e: _parametros())
+
+        def _calcular(actualizar=True):
+            # actualizar: procesa los días cerrados que falten (si ya corrió esta noche no hace nada)
+            estado = compras.sugerencias_en_segundo_plano(actualizar_antes=actualizar)
+            btn_calcular.state(["disabled"])
+            lbl.config(text="Calculando…")
+
+            def _seguir():
+                if not win.winfo_exists():
+                    return
+                if not estado["terminado"]:
+                    win.after(100, _seguir)
+                    return
+                btn_calcular.state(["!disabled"])
+                if estado["error"] is not None:
+                    lbl.config(text="")
+                    messagebox.showerror("Sugerencias de compra", f"No se pudo calcular.\n{estado['error']}", parent=win)
+                    return
+                for tabla, df in zip(tablas.values(), estado["resultado"]):
+                    tabla.mostrar(df)
+                a_pedir = int((tablas["productos"].df["sugerido"] > 0).sum())
+                texto = f"{a_pedir:,} productos para pedir".replace(",", ".")
+                if estado["corrida"] is not None:
+                    texto += (f" · pronóstico al {estado['corrida']['hasta']}"
+                              f" ({estado['corrida']['productos']} recalculados)")
+                lbl.config(text=texto)
+
+            _seguir()
+
+        def _parametros():
+            fila = tablas[("productos", "categorias")[pestanas.index("current")]].seleccionada()
+            if fila is None:
+                messagebox.showinfo("Sugerencias de compra", "Selecciona una categoría o un producto.", parent=win)
+                return
+            categoria = str(fila["categoria"])
+            plazo, cobertura, servicio = compras.parametros().get(
+                categoria, (compras.PLAZO, compras.COBERTURA, compras.SERVICIO))
+            dlg = tk.Toplevel(win)
+            dlg.title(f"Parámetros: {categoria}")
+            dlg.transient(win)
+            variables = []
+            for i, (texto, valor) in enumerate((("Plazo de entrega (días):", plazo),
+                                                ("Cobertura del pedido (días):", cobertura),
+                                                ("Nivel de servicio (%):", f"{servicio * 100:g}"))):
+                tk.Label(dlg, text=texto).grid(row=i, column=0, sticky="w", padx=10, pady=4)
+                var = tk.StringVar(value=str(valor))
+                ttk.Entry(dlg, textvariable=var, width=10).grid(row=i, column=1, padx=10, pady=4)
+                variables.append(var)
+
+            def _guardar():
+                try:
+                    compras.fijar_parametros(categoria, int(variables[0].get()), int(variables[1].get()),
+                                             float(variables[2].get().replace(",", ".")) / 100)
+                except ValueError as e:
+                    messagebox.showwarning("Parámetros", f"Valores inválidos.\n{e}", parent=dlg)
+                    return
+                except sqlite3.Error as e:
+                    messagebox.showerror("Parámetros", f"No se pudo guardar.\n{e}", parent=dlg)
+                    return
+                dlg.destroy()
+                _calcular(actualizar=False)     # el pronóstico no cambia, solo el pedido
+
+            ttk.Button(dlg, text="Guardar", command=_guardar).grid(row=3, column=0, columnspan=2, pady=8)
+
+        def _exportar():
+            if tablas["productos"].df is None:
+                messagebox.showinfo("Sugerencias de compra", "Espera a que terminen de calcularse.", parent=win)
+                return
+            ruta = filedialog.asksaveasfilename(
+                parent=win, title="Exportar sugerencias de compra",
+                initialfile=f"compras_{datetime.now():%Y%m%d}.xlsx",
+                defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv")])
+            if not ruta:
+                return
+            import analisis
+            try:
+                archivos = analisis.guardar(ruta, tablas["productos"].df, tablas["categorias"].df)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Sugerencias de compra", f"No se pudo exportar.\n{e}", parent=win)
+                return
+            messagebox.showinfo("Sugerencias de compra", "Sugerencias exportadas:\n" + "\n".join(archivos), parent=win)
+
+        _calcular()
+
+    def importar_lista(self):
+        import importar
+        ruta = filedialog.askopenfilename(
+            parent=self.root, title="Importar lista de precios",
+            filetypes=[("CSV o Excel", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")],
+        )
+        if not ruta:
+            return
+
+        # una sola transacción en un hilo; esta ventana muestra las filas leídas
+        win = tk.Toplevel(self.root)
+        win.title("Importando…")
+        win.resizable(False, False)
+        lbl = ttk.Label(win, text="Leyendo archivo…")
+        lbl.pack(padx=16, pady=(14, 6), anchor="w")
+        barra = ttk.Progressbar(win, length=360, mode="indeterminate")
+        barra.pack(padx=16, pady=6)
+        barra.start(15)
+        estado, cancelar = importar.importar_en_segundo_plano(ruta)
+        ttk.Button(win, text="Cancelar", command=cancelar.set).pack(pady=(6, 14))
+        win.protocol("WM_DELETE_WINDOW", cancelar.set)
+
+        def _seguir():
+            if not estado["terminado"]:
+                lbl.config(text=f"{estado['leidas']:,} filas leídas".replace(",", "."))
+                win.after(150, _seguir)
+                return
+            win.destroy()
+            error = estado["error"]
+            if isinstance(error, importar.ImportacionCancelada):
+                return
+            if error is not None:
+                messagebox.showerror("Importar lista", f"No se importó nada.\n{error}")
+                return
+            r = estado["resultado"]
+            texto = (f"{r['importadas']} de {r['filas']} filas importadas "
+                     f"({r['filas_por_s']} filas/s).")
+            if r["n_errores"]:
+                texto += f"\n\n{r['n_errores']} filas con errores:\n" + "\n".join(
+                    f"fila {fila}: {mensaje}" for fila, mensaje in r["errores"][:15])
+                if r["n_errores"] > 15:
+                    texto += "\n…"
+            messagebox.showinfo("Importar lista", texto)
+            self._refrescar_productos()
+
+        _seguir()
 
 
 # -----------------------------
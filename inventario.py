@@ -0,0 +1,91 @@
+# inventario.py
+# Consultas y ajustes de stock del inventario, sin nada de Tk: los usan la interfaz
+# y servicio.py (que no carga la UI). Las lecturas salen del catálogo en memoria.
+import busqueda
+import catalogo
+import database
+import movimientos
+from ventas import StockInsuficiente
+
+
+def obtener_productos_por_categoria(categoria, filtro=""):
+    """Filas (id, nombre, precio, stock) de la grilla, servidas desde catalogo.py."""
+    cat = catalogo.get_catalogo()
+    if filtro:
+        prods = cat.por_ids(busqueda.buscar_ids(filtro, categoria=categoria, columna="nombre"))
+    else:
+        prods = cat.de_categoria(categoria)
+    return [(p.id, p.nombre, p.precio, p.stock) for p in prods]
+
+
+def obtener_inventario(cat="Todas", buscar=""):
+    """Filas (categoria, nombre, stock) para la ventana de inventario."""
+    return [f[1:] for f in obtener_inventario_ids(cat, buscar)]
+
+
+def obtener_inventario_ids(cat="Todas", buscar="", ids=None):
+    """
+    Filas (id, categoria, nombre, stock) del inventario, servidas desde catalogo.py.
+    ids: limita a esos productos (refresco incremental tras un aviso de cambios.py).
+    """
+    categoria = None if cat == "Todas" else cat
+    if ids is not None:
+        # el vigilante ya consumió esos cambios del log (pueden venir de otra caja):
+        # el catálogo se pone al día ahora en vez de esperar a catalogo.EXTERNO_S
+        catalogo.sincronizar()
+    cache = catalogo.get_catalogo()
+    if buscar:
+        prods = cache.por_ids(busqueda.buscar_ids(
+            buscar, categoria=categoria, columna="nombre",
+            limite=-1 if ids is not None else busqueda.LIMITE_RESULTADOS))
+    elif ids is not None:
+        prods = cache.por_ids(sorted(ids))
+    elif categoria is None:
+        prods = cache.todos()
+    else:
+        prods = cache.de_categoria(categoria)
+    if ids is not None:
+        prods = [p for p in prods if p.id in ids and (categoria is None or p.categoria == categoria)]
+    return [(p.id, p.categoria, p.nombre, p.stock or 0) for p in prods]
+
+
+def obtener_categorias():
+    return catalogo.get_catalogo().categorias()
+
+
+def ajustar_stock(nombre, delta=None, fijar=None):
+    """Entrada/salida (delta) o valor fijo (fijar) de stock para un producto."""
+    with database.escritura() as con:
+        stock = ajustar_stock_en(con, nombre, delta, fijar)
+    catalogo.actualizar_stock(stock)
+    return stock
+
+
+def ajustar_stock_en(con, nombre, delta=None, fijar=None):
+    """
+    Como ajustar_stock dentro de una transacción abierta (servicio.py). Devuelve {id: stock}.
+    Una salida mayor que el stock no se hace (StockInsuficiente) salvo que el producto
+    permita negativo.
+    """
+    if delta is not None:
+        # entrada/salida
+        with movimientos.con_motivo(con, "entrada" if delta >= 0 else "salida"):
+            filas = con.execute(
+                "UPDATE productos SET stock = COALESCE(stock,0) + ? WHERE nombre=? "
+                "AND (? >= 0 OR COALESCE(stock,0) + ? >= 0 OR permite_negativo) RETURNING id, stock",
+                (delta, nombre, delta, delta),
+            ).fetchall()
+        if not filas:
+            fila = con.execute("SELECT id, COALESCE(stock,0) FROM productos WHERE nombre=?", (nombre,)).fetchone()
+            if fila:
+                raise StockInsuficiente({fila[0]: (-delta, fila[1])})
+    elif fijar is not None:
+        # conteo: la diferencia con lo que había queda en el libro (mermas)
+        with movimientos.con_motivo(con, "conteo"):
+            filas = con.execute(
+                "UPDATE productos SET stock = ? WHERE nombre=? RETURNING id, stock",
+                (fijar, nombre),
+            ).fetchall()
+    else:
+        filas = []
+    return dict(filas)
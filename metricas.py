@@ -0,0 +1,182 @@
+# metricas.py
+# Instrumentación de los caminos calientes: cuántas veces y cuánto tarda cada
+# consulta (database.py la mide sola) y cada refresco de la UI.
+#   with metricas.medir("ui.algo"): ...        @metricas.medido("ui.algo")
+# Apagada (por defecto) cada medida es una comparación y nada más. Se enciende
+# con TIENDA_METRICAS=1 o desde la ventana de diagnóstico (Ctrl+Shift+D);
+# con TIENDA_METRICAS=/ruta/metricas.json (o .prom) además se vuelca al salir.
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Límites superiores de las cubetas del histograma, en ms (la última es +Inf)
+LIMITES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_destino = os.environ.get("TIENDA_METRICAS", "")
+activo = _destino not in ("", "0")
+
+_lock = threading.Lock()
+_histogramas = {}
+
+
+class Histograma:
+    __slots__ = ("cuenta", "suma_ms", "max_ms", "cubetas")
+
+    def __init__(self):
+        self.cuenta = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+        self.cubetas = [0] * (len(LIMITES_MS) + 1)
+
+    def registrar(self, ms):
+        self.cuenta += 1
+        self.suma_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.cubetas[bisect_left(LIMITES_MS, ms)] += 1
+
+    def percentil(self, p):
+        """Límite superior de la cubeta donde cae el percentil p (0-100); el máximo en la última."""
+        if not self.cuenta:
+            return 0.0
+        objetivo = self.cuenta * p / 100
+        acumulado = 0
+        for limite, n in zip(LIMITES_MS, self.cubetas):
+            acumulado += n
+            if acumulado >= objetivo:
+                return round(min(limite, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def resumen(self):
+        return {"cuenta": self.cuenta, "suma_ms": round(self.suma_ms, 3),
+                "media_ms": round(self.suma_ms / self.cuenta, 3) if self.cuenta else 0.0,
+                "p50_ms": self.percentil(50), "p95_ms": self.percentil(95), "p99_ms": self.percentil(99),
+                "max_ms": round(self.max_ms, 3)}
+
+
+# -----------------------------
+# Medidas
+# -----------------------------
+def activar(si=True):
+    global activo
+    activo = bool(si)
+
+
+def registrar(nombre, ms):
+    with _lock:
+        h = _histogramas.get(nombre)
+        if h is None:
+            h = _histogramas[nombre] = Histograma()
+        h.registrar(ms)
+
+
+class _Medida:
+    __slots__ = ("nombre", "t")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.nombre, (time.perf_counter() - self.t) * 1000)
+        return False
+
+
+class _Nada:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NADA = _Nada()
+
+
+def medir(nombre):
+    """Context manager que registra la duración del bloque bajo nombre (no hace nada si está apagado)."""
+    return _Medida(nombre) if activo else _NADA
+
+
+def medido(nombre=None):
+    """Decorador: como medir() alrededor de cada llamada. Por defecto usa el __qualname__."""
+    def decorar(fn):
+        etiqueta = nombre or fn.__qualname__
+
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if not activo:
+                return fn(*args, **kwargs)
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registrar(etiqueta, (time.perf_counter() - t) * 1000)
+        return envoltura
+    return decorar
+
+
+def nombre_sql(sql):
+    """'sql.select', 'sql.insert', ... según la primera palabra de la sentencia."""
+    palabra = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else "vacia"
+    return "sql." + palabra
+
+
+def reiniciar():
+    with _lock:
+        _histogramas.clear()
+
+
+def resumen():
+    """{nombre: {cuenta, suma_ms, media_ms, p50_ms, p95_ms, p99_ms, max_ms}} ordenado por tiempo total."""
+    with _lock:
+        filas = [(n, h.resumen()) for n, h in _histogramas.items()]
+    return dict(sorted(filas, key=lambda f: -f[1]["suma_ms"]))
+
+
+# -----------------------------
+# Volcado
+# -----------------------------
+def texto_prometheus():
+    """Formato de texto de Prometheus: un histograma tienda_duracion_segundos por medida."""
+    lineas = ["# HELP tienda_duracion_segundos Duración de consultas y refrescos de la UI.",
+              "# TYPE tienda_duracion_segundos histogram"]
+    with _lock:
+        for nombre, h in sorted(_histogramas.items()):
+            etiqueta = nombre.replace("\\", "\\\\").replace('"', '\\"')
+            acumulado = 0
+            for limite, n in zip(LIMITES_MS, h.cubetas):
+                acumulado += n
+                lineas.append(f'tienda_duracion_segundos_bucket{{medida="{etiqueta}",le="{limite / 1000:g}"}} {acumulado}')
+            lineas.append(f'tienda_duracion_segundos_bucket{{medida="{etiqueta}",le="+Inf"}} {h.cuenta}')
+            lineas.append(f'tienda_duracion_segundos_sum{{medida="{etiqueta}"}} {h.suma_ms / 1000:.6f}')
+            lineas.append(f'tienda_duracion_segundos_count{{medida="{etiqueta}"}} {h.cuenta}')
+    return "\n".join(lineas) + "\n"
+
+
+def volcar(ruta):
+    """Escribe las métricas en ruta: .prom/.txt en formato Prometheus, cualquier otra en JSON."""
+    if ruta.endswith((".prom", ".txt")):
+        texto = texto_prometheus()
+    else:
+        with _lock:
+            cubetas = {n: list(h.cubetas) for n, h in _histogramas.items()}
+        medidas = {n: {**r, "cubetas": cubetas.get(n)} for n, r in resumen().items()}
+        texto = json.dumps({"fecha": time.strftime("%Y-%m-%d %H:%M:%S"), "limites_ms": LIMITES_MS,
+                            "medidas": medidas}, indent=2, ensure_ascii=False)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+    return ruta
+
+
+if _destino.endswith((".json", ".prom", ".txt")):
+    atexit.register(volcar, _destino)
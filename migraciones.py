@@ -0,0 +1,537 @@
+# migraciones.py
+# Esquema de la BD versionado con PRAGMA user_version. Cada paso de MIGRACIONES
+# lleva la base de la versión n-1 a la n; migrar() corre una vez al arrancar la
+# app y aplica solo los pasos pendientes, todos en una transacción.
+# Las rutas calientes (guardar, vender, listar) asumen el esquema actual: no
+# consultan PRAGMA table_info ni tienen consultas alternativas para bases viejas.
+import sqlite3
+
+import database
+
+
+def _columnas(cur, tabla):
+    return [c[1] for c in cur.execute(f"PRAGMA table_info({tabla})")]
+
+
+# -----------------------------
+# Pasos
+# Los pasos 1-5 son idempotentes: una base anterior al versionado (user_version 0)
+# puede estar en cualquier punto intermedio. Los pasos nuevos van al final.
+# -----------------------------
+def _v1_productos(cur):
+    """Tabla productos con precio_venta y stock, índice cubriente por categoría y nombre único."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS productos(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            precio REAL NOT NULL DEFAULT 0,      -- compatibilidad: algunos usan 'precio'
+            costo REAL NOT NULL DEFAULT 0,
+            categoria TEXT NOT NULL,
+            precio_venta REAL,                   -- precio preferido por la UI
+            stock INTEGER DEFAULT 0
+        )
+    """)
+    cols = _columnas(cur, "productos")
+    if "precio_venta" not in cols:
+        cur.execute("ALTER TABLE productos ADD COLUMN precio_venta REAL")
+    if "stock" not in cols:
+        cur.execute("ALTER TABLE productos ADD COLUMN stock INTEGER DEFAULT 0")
+    # índice cubriente: navegación por categoría e inventario salen del índice,
+    # ya ordenados por nombre (ver test_plan_consultas.py)
+    cur.execute("""CREATE INDEX IF NOT EXISTS idx_productos_categoria_nombre
+                   ON productos(categoria, nombre, precio_venta, precio, stock)""")
+    _indice_nombre(cur)
+
+
+def nombre_unico(cur):
+    """
+    True si productos.nombre tiene un índice único. Una base vieja con nombres repetidos
+    se queda con uno común (ver _indice_nombre) y ahí no vale ON CONFLICT(nombre).
+    """
+    for _, indice, unico, *_ in cur.execute("PRAGMA index_list(productos)").fetchall():
+        cols = [c[2] for c in cur.execute(f"PRAGMA index_info({indice})")]
+        if unico and cols == ["nombre"]:
+            return True
+    return False
+
+
+def _indice_nombre(cur):
+    """Las bases viejas crearon productos sin UNIQUE(nombre); sin índice cada WHERE nombre=? recorre la tabla."""
+    if nombre_unico(cur):
+        return
+    try:
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre)")
+    except sqlite3.IntegrityError:
+        # hay nombres repetidos: al menos que las búsquedas por nombre usen índice
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre)")
+
+
+def _v2_busqueda(cur):
+    """
+    Índice de texto completo sobre nombre y categoría, sincronizado por triggers.
+    remove_diacritics: "cafe" encuentra "Café"; prefix: índices para prefijos de 2 y 3 letras.
+    """
+    existia = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='productos_fts'").fetchone() is not None
+    try:
+        cur.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                nombre, categoria,
+                content='productos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return  # SQLite sin FTS5: busqueda.py cae a LIKE
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+            INSERT INTO productos_fts(rowid, nombre, categoria) VALUES (new.id, new.nombre, new.categoria);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, nombre, categoria)
+                VALUES ('delete', old.id, old.nombre, old.categoria);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, categoria ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, nombre, categoria)
+                VALUES ('delete', old.id, old.nombre, old.categoria);
+            INSERT INTO productos_fts(rowid, nombre, categoria) VALUES (new.id, new.nombre, new.categoria);
+        END
+    """)
+    if not existia:
+        cur.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+
+
+def _v3_log_cambios(cur):
+    """
+    Log de cambios de productos: cada alta, modificación o baja anota el id.
+    Las vistas preguntan qué cambió desde su último seq (ver cambios.py).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS productos_cambios(
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_insert AFTER INSERT ON productos BEGIN
+            INSERT INTO productos_cambios(producto_id) VALUES (new.id);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_update AFTER UPDATE ON productos BEGIN
+            INSERT INTO productos_cambios(producto_id) SELECT old.id UNION SELECT new.id;
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS productos_cambios_delete AFTER DELETE ON productos BEGIN
+            INSERT INTO productos_cambios(producto_id) VALUES (old.id);
+        END
+    """)
+
+
+def _v4_ventas(cur):
+    """
+    Ventas normalizadas: una cabecera por ticket + una línea por producto.
+    - ventas(id, fecha, total)
+    - venta_items(venta_id, producto_id, cantidad, precio_unitario)
+    La vista ventas_planas conserva la forma vieja (producto, cantidad, total, fecha)
+    y acepta INSERT como antes.
+    """
+    viejas = "producto" in _columnas(cur, "ventas")
+    if viejas:
+        cur.execute("ALTER TABLE ventas RENAME TO ventas_planas_old")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ventas(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,                 -- 'YYYY-MM-DD HH:MM:SS'
+            total REAL NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS venta_items(
+            id INTEGER PRIMARY KEY,
+            venta_id INTEGER NOT NULL REFERENCES ventas(id) ON DELETE CASCADE,
+            producto_id INTEGER NOT NULL REFERENCES productos(id),
+            cantidad INTEGER NOT NULL,
+            precio_unitario REAL NOT NULL,
+            costo_unitario REAL                  -- costo del producto al momento de la venta
+        )
+    """)
+    costo_nuevo = "costo_unitario" not in _columnas(cur, "venta_items")
+    if costo_nuevo:
+        cur.execute("ALTER TABLE venta_items ADD COLUMN costo_unitario REAL")
+        # historial previo: el mejor dato disponible es el costo actual
+        cur.execute("""UPDATE venta_items SET costo_unitario =
+                       (SELECT costo FROM productos WHERE id = venta_items.producto_id)""")
+        cur.execute("DROP TRIGGER IF EXISTS ventas_planas_insert")
+    # (fecha, total) cubre los rangos de fechas y los totales diarios sin leer la tabla
+    cur.execute("DROP INDEX IF EXISTS idx_ventas_fecha")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ventas_fecha_total ON ventas(fecha, total)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_venta_items_venta ON venta_items(venta_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_venta_items_producto ON venta_items(producto_id)")
+
+    cur.execute("""
+        CREATE VIEW IF NOT EXISTS ventas_planas AS
+        SELECT i.id, p.nombre AS producto, i.cantidad,
+               i.cantidad * i.precio_unitario AS total, v.fecha,
+               i.venta_id, i.producto_id
+        FROM venta_items i
+        JOIN ventas v ON v.id = i.venta_id
+        JOIN productos p ON p.id = i.producto_id
+    """)
+    # INSERT con la forma vieja: agrupa por fecha en un mismo ticket, como antes
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS ventas_planas_insert
+        INSTEAD OF INSERT ON ventas_planas
+        BEGIN
+            INSERT INTO ventas (fecha, total)
+                SELECT NEW.fecha, 0 WHERE NOT EXISTS (SELECT 1 FROM ventas WHERE fecha = NEW.fecha);
+            INSERT INTO venta_items (venta_id, producto_id, cantidad, precio_unitario, costo_unitario)
+                SELECT (SELECT MAX(id) FROM ventas WHERE fecha = NEW.fecha), p.id,
+                       NEW.cantidad, NEW.total * 1.0 / MAX(NEW.cantidad, 1), p.costo
+                FROM (SELECT 1) LEFT JOIN productos p ON p.nombre = NEW.producto;
+            UPDATE ventas SET total = total + NEW.total
+                WHERE id = (SELECT MAX(id) FROM ventas WHERE fecha = NEW.fecha);
+        END
+    """)
+
+    if viejas:
+        _migrar_ventas_planas(cur)
+
+
+def _migrar_ventas_planas(cur):
+    """Pasa las filas de la tabla vieja (producto TEXT) a cabecera + líneas por id."""
+    # productos vendidos que ya no existen: se recrean para no perder el historial
+    cur.execute("""
+        INSERT INTO productos (nombre, categoria, precio, precio_venta, stock)
+        SELECT o.producto, 'Otros', MAX(o.total * 1.0 / MAX(o.cantidad, 1)), MAX(o.total * 1.0 / MAX(o.cantidad, 1)), 0
+        FROM ventas_planas_old o
+        WHERE o.producto NOT IN (SELECT nombre FROM productos)
+        GROUP BY o.producto
+    """)
+    # un ticket por cada fecha distinta (era la única forma de agrupar)
+    cur.execute("""
+        INSERT INTO ventas (fecha, total)
+        SELECT fecha, SUM(total) FROM ventas_planas_old GROUP BY fecha ORDER BY MIN(id)
+    """)
+    cur.execute("""
+        INSERT INTO venta_items (venta_id, producto_id, cantidad, precio_unitario, costo_unitario)
+        SELECT v.id,
+               (SELECT MIN(p.id) FROM productos p WHERE p.nombre = o.producto),
+               o.cantidad, o.total * 1.0 / MAX(o.cantidad, 1),
+               (SELECT p.costo FROM productos p WHERE p.nombre = o.producto ORDER BY p.id LIMIT 1)
+        FROM ventas_planas_old o
+        JOIN ventas v ON v.fecha = o.fecha
+        ORDER BY o.id
+    """)
+    cur.execute("DROP TABLE ventas_planas_old")
+
+
+# Día y hora salen del texto 'YYYY-MM-DD HH:MM:SS' de ventas.fecha
+_DIA = "substr({f}, 1, 10)"
+_HORA = "CAST(substr({f}, 12, 2) AS INTEGER)"
+
+
+def _v5_resumenes(cur):
+    """
+    Resúmenes materializados, mantenidos por triggers en la misma transacción de la venta:
+    - ventas_diarias(fecha, producto_id, unidades, importe, costo)
+    - ventas_por_hora(fecha, hora, tickets, unidades, importe)
+    Los tableros y reportes leen O(días) filas en vez de recorrer todas las líneas.
+    Si las tablas son nuevas se llenan desde el historial (ver ventas.reconstruir_resumenes).
+    """
+    nuevas = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='ventas_diarias'").fetchone() is None
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ventas_diarias(
+            fecha TEXT NOT NULL,                 -- 'YYYY-MM-DD'
+            producto_id INTEGER NOT NULL,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            importe REAL NOT NULL DEFAULT 0,
+            costo REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, producto_id)
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ventas_por_hora(
+            fecha TEXT NOT NULL,
+            hora INTEGER NOT NULL,               -- 0..23
+            tickets INTEGER NOT NULL DEFAULT 0,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            importe REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, hora)
+        ) WITHOUT ROWID
+    """)
+
+    # una línea suma (signo=+1) o resta (signo=-1) en los dos resúmenes;
+    # al restar se borran las filas que quedan en cero: el resumen es igual a un GROUP BY
+    def linea(fila, signo):
+        fecha = f"(SELECT fecha FROM ventas WHERE id = {fila}.venta_id)"
+        dia, hora = _DIA.format(f=fecha), _HORA.format(f=fecha)
+        sql = f"""
+            INSERT INTO ventas_diarias (fecha, producto_id, unidades, importe, costo)
+                VALUES ({dia}, {fila}.producto_id,
+                        {signo} * {fila}.cantidad,
+                        {signo} * {fila}.cantidad * {fila}.precio_unitario,
+                        {signo} * {fila}.cantidad * COALESCE({fila}.costo_unitario, 0))
+                ON CONFLICT (fecha, producto_id) DO UPDATE SET
+                    unidades = unidades + excluded.unidades,
+                    importe = importe + excluded.importe,
+                    costo = costo + excluded.costo;
+            INSERT INTO ventas_por_hora (fecha, hora, unidades, importe)
+                VALUES ({dia}, {hora}, {signo} * {fila}.cantidad, {signo} * {fila}.cantidad * {fila}.precio_unitario)
+                ON CONFLICT (fecha, hora) DO UPDATE SET
+                    unidades = unidades + excluded.unidades,
+                    importe = importe + excluded.importe;
+        """
+        if signo < 0:
+            sql += f"""
+            DELETE FROM ventas_diarias WHERE fecha = {dia} AND producto_id = {fila}.producto_id AND unidades = 0;
+            DELETE FROM ventas_por_hora WHERE fecha = {dia} AND hora = {hora} AND tickets = 0 AND unidades = 0;
+            """
+        return sql
+
+    def ticket(fila, signo):
+        dia, hora = _DIA.format(f=fila + ".fecha"), _HORA.format(f=fila + ".fecha")
+        sql = f"""
+            INSERT INTO ventas_por_hora (fecha, hora, tickets) VALUES ({dia}, {hora}, {signo})
+                ON CONFLICT (fecha, hora) DO UPDATE SET tickets = tickets + excluded.tickets;
+        """
+        if signo < 0:
+            sql += f"DELETE FROM ventas_por_hora WHERE fecha = {dia} AND hora = {hora} AND tickets = 0 AND unidades = 0;"
+        return sql
+
+    triggers = {
+        "resumen_items_ai": f"AFTER INSERT ON venta_items BEGIN {linea('NEW', 1)} END",
+        "resumen_items_ad": f"AFTER DELETE ON venta_items BEGIN {linea('OLD', -1)} END",
+        "resumen_items_au": f"""AFTER UPDATE OF venta_id, producto_id, cantidad, precio_unitario, costo_unitario
+                               ON venta_items BEGIN {linea('OLD', -1)} {linea('NEW', 1)} END""",
+        "resumen_ventas_ai": f"AFTER INSERT ON ventas BEGIN {ticket('NEW', 1)} END",
+        # las líneas se borran antes que la cabecera: sus triggers todavía ven ventas.fecha
+        "resumen_ventas_bd": "BEFORE DELETE ON ventas BEGIN DELETE FROM venta_items WHERE venta_id = OLD.id; END",
+        "resumen_ventas_ad": f"AFTER DELETE ON ventas BEGIN {ticket('OLD', -1)} END",
+    }
+    for nombre, cuerpo in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}")
+    if nuevas:
+        from ventas import reconstruir_resumenes
+        reconstruir_resumenes(cur)
+
+
+def _v6_codigo_barras(cur):
+    """
+    productos.codigo_barras: único entre los productos que lo tienen (NULL = sin código).
+    El índice cubriente de categoría/nombre lo incluye para que el catálogo en memoria
+    siga cargándose sin tocar la tabla.
+    """
+    if "codigo_barras" not in _columnas(cur, "productos"):
+        cur.execute("ALTER TABLE productos ADD COLUMN codigo_barras TEXT")
+    cur.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_productos_codigo_barras
+                   ON productos(codigo_barras) WHERE codigo_barras IS NOT NULL""")
+    cur.execute("DROP INDEX IF EXISTS idx_productos_categoria_nombre")
+    cur.execute("""CREATE INDEX idx_productos_categoria_nombre
+                   ON productos(categoria, nombre, precio_venta, precio, stock, codigo_barras)""")
+
+
+def _v7_uid_ventas(cur):
+    """
+    ventas.uid: identificador del ticket en el diario de cola_ventas.py. Único, así
+    volver a aplicar el diario tras un corte no duplica ventas (NULL = venta directa).
+    """
+    if "uid" not in _columnas(cur, "ventas"):
+        cur.execute("ALTER TABLE ventas ADD COLUMN uid TEXT")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_ventas_uid ON ventas(uid) WHERE uid IS NOT NULL")
+
+
+def _v8_permite_negativo(cur):
+    """
+    productos.permite_negativo: 1 = se puede vender aunque el stock no alcance (queda
+    negativo, p. ej. productos a granel que no se inventarían). Por defecto no.
+    """
+    if "permite_negativo" not in _columnas(cur, "productos"):
+        cur.execute("ALTER TABLE productos ADD COLUMN permite_negativo INTEGER NOT NULL DEFAULT 0")
+
+
+def _v9_movimientos_stock(cur):
+    """
+    Libro de movimientos de stock (ver movimientos.py), escrito por triggers en la
+    misma transacción de cada cambio de productos.stock, venga de donde venga:
+    - movimientos_stock(id, producto_id, delta, motivo, ref, fecha)
+    - movimiento_motivo: una sola fila con el motivo y la referencia (venta_id) que la
+      app fija antes de tocar el stock; fuera de la app queda 'externo'
+    - stock_fotos / stock_fotos_items: stock de cada producto hasta un movimiento, para
+      responder "stock al día X" sin sumar todo el libro
+    El stock que ya había entra como movimiento 'inicial'.
+    """
+    nueva = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='movimientos_stock'").fetchone() is None
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movimientos_stock(
+            id INTEGER PRIMARY KEY,
+            producto_id INTEGER NOT NULL,        -- sin REFERENCES: el libro sobrevive a la baja
+            delta INTEGER NOT NULL,
+            motivo TEXT NOT NULL,
+            ref INTEGER,                         -- venta_id en las ventas
+            fecha TEXT NOT NULL                  -- 'YYYY-MM-DD HH:MM:SS', hora local
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_movimientos_producto ON movimientos_stock(producto_id, id)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movimiento_motivo(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            motivo TEXT NOT NULL,
+            ref INTEGER
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO movimiento_motivo (id, motivo) VALUES (1, 'externo')")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS stock_fotos(
+            id INTEGER PRIMARY KEY,
+            fecha TEXT NOT NULL,
+            hasta_mov INTEGER NOT NULL           -- incluye los movimientos con id <= hasta_mov
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_stock_fotos_fecha ON stock_fotos(fecha)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS stock_fotos_items(
+            foto_id INTEGER NOT NULL,
+            producto_id INTEGER NOT NULL,
+            stock INTEGER NOT NULL,              -- solo los distintos de cero
+            PRIMARY KEY (foto_id, producto_id)
+        ) WITHOUT ROWID
+    """)
+
+    ahora = "strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')"
+    movimiento = ("INSERT INTO movimientos_stock (producto_id, delta, motivo, ref, fecha) "
+                  "SELECT {id}, {delta}, motivo, ref, " + ahora + " FROM movimiento_motivo;")
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS movimientos_stock_insert AFTER INSERT ON productos
+        WHEN COALESCE(new.stock, 0) != 0 BEGIN
+            {movimiento.format(id="new.id", delta="new.stock")}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS movimientos_stock_update AFTER UPDATE OF stock ON productos
+        WHEN COALESCE(new.stock, 0) != COALESCE(old.stock, 0) BEGIN
+            {movimiento.format(id="new.id", delta="COALESCE(new.stock, 0) - COALESCE(old.stock, 0)")}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS movimientos_stock_delete AFTER DELETE ON productos
+        WHEN COALESCE(old.stock, 0) != 0 BEGIN
+            {movimiento.format(id="old.id", delta="-old.stock")}
+        END
+    """)
+    if nueva:
+        cur.execute(f"""INSERT INTO movimientos_stock (producto_id, delta, motivo, fecha)
+                        SELECT id, stock, 'inicial', {ahora} FROM productos WHERE COALESCE(stock, 0) != 0""")
+
+
+def _v10_pronostico(cur):
+    """
+    Estado del pronóstico de demanda de compras.py, para recalcular solo lo que vendió:
+    - pronostico_demanda: por producto, nivel suavizado (unidades/día sin estacionalidad),
+      varianza del error de un día y un factor por día de la semana (f0 = lunes), al día `dia`
+    - pronostico_estado: una sola fila con el último día procesado y la última corrida
+    - compras_parametros: plazo de entrega, días de cobertura y nivel de servicio por
+      categoría (las que no están usan los valores por defecto de compras.py)
+    """
+    factores = ", ".join(f"f{i} REAL NOT NULL DEFAULT 1" for i in range(7))
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS pronostico_demanda(
+            producto_id INTEGER PRIMARY KEY,     -- sin REFERENCES, como movimientos_stock
+            dia INTEGER NOT NULL,                -- último día incluido (días desde 1970-01-01)
+            nivel REAL NOT NULL,
+            varianza REAL NOT NULL,
+            {factores}
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS pronostico_estado(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            hasta INTEGER,                       -- NULL = nunca se calculó
+            actualizado TEXT,
+            productos INTEGER,
+            segundos REAL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO pronostico_estado (id) VALUES (1)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS compras_parametros(
+            categoria TEXT PRIMARY KEY,
+            plazo_dias INTEGER NOT NULL,
+            cobertura_dias INTEGER NOT NULL,
+            nivel_servicio REAL NOT NULL
+        )
+    """)
+
+
+MIGRACIONES = [_v1_productos, _v2_busqueda, _v3_log_cambios, _v4_ventas, _v5_resumenes,
+               _v6_codigo_barras, _v7_uid_ventas, _v8_permite_negativo,
+               _v9_movimientos_stock, _v10_pronostico]
+VERSION = len(MIGRACIONES)
+
+
+# -----------------------------
+# Índices derivados durante cargas masivas (ver importar.py y benchmarks/datos.py)
+# -----------------------------
+_TRIGGERS_RESUMEN = ("resumen_items_ai", "resumen_items_ad", "resumen_items_au",
+                     "resumen_ventas_ai", "resumen_ventas_ad")
+
+def pausar_indice_busqueda(cur):
+    """
+    Quita los triggers de productos_fts dentro de la transacción de una carga masiva
+    (uno por fila cuesta ~15 veces más que reconstruir el índice al final).
+    Llamar reanudar_indice_busqueda(cur) antes del COMMIT.
+    """
+    for trigger in ("productos_fts_ai", "productos_fts_ad", "productos_fts_au"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def reanudar_indice_busqueda(cur):
+    _v2_busqueda(cur)
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE name='productos_fts'").fetchone():
+        cur.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+
+
+def pausar_resumenes(cur):
+    """
+    Igual que pausar_indice_busqueda para ventas_diarias / ventas_por_hora: cargar
+    historial sin un trigger por línea. reanudar_resumenes(cur) los recalcula completos.
+    """
+    for trigger in _TRIGGERS_RESUMEN:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def reanudar_resumenes(cur):
+    from ventas import reconstruir_resumenes
+    _v5_resumenes(cur)
+    reconstruir_resumenes(cur)
+
+
+# -----------------------------
+# Arranque
+# -----------------------------
+def migrar():
+    """
+    Lleva la BD del pool a la versión VERSION (una transacción; si un paso falla
+    no queda nada a medias). También la deja en modo WAL (ver database.PERFIL_ALMACENAMIENTO).
+    Devuelve (version_anterior, VERSION). Una base de una versión más nueva que
+    esta app no se toca (RuntimeError).
+    """
+    database.activar_wal()
+    with database.escritura() as con:
+        anterior = con.execute("PRAGMA user_version").fetchone()[0]
+        if anterior > VERSION:
+            raise RuntimeError(f"La base de datos es de una versión más nueva de la app ({anterior} > {VERSION}).")
+        cur = con.cursor()
+        for version, paso in enumerate(MIGRACIONES[anterior:], start=anterior + 1):
+            paso(cur)
+            cur.execute(f"PRAGMA user_version = {version}")
+    return anterior, VERSION
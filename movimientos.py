@@ -0,0 +1,171 @@
+# movimientos.py
+# Libro de movimientos de stock: cada cambio de productos.stock queda como una fila
+# (producto, delta, motivo, ref, fecha) que escriben los triggers de migraciones.py
+# en la misma transacción. La app fija el motivo antes de tocar el stock con
+# con_motivo(); lo que cambie otra herramienta queda como 'externo'.
+# Cada FOTO_CADA movimientos se guarda una foto del stock, así "stock al día X"
+# es foto + los movimientos posteriores, no la suma de todo el libro.
+from contextlib import contextmanager
+from datetime import datetime
+
+import database
+
+# Motivos que usa la app
+MOTIVOS = ("inicial", "venta", "entrada", "salida", "conteo", "alta", "edicion", "importacion", "baja", "externo")
+# Movimientos nuevos que justifican otra foto
+FOTO_CADA = 50_000
+
+SQL_MOTIVO = "UPDATE movimiento_motivo SET motivo = ?, ref = ? WHERE id = 1"
+
+# Sin límite de id (no hay foto posterior a la fecha)
+SIN_TOPE = 2 ** 62
+
+# stock por producto = foto (?1) + movimientos con ?2 < id <= ?4 y fecha <= ?3
+SQL_STOCK_AL = """
+    SELECT producto_id, SUM(s) FROM (
+        SELECT producto_id, stock AS s FROM stock_fotos_items WHERE foto_id = ?1
+        UNION ALL
+        SELECT producto_id, delta FROM movimientos_stock WHERE id > ?2 AND id <= ?4 AND fecha <= ?3
+    ) GROUP BY producto_id HAVING SUM(s) != 0
+"""
+
+
+def _ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _fin(fecha):
+    # 'YYYY-MM-DD' incluye todo ese día; None = sin límite
+    if fecha is None:
+        return "9999-12-31"
+    return fecha + " 23:59:59" if len(fecha) == 10 else fecha
+
+
+def fijar_motivo(con, motivo, ref=None):
+    """Motivo y referencia de los próximos cambios de stock en esta transacción."""
+    con.execute(SQL_MOTIVO, (motivo, ref))
+
+
+@contextmanager
+def con_motivo(con, motivo, ref=None):
+    """
+    Los cambios de stock dentro del bloque se anotan con motivo y ref. Al salir bien
+    vuelve a 'externo'; si hay una excepción, el ROLLBACK del llamador lo deshace.
+    """
+    fijar_motivo(con, motivo, ref)
+    yield
+    fijar_motivo(con, "externo")
+
+
+# -----------------------------
+# Fotos
+# -----------------------------
+def _ultima_foto(con, fecha=None):
+    """(foto_id, hasta_mov) de la última foto tomada hasta fecha; (0, 0) si no hay."""
+    if fecha is None:
+        fila = con.execute("SELECT id, hasta_mov FROM stock_fotos ORDER BY id DESC LIMIT 1").fetchone()
+    else:
+        fila = con.execute("SELECT id, hasta_mov FROM stock_fotos WHERE fecha <= ? "
+                           "ORDER BY fecha DESC, id DESC LIMIT 1", (fecha,)).fetchone()
+    return fila or (0, 0)
+
+
+def _tope(con, fecha):
+    """
+    hasta_mov de la primera foto posterior a fecha: los movimientos que siguen son
+    más nuevos que esa foto (las fechas del libro crecen con el id), así la cola de
+    una consulta al pasado no recorre el resto del libro.
+    """
+    fila = con.execute("SELECT hasta_mov FROM stock_fotos WHERE fecha > ? ORDER BY fecha, id LIMIT 1",
+                       (fecha,)).fetchone()
+    return fila[0] if fila else SIN_TOPE
+
+
+def tomar_foto(fecha=None):
+    """
+    Guarda el stock del libro hasta el último movimiento (foto anterior + lo nuevo).
+    fecha: la de la foto (por defecto ahora; los benchmarks cargan historia con fechas
+    pasadas). Devuelve el id de la foto, o el de la anterior si no hubo movimientos.
+    """
+    with database.escritura() as con:
+        previa, desde = _ultima_foto(con)
+        hasta = con.execute("SELECT COALESCE(MAX(id), 0) FROM movimientos_stock").fetchone()[0]
+        if hasta == desde and previa:
+            return previa
+        foto = con.execute("INSERT INTO stock_fotos (fecha, hasta_mov) VALUES (?, ?)",
+                           (fecha or _ahora(), hasta)).lastrowid
+        con.execute("""
+            INSERT INTO stock_fotos_items (foto_id, producto_id, stock)
+            SELECT ?1, producto_id, SUM(s) FROM (
+                SELECT producto_id, stock AS s FROM stock_fotos_items WHERE foto_id = ?2
+                UNION ALL
+                SELECT producto_id, delta FROM movimientos_stock WHERE id > ?3 AND id <= ?4
+            ) GROUP BY producto_id HAVING SUM(s) != 0
+        """, (foto, previa, desde, hasta))
+    return foto
+
+
+def foto_si_hace_falta(cada=FOTO_CADA):
+    """Toma una foto si desde la última hay al menos cada movimientos (la app lo llama con el checkpoint)."""
+    with database.lectura() as con:
+        _foto, desde = _ultima_foto(con)
+        hasta = con.execute("SELECT COALESCE(MAX(id), 0) FROM movimientos_stock").fetchone()[0]
+    if hasta - desde >= cada:
+        return tomar_foto()
+    return None
+
+
+# -----------------------------
+# Consultas
+# -----------------------------
+def stock_al(fecha=None, ids=None):
+    """
+    Stock según el libro al final de fecha ('YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS';
+    None = ahora): {producto_id: stock}, sin los que dan cero. ids limita a esos productos.
+    """
+    hasta = _fin(fecha)
+    with database.lectura() as con:
+        foto, desde = _ultima_foto(con, fecha and hasta)
+        tope = _tope(con, hasta) if fecha else SIN_TOPE
+        if ids is None:
+            return dict(con.execute(SQL_STOCK_AL, (foto, desde, hasta, tope)).fetchall())
+        stock = {}
+        for pid in ids:
+            base = con.execute("SELECT stock FROM stock_fotos_items WHERE foto_id = ? AND producto_id = ?",
+                               (foto, pid)).fetchone()
+            resto = con.execute("SELECT COALESCE(SUM(delta), 0) FROM movimientos_stock "
+                                "WHERE producto_id = ? AND id > ? AND id <= ? AND fecha <= ?",
+                                (pid, desde, tope, hasta)).fetchone()
+            total = (base[0] if base else 0) + resto[0]
+            if total:
+                stock[pid] = total
+        return stock
+
+
+def historial(producto_id, desde=None, hasta=None):
+    """Movimientos de un producto [(fecha, delta, motivo, ref)], del más viejo al más nuevo."""
+    with database.lectura() as con:
+        return con.execute(
+            "SELECT fecha, delta, motivo, ref FROM movimientos_stock WHERE producto_id = ? "
+            "AND fecha >= ? AND fecha <= ? ORDER BY id",
+            (producto_id, desde or "", _fin(hasta)),
+        ).fetchall()
+
+
+def resumen(desde=None, hasta=None):
+    """Unidades por producto y motivo en el rango [(producto_id, motivo, unidades)]: mermas, conteos, ventas."""
+    with database.lectura() as con:
+        return con.execute(
+            "SELECT producto_id, motivo, SUM(delta) FROM movimientos_stock WHERE fecha >= ? AND fecha <= ? "
+            "GROUP BY producto_id, motivo ORDER BY producto_id, motivo",
+            (desde or "", _fin(hasta)),
+        ).fetchall()
+
+
+def descuadres():
+    """Productos cuyo stock no coincide con el libro {id: (libro, stock)}; vacío si nadie tocó el libro a mano."""
+    libro = stock_al()
+    with database.lectura() as con:
+        actual = dict(con.execute("SELECT id, COALESCE(stock, 0) FROM productos").fetchall())
+    return {pid: (libro.get(pid, 0), actual.get(pid, 0))
+            for pid in set(libro) | set(actual) if libro.get(pid, 0) != actual.get(pid, 0)}
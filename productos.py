@@ -1,160 +1,111 @@
 # productos.py
-import os
+# CRUD de productos (sin UI) y los formularios Tk del administrador; Tk se importa
+# dentro de los formularios, así servicio.py, importar.py y las pruebas no lo cargan.
 import sqlite3
-import tkinter as tk
-from tkinter import ttk, messagebox
-
-# -----------------------------
-# Ruta única de la base de datos (compartida por toda la app)
-# -----------------------------
-db_path = os.path.join(os.path.dirname(__file__), "tienda.db")
-
-
-# -----------------------------
-# Utilidades de BD
-# -----------------------------
-def _get_con():
-    return sqlite3.connect(db_path)
-
-def _get_cols(cur):
-    return [c[1] for c in cur.execute("PRAGMA table_info(productos)")]
-
-def ensure_schema():
-    """
-    Crea la tabla productos si no existe y agrega columnas faltantes.
-    Mantenemos compatibilidad con esquemas viejos.
-    """
-    con = _get_con()
-    cur = con.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS productos(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT UNIQUE NOT NULL,
-            precio REAL NOT NULL DEFAULT 0,      -- compatibilidad: algunos usan 'precio'
-            costo REAL NOT NULL DEFAULT 0,
-            categoria TEXT NOT NULL,
-            precio_venta REAL,                   -- precio preferido por la UI
-            stock INTEGER DEFAULT 0
-        )
-    """)
-    cols = _get_cols(cur)
-    if "precio_venta" not in cols:
-        cur.execute("ALTER TABLE productos ADD COLUMN precio_venta REAL")
-    if "stock" not in cols:
-        cur.execute("ALTER TABLE productos ADD COLUMN stock INTEGER DEFAULT 0")
-    con.commit()
-    con.close()
-
-ensure_schema()
 
+import database
+import busqueda
+import catalogo
+import movimientos
 
 # -----------------------------
 # Operaciones CRUD
 # -----------------------------
-def agregar_o_actualizar_producto(nombre, costo, precio, categoria, stock=None, rowid=None):
+def agregar_o_actualizar_producto(nombre, costo, precio, categoria, stock=None, rowid=None, codigo_barras=None,
+                                  permite_negativo=None):
     """
     Inserta o actualiza un producto.
     - Si rowid está, actualiza por id.
     - Si no, intenta insertar; si el nombre ya existe, actualiza por nombre.
     Siempre escribe tanto 'precio' como 'precio_venta' para compatibilidad.
+    codigo_barras: None no lo toca, "" lo quita. Si ya es de otro producto: sqlite3.IntegrityError.
+    permite_negativo: vender aunque no alcance el stock (None no lo toca; nuevo: no).
     """
-    con = _get_con()
-    cur = con.cursor()
-    cols = _get_cols(cur)
-
     # Valores definitivos
     val_stock = int(stock) if (stock is not None and str(stock).strip() != "") else None
     precio = float(precio)
     costo = float(costo)
+    codigo = None if codigo_barras is None else str(codigo_barras).strip()
+    negativo = None if permite_negativo is None else int(bool(permite_negativo))
 
-    try:
-        if rowid:  # actualizar por id conocido
-            if "stock" in cols and val_stock is not None:
-                cur.execute(
-                    "UPDATE productos SET nombre=?, categoria=?, costo=?, precio=?, precio_venta=?, stock=? WHERE id=?",
-                    (nombre, categoria, costo, precio, precio, val_stock, rowid)
-                )
-            else:
-                cur.execute(
-                    "UPDATE productos SET nombre=?, categoria=?, costo=?, precio=?, precio_venta=? WHERE id=?",
-                    (nombre, categoria, costo, precio, precio, rowid)
-                )
-        else:
-            # intentar insertar
-            if "stock" in cols and val_stock is not None:
+    # stock vacío (None) no toca el stock actual; un producto nuevo queda en 0
+    with database.escritura() as con, movimientos.con_motivo(con, "edicion" if rowid else "alta"):
+        cur = con.cursor()
+        try:
+            if rowid:  # actualizar por id conocido
                 cur.execute(
-                    "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
-                    (nombre, categoria, costo, precio, precio, val_stock)
+                    "UPDATE productos SET nombre=?, categoria=?, costo=?, precio=?, precio_venta=?, "
+                    "stock=COALESCE(?, stock), codigo_barras=IIF(? IS NULL, codigo_barras, NULLIF(?, '')), "
+                    "permite_negativo=COALESCE(?, permite_negativo) WHERE id=?",
+                    (nombre, categoria, costo, precio, precio, val_stock, codigo, codigo, negativo, rowid)
                 )
+                producto_id = rowid
             else:
+                # intentar insertar
                 cur.execute(
-                    "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta) VALUES (?,?,?,?,?)",
-                    (nombre, categoria, costo, precio, precio)
+                    "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock, codigo_barras, "
+                    "permite_negativo) VALUES (?,?,?,?,?,COALESCE(?, 0),NULLIF(?, ''),COALESCE(?, 0))",
+                    (nombre, categoria, costo, precio, precio, val_stock, codigo, negativo)
                 )
+                producto_id = cur.lastrowid
 
-    except sqlite3.IntegrityError:
-        # nombre ya existe -> actualizar por nombre
-        if "stock" in cols and val_stock is not None:
-            cur.execute(
-                "UPDATE productos SET categoria=?, costo=?, precio=?, precio_venta=?, stock=? WHERE nombre=?",
-                (categoria, costo, precio, precio, val_stock, nombre)
-            )
-        else:
+        except sqlite3.IntegrityError:
+            # nombre ya existe -> actualizar por nombre
+            movimientos.fijar_motivo(con, "edicion")
             cur.execute(
-                "UPDATE productos SET categoria=?, costo=?, precio=?, precio_venta=? WHERE nombre=?",
-                (categoria, costo, precio, precio, nombre)
+                "UPDATE productos SET categoria=?, costo=?, precio=?, precio_venta=?, "
+                "stock=COALESCE(?, stock), codigo_barras=IIF(? IS NULL, codigo_barras, NULLIF(?, '')), "
+                "permite_negativo=COALESCE(?, permite_negativo) WHERE nombre=? RETURNING id",
+                (categoria, costo, precio, precio, val_stock, codigo, codigo, negativo, nombre)
             )
+            fila = cur.fetchone()
+            if fila is None:
+                raise       # no era el nombre: el código de barras ya es de otro producto
+            producto_id = fila[0]
 
-    con.commit()
-    con.close()
+    # write-through: el catálogo en memoria relee solo esta fila
+    if producto_id is not None:
+        catalogo.refrescar([int(producto_id)])
+
+
+def permite_negativo(rowid):
+    with database.lectura() as con:
+        fila = con.execute("SELECT permite_negativo FROM productos WHERE id=?", (rowid,)).fetchone()
+    return bool(fila and fila[0])
 
 
 def borrar_producto_por_id(rowid):
-    con = _get_con()
-    cur = con.cursor()
-    cur.execute("DELETE FROM productos WHERE id=?", (rowid,))
-    con.commit()
-    con.close()
+    with database.escritura() as con, movimientos.con_motivo(con, "baja"):
+        con.execute("DELETE FROM productos WHERE id=?", (rowid,))
+    catalogo.quitar(int(rowid))
 
 
 def buscar_productos(texto=""):
     """
     Devuelve lista de tuplas:
     (id, nombre, categoria, costo, precio_mostrar, stock)
-    donde precio_mostrar = COALESCE(precio_venta, precio)
+    donde precio_mostrar = COALESCE(precio_venta, precio).
+    Con texto, ordenadas por relevancia (ver busqueda.buscar_ids); sin texto, por nombre.
     """
-    con = _get_con()
-    cur = con.cursor()
-    like = f"%{texto}%"
-    try:
-        rows = cur.execute(
-            """SELECT id, nombre, categoria, costo,
-                      COALESCE(precio_venta, precio) AS precio_mostrar,
-                      stock
-               FROM productos
-               WHERE nombre LIKE ? OR categoria LIKE ?
-               ORDER BY nombre ASC""",
-            (like, like)
+    columnas = "nombre, categoria, costo, COALESCE(precio_venta, precio) AS precio_mostrar"
+    if texto.strip():
+        ids = busqueda.buscar_ids(texto)
+        with database.lectura() as con:
+            return busqueda.filas_por_ids(con, columnas + ", stock", ids)
+
+    with database.lectura() as con:
+        return con.execute(
+            f"SELECT id, {columnas}, stock FROM productos ORDER BY nombre ASC"
         ).fetchall()
-    except sqlite3.OperationalError:
-        # esquemas muy viejos sin stock
-        rows = cur.execute(
-            """SELECT id, nombre, categoria, costo,
-                      COALESCE(precio_venta, precio) AS precio_mostrar,
-                      NULL as stock
-               FROM productos
-               WHERE nombre LIKE ? OR categoria LIKE ?
-               ORDER BY nombre ASC""",
-            (like, like)
-        ).fetchall()
-    con.close()
-    return rows
 
 
 # -----------------------------
 # UI: Registrar nuevo producto (simple)
 # -----------------------------
 def interfaz_registro_producto(frame_destino, categorias, categoria_inicial=None):
+    import tkinter as tk
+    from tkinter import messagebox
+
     for w in frame_destino.winfo_children():
         w.destroy()
 
@@ -184,6 +135,7 @@ def interfaz_registro_producto(frame_destino, categorias, categoria_inicial=None
             .grid(row=i//2, column=i%2, sticky="w", padx=8, pady=4)
 
     entries["stock"] = fila("Stock (opcional)")
+    entries["codigo"] = fila("Código de barras (opcional: escanéalo aquí)")
 
     # Botón
     def registrar():
@@ -191,6 +143,7 @@ def interfaz_registro_producto(frame_destino, categorias, categoria_inicial=None
         costo  = entries["costo"].get().strip()
         precio = entries["precio"].get().strip()
         stock  = entries["stock"].get().strip()
+        codigo = entries["codigo"].get().strip()
         categoria = cat_var.get()
 
         if not nombre or not costo or not precio or not categoria:
@@ -203,7 +156,12 @@ def interfaz_registro_producto(frame_destino, categorias, categoria_inicial=None
             messagebox.showerror("Error", "Costo y precio deben ser numéricos.")
             return
 
-        agregar_o_actualizar_producto(nombre, costo, precio, categoria, stock if stock else None, rowid=None)
+        try:
+            agregar_o_actualizar_producto(nombre, costo, precio, categoria, stock if stock else None,
+                                          rowid=None, codigo_barras=codigo or None)
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", f"El código de barras {codigo} ya es de otro producto.")
+            return
         messagebox.showinfo("OK", f"Producto '{nombre}' guardado.")
         for e in entries.values():
             e.delete(0, tk.END)
@@ -221,6 +179,9 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
     """
     Ventana con buscador + tabla + formulario para editar/crear.
     """
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+
     for w in frame_destino.winfo_children():
         w.destroy()
 
@@ -275,6 +236,10 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
         tk.Radiobutton(frame_cats, text=cat, value=cat, variable=cat_var, bg="#f3f4f6")\
             .grid(row=i//2, column=i%2, sticky="w", padx=6, pady=3)
     ent_stock  = fila("Stock (opcional)")
+    ent_codigo = fila("Código de barras")
+    var_negativo = tk.BooleanVar(value=False)
+    tk.Checkbutton(form, text="Vender aunque no haya stock", variable=var_negativo, anchor="w")\
+        .pack(fill="x", pady=(6,0))
 
     # Botones
     btns = tk.Frame(form); btns.pack(fill="x", pady=6)
@@ -297,6 +262,8 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
         ent_costo.delete(0, tk.END)
         ent_precio.delete(0, tk.END)
         ent_stock.delete(0, tk.END)
+        ent_codigo.delete(0, tk.END)
+        var_negativo.set(False)
         if categorias:
             cat_var.set(categorias[0])
 
@@ -312,6 +279,9 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
         ent_costo.delete(0, tk.END); ent_costo.insert(0, vals[3])
         ent_precio.delete(0, tk.END); ent_precio.insert(0, vals[4])
         ent_stock.delete(0, tk.END); ent_stock.insert(0, vals[5] if vals[5] is not None else "")
+        p = catalogo.get_catalogo().get(rowid)
+        ent_codigo.delete(0, tk.END); ent_codigo.insert(0, (p and p.codigo) or "")
+        var_negativo.set(permite_negativo(rowid))
 
     def guardar():
         nombre = ent_nombre.get().strip()
@@ -319,6 +289,7 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
         precio = ent_precio.get().strip()
         stock  = ent_stock.get().strip()
         cat    = cat_var.get()
+        codigo = ent_codigo.get().strip()
         rid    = ent_id.get().strip()
         if not nombre or not costo or not precio:
             messagebox.showerror("Error", "Nombre, costo y precio son obligatorios.")
@@ -329,14 +300,20 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
             messagebox.showerror("Error", "Costo y precio deben ser numéricos.")
             return
 
-        agregar_o_actualizar_producto(
-            nombre=nombre,
-            costo=costo,
-            precio=precio,
-            categoria=cat,
-            stock=stock if stock else None,
-            rowid=int(rid) if rid else None
-        )
+        try:
+            agregar_o_actualizar_producto(
+                nombre=nombre,
+                costo=costo,
+                precio=precio,
+                categoria=cat,
+                stock=stock if stock else None,
+                rowid=int(rid) if rid else None,
+                codigo_barras=codigo,       # vacío: el producto queda sin código
+                permite_negativo=var_negativo.get(),
+            )
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", f"El código de barras {codigo} ya es de otro producto.")
+            return
         cargar_tabla(var_busca.get())
         if on_saved:
             try:
@@ -352,7 +329,11 @@ def interfaz_admin_productos(frame_destino, categorias, categoria_inicial=None,
             return
         if not messagebox.askyesno("Eliminar", "¿Eliminar el producto seleccionado?"):
             return
-        borrar_producto_por_id(int(sel[0]))
+        try:
+            borrar_producto_por_id(int(sel[0]))
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", "El producto tiene ventas registradas; no se puede eliminar.")
+            return
         limpiar_form()
         cargar_tabla(var_busca.get())
         if on_saved:
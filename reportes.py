@@ -0,0 +1,237 @@
+# reportes.py
+# Exportación de ventas a Excel, CSV o Parquet en memoria constante:
+# las filas salen del cursor de SQLite por lotes (fetchmany) y se escriben
+# apenas llegan; nunca se arma la lista completa en Python.
+import csv
+import os
+import threading
+
+import database
+import segundo_plano
+
+LOTE = 5000
+FORMATOS = ("xlsx", "csv", "parquet")
+# Excel admite 1.048.576 filas por hoja (una es el encabezado); el detalle sigue en otra hoja
+MAX_FILAS_XLSX = 1_048_575
+
+# Límites por defecto: todo el historial
+_DESDE = "0000-01-01"
+_HASTA = "9999-12-30"
+
+# (nombre de hoja, columnas, SQL). Todas reciben (desde, hasta) como días inclusive.
+# Los resúmenes salen de ventas_por_hora / ventas_diarias: O(días) filas, no O(líneas).
+HOJAS = [
+    ("Por día", ("dia", "tickets", "total"),
+     """SELECT fecha, SUM(tickets), SUM(importe)
+        FROM ventas_por_hora
+        WHERE fecha BETWEEN ? AND ?
+        GROUP BY fecha ORDER BY fecha"""),
+    ("Por producto", ("producto", "categoria", "cantidad", "total", "costo"),
+     """SELECT COALESCE(p.nombre, '#' || d.producto_id), p.categoria,
+               SUM(d.unidades), SUM(d.importe) AS total, SUM(d.costo)
+        FROM ventas_diarias d
+        LEFT JOIN productos p ON p.id = d.producto_id
+        WHERE d.fecha BETWEEN ? AND ?
+        GROUP BY d.producto_id ORDER BY total DESC"""),
+    ("Por categoría", ("categoria", "cantidad", "total", "costo"),
+     """SELECT COALESCE(p.categoria, 'Sin categoría') AS cat,
+               SUM(d.unidades), SUM(d.importe) AS total, SUM(d.costo)
+        FROM ventas_diarias d
+        LEFT JOIN productos p ON p.id = d.producto_id
+        WHERE d.fecha BETWEEN ? AND ?
+        GROUP BY cat ORDER BY total DESC"""),
+]
+
+HOJA_DETALLE = ("Detalle", ("venta_id", "fecha", "producto", "categoria", "cantidad", "precio_unitario", "subtotal"),
+    """SELECT v.id, v.fecha, COALESCE(p.nombre, '#' || i.producto_id), p.categoria,
+              i.cantidad, i.precio_unitario, i.cantidad * i.precio_unitario
+       FROM ventas v
+       JOIN venta_items i ON i.venta_id = v.id
+       LEFT JOIN productos p ON p.id = i.producto_id
+       WHERE v.fecha >= ? AND v.fecha < date(?, '+1 day')
+       ORDER BY v.fecha""")
+
+SQL_CONTAR_LINEAS = """
+    SELECT COUNT(*) FROM ventas v JOIN venta_items i ON i.venta_id = v.id
+    WHERE v.fecha >= ? AND v.fecha < date(?, '+1 day')
+"""
+
+
+class ExportacionCancelada(Exception):
+    pass
+
+
+# -----------------------------
+# Escritores por formato
+# -----------------------------
+class _EscritorXlsx:
+    """Libro write_only de openpyxl: cada fila se vuelca a disco al agregarla."""
+
+    def __init__(self, ruta):
+        from openpyxl import Workbook
+        self.ruta = ruta
+        self.archivos = [ruta]
+        self._wb = Workbook(write_only=True)
+        self._hoja = None
+
+    def abrir_hoja(self, nombre, columnas):
+        self._nombre, self._columnas, self._n, self._parte = nombre, columnas, 0, 1
+        self._nueva_hoja(nombre)
+
+    def _nueva_hoja(self, titulo):
+        self._hoja = self._wb.create_sheet(titulo)
+        self._hoja.append(list(self._columnas))
+
+    def escribir(self, filas):
+        for fila in filas:
+            if self._n == MAX_FILAS_XLSX:
+                self._parte += 1
+                self._n = 0
+                self._nueva_hoja(f"{self._nombre} ({self._parte})")
+            self._hoja.append(fila)
+            self._n += 1
+
+    def cerrar(self):
+        self._wb.save(self.ruta)
+
+
+class _EscritorCsv:
+    """Un CSV por hoja: reporte.csv -> reporte_por_dia.csv, reporte_detalle.csv, ..."""
+
+    def __init__(self, ruta):
+        self._base = os.path.splitext(ruta)[0]
+        self.archivos = []
+        self._f = None
+
+    def abrir_hoja(self, nombre, columnas):
+        self._cerrar_hoja()
+        ruta = f"{self._base}_{_sufijo(nombre)}.csv"
+        self.archivos.append(ruta)
+        # utf-8-sig: Excel abre bien las tildes
+        self._f = open(ruta, "w", newline="", encoding="utf-8-sig")
+        self._csv = csv.writer(self._f)
+        self._csv.writerow(columnas)
+
+    def escribir(self, filas):
+        self._csv.writerows(filas)
+
+    def _cerrar_hoja(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def cerrar(self):
+        self._cerrar_hoja()
+
+
+class _EscritorParquet:
+    """Un .parquet por hoja (las hojas vacías no generan archivo); cada lote es un row group. Requiere pyarrow."""
+
+    def __init__(self, ruta):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Para exportar a Parquet instala pyarrow (pip install pyarrow).")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._base = os.path.splitext(ruta)[0]
+        self.archivos = []
+        self._w = None
+
+    def abrir_hoja(self, nombre, columnas):
+        self._cerrar_hoja()
+        self._ruta = f"{self._base}_{_sufijo(nombre)}.parquet"
+        self._columnas = columnas
+
+    def escribir(self, filas):
+        if not filas:
+            return
+        tabla = self._pa.Table.from_pylist([dict(zip(self._columnas, f)) for f in filas])
+        if self._w is None:
+            self._w = self._pq.ParquetWriter(self._ruta, tabla.schema)
+            self.archivos.append(self._ruta)
+        elif tabla.schema != self._w.schema:
+            tabla = tabla.cast(self._w.schema)
+        self._w.write_table(tabla)
+
+    def _cerrar_hoja(self):
+        if self._w is not None:
+            self._w.close()
+            self._w = None
+
+    def cerrar(self):
+        self._cerrar_hoja()
+
+
+ESCRITORES = {"xlsx": _EscritorXlsx, "csv": _EscritorCsv, "parquet": _EscritorParquet}
+
+
+def _sufijo(nombre):
+    tabla = str.maketrans("áéíóúñ ", "aeioun_")
+    return nombre.lower().translate(tabla)
+
+
+# -----------------------------
+# Exportación
+# -----------------------------
+def exportar(ruta, formato=None, desde=None, hasta=None, detalle=True, progreso=None, cancelar=None, lote=LOTE):
+    """
+    Escribe el reporte de ventas (por día, por producto, por categoría y, con
+    detalle=True, una fila por línea vendida). desde/hasta: 'YYYY-MM-DD' inclusive.
+    progreso(hechas, total): filas escritas / estimadas. cancelar: threading.Event.
+    Todo se lee en una sola transacción de lectura (las hojas cuadran entre sí), por
+    una conexión aparte (database.lectura_larga): la caja no espera un lector.
+    Devuelve la lista de archivos escritos.
+    """
+    formato = (formato or os.path.splitext(ruta)[1].lstrip(".") or "xlsx").lower()
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato} (usa {', '.join(FORMATOS)})")
+    rango = (desde or _DESDE, hasta or _HASTA)
+    hojas = HOJAS + ([HOJA_DETALLE] if detalle else [])
+
+    escritor = ESCRITORES[formato](ruta)
+    try:
+        with database.lectura_larga() as con:
+            total = con.execute(SQL_CONTAR_LINEAS, rango).fetchone()[0] if detalle else 0
+            hechas = 0
+            for nombre, columnas, sql in hojas:
+                escritor.abrir_hoja(nombre, columnas)
+                cur = con.execute(sql, rango)
+                while True:
+                    if cancelar is not None and cancelar.is_set():
+                        raise ExportacionCancelada()
+                    filas = cur.fetchmany(lote)
+                    if not filas:
+                        break
+                    escritor.escribir(filas)
+                    if nombre == HOJA_DETALLE[0]:
+                        hechas += len(filas)
+                        if progreso:
+                            progreso(hechas, total)
+        escritor.cerrar()
+    except BaseException:
+        escritor.cerrar()
+        for archivo in escritor.archivos:
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        raise
+    if progreso:
+        progreso(total, total)
+    return escritor.archivos
+
+
+def exportar_en_segundo_plano(ruta, **kwargs):
+    """
+    Corre exportar() en un hilo para no congelar la caja. Devuelve (estado, cancelar):
+    estado = {"hechas", "total", "resultado" (los archivos), "error", "terminado"} lo
+    actualiza el hilo y la UI lo lee periódicamente con root.after.
+    """
+    estado = {"hechas": 0, "total": 0}
+    cancelar = threading.Event()
+
+    def progreso(hechas, total):
+        estado["hechas"], estado["total"] = hechas, total
+
+    segundo_plano.en_segundo_plano(exportar, estado, ruta=ruta, progreso=progreso, cancelar=cancelar, **kwargs)
+    return estado, cancelar
@@ -0,0 +1,26 @@
+# segundo_plano.py
+# Trabajos largos (exportar, importar, análisis, sugerencias de compra) en un hilo
+# para no congelar la caja. La UI no espera al hilo: lee el dict de estado con
+# root.after hasta que "terminado" es True.
+import threading
+
+
+def en_segundo_plano(funcion, estado=None, **kwargs):
+    """
+    Corre funcion(**kwargs) en un hilo. Devuelve estado con "resultado" (lo que
+    devolvió), "error" (la excepción, si falló) y "terminado". estado puede traer
+    claves propias del trabajo (el progreso, por ejemplo) que funcion actualiza.
+    """
+    estado = {} if estado is None else estado
+    estado.update(resultado=None, error=None, terminado=False)
+
+    def trabajar():
+        try:
+            estado["resultado"] = funcion(**kwargs)
+        except Exception as e:
+            estado["error"] = e
+        finally:
+            estado["terminado"] = True
+
+    threading.Thread(target=trabajar, name=getattr(funcion, "__name__", "segundo_plano"), daemon=True).start()
+    return estado
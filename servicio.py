@@ -0,0 +1,338 @@
+# servicio.py
+# Servicio local para varias cajas sobre la misma tienda.db: un solo proceso abre
+# la BD y todas las escrituras pasan por un escritor que las agrupa en lotes (una
+# transacción por lote, un SAVEPOINT por operación), así las cajas no se pelean
+# el lock de SQLite. El catálogo se sirve desde la memoria de este proceso.
+# Solo biblioteca estándar: asyncio + HTTP/1.1 con JSON y conexiones persistentes.
+#
+#   python servicio.py --puerto 8765             (la caja: TIENDA_SERVICIO=http://127.0.0.1:8765)
+#
+# GET  /salud                                     {"ok", "version"}
+# GET  /categorias                                [categoria, ...]
+# GET  /productos?categoria=&q=                   [[id, nombre, precio, stock], ...]
+# GET  /codigo?c=                                 {"id", "nombre", "precio", "stock"} o 404
+# POST /ventas   {"items", "fecha"?, "uid"?}      {"venta_id", "stock": {id: stock}}
+# POST /stock    {"nombre", "delta"? | "fijar"?}  {"stock": {id: stock}}
+#                sin stock: 409 {"error", "faltantes": {id: [pedido, disponible]}}
+# GET  /estadisticas
+import argparse
+import asyncio
+import json
+import signal
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import catalogo
+import database
+import inventario
+import migraciones
+import movimientos
+from ventas import StockInsuficiente, registrar_en, venta_por_uid
+
+PUERTO = 8765
+# Operaciones por transacción como máximo
+LOTE = 200
+RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 503: "Service Unavailable"}
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# -----------------------------
+# Escrituras (corren en el hilo del escritor, dentro de la transacción del lote)
+# -----------------------------
+def _op_venta(con, items, fecha=None, uid=None):
+    if uid:
+        previa = venta_por_uid(con, uid)
+        if previa is not None:      # la caja reintentó una venta que ya había llegado
+            return {"venta_id": previa, "stock": {}, "repetida": True}
+    venta_id, stock = registrar_en(con, items, fecha, uid)
+    return {"venta_id": venta_id, "stock": stock}
+
+
+def _op_stock(con, nombre, delta=None, fijar=None):
+    return {"stock": inventario.ajustar_stock_en(con, nombre, delta, fijar)}
+
+
+OPERACIONES = {"venta": _op_venta, "stock": _op_stock}
+
+
+def aplicar_lote(lote):
+    """
+    lote: [(operacion, kwargs)]. Devuelve un resultado por operación: el dict de la
+    operación o la excepción que la rechazó (también un error de SQLite de esa
+    operación). Solo un error al abrir o confirmar la transacción rechaza el lote entero.
+    """
+    resultados, stock = [], {}
+    try:
+        with database.escritura() as con:
+            for operacion, kwargs in lote:
+                con.execute("SAVEPOINT operacion")
+                try:
+                    r = OPERACIONES[operacion](con, **kwargs)
+                except (ValueError, TypeError, sqlite3.Error) as e:
+                    con.execute("ROLLBACK TO operacion")
+                    con.execute("RELEASE operacion")
+                    resultados.append(e if isinstance(e, (StockInsuficiente, sqlite3.Error)) else ValueError(str(e)))
+                    continue
+                con.execute("RELEASE operacion")
+                stock.update(r["stock"])
+                resultados.append(r)
+    except sqlite3.Error as e:
+        return [e] * len(lote)
+    catalogo.actualizar_stock(stock)
+    return resultados
+
+
+# -----------------------------
+# Servicio
+# -----------------------------
+class Servicio:
+    """
+    iniciar() / cerrar() dentro de un loop de asyncio; en_segundo_plano() arma uno en un hilo.
+    Las lecturas corren en un pool de hilos (el catálogo en memoria tiene su propio lock);
+    las escrituras, en un único hilo escritor.
+    """
+
+    def __init__(self, host="127.0.0.1", puerto=PUERTO):
+        self.host = host
+        self.puerto = puerto
+        self.peticiones = 0
+        self.lotes = 0
+        self.operaciones = 0
+        self._servidor = None
+        self._cola = None
+        self._tarea_escritor = None
+        self._conexiones = set()        # una tarea por caja conectada
+        self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="servicio-escritor")
+        self._lectores = ThreadPoolExecutor(max_workers=4, thread_name_prefix="servicio-lector")
+        self._rutas = {
+            ("GET", "/salud"): self._salud,
+            ("GET", "/categorias"): self._categorias,
+            ("GET", "/productos"): self._productos,
+            ("GET", "/codigo"): self._codigo,
+            ("GET", "/estadisticas"): self._estadisticas,
+            ("POST", "/ventas"): self._ventas,
+            ("POST", "/stock"): self._stock,
+        }
+
+    async def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._tarea_escritor = asyncio.ensure_future(self._escribir())
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]      # puerto=0: uno libre
+        return self
+
+    async def cerrar(self):
+        self._servidor.close()
+        for tarea in list(self._conexiones):
+            tarea.cancel()
+        await asyncio.gather(*self._conexiones, return_exceptions=True)
+        await self._servidor.wait_closed()
+        self._tarea_escritor.cancel()
+        self._escritor.shutdown()
+        self._lectores.shutdown()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.puerto}"
+
+    # --- HTTP ---
+    async def _atender(self, reader, writer):
+        tarea = asyncio.current_task()
+        self._conexiones.add(tarea)
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea.strip():
+                    break
+                metodo, destino, _version = linea.decode("latin-1").split()
+                cabeceras = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    clave, _, valor = h.decode("latin-1").partition(":")
+                    cabeceras[clave.strip().lower()] = valor.strip()
+                largo = int(cabeceras.get("content-length") or 0)
+                cuerpo = await reader.readexactly(largo) if largo else b""
+                estado, respuesta = await self._despachar(metodo, destino, cuerpo)
+                datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                writer.write(f"HTTP/1.1 {estado} {RAZONES[estado]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(datos)}\r\n\r\n".encode("latin-1") + datos)
+                await writer.drain()
+                if cabeceras.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass        # la caja cortó o mandó algo que no es HTTP
+        except asyncio.CancelledError:
+            pass        # cerrar(): el servicio se apaga
+        finally:
+            self._conexiones.discard(tarea)
+            writer.close()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        self.peticiones += 1
+        url = urlsplit(destino)
+        manejador = self._rutas.get((metodo, url.path))
+        if manejador is None:
+            rutas = [m for m, r in self._rutas if r == url.path]
+            return (405, {"error": f"usar {rutas[0]}"}) if rutas else (404, {"error": "no existe"})
+        try:
+            parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if cuerpo:
+                parametros.update(json.loads(cuerpo))
+            return 200, await manejador(parametros)
+        except ErrorPeticion as e:
+            return e.estado, {"error": str(e)}
+        except StockInsuficiente as e:
+            return 409, {"error": str(e), "faltantes": e.faltantes}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {"error": str(e)}
+        except sqlite3.Error as e:
+            return 503, {"error": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            return 503, {"error": str(e)}
+
+    async def _leer(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._lectores, fn, *args)
+
+    # --- lecturas ---
+    async def _salud(self, _p):
+        return {"ok": True, "version": migraciones.VERSION}
+
+    async def _categorias(self, _p):
+        return await self._leer(inventario.obtener_categorias)
+
+    async def _productos(self, p):
+        return await self._leer(inventario.obtener_productos_por_categoria, p.get("categoria"), p.get("q", ""))
+
+    async def _codigo(self, p):
+        producto = await self._leer(catalogo.por_codigo, p["c"])
+        if producto is None:
+            raise ErrorPeticion(404, f"código {p['c']} no encontrado")
+        return {"id": producto.id, "nombre": producto.nombre, "precio": producto.precio,
+                "stock": producto.stock}
+
+    async def _estadisticas(self, _p):
+        return {"peticiones": self.peticiones, "lotes": self.lotes, "operaciones": self.operaciones,
+                "en_cola": self._cola.qsize(), "catalogo": catalogo.estadisticas(),
+                "bd": database.get_pool().estadisticas()}
+
+    # --- escrituras ---
+    async def _ventas(self, p):
+        return await self._escribir_uno("venta", {"items": p["items"], "fecha": p.get("fecha"),
+                                                  "uid": p.get("uid")})
+
+    async def _stock(self, p):
+        return await self._escribir_uno("stock", {"nombre": p["nombre"], "delta": p.get("delta"),
+                                                  "fijar": p.get("fijar")})
+
+    async def _escribir_uno(self, operacion, kwargs):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((operacion, kwargs, futuro))
+        resultado = await futuro
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    async def _escribir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            while len(lote) < LOTE and not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+            try:
+                resultados = await loop.run_in_executor(
+                    self._escritor, aplicar_lote, [(op, kwargs) for op, kwargs, _f in lote])
+            except Exception as e:
+                # un error inesperado rechaza este lote (el manejador lo registra y
+                # responde 503), pero el escritor sigue atendiendo la cola
+                for _op, _kwargs, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            self.lotes += 1
+            self.operaciones += len(lote)
+            for (_op, _kwargs, futuro), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+
+
+def en_segundo_plano(host="127.0.0.1", puerto=0):
+    """Levanta el servicio en un hilo con su propio loop (pruebas, benchmarks). Devuelve (servicio, parar)."""
+    listo = threading.Event()
+    estado = {}
+
+    def correr():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        estado["servicio"] = loop.run_until_complete(Servicio(host, puerto).iniciar())
+        estado["loop"] = loop
+        listo.set()
+        loop.run_forever()
+        loop.run_until_complete(estado["servicio"].cerrar())
+        loop.close()
+
+    hilo = threading.Thread(target=correr, name="servicio", daemon=True)
+    hilo.start()
+    listo.wait()
+
+    def parar():
+        estado["loop"].call_soon_threadsafe(estado["loop"].stop)
+        hilo.join()
+
+    return estado["servicio"], parar
+
+
+async def _principal(host, puerto):
+    servicio = await Servicio(host, puerto).iniciar()
+    print(f"Servicio de la tienda en {servicio.url} (BD: {database.get_pool().ruta})")
+    loop = asyncio.get_running_loop()
+    parar = asyncio.Event()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, parar.set)
+        except (NotImplementedError, RuntimeError):
+            pass    # Windows: Ctrl+C llega como KeyboardInterrupt
+    try:
+        while not parar.is_set():
+            try:
+                await asyncio.wait_for(parar.wait(), database.CHECKPOINT_MS / 1000)
+            except asyncio.TimeoutError:
+                try:
+                    await loop.run_in_executor(servicio._escritor, database.checkpoint)
+                    await loop.run_in_executor(servicio._escritor, movimientos.foto_si_hace_falta)
+                except sqlite3.Error:
+                    pass    # se reintenta en el próximo ciclo
+    finally:
+        await servicio.cerrar()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Servicio local de la tienda para varias cajas")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--puerto", type=int, default=PUERTO)
+    ap.add_argument("--db", help="ruta de la BD (por defecto TIENDA_DB o tienda.db)")
+    args = ap.parse_args(argv)
+    if args.db:
+        database.configurar(args.db)
+    migraciones.migrar()
+    catalogo.get_catalogo().precargar()
+    try:
+        asyncio.run(_principal(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+
+import analisis
+import database
+import productos
+from ventas import registrar_venta_carrito
+
+
+def _tienda():
+    for nombre, categoria, costo, precio, stock in [("Pan", "Granos", 500, 1000, 100), ("Arroz", "Granos", 2000, 2500, 10),
+                                                    ("Leche", "Lácteos y Huevos", 2000, 3500, 100),
+                                                    ("Jabón", "Aseo", 1500, 2000, 5)]:
+        productos.agregar_o_actualizar_producto(nombre, costo, precio, categoria, stock=stock)
+    with database.lectura() as con:
+        ids = dict(con.execute("SELECT nombre, id FROM productos"))
+    registrar_venta_carrito([(ids["Pan"], "Pan", 60, 1000), (ids["Leche"], "Leche", 4, 3500)], "2025-07-01 09:00:00")
+    registrar_venta_carrito([(ids["Pan"], "Pan", 20, 1000), (ids["Arroz"], "Arroz", 2, 2500)], "2025-07-10 10:00:00")
+    return ids
+
+
+@pytest.mark.parametrize("fuente", list(analisis.FUENTES))
+def test_margen_abc_y_velocidad(bd, fuente):
+    ids = _tienda()
+    prod, cats = analisis.analizar("2025-07-01", "2025-07-10", fuente=fuente, lote=2)
+    p = prod.set_index("nombre")
+    assert list(prod["nombre"]) == ["Pan", "Leche", "Arroz", "Jabón"]       # por importe
+    assert p.loc["Pan", "unidades"] == 80 and p.loc["Pan", "importe"] == 80_000
+    assert p.loc["Pan", "margen"] == 40_000 and p.loc["Pan", "margen_pct"] == pytest.approx(0.5)
+    # la clase es la del tramo donde empieza el producto: Pan (0 %) A, Leche (80,8 %) B,
+    # Arroz (94,9 %) B; sin ventas, C
+    assert list(prod["clase"]) == ["A", "B", "B", "C"]
+    assert p.loc["Pan", "velocidad"] == pytest.approx(8.0)                 # 80 unidades en 10 días
+    assert p.loc["Pan", "dias_stock"] == pytest.approx(20 / 8.0)           # quedan 20
+    assert p.loc["Pan", "sell_through"] == pytest.approx(0.8)
+    assert np.isnan(p.loc["Jabón", "dias_stock"]) and np.isnan(p.loc["Jabón", "margen_pct"])
+    assert p.loc["Pan", "id"] == ids["Pan"]
+    assert str(prod["categoria"].dtype) == "category"
+
+    c = cats.set_index("categoria")
+    assert list(cats["categoria"]) == ["Granos", "Lácteos y Huevos", "Aseo"]
+    assert c.loc["Granos", "importe"] == 85_000 and c.loc["Granos", "margen"] == 41_000
+    assert (c.loc["Granos", "clase_A"], c.loc["Granos", "clase_B"], c.loc["Aseo", "clase_C"]) == (1, 1, 1)
+
+
+def test_tipos_de_la_carga(bd):
+    _tienda()
+    ventas = analisis.cargar_ventas(fuente="lineas", lote=1)
+    assert dict(ventas.dtypes.astype(str)) == {"producto_id": "int32", "dia": "int32", "unidades": "int32",
+                                               "importe": "float32", "costo": "float32"}
+    assert len(ventas) == 4
+    vacio, _ = analisis.analizar("2030-01-01", "2030-01-31")
+    assert (vacio["unidades"] == 0).all() and list(vacio["clase"]) == ["C"] * 4
+
+
+def test_guardar(bd, tmp_path):
+    _tienda()
+    archivos = analisis.guardar(str(tmp_path / "a.csv"), *analisis.analizar())
+    assert [a.rsplit("/", 1)[1] for a in archivos] == ["a.csv", "a_categorias.csv"]
+
+
+def test_en_segundo_plano_con_lectura_larga(bd):
+    _tienda()
+    antes = database.get_pool().estadisticas()["lecturas_largas"]
+    estado = analisis.analizar_en_segundo_plano(desde="2025-07-01", hasta="2025-07-10")
+    for _ in range(200):
+        if estado["terminado"]:
+            break
+        threading.Event().wait(0.05)
+    assert estado["error"] is None and estado["resultado"][0]["nombre"][0] == "Pan"
+    # ventas y catálogo por conexiones aparte, no por los lectores del pool
+    assert database.get_pool().estadisticas()["lecturas_largas"] == antes + 2
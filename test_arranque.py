@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.bench_arranque import MODULOS_DIFERIDOS, PRESUPUESTO_IMPORT_MS, tiempos_de_import
+
+
+def test_import_de_la_interfaz_dentro_del_presupuesto(tmp_path):
+    tiempos = tiempos_de_import("interfaz_unificada_tienda", str(tmp_path / "tienda.db"))
+    assert [m for m in MODULOS_DIFERIDOS if m in tiempos] == []
+    assert tiempos["interfaz_unificada_tienda"] < PRESUPUESTO_IMPORT_MS
+    # importar la interfaz no abre la base
+    assert not (tmp_path / "tienda.db").exists()
+
+
+def test_app_importa_solo_tkinter(tmp_path):
+    tiempos = tiempos_de_import("app", str(tmp_path / "tienda.db"))
+    assert "interfaz_unificada_tienda" not in tiempos and "database" not in tiempos
+
+
+def test_servicio_no_carga_la_interfaz(tmp_path):
+    tiempos = tiempos_de_import("servicio", str(tmp_path / "tienda.db"))
+    assert "tkinter" not in tiempos and "interfaz_unificada_tienda" not in tiempos
+
+
+@pytest.mark.parametrize("modulo", ["productos", "importar"])
+def test_capa_de_datos_sin_tkinter(tmp_path, modulo):
+    assert "tkinter" not in tiempos_de_import(modulo, str(tmp_path / "tienda.db"))
@@ -0,0 +1,187 @@
+import busqueda
+import database
+import productos
+import interfaz_unificada_tienda as app
+
+
+def _cargar():
+    for nombre, cat in [("Café Sello Rojo", "Granos"), ("Cafetera", "Otros"),
+                        ("Leche Alquería", "Lácteos y Huevos"), ("coca-cola 1.5L", "Gaseosa"),
+                        ("Arroz Diana", "Granos")]:
+        productos.agregar_o_actualizar_producto(nombre, 100, 200, cat, stock=1)
+    with database.lectura() as con:
+        return dict(con.execute("SELECT nombre, id FROM productos"))
+
+
+def test_consulta_fts():
+    assert busqueda.consulta_fts("caf sel") == '"caf"* "sel"*'
+    assert busqueda.consulta_fts('a"b') == '"a"* "b"*'
+    assert busqueda.consulta_fts("  ") == ""
+    assert busqueda.consulta_fts("leche", "nombre") == 'nombre : ("leche"*)'
+
+
+def test_sin_tildes_y_por_prefijo(bd):
+    ids = _cargar()
+    assert set(busqueda.buscar_ids("cafe")) == {ids["Café Sello Rojo"], ids["Cafetera"]}
+    assert busqueda.buscar_ids("caf sel") == [ids["Café Sello Rojo"]]
+    assert busqueda.buscar_ids("lacteos") == [ids["Leche Alquería"]]          # por categoría
+    assert busqueda.buscar_ids("lacteos", columna="nombre") == []
+    assert busqueda.buscar_ids("coca-cola") == [ids["coca-cola 1.5L"]]
+    assert busqueda.buscar_ids("caf", categoria="Otros") == [ids["Cafetera"]]
+
+
+def test_triggers_mantienen_indice(bd):
+    ids = _cargar()
+    productos.agregar_o_actualizar_producto("Té Hindú", 100, 200, "Otros", rowid=ids["Cafetera"])
+    assert busqueda.buscar_ids("cafetera") == []
+    assert busqueda.buscar_ids("te hindu") == [ids["Cafetera"]]
+    productos.borrar_producto_por_id(ids["Arroz Diana"])
+    assert busqueda.buscar_ids("arroz") == []
+    with database.lectura() as con:
+        con.execute("INSERT INTO productos_fts(productos_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_call_sites_usan_fts(bd):
+    ids = _cargar()
+    assert {r[1] for r in productos.buscar_productos("granos")} == {"Café Sello Rojo", "Arroz Diana"}
+    assert app.obtener_productos_por_categoria("Granos", "cafe") == [
+        (ids["Café Sello Rojo"], "Café Sello Rojo", 200.0, 1)]
+    assert app.obtener_inventario("Todas", "leche") == [("Lácteos y Huevos", "Leche Alquería", 1)]
+
+
+# -----------------------------
+# ControladorBusqueda: teclas rápidas simuladas
+# -----------------------------
+class RootFalso:
+    """after/after_cancel con reloj virtual (avanzar) en vez del mainloop de Tk."""
+
+    def __init__(self):
+        self.ahora = 0
+        self._tareas = {}
+        self._n = 0
+
+    def after(self, ms, fn):
+        self._n += 1
+        self._tareas[self._n] = (self.ahora + ms, fn)
+        return self._n
+
+    def after_cancel(self, ident):
+        self._tareas.pop(ident, None)
+
+    def avanzar(self, ms):
+        self.ahora += ms
+        while True:
+            listas = sorted((t, i) for i, (t, _) in self._tareas.items() if t <= self.ahora)
+            if not listas:
+                return
+            _, i = listas[0]
+            self._tareas.pop(i)[1]()
+
+
+class EjecutorManual:
+    """Guarda los trabajos para correrlos cuando (y en el orden que) diga la prueba."""
+
+    def __init__(self):
+        self.trabajos = []
+
+    def submit(self, fn, *args):
+        self.trabajos.append((fn, args))
+
+    def correr(self, orden=None):
+        trabajos, self.trabajos = self.trabajos, []
+        for i in (orden if orden is not None else range(len(trabajos))):
+            fn, args = trabajos[i]
+            fn(*args)
+
+
+def _controlador(espera_ms=200):
+    root, ejecutor = RootFalso(), EjecutorManual()
+    consultas, pintados = [], []
+
+    def buscar(texto):
+        consultas.append(texto)
+        return f"resultado de {texto}"
+
+    ctl = busqueda.ControladorBusqueda(root, buscar, pintados.append, espera_ms=espera_ms, ejecutor=ejecutor)
+    return ctl, root, ejecutor, consultas, pintados
+
+
+def test_rafaga_de_teclas_busca_una_sola_vez():
+    ctl, root, ejecutor, consultas, pintados = _controlador()
+    for parcial in ["c", "ca", "caf", "cafe", "cafe s", "cafe se"]:
+        ctl.solicitar(parcial)
+        root.avanzar(40)           # tecleo rápido: menos que la espera
+    root.avanzar(200)
+    ejecutor.correr()
+    root.avanzar(0)
+    assert consultas == ["cafe se"]
+    assert pintados == ["resultado de cafe se"]
+
+
+def test_resultados_viejos_se_descartan():
+    ctl, root, ejecutor, consultas, pintados = _controlador()
+    # tecleo lento: cada búsqueda alcanza a lanzarse, pero el hilo va atrasado
+    for parcial in ["le", "lec", "lech"]:
+        ctl.solicitar(parcial)
+        root.avanzar(250)
+    assert len(ejecutor.trabajos) == 3
+    ejecutor.correr(orden=[2, 0, 1])   # la última termina primero
+    root.avanzar(0)
+    assert consultas == ["lech"]       # las superadas ni llegan a consultar
+    assert pintados == ["resultado de lech"]
+    assert ctl.descartadas == 2
+
+
+def test_resultado_en_camino_se_descarta_si_llega_otra_tecla():
+    ctl, root, ejecutor, consultas, pintados = _controlador()
+    ctl.solicitar("arr")
+    root.avanzar(200)
+    ejecutor.correr()                  # ya consultó, falta entregar en el hilo de Tk
+    ctl.solicitar("arroz")
+    root.avanzar(0)
+    assert pintados == []
+    root.avanzar(200)
+    ejecutor.correr()
+    root.avanzar(0)
+    assert consultas == ["arr", "arroz"]
+    assert pintados == ["resultado de arroz"]
+
+
+def test_ahora_y_cancelar():
+    ctl, root, ejecutor, consultas, pintados = _controlador()
+    ctl.solicitar("pa")
+    ctl.ahora("pan")                   # Enter: sin esperar, y la pendiente no corre
+    ejecutor.correr(); root.avanzar(500); ejecutor.correr(); root.avanzar(0)
+    assert pintados == ["resultado de pan"]
+    ctl.solicitar("leche")
+    ctl.cancelar()
+    root.avanzar(500); ejecutor.correr(); root.avanzar(0)
+    assert consultas == ["pan"]
+
+
+def test_con_hilo_real(bd):
+    import threading
+    productos.agregar_o_actualizar_producto("Café Sello Rojo", 100, 200, "Granos", stock=1)
+    root = RootFalso()
+    lock = threading.Lock()
+    listo = threading.Event()
+    pintados = []
+
+    def after(ms, fn, _after=root.after):
+        with lock:
+            return _after(ms, fn)
+
+    root.after = after
+    ctl = busqueda.ControladorBusqueda(
+        root, app.obtener_productos_por_categoria,
+        lambda r: (pintados.append(r), listo.set()), espera_ms=50)
+    for parcial in ["c", "ca", "caf"]:
+        ctl.solicitar("Granos", parcial)
+    for _ in range(200):
+        with lock:
+            root.avanzar(10)
+        if listo.wait(0.01):
+            break
+    with lock:
+        root.avanzar(0)
+    assert [[r[1] for r in p] for p in pintados] == [["Café Sello Rojo"]]
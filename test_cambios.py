@@ -0,0 +1,156 @@
+import sqlite3
+
+import cambios
+import database
+import inventario
+import productos
+import interfaz_unificada_tienda as app
+from interfaz_unificada_tienda import ArbolInventario
+from test_busqueda import RootFalso
+from ventas import registrar_venta_carrito
+
+
+class TreeFalso:
+    """Lo mínimo de ttk.Treeview que usa ArbolInventario."""
+
+    def __init__(self):
+        self.hijos = {"": []}
+        self.nodos = {}
+
+    def insert(self, parent, index, iid, text, values, open=False):
+        self.hijos[parent].insert(index, iid)
+        self.hijos[iid] = []
+        self.nodos[iid] = (text, values)
+
+    def item(self, iid, values):
+        self.nodos[iid] = (self.nodos[iid][0], values)
+
+    def delete(self, *iids):
+        for iid in iids:
+            for lista in self.hijos.values():
+                if iid in lista:
+                    lista.remove(iid)
+            del self.hijos[iid], self.nodos[iid]
+
+    def volcar(self):
+        """[(categoria, [(nombre, stock)])] en el orden en que se ven."""
+        return [(self.nodos[c][0], [(self.nodos[p][0], self.nodos[p][1][0]) for p in self.hijos[c]])
+                for c in self.hijos[""]]
+
+
+def _cargar():
+    for nombre, cat, stock in [("Pan", "Granos", 5), ("Arroz", "Granos", 3),
+                               ("Leche", "Lácteos y Huevos", 7), ("Jabón", "Aseo", 2)]:
+        productos.agregar_o_actualizar_producto(nombre, 100, 200, cat, stock=stock)
+    with database.lectura() as con:
+        return dict(con.execute("SELECT nombre, id FROM productos"))
+
+
+def _vista(filas):
+    """Lo que pintaba la versión anterior (recarga completa) para comparar."""
+    grupos = {}
+    for categoria, nombre, stock in filas:
+        grupos.setdefault(categoria, []).append((nombre, stock))
+    return list(grupos.items())
+
+
+def test_log_anota_altas_cambios_y_ventas(bd):
+    seq = cambios.ultimo_seq()
+    ids = _cargar()
+    seq, cambiados = cambios.cambios_desde(seq)
+    assert cambiados == set(ids.values())
+    registrar_venta_carrito([(ids["Pan"], "Pan", 1, 200)])
+    seq, cambiados = cambios.cambios_desde(seq)
+    assert cambiados == {ids["Pan"]}
+    productos.borrar_producto_por_id(ids["Jabón"])
+    assert cambios.cambios_desde(seq)[1] == {ids["Jabón"]}
+
+
+def test_log_purgado_pide_recarga(bd):
+    seq = cambios.ultimo_seq()
+    _cargar()
+    app.ajustar_stock("Pan", delta=1)
+    cambios.purgar(conservar=1)
+    assert cambios.cambios_desde(seq)[1] is None
+    assert cambios.cambios_desde(cambios.ultimo_seq())[1] == set()
+
+
+def test_arbol_aplica_solo_diferencias(bd):
+    ids = _cargar()
+    tree = TreeFalso()
+    arbol = ArbolInventario(tree)
+    arbol.cargar(app.obtener_inventario_ids())
+    assert tree.volcar() == _vista(app.obtener_inventario())
+    assert arbol.ops == 3 + 4          # 3 categorías + 4 productos
+
+    arbol.ops = 0
+    arbol.cargar(app.obtener_inventario_ids())      # sin cambios: no toca el widget
+    assert arbol.ops == 0
+
+    app.ajustar_stock("Pan", delta=-2)
+    productos.agregar_o_actualizar_producto("Atún", 100, 200, "Otros", stock=1)
+    productos.agregar_o_actualizar_producto("Jabón", 100, 200, "Granos", stock=2)
+    cambiados = {ids["Pan"], ids["Jabón"], ids["Jabón"] + 10}
+    with database.lectura() as con:
+        cambiados.add(con.execute("SELECT id FROM productos WHERE nombre='Atún'").fetchone()[0])
+    arbol.aplicar(app.obtener_inventario_ids(ids=cambiados), cambiados)
+    assert tree.volcar() == _vista(app.obtener_inventario())
+    # Pan: 1 item; Atún: categoría + fila; Jabón: quitar fila + categoría vacía + insertar
+    assert arbol.ops == 1 + 2 + 3
+
+
+def test_arbol_con_filtro(bd):
+    ids = _cargar()
+    tree = TreeFalso()
+    arbol = ArbolInventario(tree)
+    arbol.cargar(app.obtener_inventario_ids("Granos"))
+    app.ajustar_stock("Leche", delta=1)                     # otra categoría: no aparece
+    app.ajustar_stock("Arroz", delta=1)
+    cambiados = {ids["Leche"], ids["Arroz"]}
+    arbol.aplicar(app.obtener_inventario_ids("Granos", ids=cambiados), cambiados)
+    assert tree.volcar() == [("Granos", [("Arroz", 4), ("Pan", 5)])]
+
+    arbol.cargar(app.obtener_inventario_ids("Todas", "pan"))
+    app.ajustar_stock("Pan", delta=1)
+    arbol.aplicar(app.obtener_inventario_ids("Todas", "pan", ids={ids["Pan"]}), {ids["Pan"]})
+    assert tree.volcar() == [("Granos", [("Pan", 6)])]
+
+
+def test_vigilante_sin_consultas_en_reposo(bd):
+    ids = _cargar()
+    root = RootFalso()
+    avisos = []
+    vigilante = cambios.VigilanteCambios(root, intervalo_ms=1000, externo_ms=10_000)
+    vigilante.suscribir(avisos.append)
+    antes = database.estadisticas()["consultas"]
+    for _ in range(9):
+        root.avanzar(1_000)
+    assert database.estadisticas()["consultas"] == antes and avisos == []
+
+    app.ajustar_stock("Pan", delta=1)                       # escritura de este proceso
+    root.avanzar(1_000)
+    assert avisos == [{ids["Pan"]}]
+
+    for _ in range(60):                                     # un minuto sin cambios
+        root.avanzar(1_000)
+    assert vigilante.consultas == 1 + 1 + 6                 # suscribir + aviso + otra caja c/10 s
+    assert len(avisos) == 1
+
+    vigilante.desuscribir(avisos.append)
+    assert root._tareas == {}
+
+
+def test_escritura_de_otra_caja_llega_con_el_stock_nuevo(bd):
+    ids = _cargar()
+    assert (ids["Pan"], "Granos", "Pan", 5) in inventario.obtener_inventario_ids()     # catálogo cargado
+    avisos = []
+    vigilante = cambios.VigilanteCambios(RootFalso())
+    vigilante.suscribir(avisos.append)
+    con = sqlite3.connect(bd.ruta)                          # otra caja sobre el mismo archivo
+    with con:
+        con.execute("UPDATE productos SET stock = 1 WHERE id = ?", (ids["Pan"],))
+    con.close()
+    vigilante.revisar()
+    assert avisos == [{ids["Pan"]}]
+    # el aviso ya consumió ese cambio del log: el catálogo no puede esperar a EXTERNO_S
+    assert inventario.obtener_inventario_ids(ids=avisos[0]) == [(ids["Pan"], "Granos", "Pan", 1)]
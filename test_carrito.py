@@ -0,0 +1,70 @@
+import random
+
+import carrito
+from carrito import Carrito, a_centavos
+
+
+def _espejo(c):
+    """Aplica los eventos a una lista como lo haría el Treeview."""
+    filas = []
+
+    def aplicar(cambio):
+        if cambio.tipo == carrito.AGREGADO:
+            filas.insert(cambio.indice, cambio.nombre)
+        elif cambio.tipo == carrito.QUITADO:
+            filas.remove(cambio.nombre)
+        elif cambio.tipo == carrito.VACIADO:
+            filas.clear()
+
+    c.suscribir(aplicar)
+    return filas
+
+
+def test_a_centavos():
+    assert a_centavos(0.1) == 10
+    assert a_centavos("1999.995") == 200000
+    assert a_centavos(None) == 0
+    assert a_centavos(3500) == 350000
+
+
+def test_eventos_por_linea():
+    c = Carrito()
+    eventos = []
+    c.suscribir(eventos.append)
+    c.agregar("Pan", 1000, producto_id=1)
+    c.agregar("Pan", 1000, cantidad=5)
+    c.agregar("Arroz", 2500, producto_id=2)
+    c.cambiar_cantidad("Pan", -6)
+    assert [(e.tipo, e.nombre, e.indice) for e in eventos] == [
+        ("agregado", "Pan", 0), ("cantidad", "Pan", None),
+        ("agregado", "Arroz", 0), ("quitado", "Pan", None)]
+    assert c.total_c == 250000 and c.items_venta() == [(2, "Arroz", 1, 2500.0)]
+
+
+def test_total_incremental_igual_al_recalculado():
+    rnd = random.Random(9)
+    c = Carrito()
+    filas = _espejo(c)
+    precios = {f"P{i:03d}": rnd.choice([0.1, 0.2, 999.99, 1000, 3500.5, 12000, 1e-2]) for i in range(300)}
+    for _ in range(5000):
+        nombre = rnd.choice(list(precios))
+        op = rnd.random()
+        if op < 0.5:
+            c.agregar(nombre, precios[nombre], cantidad=rnd.randint(1, 5), producto_id=1)
+        elif op < 0.9:
+            c.cambiar_cantidad(nombre, rnd.choice([-1, 1, 5, -5]))
+        elif op < 0.995:
+            c.quitar(nombre)
+        else:
+            c.vaciar()
+        assert c.total_c == c.recalcular_total_c()
+    assert filas == sorted(c.lineas) == c.nombres()
+    # mismo total que sumar cada línea en centavos al final
+    assert c.total_c == sum(a_centavos(precios[n]) * l["cantidad"] for n, l in c.lineas.items())
+
+
+def test_vaciar():
+    c = Carrito()
+    c.agregar("Pan", 1000)
+    c.vaciar()
+    assert len(c) == 0 and c.total_c == 0 and not c
@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+import catalogo
+import database
+import productos
+import interfaz_unificada_tienda as app
+from ventas import registrar_venta_carrito
+
+SQL_GRILLA = """SELECT id, nombre, COALESCE(precio_venta,precio), stock FROM productos
+                WHERE categoria=? ORDER BY nombre"""
+SQL_INVENTARIO = "SELECT id, categoria, nombre, COALESCE(stock,0) FROM productos ORDER BY categoria, nombre"
+
+
+def _cargar():
+    for nombre, cat, stock in [("Pan", "Granos", 5), ("Arroz", "Granos", 3), ("Avena", "Granos", 9),
+                               ("Leche", "Lácteos y Huevos", 7), ("Jabón", "Aseo", 2)]:
+        productos.agregar_o_actualizar_producto(nombre, 100, 200, cat, stock=stock)
+    with database.lectura() as con:
+        return dict(con.execute("SELECT nombre, id FROM productos"))
+
+
+def _igual_a_sql():
+    with database.lectura() as con:
+        for cat in ("Granos", "Aseo", "Lácteos y Huevos", "Otros"):
+            assert app.obtener_productos_por_categoria(cat) == con.execute(SQL_GRILLA, (cat,)).fetchall()
+        assert app.obtener_inventario_ids() == con.execute(SQL_INVENTARIO).fetchall()
+        assert app.obtener_categorias() == [r[0] for r in con.execute(
+            "SELECT DISTINCT categoria FROM productos ORDER BY categoria")]
+
+
+def _consultas():
+    return database.estadisticas()["consultas"]
+
+
+def test_lecturas_desde_memoria(bd):
+    _cargar()
+    _igual_a_sql()
+    antes, stats = _consultas(), catalogo.estadisticas()
+    for _ in range(50):
+        app.obtener_productos_por_categoria("Granos")
+        app.obtener_categorias()
+    assert _consultas() == antes
+    assert catalogo.estadisticas()["aciertos"] == stats["aciertos"] + 100
+    assert catalogo.estadisticas()["fallos"] == stats["fallos"]
+
+
+def test_ganchos_de_escritura(bd):
+    ids = _cargar()
+    app.obtener_categorias()
+
+    registrar_venta_carrito([(ids["Pan"], "Pan", 2, 200)])
+    app.ajustar_stock("Leche", delta=4)
+    productos.agregar_o_actualizar_producto("Atún", 100, 300, "Otros", stock=1)
+    productos.agregar_o_actualizar_producto("Avena", 100, 250, "Otros", stock=9)          # por nombre
+    productos.agregar_o_actualizar_producto("Arroz Diana", 100, 210, "Granos", rowid=ids["Arroz"])
+    productos.borrar_producto_por_id(ids["Jabón"])
+
+    antes, fallos = _consultas(), catalogo.estadisticas()["fallos"]
+    cache = catalogo.get_catalogo()
+    assert cache.get(ids["Pan"]).stock == 3
+    assert cache.por_nombre("Leche").stock == 11
+    assert cache.precio(ids["Avena"]) == 250
+    assert cache.por_nombre("Arroz") is None and cache.por_nombre("Arroz Diana").id == ids["Arroz"]
+    assert _consultas() == antes and catalogo.estadisticas()["fallos"] == fallos
+    _igual_a_sql()
+
+
+def test_escritura_sin_gancho_se_sincroniza_por_el_log(bd):
+    ids = _cargar()
+    app.obtener_categorias()
+    with database.escritura() as con:
+        con.execute("UPDATE productos SET stock = 42 WHERE id = ?", (ids["Pan"],))
+    assert catalogo.get_catalogo().get(ids["Pan"]).stock == 42
+    _igual_a_sql()
+
+
+def test_venta_deshecha_no_toca_el_catalogo(bd):
+    ids = _cargar()
+    app.obtener_categorias()
+    with pytest.raises(RuntimeError):
+        with database.escritura():
+            registrar_venta_carrito([(ids["Pan"], "Pan", 2, 200)])
+            raise RuntimeError("se cae la caja")
+    assert catalogo.get_catalogo().get(ids["Pan"]).stock == 5
+
+
+def test_otra_caja(bd):
+    ids = _cargar()
+    cache = catalogo.Catalogo(externo_s=0)
+    assert cache.get(ids["Pan"]).stock == 5
+    otra = sqlite3.connect(bd.ruta)
+    with otra:
+        otra.execute("UPDATE productos SET stock = 1, categoria = 'Otros' WHERE id = ?", (ids["Pan"],))
+    otra.close()
+    assert [p.nombre for p in cache.de_categoria("Otros")] == ["Pan"]
+    assert [p.nombre for p in cache.de_categoria("Granos")] == ["Arroz", "Avena"]
+
+
+def test_precarga_en_segundo_plano(bd):
+    _cargar()
+    catalogo.precargar_en_segundo_plano().join()
+    antes = _consultas()
+    assert [p.nombre for p in catalogo.get_catalogo().de_categoria("Granos")] == ["Arroz", "Avena", "Pan"]
+    assert _consultas() == antes
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import catalogo
+import cola_ventas
+import database
+from ventas import StockInsuficiente, registrar_venta_carrito
+
+
+def _contar(sql="SELECT COUNT(*) FROM ventas"):
+    with database.lectura() as con:
+        return con.execute(sql).fetchone()[0]
+
+
+def test_encola_aplica_y_vacia_el_diario(crear_producto, tmp_path):
+    pan = crear_producto("Pan", 10)
+    hechos = []
+    cola = cola_ventas.ColaVentas(str(tmp_path / "diario"), al_aplicar=hechos.extend, vaciar_desde=0).iniciar()
+    for _ in range(3):
+        cola.encolar([(pan, "Pan", 2, 1000)])
+    cola.esperar()
+    assert _contar() == 3 and cola.aplicadas == 3
+    assert _contar("SELECT COUNT(DISTINCT uid) FROM ventas") == 3
+    assert catalogo.get_catalogo().get(pan).stock == 4
+    assert [stock for _uid, _venta, stock in hechos][-1] == {pan: 4}
+    assert os.path.getsize(cola.ruta) == 0 and cola.pendientes() == 0
+    cola.cerrar()
+
+
+def test_recupera_lo_que_quedo_en_el_diario(crear_producto, tmp_path):
+    pan = crear_producto("Pan", 10)
+    ruta = str(tmp_path / "diario")
+    caida = cola_ventas.ColaVentas(ruta)          # sin escritor: todo queda solo en el diario
+    caida.encolar([(pan, "Pan", 1, 1000)], "2025-07-19 09:00:00")
+    uid = caida.encolar([(pan, "Pan", 2, 1000)], "2025-07-19 09:05:00")
+    caida.encolar([(pan, "Pan", 3, 1000)], "2025-07-19 09:10:00")
+    caida.cerrar()
+    # la segunda alcanzó a llegar a la BD antes del corte; la última línea quedó a medias
+    registrar_venta_carrito([(pan, "Pan", 2, 1000)], "2025-07-19 09:05:00", uid=uid)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"uid":"cortada","fecha":"2025-07-19 09:15')
+
+    cola = cola_ventas.ColaVentas(ruta)
+    assert cola.recuperar() == 2 and cola.duplicadas == 1
+    assert _contar() == 3
+    assert _contar("SELECT stock FROM productos WHERE id = %d" % pan) == 4
+    assert os.path.getsize(ruta) == 0
+    assert cola.recuperar() == 0 and _contar() == 3      # una segunda vez no repite nada
+
+
+def test_ticket_rechazado_no_frena_el_lote(crear_producto, tmp_path):
+    pan = crear_producto("Pan", 10)
+    rechazos = []
+    cola = cola_ventas.ColaVentas(str(tmp_path / "diario"),
+                                  al_rechazar=lambda entrada, error: rechazos.append(entrada["uid"])).iniciar()
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    fantasma = cola.encolar([(pan, "Pan", 1, 1000), (9999, "Fantasma", 1, 500)])
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    cola.esperar()
+    assert rechazos == [fantasma] and cola.rechazadas == 1
+    assert _contar() == 2 and _contar("SELECT stock FROM productos WHERE id = %d" % pan) == 8
+    assert cola.leer_diario() == []
+    assert [e["uid"] for e in cola_ventas.ColaVentas(cola.ruta + ".rechazadas").leer_diario()] == [fantasma]
+    cola.cerrar()
+
+
+def test_proceso_que_muere_sin_cerrar(bd, tmp_path, crear_producto):
+    pan = crear_producto("Pan", 1000)
+    ruta = str(tmp_path / "diario")
+    # encola 50 ventas con el escritor andando y muere sin cerrar nada
+    codigo = textwrap.dedent(f"""
+        import os, cola_ventas
+        cola = cola_ventas.ColaVentas({ruta!r}).iniciar()
+        for _ in range(50):
+            cola.encolar([({pan}, "Pan", 1, 1000)])
+        os._exit(0)
+    """)
+    subprocess.run([sys.executable, "-c", codigo], check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                   env={**os.environ, "TIENDA_DB": bd.ruta})
+    aplicadas = _contar()
+    assert aplicadas <= 50
+    assert cola_ventas.ColaVentas(ruta).recuperar() == 50 - aplicadas
+    assert _contar() == 50
+    assert _contar("SELECT stock FROM productos WHERE id = %d" % pan) == 950
+
+
+def test_no_encola_lo_que_no_hay(crear_producto, tmp_path):
+    pan = crear_producto("Pan", 5)
+    cola = cola_ventas.ColaVentas(str(tmp_path / "diario"))     # sin escritor: todo queda pendiente
+    cola.encolar([(pan, "Pan", 3, 1000)])
+    # la BD todavía dice 5, pero 3 ya están comprometidos por el ticket pendiente
+    with pytest.raises(StockInsuficiente) as e:
+        cola.encolar([(pan, "Pan", 3, 1000)])
+    assert e.value.faltantes == {pan: (3, 2)}
+    assert len(cola.leer_diario()) == 1 and cola.pendientes() == 1
+    cola.encolar([(pan, "Pan", 2, 1000)])
+    cola.iniciar().esperar()
+    assert _contar("SELECT stock FROM productos WHERE id = %d" % pan) == 0
+    with pytest.raises(StockInsuficiente):
+        cola.encolar([(pan, "Pan", 1, 1000)])
+    cola.cerrar()
+
+
+def test_un_error_en_el_aviso_no_mata_al_escritor(crear_producto, tmp_path, capsys):
+    pan = crear_producto("Pan", 10)
+
+    def aviso(_hechos):
+        raise RuntimeError("la UI se cerró")
+
+    cola = cola_ventas.ColaVentas(str(tmp_path / "diario"), al_aplicar=aviso).iniciar()
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    cola.esperar()
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    cola.esperar()
+    assert _contar() == 2 and cola.aplicadas == 2 and cola._hilo.is_alive()
+    assert "la UI se cerró" in capsys.readouterr().err
+    cola.cerrar()
+
+
+def test_cerrar_sin_esperar_al_escritor(crear_producto, tmp_path, monkeypatch):
+    import threading
+    import time
+    pan = crear_producto("Pan", 10)
+    errores = []
+    monkeypatch.setattr(threading, "excepthook", errores.append)
+    cola = cola_ventas.ColaVentas(str(tmp_path / "diario"), vaciar_desde=0).iniciar()
+    aplicar = cola._aplicar
+    monkeypatch.setattr(cola, "_aplicar", lambda lote: time.sleep(0.3) or aplicar(lote))
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    hilo = cola._hilo
+    cola.cerrar(timeout=0.01)
+    hilo.join()
+    assert errores == [] and _contar() == 1
+    # el diario no se vació: al abrir otra vez ese ticket se salta por uid
+    assert len(cola.leer_diario()) == 1
+
+
+def test_recuperar_con_la_bd_bloqueada(crear_producto, tmp_path, monkeypatch):
+    pan = crear_producto("Pan", 10)
+    ruta = str(tmp_path / "diario")
+    caida = cola_ventas.ColaVentas(ruta)
+    caida.encolar([(pan, "Pan", 2, 1000)])
+    caida.cerrar()
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"uid":"cortada","fecha":"2025-07-19 09:15')
+
+    cola = cola_ventas.ColaVentas(ruta)
+    aplicar = cola._aplicar
+
+    def bloqueada(lote):
+        monkeypatch.setattr(cola, "_aplicar", aplicar)      # otra caja soltó el lock
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cola, "_aplicar", bloqueada)
+    # la app abre igual: el ticket queda en el diario y pendiente para el escritor
+    assert cola.recuperar() == 0 and cola.pendientes() == 1 and _contar() == 0
+    cola.iniciar()
+    cola.encolar([(pan, "Pan", 1, 1000)])
+    cola.esperar()
+    assert _contar() == 2 and _contar("SELECT stock FROM productos WHERE id = %d" % pan) == 7
+    assert len(cola.leer_diario()) == 2          # la línea cortada no rompió lo anotado después
+    cola.cerrar()
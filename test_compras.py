@@ -0,0 +1,106 @@
+import math
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+import compras
+import database
+import interfaz_unificada_tienda as app
+from ventas import registrar_venta_carrito
+
+FIN = date(2024, 3, 31)         # domingo: la ventana de 8 semanas empieza un lunes
+
+
+def _vender(pid, nombre, cantidad, dia):
+    registrar_venta_carrito([(pid, nombre, cantidad, 1000)], fecha=f"{dia.isoformat()} 10:00:00")
+
+
+def _estado():
+    with database.lectura() as con:
+        return con.execute("SELECT * FROM pronostico_demanda ORDER BY producto_id").fetchall()
+
+
+def test_demanda_semanal_y_punto_de_pedido(crear_producto):
+    pan = crear_producto("Pan", 1000, categoria="Panadería")
+    for i in range(compras.VENTANA):
+        dia = FIN - timedelta(days=i)
+        _vender(pan, "Pan", 7 if dia.weekday() == 5 else 1, dia)     # los sábados se vende más
+    corrida = compras.actualizar(FIN.isoformat())
+    assert (corrida["hasta"], corrida["productos"], corrida["reiniciados"]) == ("2024-03-31", 1, 1)
+    app.ajustar_stock("Pan", fijar=5)
+    p, c = compras.sugerencias()
+    fila = p.set_index("nombre").loc["Pan"]
+    assert fila["demanda_diaria"] == pytest.approx(13 / 7)
+    # un plazo de 7 días es una semana entera: los factores suman 7
+    assert fila["demanda_plazo"] == pytest.approx(13)
+    assert fila["stock_seguridad"] > 0 and fila["sugerido"] == math.ceil(fila["objetivo"] - 5)
+    with database.lectura() as con:
+        factores = con.execute("SELECT f0, f1, f2, f3, f4, f5, f6 FROM pronostico_demanda").fetchone()
+    assert factores[5] > 2 and max(factores[:5] + factores[6:]) < 1
+    assert c.set_index("categoria").loc["Panadería", ["a_pedir", "sugerido"]].tolist() == [1, fila["sugerido"]]
+
+
+def test_solo_se_recalcula_lo_que_vendio(crear_producto):
+    pan, leche = crear_producto("Pan", 1000), crear_producto("Leche", 1000)
+    for i in range(14):
+        _vender(pan, "Pan", 2, FIN - timedelta(days=i))
+        _vender(leche, "Leche", 3, FIN - timedelta(days=i))
+    compras.actualizar(FIN.isoformat())
+    antes = _estado()
+    _vender(pan, "Pan", 4, FIN + timedelta(days=1))
+    _vender(pan, "Pan", 1, FIN + timedelta(days=3))
+
+    # una corrida por noche: el día sin ventas no toca nada y Leche nunca se recalcula
+    corridas = [compras.actualizar((FIN + timedelta(days=d)).isoformat())["productos"] for d in (1, 2, 3)]
+    assert corridas == [1, 0, 1]
+    por_noche = _estado()
+    assert por_noche[1] == antes[1]
+
+    # tres noches de una vez dan lo mismo
+    with database.escritura() as con:
+        con.execute("DELETE FROM pronostico_demanda")
+        con.executemany(compras.SQL_GUARDAR, antes)
+        con.execute("UPDATE pronostico_estado SET hasta = ?", (compras._a_dia(FIN.isoformat()),))
+    assert compras.actualizar((FIN + timedelta(days=3)).isoformat())["productos"] == 1
+    assert _estado() == [pytest.approx(f) for f in por_noche]
+
+    # Leche: tres días sin ventas decaen el nivel al leer
+    p, _c = compras.sugerencias()
+    assert p.set_index("nombre").loc["Leche", "demanda_diaria"] == pytest.approx(antes[1][2] * (1 - compras.ALFA) ** 3)
+
+
+def test_parametros_por_categoria(crear_producto):
+    pan, vino = crear_producto("Pan", 1000), crear_producto("Vino", 1000, categoria="Licores")
+    for i in range(compras.VENTANA):
+        _vender(pan, "Pan", 1, FIN - timedelta(days=i))
+        _vender(vino, "Vino", 1, FIN - timedelta(days=i))
+    compras.actualizar(FIN.isoformat())
+    app.ajustar_stock("Pan", fijar=10)
+    app.ajustar_stock("Vino", fijar=10)
+    compras.fijar_parametros("Licores", plazo=21, cobertura=30, servicio=0.99)
+    with pytest.raises(ValueError):
+        compras.fijar_parametros("Licores", servicio=1.5)
+    p, c = compras.sugerencias()
+    p = p.set_index("nombre")
+    # Pan: 7 días de plazo con 10 en stock no llega al punto de pedido; Vino sí
+    assert p.loc["Pan", "sugerido"] == 0 and p.loc["Vino", "sugerido"] == 41
+    assert p.index[0] == "Vino"
+    assert c.set_index("categoria").loc["Licores", ["plazo_dias", "cobertura_dias", "nivel_servicio"]].tolist() \
+        == [21, 30, 0.99]
+
+
+def test_en_segundo_plano_con_lectura_larga(crear_producto):
+    pan = crear_producto("Pan", 1000)
+    for i in range(1, 15):     # actualizar() llega hasta ayer
+        _vender(pan, "Pan", 2, date.today() - timedelta(days=i))
+    antes = database.get_pool().estadisticas()["lecturas_largas"]
+    estado = compras.sugerencias_en_segundo_plano()
+    for _ in range(200):
+        if estado["terminado"]:
+            break
+        threading.Event().wait(0.05)
+    assert estado["error"] is None and estado["corrida"]["productos"] == 1
+    assert estado["resultado"][0].set_index("nombre").loc["Pan", "demanda_diaria"] > 0
+    # actualizar() y sugerencias() leen ventas_diarias, el estado y el catálogo por conexiones aparte
+    assert database.get_pool().estadisticas()["lecturas_largas"] == antes + 3
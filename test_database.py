@@ -0,0 +1,92 @@
+import threading
+
+import database
+import productos
+
+
+def test_conexiones_se_reutilizan(bd):
+    for i in range(50):
+        productos.agregar_o_actualizar_producto(f"P{i}", 100, 150, "Otros", stock=5)
+        productos.buscar_productos("P")
+    stats = database.estadisticas()
+    # un escritor + como mucho N lectores, sin importar cuántas llamadas
+    assert stats["conexiones_abiertas"] <= 1 + bd.n_lectores
+    assert stats["consultas"] >= 100
+
+
+def test_escritura_hace_rollback_si_falla(bd):
+    try:
+        with database.escritura() as con:
+            con.execute("INSERT INTO productos (nombre, categoria) VALUES ('X', 'Otros')")
+            raise RuntimeError("falla a mitad")
+    except RuntimeError:
+        pass
+    assert productos.buscar_productos("X") == []
+
+
+def test_lectores_concurrentes(bd):
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=3)
+    errores = []
+
+    def leer():
+        try:
+            for _ in range(20):
+                assert len(productos.buscar_productos("Pan")) == 1
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errores.append(e)
+
+    hilos = [threading.Thread(target=leer) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert not errores
+    assert database.estadisticas()["conexiones_abiertas"] <= 1 + bd.n_lectores
+
+
+def test_perfil_wal_aplicado(bd):
+    with database.lectura() as con:
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert con.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    busy, _, _ = database.checkpoint()
+    assert busy == 0
+
+
+def test_lector_no_bloquea_al_escritor(bd):
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=3)
+    with database.lectura() as con:
+        cur = con.execute("SELECT nombre FROM productos")
+        con.execute("BEGIN")  # snapshot de lectura abierto
+        cur.fetchall()
+        productos.agregar_o_actualizar_producto("Leche", 2000, 3000, "Lácteos y Huevos", stock=1)
+        con.execute("COMMIT")
+    assert len(productos.buscar_productos("")) == 2
+
+
+def test_lector_de_mas_si_todos_estan_prestados(bd):
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=3)
+    with database.lectura(), database.lectura():        # p. ej. dos lecturas largas
+        with database.lectura() as con:
+            assert con.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 1
+    stats = database.estadisticas()
+    assert stats["desbordes"] == 1
+    # el de más se cierra al devolverlo
+    assert stats["conexiones_abiertas"] == 1 + bd.n_lectores
+
+
+def test_lectura_larga_no_ocupa_lectores(bd):
+    import sqlite3
+
+    import pytest
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=3)
+    with database.lectura(), database.lectura():
+        with database.lectura_larga() as con:
+            assert con.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 1
+            productos.agregar_o_actualizar_producto("Leche", 2000, 3000, "Lácteos y Huevos", stock=1)
+            # transacción de lectura: no ve lo escrito después de la primera lectura
+            assert con.execute("SELECT COUNT(*) FROM productos").fetchone()[0] == 1
+            with pytest.raises(sqlite3.OperationalError):
+                con.execute("DELETE FROM productos")
+    stats = database.estadisticas()
+    assert stats["desbordes"] == 0 and stats["lecturas_largas"] == 1
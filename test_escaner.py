@@ -0,0 +1,92 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import carrito
+import catalogo
+import escaner
+import importar
+import interfaz_unificada_tienda as app
+import productos
+
+
+def _teclear(lector, texto, inicio, paso_ms):
+    resultado = None
+    for i, c in enumerate(texto + "\r"):
+        resultado = lector.tecla(c, inicio + i * paso_ms)
+    return resultado
+
+
+def test_rafagas_vs_persona():
+    lector = escaner.LectorRafagas()
+    assert _teclear(lector, "7702001001234", 0, 5) == "7702001001234"
+    assert _teclear(lector, "7702001001234", 1000, 120) is None       # alguien tecleando
+    assert _teclear(lector, "12", 5000, 5) is None                     # muy corto
+    # teclas sueltas antes de la ráfaga no se pegan al código
+    lector.tecla("x", 9000)
+    assert _teclear(lector, "4006381333931", 9500, 8) == "4006381333931"
+    # mayúsculas: el Shift llega como tecla sin carácter
+    for i, c in enumerate(["", "A", "", "B", "1", "2", "\r"]):
+        codigo = lector.tecla(c, 20000 + i * 3)
+    assert codigo == "AB12"
+
+
+def test_codigo_unico_y_catalogo(bd):
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3000, "Lácteos y Huevos", codigo_barras="7702001001234")
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos")
+    assert catalogo.por_codigo("7702001001234").nombre == "Leche"
+    with pytest.raises(sqlite3.IntegrityError):
+        productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", codigo_barras="7702001001234")
+    with pytest.raises(sqlite3.IntegrityError):
+        productos.agregar_o_actualizar_producto("Arroz", 500, 1000, "Granos", codigo_barras="7702001001234")
+    assert catalogo.por_codigo("7702001001234").nombre == "Leche"
+
+    # cambiar el código (write-through): el viejo deja de encontrarse
+    leche = catalogo.por_codigo("7702001001234")
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3100, "Lácteos y Huevos", rowid=leche.id,
+                                            codigo_barras="7702001009999")
+    assert catalogo.por_codigo("7702001001234") is None
+    assert catalogo.por_codigo("7702001009999").precio == 3100
+    # None no lo toca, "" lo quita
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3200, "Lácteos y Huevos")
+    assert catalogo.por_codigo("7702001009999").precio == 3200
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3200, "Lácteos y Huevos", codigo_barras="")
+    assert catalogo.por_codigo("7702001009999") is None
+
+
+def test_importar_codigos(bd, tmp_path):
+    ruta = tmp_path / "lista.csv"
+    ruta.write_text("nombre,categoria,costo,precio,EAN\n"
+                    "Leche,Lácteos y Huevos,1800,3000,7702001001234\n"
+                    "Pan,Granos,500,1000,\n"
+                    "Arroz,Granos,2000,2600,111\n"
+                    "Avena,Granos,2000,2600,111\n", encoding="utf-8")
+    r = importar.importar(str(ruta))
+    assert r["importadas"] == 2
+    assert [e[1] for e in r["errores"]] == ["código de barras repetido en el archivo"] * 2
+    assert catalogo.por_codigo("7702001001234").nombre == "Leche"
+    assert catalogo.get_catalogo().por_nombre("Pan").codigo is None
+
+
+class _Etiqueta:
+    def __init__(self):
+        self.texto = ""
+
+    def config(self, text):
+        self.texto = text
+
+
+def test_escanear_agrega_al_carrito(bd):
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3000, "Lácteos y Huevos", codigo_barras="7702001001234")
+    cambios = []
+    caja = SimpleNamespace(carrito=carrito.Carrito(), lbl_escaner=_Etiqueta(), root=SimpleNamespace(bell=lambda: None))
+    caja.agregar_producto = lambda *args: app.TiendaApp.agregar_producto(caja, *args)
+    caja.carrito.suscribir(cambios.append)
+
+    assert app.TiendaApp.escanear(caja, "7702001001234").nombre == "Leche"
+    app.TiendaApp.escanear(caja, "7702001001234")
+    assert caja.carrito.items_venta() == [(catalogo.por_codigo("7702001001234").id, "Leche", 2, 3000)]
+    assert [c.tipo for c in cambios] == [carrito.AGREGADO, carrito.CANTIDAD]
+    assert app.TiendaApp.escanear(caja, "000") is None
+    assert "no encontrado" in caja.lbl_escaner.texto
@@ -0,0 +1,48 @@
+from grilla_virtual import ModeloGrilla, rango_visible
+
+
+def test_rango_visible():
+    assert rango_visible(0, 600, 150, 100, overscan=0) == (0, 5)
+    assert rango_visible(0, 600, 150, 100, overscan=1) == (0, 6)
+    assert rango_visible(1500, 600, 150, 100, overscan=1) == (9, 16)
+    assert rango_visible(14900, 600, 150, 100, overscan=1) == (98, 100)   # al final
+    assert rango_visible(0, 600, 150, 0) == (0, 0)
+
+
+def test_solo_materializa_lo_visible():
+    m = ModeloGrilla(columnas=2, alto_fila=150, overscan=1)
+    m.set_items(range(10_000))
+    nuevas, ocultas = m.actualizar(0, 600)
+    assert ocultas == []
+    assert sorted(i for _, i in nuevas) == list(range(12))    # 6 filas x 2 columnas
+    assert m.n_ranuras == 12
+    assert m.alto_total() == 5000 * 150
+
+
+def test_scroll_recicla_ranuras():
+    m = ModeloGrilla(columnas=2, alto_fila=150, overscan=1)
+    m.set_items(range(10_000))
+    m.actualizar(0, 600)
+    fondo = m.alto_total() - 600
+    for y in list(range(0, fondo, 97)) + [fondo]:   # recorrer toda la lista
+        nuevas, ocultas = m.actualizar(y, 600)
+        ranuras = list(m.asignadas.values())
+        assert len(ranuras) == len(set(ranuras))        # nunca dos items en la misma tarjeta
+        assert not set(ocultas) & set(ranuras)
+    assert m.n_ranuras <= 14
+    assert sorted(m.asignadas) == list(range(9990, 10_000))
+
+
+def test_set_items_reasigna_y_oculta_sobrantes():
+    m = ModeloGrilla(columnas=2, alto_fila=150, overscan=0)
+    m.set_items(range(100))
+    m.actualizar(0, 600)
+    m.set_items(["a", "b", "c"])
+    nuevas, ocultas = m.actualizar(0, 600)
+    assert sorted(i for _, i in nuevas) == [0, 1, 2]
+    assert len(ocultas) == m.n_ranuras - 3
+    assert m.n_ranuras == 10          # no se crearon tarjetas nuevas
+
+    m.set_items([])
+    nuevas, ocultas = m.actualizar(0, 600)
+    assert nuevas == [] and len(ocultas) == 3
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from openpyxl import Workbook
+
+import busqueda
+import cambios
+import catalogo
+import database
+import importar
+import productos
+
+
+def _productos():
+    with database.lectura() as con:
+        return {n: (c, cst, p, pv, s) for n, c, cst, p, pv, s in con.execute(
+            "SELECT nombre, categoria, costo, precio, precio_venta, stock FROM productos")}
+
+
+def _csv(tmp_path, texto, nombre="lista.csv"):
+    ruta = tmp_path / nombre
+    ruta.write_text(texto, encoding="utf-8")
+    return str(ruta)
+
+
+def test_csv_inserta_actualiza_y_reporta_errores(bd, tmp_path):
+    productos.agregar_o_actualizar_producto("Leche", 1800, 3000, "Lácteos y Huevos", stock=20)
+    ruta = _csv(tmp_path, "Nombre;Categoría;Costo;Precio venta;Stock\n"
+                          "Pan;Granos;500;1.000;10\n"
+                          "Leche;Lácteos y Huevos;2000,5;$ 3.500;\n"
+                          ";Aseo;1;2;3\n"
+                          "Jabón;;x;-1;2.5\n"
+                          "Arroz;Granos;2000;2600;\n")
+    r = importar.importar(ruta, lote=2)
+    assert (r["filas"], r["importadas"], r["n_errores"]) == (5, 3, 2)
+    assert r["errores"] == [(4, "falta el nombre"),
+                            (5, "falta la categoría; costo inválido; precio inválido; stock inválido")]
+    assert _productos() == {
+        "Pan": ("Granos", 500, 1000, 1000, 10),
+        "Leche": ("Lácteos y Huevos", 2000.5, 3500, 3500, 20),      # stock vacío: se conserva
+        "Arroz": ("Granos", 2000, 2600, 2600, 0),
+    }
+    assert [p.nombre for p in catalogo.get_catalogo().de_categoria("Granos")] == ["Arroz", "Pan"]
+    assert busqueda.buscar_ids("arroz") == [catalogo.get_catalogo().por_nombre("Arroz").id]
+
+    # la misma lista otra vez: nada cambia, nada se anota en el log
+    seq = cambios.ultimo_seq()
+    importar.importar(ruta)
+    assert cambios.cambios_desde(seq)[1] == set()
+
+
+def test_base_vieja_con_nombres_repetidos(tmp_path):
+    # productos sin UNIQUE(nombre) y con repetidos: la migración deja un índice común
+    # (migraciones._indice_nombre) y ahí no vale ON CONFLICT(nombre)
+    import sqlite3
+
+    import migraciones
+    db = str(tmp_path / "vieja.db")
+    with sqlite3.connect(db) as con:
+        con.execute("""CREATE TABLE productos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL,
+                       precio REAL NOT NULL DEFAULT 0, costo REAL NOT NULL DEFAULT 0, categoria TEXT NOT NULL)""")
+        con.executemany("INSERT INTO productos (nombre, categoria, costo, precio) VALUES (?, 'Granos', 1, 2)",
+                        [("Pan",), ("Pan",)])
+    pool = database.configurar(db)
+    try:
+        migraciones.migrar()
+        ruta = _csv(tmp_path, "nombre,categoria,costo,precio,stock\n"
+                              "Pan,Granos,500,1000,\n"
+                              "Arroz,Granos,2000,2500,\n"
+                              "Arroz,Granos,2000,2600,4\n")
+        assert importar.importar(ruta)["importadas"] == 3
+        with database.lectura() as con:
+            assert con.execute("SELECT nombre, costo, precio, stock FROM productos ORDER BY id").fetchall() == [
+                ("Pan", 500, 1000, 0), ("Pan", 500, 1000, 0), ("Arroz", 2000, 2600, 4)]
+    finally:
+        pool.cerrar()
+
+
+def test_xlsx(bd, tmp_path):
+    wb = Workbook()
+    hoja = wb.active
+    hoja.append(["producto", "categoria", "costo", "precio"])
+    hoja.append(["Café", "Otros", 6000, 8000])
+    hoja.append(["Té", "Otros", None, 3000])
+    ruta = str(tmp_path / "lista.xlsx")
+    wb.save(ruta)
+    r = importar.importar(ruta)
+    assert r["importadas"] == 1 and r["errores"] == [(3, "costo inválido")]
+    assert _productos() == {"Café": ("Otros", 6000, 8000, 8000, 0)}
+
+
+def test_faltan_columnas_no_escribe_nada(bd, tmp_path):
+    ruta = _csv(tmp_path, "nombre,precio\nPan,1000\n")
+    with pytest.raises(ValueError, match="categoria, costo"):
+        importar.importar(ruta)
+    assert _productos() == {}
+
+
+def test_cancelar_deshace_todo(bd, tmp_path):
+    ruta = _csv(tmp_path, "nombre,categoria,costo,precio\n" + "".join(f"P{i},Otros,1,2\n" for i in range(10)))
+    cancelar = threading.Event()
+    with pytest.raises(importar.ImportacionCancelada):
+        importar.importar(ruta, lote=3, progreso=lambda n: cancelar.set(), cancelar=cancelar)
+    assert _productos() == {}
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import database
+import metricas
+import productos
+from ventas import registrar_venta_carrito
+
+
+@pytest.fixture
+def medir():
+    anterior = metricas.activo
+    metricas.reiniciar()
+    metricas.activar()
+    yield
+    metricas.activar(anterior)
+    metricas.reiniciar()
+
+
+def test_apagado_no_registra(bd):
+    metricas.activar(False)
+    metricas.reiniciar()
+
+    @metricas.medido("prueba.funcion")
+    def funcion():
+        return 7
+
+    with metricas.medir("prueba.bloque"):
+        assert funcion() == 7
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos")
+    assert metricas.resumen() == {}
+
+
+def test_consultas_y_bloques(bd, medir):
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=5)
+    registrar_venta_carrito([(1, "Pan", 2, 1000)])
+
+    @metricas.medido("ui.algo")
+    def refrescar():
+        with database.lectura() as con:
+            return con.execute("SELECT stock FROM productos").fetchone()[0]
+
+    assert refrescar() == 3
+    with pytest.raises(ZeroDivisionError):
+        with metricas.medir("ui.falla"):
+            1 / 0
+    r = metricas.resumen()
+    assert {"sql.insert", "sql.select", "sql.begin", "sql.commit", "ui.algo", "ui.falla"} <= set(r)
+    assert r["ui.algo"]["cuenta"] == 1 and r["sql.commit"]["cuenta"] == 2
+    assert r["ui.algo"]["max_ms"] >= r["ui.algo"]["p50_ms"] > 0
+
+
+def test_percentiles_por_cubeta(medir):
+    for ms in [0.3] * 90 + [40] * 9 + [3000]:
+        metricas.registrar("x", ms)
+    r = metricas.resumen()["x"]
+    assert (r["cuenta"], r["p50_ms"], r["p95_ms"], r["max_ms"]) == (100, 0.5, 50, 3000)
+    assert r["p99_ms"] == 50
+
+
+def test_volcado_json_y_prometheus(tmp_path, medir):
+    metricas.registrar('ui."raro"', 0.2)
+    metricas.registrar("sql.select", 0.02)
+    metricas.registrar("sql.select", 7)
+    datos = json.loads(open(metricas.volcar(str(tmp_path / "m.json"))).read())
+    assert datos["medidas"]["sql.select"]["cuenta"] == 2
+    assert sum(datos["medidas"]["sql.select"]["cubetas"]) == 2
+
+    texto = open(metricas.volcar(str(tmp_path / "m.prom"))).read()
+    assert "# TYPE tienda_duracion_segundos histogram" in texto
+    assert 'tienda_duracion_segundos_bucket{medida="sql.select",le="0.005"} 1' in texto
+    assert 'tienda_duracion_segundos_bucket{medida="sql.select",le="0.01"} 2' in texto
+    assert 'tienda_duracion_segundos_count{medida="sql.select"} 2' in texto
+    assert 'medida="ui.\\"raro\\""' in texto
@@ -0,0 +1,64 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import database
+import migraciones
+
+
+def _version():
+    with database.lectura() as con:
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_base_nueva_y_segunda_corrida(bd):
+    assert _version() == migraciones.VERSION
+    sentencias = []
+    bd.rastrear(sentencias.append)
+    assert migraciones.migrar() == (migraciones.VERSION, migraciones.VERSION)
+    bd.rastrear(None)
+    # al día: solo se lee la versión, ningún paso vuelve a correr
+    assert not [s for s in sentencias if "CREATE" in s or "ALTER" in s]
+
+
+def test_tienda_db_del_repo_queda_al_dia(tmp_path):
+    original = os.path.join(os.path.dirname(__file__), "tienda.db")
+    ruta = str(tmp_path / "tienda.db")
+    shutil.copy(original, ruta)
+    with sqlite3.connect(ruta) as con:
+        productos = con.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        vendido = con.execute("SELECT COALESCE(SUM(total), 0) FROM ventas").fetchone()[0]
+
+    database.configurar(ruta)
+    try:
+        assert migraciones.migrar() == (0, migraciones.VERSION)
+        with database.lectura() as con:
+            assert con.execute("PRAGMA user_version").fetchone()[0] == migraciones.VERSION
+            assert con.execute("SELECT COUNT(*) FROM productos").fetchone()[0] >= productos
+            assert con.execute("SELECT COALESCE(SUM(total), 0) FROM ventas_planas").fetchone()[0] == pytest.approx(vendido)
+            assert con.execute("SELECT COALESCE(SUM(importe), 0) FROM ventas_diarias").fetchone()[0] == pytest.approx(vendido)
+    finally:
+        database.get_pool().cerrar()
+
+
+def test_paso_que_falla_no_deja_nada(bd, monkeypatch):
+    def paso_roto(cur):
+        cur.execute("CREATE TABLE a_medias (x)")
+        raise sqlite3.OperationalError("falla a propósito")
+
+    monkeypatch.setattr(migraciones, "MIGRACIONES", migraciones.MIGRACIONES + [paso_roto])
+    monkeypatch.setattr(migraciones, "VERSION", migraciones.VERSION + 1)
+    with pytest.raises(sqlite3.OperationalError):
+        migraciones.migrar()
+    assert _version() == migraciones.VERSION - 1
+    with database.lectura() as con:
+        assert con.execute("SELECT 1 FROM sqlite_master WHERE name = 'a_medias'").fetchone() is None
+
+
+def test_base_de_una_version_mas_nueva(bd):
+    with database.escritura() as con:
+        con.execute(f"PRAGMA user_version = {migraciones.VERSION + 1}")
+    with pytest.raises(RuntimeError, match="más nueva"):
+        migraciones.migrar()
@@ -0,0 +1,67 @@
+import database
+import inventario
+import movimientos
+import productos
+from ventas import registrar_venta_carrito
+
+
+def _libro(pid):
+    return [(delta, motivo, ref) for _fecha, delta, motivo, ref in movimientos.historial(pid)]
+
+
+def test_cada_cambio_de_stock_queda_en_el_libro(crear_producto):
+    pan = crear_producto("Pan", 10)
+    venta_id, _stock = registrar_venta_carrito([(pan, "Pan", 3, 1000)])
+    inventario.ajustar_stock("Pan", delta=5)
+    inventario.ajustar_stock("Pan", delta=-2)
+    inventario.ajustar_stock("Pan", fijar=8)               # el conteo encontró 2 menos
+    productos.agregar_o_actualizar_producto("Pan", 500, 1200, "Otros")      # sin stock: no mueve
+    productos.agregar_o_actualizar_producto("Pan", 500, 1200, "Otros", stock=9)
+    with database.escritura() as con:               # otra herramienta sobre la BD
+        con.execute("UPDATE productos SET stock = 4 WHERE id = ?", (pan,))
+    assert _libro(pan) == [(10, "alta", None), (-3, "venta", venta_id), (5, "entrada", None),
+                           (-2, "salida", None), (-2, "conteo", None), (1, "edicion", None),
+                           (-5, "externo", None)]
+    leche = crear_producto("Leche", 3)
+    productos.borrar_producto_por_id(leche)
+    assert _libro(leche) == [(3, "alta", None), (-3, "baja", None)]
+    assert movimientos.stock_al() == {pan: 4} and movimientos.descuadres() == {}
+
+
+def test_venta_rechazada_no_deja_movimientos(crear_producto):
+    pan = crear_producto("Pan", 1)
+    try:
+        registrar_venta_carrito([(pan, "Pan", 5, 1000)])
+    except ValueError:
+        pass
+    assert _libro(pan) == [(1, "alta", None)]
+    with database.lectura() as con:
+        assert con.execute("SELECT motivo, ref FROM movimiento_motivo").fetchone() == ("externo", None)
+
+
+def _mover(pid, delta, fecha):
+    with database.escritura() as con:
+        con.execute("INSERT INTO movimientos_stock (producto_id, delta, motivo, fecha) VALUES (?,?,?,?)",
+                    (pid, delta, "entrada", fecha))
+
+
+def test_stock_a_una_fecha_con_fotos(bd):
+    _mover(1, 10, "2025-01-01 09:00:00")
+    _mover(2, 4, "2025-01-01 10:00:00")
+    movimientos.tomar_foto("2025-01-01 23:00:00")
+    _mover(1, -3, "2025-01-02 09:00:00")
+    movimientos.tomar_foto("2025-01-02 23:00:00")
+    _mover(2, -4, "2025-01-03 09:00:00")
+    _mover(1, 1, "2025-01-03 12:00:00")
+    assert movimientos.stock_al("2024-12-31") == {}
+    assert movimientos.stock_al("2025-01-01") == {1: 10, 2: 4}
+    assert movimientos.stock_al("2025-01-02") == {1: 7, 2: 4}
+    assert movimientos.stock_al("2025-01-03 10:00:00") == {1: 7}
+    assert movimientos.stock_al() == {1: 8}
+    assert movimientos.stock_al("2025-01-02", ids=[1, 2, 3]) == {1: 7, 2: 4}
+    # las fotos dan lo mismo que sumar todo el libro
+    with database.lectura() as con:
+        assert movimientos.stock_al("2025-01-03") == dict(con.execute(
+            "SELECT producto_id, SUM(delta) FROM movimientos_stock GROUP BY producto_id HAVING SUM(delta) != 0"))
+    assert movimientos.foto_si_hace_falta(cada=2) is not None
+    assert movimientos.foto_si_hace_falta(cada=2) is None
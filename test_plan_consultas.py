@@ -0,0 +1,93 @@
+"""
+EXPLAIN QUERY PLAN de cada consulta que emite la app.
+
+Se ejecutan las funciones de acceso a datos reales, se capturan las sentencias
+con PoolConexiones.rastrear() y se revisa su plan: ninguna puede recorrer una
+tabla completa (salvo los listados sin WHERE, que de todas formas devuelven
+todas las filas y deben salir de un índice) ni ordenar con un B-tree temporal.
+"""
+import re
+
+import pytest
+
+import database
+import migraciones
+import productos
+import cambios
+import interfaz_unificada_tienda as app
+import ventas
+
+TABLAS = {"productos", "ventas", "venta_items", "productos_cambios", "ventas_diarias", "ventas_por_hora"}
+
+
+@pytest.fixture
+def sentencias(bd):
+    with database.escritura() as con:
+        con.executemany(
+            "INSERT INTO productos (nombre, categoria, costo, precio, precio_venta, stock) VALUES (?,?,?,?,?,?)",
+            [(f"Producto {i:04d}", app.TiendaApp.CATEGORIAS[i % 8], 100, 150, 150, 50) for i in range(400)],
+        )
+    capturadas = []
+    bd.rastrear(capturadas.append)
+
+    # todo lo que la app le pide a la BD
+    app.obtener_productos_por_categoria("Granos")
+    app.obtener_productos_por_categoria("Granos", "12")
+    app.obtener_inventario("Todas")
+    app.obtener_inventario("Todas", "12")
+    app.obtener_inventario("Aseo")
+    app.obtener_inventario("Aseo", "12")
+    app.obtener_inventario_ids("Aseo", ids={1, 2, 3})
+    app.obtener_inventario_ids("Todas", "12", ids={1, 2, 3})
+    app.obtener_categorias()
+    app.ajustar_stock("Producto 0001", delta=5)
+    app.ajustar_stock("Producto 0001", fijar=3)
+    productos.buscar_productos("Prod")
+    productos.agregar_o_actualizar_producto("Producto 0002", 100, 200, "Aseo", stock=4)
+    productos.agregar_o_actualizar_producto("Producto 0002", 100, 210, "Aseo", stock=4, rowid=3)
+    ventas.registrar_venta_carrito([(1, "Producto 0000", 2, 150), (2, "Producto 0001", 1, 150)])
+    ventas.totales_diarios("2025-01-01", "2030-12-31")
+    cambios.cambios_desde(cambios.ultimo_seq() - 5)
+    cambios.purgar()
+    with database.lectura() as con:
+        con.execute("SELECT * FROM ventas_planas WHERE venta_id = 1").fetchall()
+        con.execute("SELECT * FROM ventas WHERE fecha >= '2025-01-01' AND fecha < '2025-02-01'").fetchall()
+
+    bd.rastrear(None)
+    return [s for s in capturadas
+            if re.match(r"\s*(SELECT|UPDATE|DELETE|WITH|INSERT\s+INTO\s+\w+\s*\(.*\)\s*SELECT)", s, re.I | re.S)]
+
+
+def _plan(sql):
+    with database.lectura() as con:
+        return [fila[3] for fila in con.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def test_ninguna_consulta_recorre_tablas(sentencias):
+    assert len(sentencias) >= 15
+    problemas = []
+    for sql in sentencias:
+        listado = not re.search(r"\bWHERE\b", sql, re.I)
+        for paso in _plan(sql):
+            m = re.match(r"SCAN (\w+)( USING (COVERING )?INDEX)?", paso)
+            if m and m.group(1) in TABLAS and not (listado and m.group(2)):
+                problemas.append((sql, paso))
+            if "USE TEMP B-TREE FOR ORDER BY" in paso:
+                problemas.append((sql, paso))
+    assert not problemas, "\n\n".join(f"{sql}\n  -> {paso}" for sql, paso in problemas)
+
+
+def test_indices_existen_en_base_vieja(tmp_path):
+    import sqlite3
+    ruta = str(tmp_path / "vieja.db")
+    con = sqlite3.connect(ruta)
+    con.execute("""CREATE TABLE productos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL,
+                   precio REAL NOT NULL, costo REAL NOT NULL DEFAULT 0, categoria TEXT DEFAULT 'General',
+                   precio_venta REAL DEFAULT 0.0, stock INTEGER DEFAULT 0)""")
+    con.commit()
+    con.close()
+    database.configurar(ruta)
+    migraciones.migrar()
+    assert "SEARCH productos USING INDEX idx_productos_nombre (nombre=?)" in _plan(
+        "UPDATE productos SET stock = 1 WHERE nombre = 'Pan'")
+    database.get_pool().cerrar()
@@ -0,0 +1,83 @@
+import csv
+import threading
+
+import pytest
+from openpyxl import load_workbook
+
+import database
+import productos
+import reportes
+from ventas import registrar_venta_carrito
+
+
+def _vender():
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Granos", stock=100)
+    productos.agregar_o_actualizar_producto("Leche", 2000, 3500, "Lácteos y Huevos", stock=100)
+    with database.lectura() as con:
+        ids = dict(con.execute("SELECT nombre, id FROM productos"))
+    registrar_venta_carrito([(ids["Pan"], "Pan", 2, 1000), (ids["Leche"], "Leche", 1, 3500)], "2025-07-17 09:00:00")
+    registrar_venta_carrito([(ids["Pan"], "Pan", 1, 1000)], "2025-07-19 10:00:00")
+    registrar_venta_carrito([(ids["Pan"], "Pan", 3, 1000)], "2025-07-19 18:30:00")
+
+
+def _hoja(wb, nombre):
+    return [tuple(f) for f in wb[nombre].iter_rows(values_only=True)]
+
+
+def test_exporta_xlsx_con_todas_las_hojas(bd, tmp_path):
+    _vender()
+    avance = []
+    archivos = reportes.exportar(str(tmp_path / "r.xlsx"), progreso=lambda h, t: avance.append((h, t)), lote=2)
+    wb = load_workbook(archivos[0], read_only=True)
+    assert wb.sheetnames == ["Por día", "Por producto", "Por categoría", "Detalle"]
+    assert _hoja(wb, "Por día")[1:] == [("2025-07-17", 1, 5500), ("2025-07-19", 2, 4000)]
+    assert _hoja(wb, "Por producto")[1:] == [("Pan", "Granos", 6, 6000, 3000), ("Leche", "Lácteos y Huevos", 1, 3500, 2000)]
+    assert _hoja(wb, "Por categoría")[1:] == [("Granos", 6, 6000, 3000), ("Lácteos y Huevos", 1, 3500, 2000)]
+    detalle = _hoja(wb, "Detalle")
+    assert detalle[0][:3] == ("venta_id", "fecha", "producto") and len(detalle) == 5
+    assert avance[-1] == (4, 4) and len(avance) >= 3        # lotes de 2 + cierre
+
+
+def test_rango_de_fechas_y_csv(bd, tmp_path):
+    _vender()
+    archivos = reportes.exportar(str(tmp_path / "r.csv"), desde="2025-07-19", hasta="2025-07-19")
+    assert [a.rsplit("_", 1)[-1] for a in archivos] == ["dia.csv", "producto.csv", "categoria.csv", "detalle.csv"]
+    with open(archivos[0], encoding="utf-8-sig", newline="") as f:
+        assert list(csv.reader(f)) == [["dia", "tickets", "total"], ["2025-07-19", "2", "4000.0"]]
+
+
+def test_detalle_se_parte_en_varias_hojas(bd, tmp_path, monkeypatch):
+    _vender()
+    monkeypatch.setattr(reportes, "MAX_FILAS_XLSX", 3)
+    archivos = reportes.exportar(str(tmp_path / "r.xlsx"))
+    wb = load_workbook(archivos[0], read_only=True)
+    assert wb.sheetnames[-2:] == ["Detalle", "Detalle (2)"]
+    assert len(_hoja(wb, "Detalle")) == 4 and len(_hoja(wb, "Detalle (2)")) == 2
+
+
+def test_parquet(bd, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _vender()
+    archivos = reportes.exportar(str(tmp_path / "r.parquet"), lote=1)
+    detalle = pq.read_table(archivos[-1])
+    assert detalle.num_rows == 4 and detalle.column_names[0] == "venta_id"
+
+
+def test_cancelar_no_deja_archivos(bd, tmp_path):
+    _vender()
+    cancelar = threading.Event()
+    cancelar.set()
+    with pytest.raises(reportes.ExportacionCancelada):
+        reportes.exportar(str(tmp_path / "r.csv"), cancelar=cancelar)
+    assert list(tmp_path.glob("r_*")) == []
+
+
+def test_en_segundo_plano(bd, tmp_path):
+    _vender()
+    estado, _cancelar = reportes.exportar_en_segundo_plano(str(tmp_path / "r.xlsx"))
+    for _ in range(200):
+        if estado["terminado"]:
+            break
+        threading.Event().wait(0.05)
+    assert estado["error"] is None and estado["hechas"] == estado["total"] == 4
+    assert estado["resultado"] == [str(tmp_path / "r.xlsx")]
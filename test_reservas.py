@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import database
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_varias_cajas_nunca_venden_mas_de_lo_que_hay(bd, crear_producto):
+    ids = [crear_producto(f"Producto {i}", 40) for i in range(5)]
+    # 6 procesos cobran carritos de 1 a 3 líneas hasta pedir bastante más que el stock
+    codigo = textwrap.dedent(f"""
+        import random, sys
+        from ventas import StockInsuficiente, registrar_venta_carrito
+        rnd = random.Random(int(sys.argv[1]))
+        for _ in range(60):
+            try:
+                registrar_venta_carrito([(pid, "x", rnd.randint(1, 3), 1000)
+                                         for pid in rnd.sample({ids!r}, rnd.randint(1, 3))])
+            except StockInsuficiente as e:
+                assert all(pedido > hay for pedido, hay in e.faltantes.values())
+    """)
+    cajas = [subprocess.Popen([sys.executable, "-c", codigo, str(n)], cwd=RAIZ,
+                              env={**os.environ, "TIENDA_DB": bd.ruta}) for n in range(6)]
+    assert [c.wait() for c in cajas] == [0] * 6
+    with database.lectura() as con:
+        vendidas = dict(con.execute(
+            "SELECT producto_id, SUM(cantidad) FROM venta_items GROUP BY producto_id").fetchall())
+        stock = dict(con.execute("SELECT id, stock FROM productos").fetchall())
+    assert sum(vendidas.values()) > 100         # hubo competencia de verdad
+    for pid in ids:
+        assert vendidas.get(pid, 0) <= 40
+        assert stock[pid] == 40 - vendidas.get(pid, 0)
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+import database
+import migraciones
+import productos
+from ventas import registrar_venta_carrito, reconstruir_resumenes, totales_diarios
+
+# GROUP BY completo sobre las tablas crudas: lo que los resúmenes deben igualar
+CRUDO_DIARIO = """
+    SELECT substr(v.fecha, 1, 10), i.producto_id, SUM(i.cantidad),
+           ROUND(SUM(i.cantidad * i.precio_unitario), 6), ROUND(SUM(i.cantidad * i.costo_unitario), 6)
+    FROM ventas v JOIN venta_items i ON i.venta_id = v.id
+    GROUP BY 1, 2 ORDER BY 1, 2
+"""
+CRUDO_HORA = """
+    SELECT substr(v.fecha, 1, 10), CAST(substr(v.fecha, 12, 2) AS INTEGER), COUNT(DISTINCT v.id),
+           COALESCE(SUM(i.cantidad), 0), ROUND(COALESCE(SUM(i.cantidad * i.precio_unitario), 0), 6)
+    FROM ventas v LEFT JOIN venta_items i ON i.venta_id = v.id
+    GROUP BY 1, 2 ORDER BY 1, 2
+"""
+RESUMEN_DIARIO = """SELECT fecha, producto_id, unidades, ROUND(importe, 6), ROUND(costo, 6)
+                    FROM ventas_diarias ORDER BY 1, 2"""
+RESUMEN_HORA = """SELECT fecha, hora, tickets, unidades, ROUND(importe, 6)
+                  FROM ventas_por_hora ORDER BY 1, 2"""
+
+
+def _comparar():
+    with database.lectura() as con:
+        assert con.execute(RESUMEN_DIARIO).fetchall() == con.execute(CRUDO_DIARIO).fetchall()
+        assert con.execute(RESUMEN_HORA).fetchall() == con.execute(CRUDO_HORA).fetchall()
+
+
+def _catalogo(n=12):
+    for i in range(n):
+        productos.agregar_o_actualizar_producto(f"P{i:02d}", 100 + i * 7.5, 250 + i * 10.25, "Otros", stock=10_000)
+    with database.lectura() as con:
+        return [r[0] for r in con.execute("SELECT id FROM productos ORDER BY id")]
+
+
+def _vender_al_azar(ids, n, rnd):
+    for _ in range(n):
+        fecha = f"2025-07-{rnd.randint(1, 5):02d} {rnd.randint(7, 21):02d}:{rnd.randint(0, 59):02d}:00"
+        elegidos = rnd.sample(ids, rnd.randint(1, min(4, len(ids))))
+        items = [(pid, "x", rnd.randint(1, 4), 250.5 + rnd.randint(0, 3)) for pid in elegidos]
+        registrar_venta_carrito(items, fecha)
+
+
+def test_resumenes_igual_a_group_by(bd):
+    rnd = random.Random(3)
+    ids = _catalogo()
+    _vender_al_azar(ids, 150, rnd)
+    _comparar()
+
+    # forma vieja por la vista de compatibilidad
+    with database.escritura() as con:
+        con.execute("INSERT INTO ventas_planas (producto, cantidad, total, fecha) VALUES ('P03', 2, 500, '2025-07-02 08:15:00')")
+    _comparar()
+
+    # anular tickets (borra sus líneas en cascada) y corregir una línea
+    with database.escritura() as con:
+        con.execute("DELETE FROM ventas WHERE id IN (SELECT id FROM ventas ORDER BY random() LIMIT 20)")
+        con.execute("UPDATE venta_items SET cantidad = cantidad + 3, producto_id = ? WHERE id = "
+                    "(SELECT MIN(id) FROM venta_items)", (ids[-1],))
+    _comparar()
+
+
+def test_costo_es_el_del_momento_de_la_venta(bd):
+    ids = _catalogo(1)
+    registrar_venta_carrito([(ids[0], "P00", 2, 250)], "2025-07-01 10:00:00")
+    productos.agregar_o_actualizar_producto("P00", 999, 250, "Otros", rowid=ids[0])
+    with database.lectura() as con:
+        assert con.execute("SELECT costo FROM ventas_diarias").fetchone()[0] == 200
+    _comparar()
+
+
+def test_reconstruir(bd):
+    ids = _catalogo()
+    _vender_al_azar(ids, 40, random.Random(5))
+    with database.escritura() as con:
+        con.execute("DELETE FROM ventas_diarias")
+        con.execute("UPDATE ventas_por_hora SET tickets = 0")
+    diarias, por_hora = reconstruir_resumenes()
+    assert diarias > 0 and por_hora > 0
+    _comparar()
+
+
+def test_totales_diarios_desde_resumen(bd):
+    ids = _catalogo()
+    _vender_al_azar(ids, 60, random.Random(8))
+    with database.lectura() as con:
+        crudo = con.execute("""SELECT substr(fecha, 1, 10) AS dia, COUNT(*), SUM(total) FROM ventas
+                               WHERE fecha >= '2025-07-02' AND fecha < '2025-07-05' GROUP BY dia""").fetchall()
+    resumen = totales_diarios("2025-07-02", "2025-07-04")
+    assert [(d, t) for d, t, _ in resumen] == [(d, t) for d, t, _ in crudo]
+    assert [x for *_, x in resumen] == pytest.approx([x for *_, x in crudo])
+
+
+def test_base_sin_resumenes_se_llena_al_migrar(tmp_path):
+    ruta = str(tmp_path / "tienda.db")
+    database.configurar(ruta)
+    try:
+        migraciones.migrar()
+        ids = _catalogo(3)
+        _vender_al_azar(ids, 10, random.Random(1))
+        with database.escritura() as con:
+            for nombre in ("ventas_diarias", "ventas_por_hora"):
+                con.execute(f"DROP TABLE {nombre}")
+            con.execute("PRAGMA user_version = 4")          # base de antes de los resúmenes
+        assert migraciones.migrar() == (4, migraciones.VERSION)
+        _comparar()
+    finally:
+        database.get_pool().cerrar()
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+
+import pytest
+
+import cliente
+import database
+import servicio
+from ventas import StockInsuficiente
+
+
+@pytest.fixture
+def caja(bd):
+    """Servicio en un puerto libre sobre la BD de la prueba y un cliente apuntando a él."""
+    srv, parar = servicio.en_segundo_plano()
+    yield srv, cliente.ClienteTienda(srv.url)
+    parar()
+
+
+def _stock(pid):
+    with database.lectura() as con:
+        return con.execute("SELECT stock FROM productos WHERE id = ?", (pid,)).fetchone()[0]
+
+
+def test_lecturas(caja, crear_producto):
+    _srv, c = caja
+    pan = crear_producto("Pan", 10, categoria="Granos", codigo="7700000000019")
+    arroz = crear_producto("Arroz", 5, categoria="Granos")
+    assert c.salud()["ok"]
+    assert "Granos" in c.categorias()
+    assert c.productos("Granos") == [(arroz, "Arroz", 1000, 5), (pan, "Pan", 1000, 10)]
+    assert [f[1] for f in c.productos("Granos", "pa")] == ["Pan"]
+    assert c.por_codigo("7700000000019")["nombre"] == "Pan"
+    assert c.por_codigo("000") is None
+
+
+def test_venta_reintento_y_rechazo(caja, crear_producto):
+    _srv, c = caja
+    pan = crear_producto("Pan", 10)
+    venta_id, stock = c.vender([(pan, "Pan", 3, 1000)], uid="ticket-1")
+    assert stock == {pan: 7}
+    # la caja no recibió la respuesta y reintenta: no se descuenta dos veces
+    assert c.vender([(pan, "Pan", 3, 1000)], uid="ticket-1") == (venta_id, {})
+    with pytest.raises(ValueError, match="inexistentes"):
+        c.vender([(pan, "Pan", 1, 1000), (9999, "Fantasma", 1, 500)])
+    assert _stock(pan) == 7
+    assert c.ajustar_stock("Pan", delta=5) == {pan: 12}
+    assert c.ajustar_stock("Pan", fijar=2) == {pan: 2}
+
+
+def test_sin_stock_responde_que_falta(caja, crear_producto):
+    _srv, c = caja
+    pan = crear_producto("Pan", 2)
+    with pytest.raises(StockInsuficiente) as e:
+        c.vender([(pan, "Pan", 3, 1000)])
+    assert e.value.faltantes == {pan: (3, 2)}
+    with pytest.raises(StockInsuficiente):
+        c.ajustar_stock("Pan", delta=-5)
+    assert _stock(pan) == 2
+    assert c.ajustar_stock("Pan", delta=-2) == {pan: 0}
+
+
+def test_varias_cajas_a_la_vez_sin_perder_stock(caja, crear_producto):
+    srv, _c = caja
+    pan = crear_producto("Pan", 10_000)
+
+    def una_caja():
+        c = cliente.ClienteTienda(srv.url)      # cada caja con su conexión
+        for _ in range(25):
+            c.vender([(pan, "Pan", 1, 1000)])
+            c.ajustar_stock("Pan", delta=1)
+            c.ajustar_stock("Pan", delta=-1)
+
+    hilos = [threading.Thread(target=una_caja) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert _stock(pan) == 10_000 - 200
+    with database.lectura() as con:
+        assert con.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 200
+    assert srv.operaciones == 600 and srv.lotes <= 600
+
+
+def test_ruta_desconocida(caja):
+    _srv, c = caja
+    assert c._pedir("GET", "/nada") is None
+    with pytest.raises(cliente.ErrorServicio):
+        c._pedir("GET", "/ventas")
+
+
+def test_un_error_de_sqlite_rechaza_solo_su_operacion(crear_producto, monkeypatch):
+    pan = crear_producto("Pan", 10)
+
+    def repetida(con):
+        con.execute("INSERT INTO productos (id, nombre) VALUES (?, 'Otro')", (pan,))
+
+    monkeypatch.setitem(servicio.OPERACIONES, "repetida", repetida)
+    r = servicio.aplicar_lote([("stock", {"nombre": "Pan", "delta": 1}), ("repetida", {}),
+                               ("stock", {"nombre": "Pan", "delta": 1})])
+    assert isinstance(r[1], sqlite3.IntegrityError)
+    assert [r[0]["stock"], r[2]["stock"]] == [{pan: 11}, {pan: 12}]
+    assert _stock(pan) == 12
+
+
+def test_un_error_inesperado_no_mata_al_escritor(caja, monkeypatch, crear_producto):
+    srv, c = caja
+    pan = crear_producto("Pan", 10)
+    aplicar = servicio.aplicar_lote
+
+    def falla_una_vez(lote):
+        monkeypatch.setattr(servicio, "aplicar_lote", aplicar)
+        raise RuntimeError("falla inesperada")
+
+    monkeypatch.setattr(servicio, "aplicar_lote", falla_una_vez)
+    with pytest.raises(cliente.ErrorServicio, match="falla inesperada"):
+        c.ajustar_stock("Pan", delta=1)
+    assert c.ajustar_stock("Pan", delta=1) == {pan: 11}
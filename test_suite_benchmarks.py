@@ -0,0 +1,49 @@
+import json
+
+from benchmarks import datos, suite
+
+
+def _contenido(con):
+    return [con.execute(sql).fetchall() for sql in (
+        "SELECT * FROM productos ORDER BY id",
+        "SELECT * FROM ventas ORDER BY id",
+        "SELECT * FROM venta_items ORDER BY venta_id, producto_id",
+        "SELECT * FROM ventas_diarias ORDER BY fecha, producto_id")]
+
+
+def test_misma_semilla_mismos_datos(tmp_path):
+    import database
+    contenidos = []
+    for nombre in ("a.db", "b.db"):
+        r = datos.poblar(str(tmp_path / nombre), 300, 2000)
+        with database.lectura() as con:
+            contenidos.append(_contenido(con))
+            # los resúmenes recalculados al final cuadran con las líneas
+            assert con.execute("SELECT SUM(importe) FROM ventas_diarias").fetchone()[0] == \
+                con.execute("SELECT SUM(total) FROM ventas").fetchone()[0]
+        database.get_pool().cerrar()
+    assert r["lineas"] == 2000 and len(contenidos[0][2]) == 2000
+    assert contenidos[0] == contenidos[1]
+    assert contenidos[0] != _contenido_con_otra_semilla(tmp_path)
+
+
+def _contenido_con_otra_semilla(tmp_path):
+    import database
+    datos.poblar(str(tmp_path / "c.db"), 300, 2000, semilla=7)
+    with database.lectura() as con:
+        contenido = _contenido(con)
+    database.get_pool().cerrar()
+    return contenido
+
+
+def test_suite_corre_todos_los_escenarios(tmp_path):
+    salida = tmp_path / "r.json"
+    r = suite.main(["--productos", "200", "--lineas", "3000", "--ops", "40", "--filas-import", "100",
+                    "--datos", str(tmp_path / "datos"), "--salida", str(salida)])
+    assert [e["escenario"] for e in r["escenarios"]] == list(suite.ESCENARIOS)
+    assert json.loads(salida.read_text())["parametros"]["productos"] == 200
+    # la segunda corrida reutiliza la base guardada y se puede comparar con la primera
+    r2 = suite.main(["--productos", "200", "--lineas", "3000", "--ops", "40", "--escenarios", "categoria",
+                     "--datos", str(tmp_path / "datos")])
+    assert r2["datos"] == r["datos"]
+    assert [f["escenario"] for f in suite.comparar(r, r2)] == ["categoria"]
@@ -0,0 +1,99 @@
+import pytest
+
+import database
+import migraciones
+import productos
+from ventas import StockInsuficiente, registrar_venta_carrito
+
+
+def test_registra_carrito_y_devuelve_stock(crear_producto):
+    pan = crear_producto("Pan", 10)
+    leche = crear_producto("Leche", 3, precio=3000)
+    venta_id, stock = registrar_venta_carrito([(pan, "Pan", 4, 1000), (leche, "Leche", 2, 3000)])
+    assert stock == {pan: 6, leche: 1}
+    with database.lectura() as con:
+        assert con.execute("SELECT total FROM ventas WHERE id=?", (venta_id,)).fetchone()[0] == 10000
+        filas = con.execute(
+            "SELECT producto_id, cantidad, precio_unitario FROM venta_items WHERE venta_id=? ORDER BY producto_id",
+            (venta_id,)).fetchall()
+    assert filas == [(pan, 4, 1000.0), (leche, 2, 3000.0)]
+
+
+def test_sin_stock_no_vende_y_dice_que_falta(crear_producto):
+    pan = crear_producto("Pan", 1)
+    leche = crear_producto("Leche", 5)
+    arroz = crear_producto("Arroz", 0)
+    with pytest.raises(StockInsuficiente) as e:
+        registrar_venta_carrito([(pan, "Pan", 3, 1000), (leche, "Leche", 2, 3000), (arroz, "Arroz", 1, 2000)])
+    assert e.value.faltantes == {pan: (3, 1), arroz: (1, 0)}
+    with database.lectura() as con:
+        assert con.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 0
+        assert con.execute("SELECT stock FROM productos ORDER BY id").fetchall() == [(1,), (5,), (0,)]
+    assert registrar_venta_carrito([(pan, "Pan", 1, 1000)])[1] == {pan: 0}
+
+
+def test_producto_que_permite_negativo(crear_producto):
+    pan = crear_producto("Pan", 1)
+    productos.agregar_o_actualizar_producto("Pan", 500, 1000, "Otros", permite_negativo=True)
+    assert registrar_venta_carrito([(pan, "Pan", 3, 1000)])[1] == {pan: -2}
+
+
+def test_producto_inexistente_no_escribe_nada(crear_producto):
+    pan = crear_producto("Pan", 10)
+    with pytest.raises(ValueError):
+        registrar_venta_carrito([(pan, "Pan", 1, 1000), (9999, "Fantasma", 1, 500)])
+    with database.lectura() as con:
+        assert con.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 0
+        assert con.execute("SELECT COUNT(*) FROM venta_items").fetchone()[0] == 0
+        assert con.execute("SELECT stock FROM productos WHERE id=?", (pan,)).fetchone()[0] == 10
+
+
+def test_renombrar_producto_no_pierde_historial(crear_producto):
+    pan = crear_producto("Pan", 10)
+    registrar_venta_carrito([(pan, "Pan", 2, 1000)])
+    productos.agregar_o_actualizar_producto("Pan tajado", 500, 1000, "Otros", rowid=pan)
+    with database.lectura() as con:
+        assert con.execute("SELECT producto, cantidad, total FROM ventas_planas").fetchall() == [
+            ("Pan tajado", 2, 2000.0)]
+
+
+def test_vista_plana_acepta_insert_viejo(crear_producto):
+    pan = crear_producto("Pan", 10)
+    with database.escritura() as con:
+        con.execute("INSERT INTO ventas_planas (producto, cantidad, total, fecha) VALUES ('Pan', 2, 2000, '2025-07-19')")
+        con.execute("INSERT INTO ventas_planas (producto, cantidad, total, fecha) VALUES ('Pan', 1, 1000, '2025-07-19')")
+    with database.lectura() as con:
+        assert con.execute("SELECT id, fecha, total FROM ventas").fetchall() == [(1, "2025-07-19", 3000.0)]
+        assert con.execute("SELECT producto_id FROM venta_items").fetchall() == [(pan,), (pan,)]
+
+
+def test_migra_tabla_ventas_vieja(tmp_path):
+    import sqlite3
+    ruta = str(tmp_path / "vieja.db")
+    con = sqlite3.connect(ruta)
+    con.executescript("""
+        CREATE TABLE productos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, precio REAL NOT NULL,
+                                costo REAL NOT NULL DEFAULT 0, categoria TEXT DEFAULT 'General',
+                                precio_venta REAL DEFAULT 0.0, stock INTEGER DEFAULT 0);
+        CREATE TABLE ventas (id INTEGER PRIMARY KEY AUTOINCREMENT, producto TEXT NOT NULL,
+                             cantidad INTEGER NOT NULL, total REAL NOT NULL, fecha TEXT NOT NULL);
+        INSERT INTO productos (nombre, precio) VALUES ('Pan', 1000), ('Huevos', 12000);
+        INSERT INTO ventas (producto, cantidad, total, fecha) VALUES
+            ('Pan', 2, 2000, '2025-07-17'), ('Pan', 1, 1000, '2025-07-19'),
+            ('SALCHICHON', 1, 7000, '2025-07-19'), ('Huevos', 8, 5600, '2025-08-22 20:55:17');
+    """)
+    con.commit()
+    con.close()
+
+    database.configurar(ruta)
+    migraciones.migrar()
+    with database.lectura() as con:
+        assert con.execute("SELECT fecha, total FROM ventas ORDER BY id").fetchall() == [
+            ("2025-07-17", 2000.0), ("2025-07-19", 8000.0), ("2025-08-22 20:55:17", 5600.0)]
+        planas = con.execute("SELECT producto, cantidad, total, fecha FROM ventas_planas ORDER BY id").fetchall()
+        assert planas == [("Pan", 2, 2000.0, "2025-07-17"), ("Pan", 1, 1000.0, "2025-07-19"),
+                          ("SALCHICHON", 1, 7000.0, "2025-07-19"), ("Huevos", 8, 5600.0, "2025-08-22 20:55:17")]
+        assert con.execute("PRAGMA foreign_key_check").fetchall() == []
+    # segunda corrida no vuelve a migrar
+    migraciones.migrar()
+    database.get_pool().cerrar()
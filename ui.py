@@ -1,5 +1,6 @@
 import tkinter as tk
-import sqlite3
+
+import database
 
 class VentanaVenta:
     def __init__(self, root_menu):
@@ -24,11 +25,10 @@ class VentanaVenta:
                   command=self.volver_al_menu_principal).pack(pady=20)
 
     def obtener_categorias(self):
-        conn = sqlite3.connect("tienda.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT categoria FROM productos WHERE categoria IS NOT NULL")
-        categorias = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with database.lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT categoria FROM productos WHERE categoria IS NOT NULL")
+            categorias = [row[0] for row in cursor.fetchall()]
         return categorias
 
     def mostrar_productos_por_categoria(self, categoria):
@@ -37,11 +37,10 @@ class VentanaVenta:
 
         tk.Label(self.ventana, text=f"Productos de {categoria}", font=("Arial", 14)).pack(pady=10)
 
-        conn = sqlite3.connect("tienda.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT nombre, precio FROM productos WHERE categoria = ?", (categoria,))
-        productos = cursor.fetchall()
-        conn.close()
+        with database.lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT nombre, precio FROM productos WHERE categoria = ?", (categoria,))
+            productos = cursor.fetchall()
 
         for nombre, precio in productos:
             texto = f"{nombre} - ${precio:,.0f}"
@@ -1,8 +1,188 @@
-import sqlite3
-import tkinter as tk
-from tkinter import messagebox
+import json
 from datetime import datetime
 
+import catalogo
+import database
+import movimientos
+
+
+# -----------------------------
+# Registro de ventas (carrito completo)
+# -----------------------------
+SQL_CABECERA = "INSERT INTO ventas (fecha, total, uid) VALUES (?, ?, ?)"
+SQL_ITEM = """INSERT INTO venta_items (venta_id, producto_id, cantidad, precio_unitario, costo_unitario)
+              VALUES (?,?,?,?,?)"""
+
+# Un solo UPDATE para todo el carrito: los pares (id, cantidad) llegan como JSON.
+# Solo descuenta las líneas para las que alcanza (o el producto permite negativo).
+SQL_RESERVAR_STOCK = """
+    WITH d(id, cant) AS (
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+    )
+    UPDATE productos SET stock = COALESCE(stock,0) - d.cant
+    FROM d WHERE productos.id = d.id
+      AND (COALESCE(productos.stock,0) >= d.cant OR productos.permite_negativo)
+    RETURNING productos.id, productos.stock, productos.costo
+"""
+
+
+class StockInsuficiente(ValueError):
+    """faltantes: {producto_id: (pedido, disponible)} de las líneas que no alcanzan."""
+
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        detalle = "; ".join(f"producto {pid}: pide {pedido}, hay {disponible}"
+                            for pid, (pedido, disponible) in sorted(faltantes.items()))
+        super().__init__(f"Stock insuficiente ({detalle})")
+
+
+def reservar_stock(con, cantidades):
+    """
+    Descuenta {producto_id: cantidad} de todo el carrito de una vez, dentro de la
+    transacción abierta en con (BEGIN IMMEDIATE: ninguna otra caja escribe en medio).
+    Devuelve {producto_id: (stock_nuevo, costo)}. Si alguna línea no alcanza lanza
+    StockInsuficiente con todas las que faltan (ValueError si un producto no existe);
+    el llamador deshace la transacción y no queda nada descontado.
+    """
+    hechas = {pid: (st, cst) for pid, st, cst in
+              con.execute(SQL_RESERVAR_STOCK, (json.dumps(list(cantidades.items())),)).fetchall()}
+    if len(hechas) == len(cantidades):
+        return hechas
+    resto = [pid for pid in cantidades if pid not in hechas]
+    disponibles = dict(con.execute(
+        f"SELECT id, COALESCE(stock,0) FROM productos WHERE id IN ({','.join('?' * len(resto))})",
+        resto).fetchall())
+    faltan = set(resto) - set(disponibles)
+    if faltan:
+        raise ValueError(f"Productos inexistentes: {sorted(faltan)}")
+    raise StockInsuficiente({pid: (cantidades[pid], disponibles[pid]) for pid in resto})
+
+
+def verificar_stock(con, cantidades, reservado=None):
+    """
+    Como reservar_stock pero sin escribir: StockInsuficiente si alguna línea no
+    alcanza, descontando antes lo reservado ({producto_id: cantidad}) por tickets que
+    todavía no llegaron a la BD. Los productos inexistentes se dejan para reservar_stock.
+    """
+    reservado = reservado or {}
+    ids = list(cantidades)
+    faltantes = {}
+    for pid, stock, negativo in con.execute(
+            f"SELECT id, COALESCE(stock,0), permite_negativo FROM productos WHERE id IN ({','.join('?' * len(ids))})",
+            ids):
+        disponible = stock - reservado.get(pid, 0)
+        if not negativo and cantidades[pid] > disponible:
+            faltantes[pid] = (cantidades[pid], disponible)
+    if faltantes:
+        raise StockInsuficiente(faltantes)
+
+
+def registrar_venta_carrito(items, fecha=None, uid=None):
+    """
+    Registra un carrito completo (un ticket) en una sola transacción BEGIN IMMEDIATE.
+    items: iterable de (producto_id, nombre, cantidad, precio_unitario).
+    uid: identificador del ticket en el diario de cola_ventas.py (opcional, único).
+    Devuelve (venta_id, {producto_id: stock_nuevo}) para actualizar la UI sin volver a consultar.
+    Si algún producto no existe (ValueError) o alguna línea no tiene stock suficiente
+    (StockInsuficiente) no se escribe nada.
+    """
+    with database.escritura() as con:
+        venta_id, stock = registrar_en(con, items, fecha, uid)
+    catalogo.actualizar_stock(stock)
+    return venta_id, stock
+
+
+def venta_por_uid(con, uid):
+    """Id de la venta ya registrada con ese uid, o None."""
+    fila = con.execute("SELECT id FROM ventas WHERE uid = ?", (uid,)).fetchone()
+    return fila[0] if fila else None
+
+
+def registrar_en(con, items, fecha=None, uid=None):
+    """
+    Como registrar_venta_carrito pero dentro de una transacción ya abierta en con
+    (la de un lote de cola_ventas.py); no toca el catálogo en memoria.
+    """
+    fecha = fecha or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lineas = []
+    por_id = {}
+    total = 0.0
+    for producto_id, _nombre, cantidad, precio in items:
+        producto_id, cantidad, precio = int(producto_id), int(cantidad), float(precio)
+        lineas.append((producto_id, cantidad, precio))
+        por_id[producto_id] = por_id.get(producto_id, 0) + cantidad
+        total += precio * cantidad
+    if not lineas:
+        return None, {}
+
+    venta_id = con.execute(SQL_CABECERA, (fecha, total, uid)).lastrowid
+    with movimientos.con_motivo(con, "venta", venta_id):
+        reservado = reservar_stock(con, por_id)
+    stock = {pid: st for pid, (st, _cst) in reservado.items()}
+    costo = {pid: cst for pid, (_st, cst) in reservado.items()}
+    # los triggers de venta_items/ventas actualizan ventas_diarias y ventas_por_hora aquí mismo
+    con.executemany(SQL_ITEM, [(venta_id, pid, cant, precio, costo[pid]) for pid, cant, precio in lineas])
+    return venta_id, stock
+
+
+def totales_diarios(desde, hasta):
+    """
+    Total vendido por día entre desde y hasta ('YYYY-MM-DD', ambos inclusive).
+    Devuelve [(dia, tickets, total)]. Sale de ventas_por_hora: a lo sumo 24 filas por día.
+    """
+    with database.lectura() as con:
+        return con.execute(
+            """SELECT fecha, SUM(tickets), SUM(importe)
+               FROM ventas_por_hora
+               WHERE fecha BETWEEN ? AND ?
+               GROUP BY fecha ORDER BY fecha""",
+            (desde, hasta),
+        ).fetchall()
+
+
+# -----------------------------
+# Resúmenes materializados (ver migraciones._v5_resumenes)
+# -----------------------------
+SQL_RESUMEN_DIARIO = """
+    SELECT substr(v.fecha, 1, 10) AS dia, i.producto_id,
+           SUM(i.cantidad), SUM(i.cantidad * i.precio_unitario),
+           SUM(i.cantidad * COALESCE(i.costo_unitario, 0))
+    FROM venta_items i JOIN ventas v ON v.id = i.venta_id
+    GROUP BY dia, i.producto_id
+"""
+SQL_RESUMEN_HORA = """
+    SELECT t.dia, t.hora, t.tickets, COALESCE(l.unidades, 0), COALESCE(l.importe, 0)
+    FROM (SELECT substr(fecha, 1, 10) AS dia, CAST(substr(fecha, 12, 2) AS INTEGER) AS hora,
+                 COUNT(*) AS tickets
+          FROM ventas GROUP BY dia, hora) t
+    LEFT JOIN (SELECT substr(v.fecha, 1, 10) AS dia, CAST(substr(v.fecha, 12, 2) AS INTEGER) AS hora,
+                      SUM(i.cantidad) AS unidades, SUM(i.cantidad * i.precio_unitario) AS importe
+               FROM venta_items i JOIN ventas v ON v.id = i.venta_id
+               GROUP BY dia, hora) l USING (dia, hora)
+"""
+
+
+def reconstruir_resumenes(con=None):
+    """
+    Vuelve a calcular ventas_diarias y ventas_por_hora desde ventas/venta_items.
+    Para historial importado por fuera de la app o tras corregir fechas a mano.
+    con: conexión/cursor ya dentro de una transacción (lo usa migraciones.py).
+    Devuelve (filas_diarias, filas_por_hora).
+    """
+    if con is None:
+        with database.escritura() as con:
+            return reconstruir_resumenes(con)
+    con.execute("DELETE FROM ventas_diarias")
+    con.execute("DELETE FROM ventas_por_hora")
+    diarias = con.execute(
+        "INSERT INTO ventas_diarias (fecha, producto_id, unidades, importe, costo) " + SQL_RESUMEN_DIARIO).rowcount
+    por_hora = con.execute(
+        "INSERT INTO ventas_por_hora (fecha, hora, tickets, unidades, importe) " + SQL_RESUMEN_HORA).rowcount
+    return diarias, por_hora
+
+
+# Ventana de venta simple. Tk se importa al usarla, así servicio.py y los scripts
+# sin UI pueden importar este módulo sin cargarlo.
 class SistemaVentas:
     def __init__(self, parent, frame_venta):
         self.parent = parent
@@ -10,17 +190,18 @@ class SistemaVentas:
         self.carrito = []
 
     def conectar_db(self):
-        return sqlite3.connect("tienda.db")
+        """Conexión lectora del pool compartido (usar con `with`)."""
+        return database.lectura()
 
     def obtener_productos_por_categoria(self, categoria):
-        conn = self.conectar_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT nombre FROM productos WHERE categoria = ?", (categoria,))
-        productos = [fila[0] for fila in cursor.fetchall()]
-        conn.close()
+        with self.conectar_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT nombre FROM productos WHERE categoria = ?", (categoria,))
+            productos = [fila[0] for fila in cursor.fetchall()]
         return productos
 
     def mostrar_productos(self, categoria):
+        import tkinter as tk
         for widget in self.frame_venta.winfo_children():
             widget.destroy()
 
@@ -30,6 +211,7 @@ class SistemaVentas:
             boton.pack(pady=2)
 
     def seleccionar_producto(self, nombre_producto):
+        import tkinter as tk
         cantidad = tk.IntVar(value=1)
 
         def aumentar():
@@ -59,23 +241,32 @@ class SistemaVentas:
         tk.Button(top, text="Agregar", command=agregar).pack(pady=5)
 
     def registrar_venta(self, nombre_producto, cantidad):
-        conn = self.conectar_db()
-        cursor = conn.cursor()
+        from tkinter import messagebox
+        with self.conectar_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, precio FROM productos WHERE nombre = ?", (nombre_producto,))
+            resultado = cursor.fetchone()
 
-        cursor.execute("SELECT id, precio FROM productos WHERE nombre = ?", (nombre_producto,))
-        resultado = cursor.fetchone()
         if resultado:
             producto_id, precio = resultado
             total = precio * cantidad
-            fecha = datetime.now().strftime("%Y-%m-%d")
-
-            cursor.execute("INSERT INTO ventas (producto_id, cantidad, total, fecha) VALUES (?, ?, ?, ?)",
-                           (producto_id, cantidad, total, fecha))
-            conn.commit()
-
+            registrar_venta_carrito([(producto_id, nombre_producto, cantidad, precio)])
             self.carrito.append((nombre_producto, cantidad, total))
             messagebox.showinfo("Venta registrada", f"Se vendió {cantidad} unidad(es) de '{nombre_producto}'.")
         else:
             messagebox.showerror("Error", f"Producto '{nombre_producto}' no encontrado en la base de datos.")
 
-        conn.close()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Tareas de mantenimiento de ventas")
+    ap.add_argument("--reconstruir-resumenes", action="store_true",
+                    help="recalcula ventas_diarias y ventas_por_hora desde el historial")
+    args = ap.parse_args()
+    import migraciones
+    migraciones.migrar()
+    if args.reconstruir_resumenes:
+        diarias, por_hora = reconstruir_resumenes()
+        print(f"✅ Resúmenes reconstruidos: {diarias} filas diarias, {por_hora} filas por hora.")
+    else:
+        ap.print_help()